@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 import json
 import argparse
+import sys
 from pathlib import Path
 
+# Make the shared tasks/pyutil modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "pyutil"))
+
+from telemetry import telemetry  # noqa: E402
+
 
 def generate_s3_bucket_policy(template_path, bucket_name, prefix=None):
     # Read the template file
@@ -41,11 +47,13 @@ def main():
     output_path = args.output or "output/bucket-policy.json"
 
     try:
-        policy = generate_s3_bucket_policy(template_path, args.bucket, args.prefix)
+        with telemetry.span('render'):
+            policy = generate_s3_bucket_policy(template_path, args.bucket, args.prefix)
 
         # Write the modified policy
-        with open(output_path, 'w') as f:
+        with telemetry.span('write'), open(output_path, 'w') as f:
             json.dump(policy, f, indent=4)
+        telemetry.count('files')
         print(f"Generated bucket policy saved to {output_path}")
 
     except Exception as e:
@@ -56,4 +64,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with telemetry.run('generate-iam-policy-for-bucket-access'):
+        sys.exit(main())
@@ -3,17 +3,25 @@ import json
 import argparse
 import subprocess
 import os
+import sys
 from pathlib import Path
 
+# Make the shared tasks/pyutil modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "pyutil"))
+
+from telemetry import telemetry  # noqa: E402
+
 
 def get_aws_account_id():
     """Get the AWS account ID from the AWS CLI."""
-    result = subprocess.run(
-        ["aws", "sts", "get-caller-identity", "--query", "Account", "--output", "text"],
-        capture_output=True,
-        text=True,
-        check=True
-    )
+    telemetry.count('subprocesses')
+    with telemetry.span('subprocess'):
+        result = subprocess.run(
+            ["aws", "sts", "get-caller-identity", "--query", "Account", "--output", "text"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
     return result.stdout.strip()
 
 
@@ -52,13 +60,15 @@ def main():
         print(f"Account ID: {account_id}")
         print(f"External ID: {external_id}")
 
-        policy = generate_trust_policy(template_path, account_id, external_id)
+        with telemetry.span('render'):
+            policy = generate_trust_policy(template_path, account_id, external_id)
 
         # Create output directory if needed
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-        with open(output_path, 'w') as f:
+        with telemetry.span('write'), open(output_path, 'w') as f:
             json.dump(policy, f, indent=4)
+        telemetry.count('files')
         print(f"Trust policy generated: {output_path}")
 
     except subprocess.CalledProcessError as e:
@@ -72,4 +82,5 @@ def main():
 
 
 if __name__ == "__main__":
-    exit(main())
+    with telemetry.run('generate-trust-policy'):
+        sys.exit(main())
@@ -3,15 +3,22 @@ set -euo pipefail
 
 # Usage: ./tasks/cmd/upload_to_s3.sh <bucket-name-or-s3-uri> [optional/prefix]
 # Uploads contents of the `upload` directory located at the project root.
+# Delegates to pyutil/s3sync (concurrent multipart uploads, ETag/MD5-based skipping).
+# Optional environment:
+#   S3SYNC_WORKERS        concurrent file and part uploads (default: 8)
+#   S3SYNC_PART_SIZE_MB   multipart part size in MB (default: 16)
+#   S3SYNC_STATE_FILE     resumable upload state (default: output/s3sync-state.json)
+#   S3SYNC_SUMMARY        JSON summary path (default: output/s3sync-summary.json)
+#   AWS_ENDPOINT_URL      S3-compatible endpoint, e.g. a local stand-in
 
 # Resolve project root from script location (works regardless of execution directory)
 script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 project_root="$(cd "$script_dir/../../.." && pwd)"
 upload_dir="$project_root/tasks/aws-cli/upload"
 
-# Check for AWS CLI
-if ! command -v aws >/dev/null 2>&1; then
-  echo "aws CLI not found. Install and configure AWS CLI first." >&2
+# Check for Python
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "python3 not found. Install Python 3 and boto3 (pip install boto3) first." >&2
   exit 1
 fi
 
@@ -49,22 +56,15 @@ if [[ "$bucket" != s3://* ]]; then
   bucket="s3://$bucket"
 fi
 
-# Ensure trailing slash on source to copy contents, not the directory itself
-src="$upload_dir/"
+# Remove leading and trailing "/" characters from the prefix (s3sync also normalizes it)
+prefix="${prefix#/}"
+prefix="${prefix%/}"
 
-# If prefix is provided
-if [ -n "$prefix" ]; then
-  # Remove leading "/" character if present to avoid double slashes in S3 URI
-  prefix="${prefix#/}"
-  # Remove trailing "/" character if present to ensure single slash in S3 URI
-  prefix="${prefix%/}"
-  #
-  dest="$bucket/$prefix/"
-else
-  # No prefix provided, upload to bucket root
-  dest="$bucket/"
-fi
-
-echo "Uploading \`$src\` to \`$dest\` ..."
-aws s3 sync --exact-timestamps --acl private --no-progress "$src" "$dest"
+echo "Uploading \`$upload_dir/\` to \`$bucket/${prefix:+$prefix/}\` ..."
+python3 "$project_root/tasks/aws-cli/pyutil/s3sync/s3sync.py" "$upload_dir" "$bucket" "$prefix" \
+  --workers "${S3SYNC_WORKERS:-8}" \
+  --part-size-mb "${S3SYNC_PART_SIZE_MB:-16}" \
+  --state-file "${S3SYNC_STATE_FILE:-$project_root/output/s3sync-state.json}" \
+  --summary "${S3SYNC_SUMMARY:-$project_root/output/s3sync-summary.json}" \
+  --acl private
 echo "Upload complete."
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+awsprov - provision and tear down the demo's AWS resources in one process
+
+Replaces the chain of aws CLI scripts behind aws-resources-up and
+aws-resources-teardown. All steps share one boto3 session, the caller's
+account ID is looked up once, and independent steps run concurrently:
+
+    up:   bucket | IAM policy | IAM role   ->  attach policy to role
+    down: detach policy from role  ->  IAM role | IAM policy,  alongside  bucket
+
+Every step is idempotent: existing resources are reused (an IAM policy whose
+document changed gets a new default version, an IAM role whose trust policy
+has another external ID gets the configured one), and missing resources are
+skipped on teardown. Policy documents are generated by the same functions
+the per-step scripts use (generate_s3_bucket_policy, generate_trust_policy)
+and written to the same files, and output/aws-output.json keeps the shape
+the shell scripts produce.
+
+Usage:
+    python awsprov.py up [--bucket NAME] [--prefix PREFIX] [--policy-name NAME]
+        [--role-name NAME] [--external-id ID] [--endpoint-url URL]
+    python awsprov.py down [--force]
+    python awsprov.py update-trust
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+CMD_DIR = Path(__file__).resolve().parent.parent.parent / 'cmd'
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent.parent / 'json' / 'template'
+LOG_FILE = Path(__file__).resolve().parent.parent.parent / 'logs' / 'aws-resources.log'
+
+DEFAULT_OUTPUT_DIR = 'output'
+AWS_OUTPUT_FILE = 'aws-output.json'
+BUCKET_POLICY_FILE = 'bucket-policy-output.json'
+TRUST_POLICY_FILE = 'trust-policy-output.json'
+UPDATED_TRUST_POLICY_FILE = 'trust-policy-updated.json'
+STORAGE_LOCATION_FILE = 'external-volume-desc-storage-location.json'
+
+# IAM keeps at most five versions of a managed policy
+MAX_POLICY_VERSIONS = 5
+
+
+class ProvisioningError(Exception):
+    """Raised when a provisioning step cannot complete."""
+
+
+# Steps print from worker threads; one lock keeps their lines whole
+_print_lock = threading.Lock()
+
+
+def _log(line: str) -> None:
+    with _print_lock:
+        print(line, flush=True)
+
+
+def _load_generator(filename: str, function: str) -> Callable:
+    """Load a function from one of the hyphenated generator scripts in cmd/."""
+    path = CMD_DIR / filename
+    spec = importlib.util.spec_from_file_location(path.stem.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, function)
+
+
+generate_s3_bucket_policy = _load_generator('generate-iam-policy-for-bucket-access.py', 'generate_s3_bucket_policy')
+generate_trust_policy = _load_generator('generate-trust-policy.py', 'generate_trust_policy')
+
+
+def _json_default(value):
+    # Match the aws CLI's JSON output for timestamps
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _error_code(error: Exception) -> str:
+    response = getattr(error, 'response', None) or {}
+    return str(response.get('Error', {}).get('Code', ''))
+
+
+def run_steps(steps: Dict[str, Tuple[Callable[[], None], List[str]]], workers: int = 4) -> Dict[str, Dict]:
+    """
+    Run steps as soon as their dependencies have succeeded.
+
+    Args:
+        steps: {name: (function, [names of steps it depends on])}
+        workers: Maximum steps running at once
+
+    Returns:
+        {name: {'status': 'ok' | 'failed' | 'skipped', 'seconds': float, 'error': str}}
+    """
+    results: Dict[str, Dict] = {}
+    pending = dict(steps)
+    running = {}
+
+    def start(executor, name, function):
+        def timed():
+            started = time.perf_counter()
+            function()
+            return time.perf_counter() - started
+        running[executor.submit(timed)] = name
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for name, (function, deps) in list(pending.items()):
+                if any(results.get(dep, {}).get('status') in ('failed', 'skipped') for dep in deps):
+                    results[name] = {'status': 'skipped', 'seconds': 0.0, 'error': 'dependency failed'}
+                    del pending[name]
+                elif all(results.get(dep, {}).get('status') == 'ok' for dep in deps):
+                    start(executor, name, function)
+                    del pending[name]
+
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = {'status': 'ok', 'seconds': round(future.result(), 3)}
+                except Exception as e:
+                    results[name] = {'status': 'failed', 'seconds': 0.0, 'error': str(e)}
+                    _log(f"✗ {name}: {e}")
+    return results
+
+
+class AwsProvisioner:
+    """
+    Creates and deletes the S3 bucket, IAM policy and IAM role used by the external volume.
+
+    Args:
+        bucket: S3 bucket name (an s3:// prefix is stripped)
+        region: Bucket region (default: the profile's region, else us-east-1)
+        prefix: Key prefix the IAM policy grants access to
+        policy_name: IAM policy name
+        role_name: IAM role name
+        external_id: External ID required in the role's trust policy
+        output_dir: Where aws-output.json and the generated policies are written
+        profile: AWS profile (default: credential chain)
+        endpoint_url: Endpoint for a mocked AWS backend (applies to S3, IAM and STS)
+    """
+
+    def __init__(self, bucket: Optional[str], region: Optional[str], prefix: Optional[str],
+                 policy_name: Optional[str], role_name: Optional[str], external_id: Optional[str],
+                 output_dir: Path = Path(DEFAULT_OUTPUT_DIR), profile: Optional[str] = None,
+                 endpoint_url: Optional[str] = None,
+                 bucket_policy_template: Path = TEMPLATE_DIR / 'bucket-policy-template.json',
+                 trust_policy_template: Path = TEMPLATE_DIR / 'trust-policy-template.json'):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise ProvisioningError("awsprov requires boto3. Install with: pip install boto3")
+
+        self.ClientError = ClientError
+        self.bucket = bucket[len('s3://'):] if bucket and bucket.startswith('s3://') else bucket
+        self.prefix = (prefix or '').strip('/') or None
+        self.policy_name = policy_name
+        self.role_name = role_name
+        self.external_id = external_id
+        self.output_dir = output_dir
+        self.bucket_policy_template = bucket_policy_template
+        self.trust_policy_template = trust_policy_template
+
+        # One session and one client per service, shared by every step
+        self.session = boto3.session.Session(profile_name=profile, region_name=region or None)
+        self.region = self.session.region_name or 'us-east-1'
+        self._endpoint_url = endpoint_url
+        self._clients: Dict[str, object] = {}
+        self._clients_lock = threading.Lock()
+        self._account_id: Optional[str] = None
+        self._account_lock = threading.Lock()
+
+        self._output_lock = threading.Lock()
+        self.output: Dict = {}
+
+    def client(self, service: str):
+        with self._clients_lock:
+            if service not in self._clients:
+                self._clients[service] = self.session.client(
+                    service, region_name=self.region, endpoint_url=self._endpoint_url)
+            return self._clients[service]
+
+    @property
+    def account_id(self) -> str:
+        """The caller's AWS account ID, looked up once per run."""
+        with self._account_lock:
+            if self._account_id is None:
+                self._account_id = self.client('sts').get_caller_identity()['Account']
+            return self._account_id
+
+    @property
+    def policy_arn(self) -> str:
+        return f"arn:aws:iam::{self.account_id}:policy/{self.policy_name}"
+
+    def _require(self, **values) -> None:
+        missing = [name for name, value in values.items() if not value]
+        if missing:
+            raise ProvisioningError(f"Missing required setting(s): {', '.join(missing)}")
+
+    def _write_json(self, filename: str, data: Dict) -> Path:
+        path = self.output_dir / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4, default=_json_default)
+        return path
+
+    def _set_output(self, key: str, value) -> None:
+        with self._output_lock:
+            self.output[key] = value
+
+    def save_output(self) -> Path:
+        """Write aws-output.json in the shape the shell scripts produce."""
+        path = self.output_dir / AWS_OUTPUT_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._output_lock:
+            data = json.dumps(self.output, indent=2, default=_json_default)
+        with open(path, 'w') as f:
+            f.write(data + '\n')
+        return path
+
+    def load_output(self) -> Dict:
+        path = self.output_dir / AWS_OUTPUT_FILE
+        if path.exists():
+            with open(path, 'r') as f:
+                return json.load(f)
+        return {}
+
+    # ---- up -------------------------------------------------------------
+
+    def ensure_bucket(self) -> None:
+        s3 = self.client('s3')
+        try:
+            s3.head_bucket(Bucket=self.bucket)
+            _log(f"⊘ Bucket s3://{self.bucket} already exists")
+        except self.ClientError as e:
+            if _error_code(e) not in ('404', 'NoSuchBucket', 'NotFound'):
+                raise
+            params = {'Bucket': self.bucket}
+            if self.region != 'us-east-1':
+                params['CreateBucketConfiguration'] = {'LocationConstraint': self.region}
+            try:
+                s3.create_bucket(**params)
+            except self.ClientError as create_error:
+                if _error_code(create_error) != 'BucketAlreadyOwnedByYou':
+                    raise
+            _log(f"✓ Bucket s3://{self.bucket} created in {self.region}")
+
+            LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(LOG_FILE, 'a') as log:
+                log.write(f"{datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')} - Bucket created\n"
+                          f"URI: s3://{self.bucket}\nARN: arn:aws:s3:::{self.bucket}\n---\n")
+
+        self._set_output('bucket_uri', f"s3://{self.bucket}")
+        self._set_output('bucket_arn', f"arn:aws:s3:::{self.bucket}")
+
+    def ensure_policy(self) -> None:
+        iam = self.client('iam')
+        document = generate_s3_bucket_policy(self.bucket_policy_template, self.bucket, self.prefix)
+        self._write_json(BUCKET_POLICY_FILE, document)
+
+        try:
+            policy = iam.get_policy(PolicyArn=self.policy_arn)['Policy']
+        except self.ClientError as e:
+            if _error_code(e) != 'NoSuchEntity':
+                raise
+            policy = iam.create_policy(
+                PolicyName=self.policy_name, PolicyDocument=json.dumps(document)
+            )['Policy']
+            _log(f"✓ IAM policy '{self.policy_name}' created")
+        else:
+            current = iam.get_policy_version(
+                PolicyArn=policy['Arn'], VersionId=policy['DefaultVersionId']
+            )['PolicyVersion']['Document']
+            if isinstance(current, str):
+                current = json.loads(unquote(current))
+            if current == document:
+                _log(f"⊘ IAM policy '{self.policy_name}' already up to date")
+            else:
+                versions = iam.list_policy_versions(PolicyArn=policy['Arn'])['Versions']
+                old = sorted((v for v in versions if not v['IsDefaultVersion']), key=lambda v: v['CreateDate'])
+                while len(old) >= MAX_POLICY_VERSIONS - 1:
+                    iam.delete_policy_version(PolicyArn=policy['Arn'], VersionId=old.pop(0)['VersionId'])
+                iam.create_policy_version(
+                    PolicyArn=policy['Arn'], PolicyDocument=json.dumps(document), SetAsDefault=True
+                )
+                policy = iam.get_policy(PolicyArn=policy['Arn'])['Policy']
+                _log(f"✓ IAM policy '{self.policy_name}' updated (new default version {policy['DefaultVersionId']})")
+
+        self._set_output('iam_policy', {'Policy': policy})
+
+    def ensure_role(self) -> None:
+        iam = self.client('iam')
+        document = generate_trust_policy(self.trust_policy_template, self.account_id, self.external_id)
+        self._write_json(TRUST_POLICY_FILE, document)
+
+        try:
+            role = iam.get_role(RoleName=self.role_name)['Role']
+        except self.ClientError as e:
+            if _error_code(e) != 'NoSuchEntity':
+                raise
+            role = iam.create_role(
+                RoleName=self.role_name, AssumeRolePolicyDocument=json.dumps(document)
+            )['Role']
+            _log(f"✓ IAM role '{self.role_name}' created")
+        else:
+            self._update_external_id(role)
+
+        role.pop('RoleLastUsed', None)
+        self._set_output('iam_role', {'Role': role})
+
+    def _update_external_id(self, role: Dict) -> None:
+        """
+        Bring an existing role's trust policy to the configured external ID.
+
+        Only the external ID is changed: the principal is kept, since
+        update-trust may have pointed it at Snowflake's IAM user.
+        """
+        document = role['AssumeRolePolicyDocument']
+        if isinstance(document, str):
+            document = json.loads(unquote(document))
+        condition = document['Statement'][0].setdefault('Condition', {}).setdefault('StringEquals', {})
+        if condition.get('sts:ExternalId') == self.external_id:
+            _log(f"⊘ IAM role '{self.role_name}' already exists")
+            return
+        condition['sts:ExternalId'] = self.external_id
+        self.client('iam').update_assume_role_policy(RoleName=self.role_name, PolicyDocument=json.dumps(document))
+        role['AssumeRolePolicyDocument'] = document
+        _log(f"✓ IAM role '{self.role_name}' trust policy updated to the new external ID")
+
+    def attach_policy(self) -> None:
+        # attach_role_policy is a no-op when the policy is already attached
+        self.client('iam').attach_role_policy(RoleName=self.role_name, PolicyArn=self.policy_arn)
+        _log(f"✓ IAM policy '{self.policy_name}' attached to role '{self.role_name}'")
+
+    def up(self, workers: int = 4) -> Dict[str, Dict]:
+        """Create (or reuse) every resource and write aws-output.json."""
+        self._require(bucket=self.bucket, policy_name=self.policy_name,
+                      role_name=self.role_name, external_id=self.external_id)
+        _log(f"Account ID: {self.account_id}")
+
+        results = run_steps({
+            'bucket': (self.ensure_bucket, []),
+            'iam-policy': (self.ensure_policy, []),
+            'iam-role': (self.ensure_role, []),
+            'attach-policy': (self.attach_policy, ['iam-policy', 'iam-role']),
+        }, workers)
+        _log(f"✓ Wrote {self.save_output()}")
+        return results
+
+    # ---- down -----------------------------------------------------------
+
+    def _resolve_names(self) -> None:
+        """Prefer the names recorded in aws-output.json, as the teardown scripts do."""
+        recorded = self.load_output()
+        role_arn = recorded.get('iam_role', {}).get('Role', {}).get('Arn')
+        policy_arn = recorded.get('iam_policy', {}).get('Policy', {}).get('Arn')
+        if role_arn:
+            self.role_name = role_arn.rsplit('/', 1)[-1]
+        if policy_arn:
+            self.policy_name = policy_arn.rsplit('/', 1)[-1]
+            self._account_id = self._account_id or policy_arn.split(':')[4]
+        if not self.bucket and recorded.get('bucket_uri'):
+            self.bucket = recorded['bucket_uri'][len('s3://'):]
+
+    def detach_policy(self) -> None:
+        if not (self.role_name and self.policy_name):
+            return
+        try:
+            self.client('iam').detach_role_policy(RoleName=self.role_name, PolicyArn=self.policy_arn)
+            _log(f"✓ IAM policy '{self.policy_name}' detached from role '{self.role_name}'")
+        except self.ClientError as e:
+            if _error_code(e) != 'NoSuchEntity':
+                raise
+            _log(f"⊘ IAM policy '{self.policy_name}' not attached to role '{self.role_name}'")
+
+    def delete_role(self) -> None:
+        if not self.role_name:
+            return
+        iam = self.client('iam')
+        try:
+            attached = iam.list_attached_role_policies(RoleName=self.role_name)['AttachedPolicies']
+        except self.ClientError as e:
+            if _error_code(e) != 'NoSuchEntity':
+                raise
+            _log(f"⊘ IAM role '{self.role_name}' does not exist")
+            return
+        if attached:
+            raise ProvisioningError(
+                f"Role '{self.role_name}' still has attached policies: "
+                f"{', '.join(p['PolicyArn'] for p in attached)}"
+            )
+        for name in iam.list_role_policies(RoleName=self.role_name)['PolicyNames']:
+            iam.delete_role_policy(RoleName=self.role_name, PolicyName=name)
+        iam.delete_role(RoleName=self.role_name)
+        _log(f"✓ IAM role '{self.role_name}' deleted")
+
+    def delete_policy(self) -> None:
+        if not self.policy_name:
+            return
+        iam = self.client('iam')
+        try:
+            iam.get_policy(PolicyArn=self.policy_arn)
+        except self.ClientError as e:
+            if _error_code(e) != 'NoSuchEntity':
+                raise
+            _log(f"⊘ IAM policy '{self.policy_name}' does not exist")
+            return
+        entities = iam.list_entities_for_policy(PolicyArn=self.policy_arn)
+        attached = ([r['RoleName'] for r in entities.get('PolicyRoles', [])]
+                    + [u['UserName'] for u in entities.get('PolicyUsers', [])]
+                    + [g['GroupName'] for g in entities.get('PolicyGroups', [])])
+        if attached:
+            raise ProvisioningError(
+                f"Policy '{self.policy_name}' is still attached to: {', '.join(attached)}"
+            )
+        for version in iam.list_policy_versions(PolicyArn=self.policy_arn)['Versions']:
+            if not version['IsDefaultVersion']:
+                iam.delete_policy_version(PolicyArn=self.policy_arn, VersionId=version['VersionId'])
+        iam.delete_policy(PolicyArn=self.policy_arn)
+        _log(f"✓ IAM policy '{self.policy_name}' deleted")
+
+    def delete_bucket(self, force: bool = False) -> None:
+        if not self.bucket:
+            return
+        s3 = self.client('s3')
+        try:
+            s3.head_bucket(Bucket=self.bucket)
+        except self.ClientError as e:
+            if _error_code(e) not in ('404', 'NoSuchBucket', 'NotFound', '403'):
+                raise
+            _log(f"⊘ Bucket s3://{self.bucket} does not exist or is not accessible")
+            return
+
+        if force:
+            # Delete every object version and delete marker, 1000 keys per request
+            paginator = s3.get_paginator('list_object_versions')
+            deleted = 0
+            for page in paginator.paginate(Bucket=self.bucket):
+                keys = [{'Key': v['Key'], 'VersionId': v['VersionId']}
+                        for v in page.get('Versions', []) + page.get('DeleteMarkers', [])]
+                if keys:
+                    s3.delete_objects(Bucket=self.bucket, Delete={'Objects': keys, 'Quiet': True})
+                    deleted += len(keys)
+            if deleted:
+                _log(f"✓ Removed {deleted} object(s) from s3://{self.bucket}")
+
+        s3.delete_bucket(Bucket=self.bucket)
+        _log(f"✓ Bucket s3://{self.bucket} deleted")
+
+    def down(self, force: bool = False, workers: int = 4) -> Dict[str, Dict]:
+        """Delete every resource that exists; missing ones are skipped."""
+        self._resolve_names()
+        return run_steps({
+            'detach-policy': (self.detach_policy, []),
+            'iam-role': (self.delete_role, ['detach-policy']),
+            'iam-policy': (self.delete_policy, ['detach-policy']),
+            'bucket': (lambda: self.delete_bucket(force), []),
+        }, workers)
+
+    # ---- update-trust ---------------------------------------------------
+
+    def update_trust(self) -> None:
+        """Point the role's trust policy at the Snowflake IAM user from the external volume description."""
+        location_file = self.output_dir / STORAGE_LOCATION_FILE
+        if not location_file.exists():
+            raise ProvisioningError(
+                f"Storage location file not found at {location_file}. "
+                f"Run 'task snow-cli:desc-external-volume' first."
+            )
+        with open(location_file, 'r') as f:
+            snowflake_user_arn = json.load(f).get('STORAGE_AWS_IAM_USER_ARN')
+        if not snowflake_user_arn:
+            raise ProvisioningError(f"Could not find STORAGE_AWS_IAM_USER_ARN in {location_file}")
+
+        self._resolve_names()
+        self._require(role_name=self.role_name)
+        iam = self.client('iam')
+        document = iam.get_role(RoleName=self.role_name)['Role']['AssumeRolePolicyDocument']
+        if isinstance(document, str):
+            document = json.loads(unquote(document))
+        document['Statement'][0]['Principal']['AWS'] = snowflake_user_arn
+        self._write_json(UPDATED_TRUST_POLICY_FILE, document)
+
+        iam.update_assume_role_policy(RoleName=self.role_name, PolicyDocument=json.dumps(document))
+        _log(f"✓ Trust policy of role '{self.role_name}' now trusts {snowflake_user_arn}")
+
+
+def print_results(title: str, results: Dict[str, Dict], seconds: float) -> bool:
+    """Print a per-step summary; returns True if every step succeeded."""
+    print(f"\n{'='*60}")
+    print(f"{title} ({seconds:.1f}s)")
+    print(f"{'='*60}")
+    marks = {'ok': '✓', 'failed': '✗', 'skipped': '⊘'}
+    for name, result in results.items():
+        detail = f" - {result['error']}" if result.get('error') else ''
+        print(f"  {marks[result['status']]} {name:<16} {result['seconds']:>6.2f}s{detail}")
+    return all(r['status'] == 'ok' for r in results.values())
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python awsprov.py up|down|update-trust [options]
+    """
+    parser = argparse.ArgumentParser(
+        description="Provision or tear down the S3 bucket, IAM policy and IAM role in one process",
+        epilog=(
+            "Settings default to the variables in .env/iceberg.env (S3_BUCKET_NAME, AWS_REGION,\n"
+            "S3_PREFIX, IAM_POLICY_NAME, IAM_ROLE_NAME, TRUST_POLICY_EXTERNAL_ID, AWS_PROFILE).\n\n"
+            "Example:\n"
+            "  python awsprov.py up\n"
+            "  python awsprov.py down --force\n"
+            "  python awsprov.py up --endpoint-url http://localhost:5000   # mocked AWS backend"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=['up', 'down', 'update-trust'], help="What to do")
+    parser.add_argument("--bucket", default=os.environ.get('S3_BUCKET_NAME'), help="S3 bucket name")
+    parser.add_argument("--region", default=os.environ.get('AWS_REGION'), help="AWS region (default: the profile's region, else us-east-1)")
+    parser.add_argument("--prefix", default=os.environ.get('S3_PREFIX'), help="S3 prefix the policy grants access to")
+    parser.add_argument("--policy-name", default=os.environ.get('IAM_POLICY_NAME'), help="IAM policy name")
+    parser.add_argument("--role-name", default=os.environ.get('IAM_ROLE_NAME'), help="IAM role name")
+    parser.add_argument("--external-id", default=os.environ.get('TRUST_POLICY_EXTERNAL_ID'),
+                        help="External ID for the role's trust policy")
+    parser.add_argument("--profile", default=os.environ.get('AWS_PROFILE') or None, help="AWS profile")
+    parser.add_argument("--endpoint-url", default=os.environ.get('AWS_ENDPOINT_URL'),
+                        help="Endpoint of a mocked AWS backend (default: $AWS_ENDPOINT_URL)")
+    parser.add_argument("--output-dir", type=Path, default=Path(DEFAULT_OUTPUT_DIR),
+                        help=f"Directory for aws-output.json and generated policies (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--force", action="store_true", help="down: empty the bucket before deleting it")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="Steps run at once (default: 4)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        provisioner = AwsProvisioner(
+            args.bucket, args.region, args.prefix, args.policy_name, args.role_name,
+            args.external_id, output_dir=args.output_dir, profile=args.profile,
+            endpoint_url=args.endpoint_url
+        )
+        if args.command == 'up':
+            results = provisioner.up(args.workers)
+        elif args.command == 'down':
+            results = provisioner.down(force=args.force, workers=args.workers)
+        else:
+            provisioner.update_trust()
+            sys.exit(0)
+    except Exception as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    title = 'AWS resources up' if args.command == 'up' else 'AWS resources torn down'
+    ok = print_results(title, results, time.perf_counter() - started)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Tests for awsprov against moto's in-process AWS mock.
+
+Run with: python -m pytest tasks/aws-cli/pyutil/awsprov
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import awsprov  # noqa: E402
+from awsprov import STORAGE_LOCATION_FILE, AwsProvisioner  # noqa: E402
+
+SNOWFLAKE_USER_ARN = 'arn:aws:iam::999999999999:user/snowflake'
+
+
+@pytest.fixture
+def aws(monkeypatch, tmp_path):
+    """Fake credentials, no host AWS config, and a mocked AWS for the test's duration."""
+    monkeypatch.setattr(awsprov, 'LOG_FILE', tmp_path / 'logs' / 'aws-resources.log')
+    for name in ('AWS_PROFILE', 'AWS_REGION', 'AWS_DEFAULT_REGION', 'AWS_ENDPOINT_URL'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_CONFIG_FILE', str(tmp_path / 'aws-config'))
+    monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', str(tmp_path / 'aws-credentials'))
+    with moto.mock_aws():
+        yield
+
+
+def provisioner(output_dir: Path, external_id: str = 'ext-1', region: str = 'eu-west-1') -> AwsProvisioner:
+    return AwsProvisioner('demo-bucket', region, 'iceberg', 'demo-policy', 'demo-role', external_id,
+                          output_dir=output_dir)
+
+
+def trust_policy(prov: AwsProvisioner) -> dict:
+    return prov.client('iam').get_role(RoleName='demo-role')['Role']['AssumeRolePolicyDocument']
+
+
+def test_up_is_idempotent(aws, tmp_path):
+    first = provisioner(tmp_path).up()
+    second = provisioner(tmp_path).up()
+
+    assert all(r['status'] == 'ok' for r in first.values())
+    assert all(r['status'] == 'ok' for r in second.values())
+    prov = provisioner(tmp_path)
+    iam = prov.client('iam')
+    assert len(iam.list_policy_versions(PolicyArn=prov.policy_arn)['Versions']) == 1
+    attached = iam.list_attached_role_policies(RoleName='demo-role')['AttachedPolicies']
+    assert [p['PolicyName'] for p in attached] == ['demo-policy']
+    location = prov.client('s3').get_bucket_location(Bucket='demo-bucket')['LocationConstraint']
+    assert location == 'eu-west-1'
+    output = json.loads((tmp_path / 'aws-output.json').read_text())
+    assert output['bucket_uri'] == 's3://demo-bucket'
+
+
+def test_down_is_idempotent(aws, tmp_path):
+    provisioner(tmp_path).up()
+    prov = provisioner(tmp_path)
+    prov.client('s3').put_object(Bucket='demo-bucket', Key='iceberg/data.parquet', Body=b'x')
+
+    first = provisioner(tmp_path).down(force=True)
+    second = provisioner(tmp_path).down(force=True)
+
+    assert all(r['status'] == 'ok' for r in first.values())
+    assert all(r['status'] == 'ok' for r in second.values())
+    assert prov.client('s3').list_buckets()['Buckets'] == []
+    assert prov.client('iam').list_roles()['Roles'] == []
+    assert prov.client('iam').list_policies(Scope='Local')['Policies'] == []
+
+
+def test_update_trust_survives_up_and_new_external_id(aws, tmp_path):
+    provisioner(tmp_path).up()
+    (tmp_path / STORAGE_LOCATION_FILE).write_text(json.dumps({'STORAGE_AWS_IAM_USER_ARN': SNOWFLAKE_USER_ARN}))
+
+    prov = provisioner(tmp_path)
+    prov.update_trust()
+    assert trust_policy(prov)['Statement'][0]['Principal']['AWS'] == SNOWFLAKE_USER_ARN
+
+    provisioner(tmp_path, external_id='ext-2').up()
+    statement = trust_policy(prov)['Statement'][0]
+    assert statement['Principal']['AWS'] == SNOWFLAKE_USER_ARN
+    assert statement['Condition']['StringEquals']['sts:ExternalId'] == 'ext-2'
+
+
+def test_region_falls_back_to_profile_region(aws, tmp_path, monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'ap-southeast-2')
+    assert provisioner(tmp_path, region=None).region == 'ap-southeast-2'
+
+    monkeypatch.delenv('AWS_DEFAULT_REGION')
+    assert provisioner(tmp_path, region=None).region == 'us-east-1'
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+s3sync - concurrent, checksum-aware upload of a local directory to S3
+
+Replaces `aws s3 sync` for seeding the external volume prefix:
+  - files are uploaded by a pool of workers; large files are split into
+    parts that are uploaded concurrently (multipart upload)
+  - a file is skipped when the object already in S3 has the same size and
+    ETag (MD5 for single-part objects, MD5-of-part-MD5s for multipart ones)
+  - multipart uploads are resumable: the upload ID and finished parts are
+    kept in a state file, so an interrupted run continues where it stopped
+  - a JSON summary (files, bytes, throughput, errors) is printed and can be
+    written to a file
+
+Local MD5s are cached in the state file by size and mtime, so unchanged
+files are not re-read on the next run.
+
+Works against any S3-compatible endpoint (MinIO, moto_server, LocalStack)
+via --endpoint-url or AWS_ENDPOINT_URL.
+
+Usage:
+    python s3sync.py <source_dir> <bucket-or-s3-uri> [prefix] [--workers N]
+        [--part-size-mb N] [--state-file PATH] [--summary PATH] [--endpoint-url URL]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MB = 1024 * 1024
+
+DEFAULT_WORKERS = 8
+DEFAULT_PART_SIZE_MB = 16
+DEFAULT_STATE_FILE = 'output/s3sync-state.json'
+
+# S3 multipart limits
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class S3SyncError(Exception):
+    """Raised when the sync cannot start (bad arguments, missing boto3, unreachable bucket)."""
+
+
+def parse_destination(destination: str, prefix: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Split a bucket name or s3:// URI (plus an optional extra prefix) into bucket and key prefix.
+
+    Returns:
+        (bucket, prefix) where prefix is '' or ends with '/'
+
+    Raises:
+        S3SyncError: If no bucket name is given
+    """
+    if destination.startswith('s3://'):
+        destination = destination[len('s3://'):]
+    bucket, _, uri_prefix = destination.partition('/')
+    if not bucket:
+        raise S3SyncError("Bucket name cannot be empty")
+
+    parts = [p.strip('/') for p in (uri_prefix, prefix or '') if p and p.strip('/')]
+    key_prefix = '/'.join(parts)
+    return bucket, f"{key_prefix}/" if key_prefix else ''
+
+
+def part_size_for(size: int, part_size: int) -> int:
+    """Grow part_size (in whole MB) until the file fits in MAX_PARTS parts."""
+    part_size = max(part_size, MIN_PART_SIZE)
+    while (size + part_size - 1) // part_size > MAX_PARTS:
+        part_size += MB
+    return part_size
+
+
+def compute_digests(path: Path, part_size: int) -> Dict[str, str]:
+    """
+    Compute the single-part and multipart ETags of a file in one read.
+
+    Returns:
+        {'md5': <hex md5>, 'multipart': '<md5 of part md5s>-<parts>', 'part_size': part_size}
+    """
+    whole = hashlib.md5()
+    part_digests: List[bytes] = []
+    part = hashlib.md5()
+    in_part = 0
+
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(min(HASH_BLOCK_SIZE, part_size - in_part))
+            if not block:
+                break
+            whole.update(block)
+            part.update(block)
+            in_part += len(block)
+            if in_part == part_size:
+                part_digests.append(part.digest())
+                part = hashlib.md5()
+                in_part = 0
+    if in_part or not part_digests:
+        part_digests.append(part.digest())
+
+    multipart = hashlib.md5(b''.join(part_digests)).hexdigest()
+    return {
+        'md5': whole.hexdigest(),
+        'multipart': f"{multipart}-{len(part_digests)}",
+        'part_size': part_size,
+    }
+
+
+def infer_part_size(size: int, etag: str, default: int) -> Optional[int]:
+    """
+    Guess the part size used for a multipart ETag ('<hash>-N').
+
+    Tries the configured part size first, then the smallest whole-MB size
+    that splits the file into exactly N parts.
+    """
+    try:
+        parts = int(etag.rsplit('-', 1)[1])
+    except (IndexError, ValueError):
+        return None
+    if parts <= 0:
+        return None
+    if (size + default - 1) // default == parts:
+        return default
+    candidate = max(MIN_PART_SIZE, ((size + parts - 1) // parts + MB - 1) // MB * MB)
+    if (size + candidate - 1) // candidate == parts:
+        return candidate
+    return None
+
+
+class SyncState:
+    """
+    Resumable multipart uploads and cached local digests, persisted as JSON.
+
+    Layout:
+        {'uploads': {key: {'upload_id', 'file', 'size', 'mtime_ns', 'part_size', 'parts': {n: etag}}},
+         'digests': {path: {'size', 'mtime_ns', 'md5', 'multipart', 'part_size'}}}
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._lock = threading.Lock()
+        self.uploads: Dict[str, Dict] = {}
+        self.digests: Dict[str, Dict] = {}
+        if path and path.exists():
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.uploads = data.get('uploads', {})
+                self.digests = data.get('digests', {})
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️  Ignoring unreadable state file {path}: {e}")
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps({'uploads': self.uploads, 'digests': self.digests}, indent=2, sort_keys=True)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+
+    def digest(self, path: Path, stat: os.stat_result, part_size: int) -> Dict[str, str]:
+        """Return cached digests for an unchanged file, computing them otherwise."""
+        key = str(path.resolve())
+        with self._lock:
+            cached = self.digests.get(key)
+        if (cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns
+                and cached['part_size'] == part_size):
+            return cached
+
+        digests = compute_digests(path, part_size)
+        digests.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        with self._lock:
+            self.digests[key] = digests
+        return digests
+
+    def get_upload(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            return self.uploads.get(key)
+
+    def set_upload(self, key: str, upload: Dict) -> None:
+        with self._lock:
+            self.uploads[key] = upload
+        self.save()
+
+    def record_part(self, key: str, number: int, etag: str) -> None:
+        with self._lock:
+            upload = self.uploads.get(key)
+            if upload is not None:
+                upload['parts'][str(number)] = etag
+        self.save()
+
+    def finish_upload(self, key: str) -> None:
+        with self._lock:
+            self.uploads.pop(key, None)
+        self.save()
+
+
+class S3Sync:
+    """
+    Upload the files of a directory to s3://bucket/prefix.
+
+    Args:
+        client: boto3 S3 client
+        bucket: Destination bucket
+        prefix: Key prefix ('' or ending with '/')
+        workers: Concurrent file uploads, and concurrent part uploads per run
+        part_size: Multipart part size in bytes; files larger than this are uploaded in parts
+        state: Resumable upload / digest state
+        acl: Canned ACL for uploaded objects (None to omit)
+        dry_run: Only report what would be uploaded
+    """
+
+    def __init__(self, client, bucket: str, prefix: str, workers: int = DEFAULT_WORKERS,
+                 part_size: int = DEFAULT_PART_SIZE_MB * MB, state: Optional[SyncState] = None,
+                 acl: Optional[str] = 'private', dry_run: bool = False):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.workers = workers
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.state = state or SyncState(None)
+        self.acl = acl
+        self.dry_run = dry_run
+        self._part_pool: Optional[ThreadPoolExecutor] = None
+
+    def list_remote(self) -> Dict[str, Dict]:
+        """List existing objects under the prefix: {key: {'size', 'etag'}}."""
+        remote = {}
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                remote[obj['Key']] = {'size': obj['Size'], 'etag': obj['ETag'].strip('"')}
+        return remote
+
+    def is_unchanged(self, path: Path, stat: os.stat_result, remote: Optional[Dict]) -> bool:
+        """True if the remote object has the local file's size and ETag."""
+        if remote is None or remote['size'] != stat.st_size:
+            return False
+        etag = remote['etag']
+        if '-' not in etag:
+            return self.state.digest(path, stat, self.part_size)['md5'] == etag
+        part_size = infer_part_size(stat.st_size, etag, part_size_for(stat.st_size, self.part_size))
+        if part_size is None:
+            return False
+        return self.state.digest(path, stat, part_size)['multipart'] == etag
+
+    def _extra_args(self, path: Path) -> Dict:
+        extra = {}
+        if self.acl:
+            extra['ACL'] = self.acl
+        content_type = mimetypes.guess_type(path.name)[0]
+        if content_type:
+            extra['ContentType'] = content_type
+        return extra
+
+    def upload_single(self, path: Path, key: str) -> None:
+        with open(path, 'rb') as f:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=f, **self._extra_args(path))
+
+    def _upload_part(self, path: Path, key: str, upload_id: str, number: int,
+                     offset: int, length: int) -> Tuple[int, str]:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        content_md5 = base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number,
+            Body=data, ContentMD5=content_md5
+        )
+        etag = response['ETag'].strip('"')
+        self.state.record_part(key, number, etag)
+        return number, etag
+
+    def _resume_parts(self, key: str, upload: Dict) -> Optional[Dict[int, str]]:
+        """
+        Return the parts S3 still holds for a recorded upload, or None if the upload is gone.
+        """
+        from botocore.exceptions import ClientError
+
+        parts: Dict[int, str] = {}
+        try:
+            paginator = self.client.get_paginator('list_parts')
+            for page in paginator.paginate(Bucket=self.bucket, Key=key, UploadId=upload['upload_id']):
+                for part in page.get('Parts', []):
+                    parts[part['PartNumber']] = part['ETag'].strip('"')
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchUpload', '404', 'NoSuchKey'):
+                return None
+            raise
+        return parts
+
+    def upload_multipart(self, path: Path, key: str, stat: os.stat_result) -> int:
+        """
+        Upload a file in parts, resuming a recorded upload of the same file if possible.
+
+        Returns:
+            Number of parts reused from an earlier run
+        """
+        part_size = part_size_for(stat.st_size, self.part_size)
+        upload = self.state.get_upload(key)
+        done: Dict[int, str] = {}
+
+        if upload and (upload['file'], upload['size'], upload['mtime_ns'], upload['part_size']) == (
+                str(path.resolve()), stat.st_size, stat.st_mtime_ns, part_size):
+            remote_parts = self._resume_parts(key, upload)
+            if remote_parts is not None:
+                # Only trust parts whose ETag matches what this run recorded
+                done = {int(n): etag for n, etag in upload['parts'].items()
+                        if remote_parts.get(int(n)) == etag}
+            else:
+                upload = None
+        elif upload:
+            self._abort(key, upload['upload_id'])
+            upload = None
+
+        if not upload:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=key, **self._extra_args(path)
+            )
+            upload = {
+                'upload_id': response['UploadId'],
+                'file': str(path.resolve()),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'part_size': part_size,
+                'parts': {},
+            }
+            self.state.set_upload(key, upload)
+        else:
+            upload['parts'] = {str(n): etag for n, etag in done.items()}
+            self.state.set_upload(key, upload)
+
+        part_count = max(1, (stat.st_size + part_size - 1) // part_size)
+        futures = []
+        for number in range(1, part_count + 1):
+            if number in done:
+                continue
+            offset = (number - 1) * part_size
+            length = min(part_size, stat.st_size - offset)
+            futures.append(self._part_pool.submit(
+                self._upload_part, path, key, upload['upload_id'], number, offset, length
+            ))
+
+        etags = dict(done)
+        for future in as_completed(futures):
+            number, etag = future.result()
+            etags[number] = etag
+
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload['upload_id'],
+            MultipartUpload={'Parts': [{'PartNumber': n, 'ETag': f'"{etags[n]}"'} for n in sorted(etags)]}
+        )
+        self.state.finish_upload(key)
+        return len(done)
+
+    def _abort(self, key: str, upload_id: str) -> None:
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+        except Exception:
+            pass
+        self.state.finish_upload(key)
+
+    def _sync_file(self, path: Path, key: str, stat: os.stat_result, remote: Optional[Dict]) -> Dict:
+        started = time.perf_counter()
+        if self.is_unchanged(path, stat, remote):
+            return {'key': key, 'status': 'skipped', 'bytes': stat.st_size, 'seconds': 0.0}
+        if self.dry_run:
+            return {'key': key, 'status': 'would_upload', 'bytes': stat.st_size, 'seconds': 0.0}
+
+        resumed_parts = 0
+        multipart = stat.st_size > self.part_size
+        if multipart:
+            resumed_parts = self.upload_multipart(path, key, stat)
+        else:
+            self.upload_single(path, key)
+        return {
+            'key': key,
+            'status': 'uploaded',
+            'bytes': stat.st_size,
+            'seconds': round(time.perf_counter() - started, 3),
+            'multipart': multipart,
+            'resumed_parts': resumed_parts,
+        }
+
+    def sync(self, source_dir: Path) -> Dict:
+        """
+        Upload every file under source_dir that differs from its S3 object.
+
+        Returns:
+            Summary dict (see build_summary)
+        """
+        files = sorted(p for p in source_dir.rglob('*') if p.is_file())
+        started = time.perf_counter()
+        remote = self.list_remote()
+
+        results: List[Dict] = []
+        errors: List[Dict] = []
+        with ThreadPoolExecutor(max_workers=self.workers) as part_pool, \
+                ThreadPoolExecutor(max_workers=self.workers) as file_pool:
+            self._part_pool = part_pool
+            futures = {}
+            for path in files:
+                key = self.prefix + path.relative_to(source_dir).as_posix()
+                futures[file_pool.submit(self._sync_file, path, key, path.stat(), remote.get(key))] = key
+
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append({'key': key, 'error': str(e)})
+                    print(f"✗ {key}: {e}")
+                    continue
+                results.append(result)
+                if result['status'] == 'uploaded':
+                    resumed = f", resumed {result['resumed_parts']} part(s)" if result['resumed_parts'] else ''
+                    print(f"✓ {key} ({result['bytes'] / MB:.1f} MB in {result['seconds']:.1f}s{resumed})")
+                elif result['status'] == 'would_upload':
+                    print(f"▶ {key} ({result['bytes'] / MB:.1f} MB, dry run)")
+
+        self.state.save()
+        return build_summary(source_dir, f"s3://{self.bucket}/{self.prefix}", results, errors,
+                             time.perf_counter() - started, self.workers, self.part_size)
+
+
+def build_summary(source_dir: Path, destination: str, results: List[Dict], errors: List[Dict],
+                  seconds: float, workers: int, part_size: int) -> Dict:
+    """Aggregate per-file results into the JSON summary."""
+    uploaded = [r for r in results if r['status'] == 'uploaded']
+    skipped = [r for r in results if r['status'] == 'skipped']
+    pending = [r for r in results if r['status'] == 'would_upload']
+    bytes_uploaded = sum(r['bytes'] for r in uploaded)
+    return {
+        'source': str(source_dir),
+        'destination': destination,
+        'workers': workers,
+        'part_size_mb': part_size / MB,
+        'files': len(results) + len(errors),
+        'uploaded': len(uploaded),
+        'multipart': sum(1 for r in uploaded if r.get('multipart')),
+        'resumed_parts': sum(r.get('resumed_parts', 0) for r in uploaded),
+        'skipped': len(skipped),
+        'would_upload': len(pending),
+        'failed': len(errors),
+        'bytes_uploaded': bytes_uploaded,
+        'bytes_skipped': sum(r['bytes'] for r in skipped),
+        'seconds': round(seconds, 3),
+        'throughput_mb_s': round(bytes_uploaded / MB / seconds, 2) if seconds > 0 else 0.0,
+        'errors': errors,
+    }
+
+
+def create_client(endpoint_url: Optional[str], profile: Optional[str], region: Optional[str], workers: int):
+    """
+    Create an S3 client sized for the worker count.
+
+    Raises:
+        S3SyncError: If boto3 is not installed
+    """
+    try:
+        import boto3
+        from botocore.config import Config
+    except ImportError:
+        raise S3SyncError("s3sync requires boto3. Install with: pip install boto3")
+
+    session = boto3.session.Session(profile_name=profile, region_name=region)
+    config = Config(
+        max_pool_connections=workers * 2 + 2,
+        retries={'max_attempts': 10, 'mode': 'adaptive'},
+    )
+    return session.client('s3', endpoint_url=endpoint_url, config=config)
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python s3sync.py <source_dir> <bucket-or-s3-uri> [prefix] [--workers N]
+            [--part-size-mb N] [--state-file PATH] [--summary PATH] [--endpoint-url URL]
+    """
+    parser = argparse.ArgumentParser(
+        description="Upload a directory to S3 with concurrent multipart uploads and checksum-based skipping",
+        epilog=(
+            "Example:\n"
+            "  python s3sync.py ./upload my-bucket iceberg/data --workers 16 --part-size-mb 64\n"
+            "  python s3sync.py ./upload s3://my-bucket/iceberg --summary output/s3sync-summary.json\n"
+            "  python s3sync.py ./upload test-bucket --endpoint-url http://localhost:5000   # local stand-in"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("source_dir", type=Path, help="Directory to upload (contents, recursively)")
+    parser.add_argument("destination", help="Bucket name or s3://bucket/prefix URI")
+    parser.add_argument("prefix", nargs='?', default='', help="Optional key prefix under the destination")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent file and part uploads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--part-size-mb", type=int, default=DEFAULT_PART_SIZE_MB,
+                        help=f"Multipart part size; larger files are uploaded in parts "
+                             f"(default: {DEFAULT_PART_SIZE_MB}, minimum: 5)")
+    parser.add_argument("--state-file", type=Path, default=Path(DEFAULT_STATE_FILE),
+                        help=f"Resumable upload and digest state (default: {DEFAULT_STATE_FILE})")
+    parser.add_argument("--summary", type=Path, help="Also write the JSON summary here")
+    parser.add_argument("--endpoint-url", default=os.environ.get('AWS_ENDPOINT_URL'),
+                        help="S3-compatible endpoint, e.g. a local stand-in (default: $AWS_ENDPOINT_URL)")
+    parser.add_argument("--profile", default=os.environ.get('AWS_PROFILE'), help="AWS profile")
+    parser.add_argument("--region", default=os.environ.get('AWS_REGION'), help="AWS region")
+    parser.add_argument("--acl", default='private', help="Canned ACL for uploaded objects, or 'none' (default: private)")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be uploaded without uploading")
+    args = parser.parse_args()
+
+    if not args.source_dir.is_dir():
+        print(f"Error: Directory not found: {args.source_dir}", file=sys.stderr)
+        sys.exit(1)
+    if args.workers < 1:
+        print("Error: --workers must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    if args.part_size_mb < MIN_PART_SIZE // MB:
+        print(f"Error: --part-size-mb must be at least {MIN_PART_SIZE // MB}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        bucket, prefix = parse_destination(args.destination, args.prefix)
+        client = create_client(args.endpoint_url, args.profile, args.region, args.workers)
+        syncer = S3Sync(
+            client, bucket, prefix,
+            workers=args.workers,
+            part_size=args.part_size_mb * MB,
+            state=SyncState(args.state_file),
+            acl=None if args.acl.lower() == 'none' else args.acl,
+            dry_run=args.dry_run
+        )
+        print(f"Syncing {args.source_dir} to s3://{bucket}/{prefix} "
+              f"({args.workers} workers, {args.part_size_mb} MB parts)...")
+        summary = syncer.sync(args.source_dir)
+    except S3SyncError as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted; rerun to resume unfinished multipart uploads", file=sys.stderr)
+        sys.exit(130)
+    except Exception as e:
+        print(f"\nERROR: Sync failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(summary, indent=2))
+    if args.summary:
+        args.summary.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    sys.exit(1 if summary['failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()
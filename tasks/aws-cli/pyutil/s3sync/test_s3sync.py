@@ -0,0 +1,114 @@
+"""
+Tests for s3sync against moto's in-process S3 mock.
+
+Run with: python -m pytest tasks/aws-cli/pyutil/s3sync
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from s3sync import MB, S3Sync, SyncState  # noqa: E402
+
+BUCKET = 'sync-bucket'
+PREFIX = 'iceberg/'
+PART_SIZE = 5 * MB
+
+
+class FailingPartClient:
+    """Delegate to a real S3 client, but fail one upload_part call to simulate an interrupted run."""
+
+    def __init__(self, client, fail_part: int):
+        self._client = client
+        self.fail_part = fail_part
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def upload_part(self, **kwargs):
+        if kwargs['PartNumber'] == self.fail_part:
+            raise ConnectionError(f"connection reset during part {self.fail_part}")
+        return self._client.upload_part(**kwargs)
+
+
+@pytest.fixture
+def s3(monkeypatch, tmp_path):
+    """A mocked S3 client with an empty bucket."""
+    for name in ('AWS_PROFILE', 'AWS_ENDPOINT_URL'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_CONFIG_FILE', str(tmp_path / 'aws-config'))
+    monkeypatch.setenv('AWS_SHARED_CREDENTIALS_FILE', str(tmp_path / 'aws-credentials'))
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A directory with one small file and one file that needs three parts."""
+    directory = tmp_path / 'upload'
+    (directory / 'data').mkdir(parents=True)
+    (directory / 'metadata.json').write_text('{"format-version": 2}')
+    (directory / 'data' / 'large.parquet').write_bytes(os.urandom(2 * PART_SIZE + MB))
+    return directory
+
+
+def syncer(client, state_file: Path, workers: int = 4) -> S3Sync:
+    return S3Sync(client, BUCKET, PREFIX, workers=workers, part_size=PART_SIZE, state=SyncState(state_file))
+
+
+def remote_bytes(client, key: str) -> bytes:
+    return client.get_object(Bucket=BUCKET, Key=key)['Body'].read()
+
+
+def test_multipart_upload_then_skip_on_rerun(s3, source, tmp_path):
+    first = syncer(s3, tmp_path / 'state.json').sync(source)
+
+    assert (first['uploaded'], first['multipart'], first['failed']) == (2, 1, 0)
+    large = source / 'data' / 'large.parquet'
+    assert remote_bytes(s3, PREFIX + 'data/large.parquet') == large.read_bytes()
+    etag = s3.head_object(Bucket=BUCKET, Key=PREFIX + 'data/large.parquet')['ETag'].strip('"')
+    assert etag.endswith('-3')
+
+    # A fresh state file forces the skip decision to rest on the remote ETags alone
+    second = syncer(s3, tmp_path / 'fresh-state.json').sync(source)
+    assert (second['uploaded'], second['skipped'], second['failed']) == (0, 2, 0)
+
+
+def test_changed_file_is_uploaded_again(s3, source, tmp_path):
+    syncer(s3, tmp_path / 'state.json').sync(source)
+    (source / 'metadata.json').write_text('{"format-version": 3}')
+
+    summary = syncer(s3, tmp_path / 'state.json').sync(source)
+
+    assert (summary['uploaded'], summary['skipped']) == (1, 1)
+    assert remote_bytes(s3, PREFIX + 'metadata.json') == b'{"format-version": 3}'
+
+
+def test_interrupted_multipart_upload_resumes(s3, source, tmp_path):
+    state_file = tmp_path / 'state.json'
+    interrupted = syncer(FailingPartClient(s3, fail_part=2), state_file, workers=1).sync(source)
+
+    assert interrupted['failed'] == 1
+    assert interrupted['errors'][0]['key'] == PREFIX + 'data/large.parquet'
+    assert list(SyncState(state_file).uploads) == [PREFIX + 'data/large.parquet']
+    assert 'Contents' not in s3.list_objects_v2(Bucket=BUCKET, Prefix=PREFIX + 'data/')
+
+    resumed = syncer(s3, state_file, workers=1).sync(source)
+
+    assert (resumed['uploaded'], resumed['skipped'], resumed['failed']) == (1, 1, 0)
+    assert resumed['resumed_parts'] >= 1
+    assert SyncState(state_file).uploads == {}
+    large = source / 'data' / 'large.parquet'
+    assert remote_bytes(s3, PREFIX + 'data/large.parquet') == large.read_bytes()
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', []) == []
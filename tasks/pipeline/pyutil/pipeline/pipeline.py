@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+pipeline - run a graph of setup steps concurrently, skipping steps whose inputs have not changed
+
+A pipeline is a JSON file listing steps. Each step declares the command it
+runs, the environment variables and files it reads (inputs) and the files
+it writes (outputs). A step depends on every step that produces one of its
+inputs, plus any steps listed in 'needs'. Steps run as soon as their
+dependencies have finished, so independent branches run concurrently.
+
+Before a step runs, its inputs are fingerprinted (command, environment
+values, file contents or selected JSON fields). If the fingerprint matches
+the last successful run and the outputs still exist, the step is skipped.
+Fingerprints and per-step timings are kept in a state file.
+Each run is also recorded by telemetry, with one 'step:<name>' phase per
+step that ran; the tools a step starts log this run as their parent.
+
+Step fields:
+    name      unique step name
+    cmd       argument list; $VARS are expanded from the environment
+    dir       working directory, relative to the repository root (default: root)
+    env       environment variable names that are inputs
+    inputs    file globs (relative to the root), or {"file": PATH, "json": [".a.b", ...]}
+              to fingerprint only selected fields of a JSON file
+    outputs   files the step writes (relative to the root)
+    needs     steps that must finish first without handing over a file
+    cache     false to always run the step (default: true)
+
+Usage:
+    python pipeline.py <pipeline.json> [--workers N] [--force] [--force-step NAME]
+        [--dry-run] [--state-file PATH] [--report PATH]
+    python pipeline.py <pipeline.json> --reset
+"""
+
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# Make the shared tasks/pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'pyutil'))
+
+from telemetry import telemetry  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
+
+DEFAULT_STATE_FILE = 'output/pipeline-state.json'
+DEFAULT_WORKERS = 4
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline definition is invalid."""
+
+
+class Step:
+    """One step of a pipeline, as declared in the pipeline file."""
+
+    def __init__(self, spec: Dict):
+        if not spec.get('name') or not spec.get('cmd'):
+            raise PipelineError(f"Every step needs a 'name' and a 'cmd': {spec}")
+        self.name: str = spec['name']
+        self.cmd: List[str] = spec['cmd'] if isinstance(spec['cmd'], list) else [spec['cmd']]
+        self.dir: str = spec.get('dir', '.')
+        self.env: List[str] = spec.get('env', [])
+        self.inputs: List = spec.get('inputs', [])
+        self.outputs: List[str] = spec.get('outputs', [])
+        self.needs: List[str] = spec.get('needs', [])
+        self.cache: bool = spec.get('cache', True)
+        self.deps: Set[str] = set()
+
+    def input_paths(self) -> List[str]:
+        return [i['file'] if isinstance(i, dict) else i for i in self.inputs]
+
+
+def load_pipeline(path: Path) -> Dict:
+    """
+    Load a pipeline file and resolve each step's dependencies.
+
+    Returns:
+        {'name': str, 'steps': {name: Step}} with steps in declaration order
+
+    Raises:
+        PipelineError: On duplicate names, unknown 'needs', or a dependency cycle
+    """
+    with open(path, 'r') as f:
+        spec = json.load(f)
+
+    steps: Dict[str, Step] = {}
+    for step_spec in spec.get('steps', []):
+        step = Step(step_spec)
+        if step.name in steps:
+            raise PipelineError(f"Duplicate step name '{step.name}'")
+        steps[step.name] = step
+
+    producers: Dict[str, str] = {}
+    for step in steps.values():
+        for output in step.outputs:
+            producers[os.path.normpath(output)] = step.name
+
+    for step in steps.values():
+        for need in step.needs:
+            if need not in steps:
+                raise PipelineError(f"Step '{step.name}' needs unknown step '{need}'")
+            step.deps.add(need)
+        for pattern in step.input_paths():
+            for output, producer in producers.items():
+                if producer != step.name and (
+                        os.path.normpath(pattern) == output or fnmatch.fnmatch(output, os.path.normpath(pattern))):
+                    step.deps.add(producer)
+
+    # Reject cycles (depth-first search)
+    visiting: Set[str] = set()
+    done: Set[str] = set()
+
+    def visit(name: str, trail: List[str]) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise PipelineError(f"Dependency cycle: {' -> '.join(trail + [name])}")
+        visiting.add(name)
+        for dep in sorted(steps[name].deps):
+            visit(dep, trail + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in steps:
+        visit(name, [])
+
+    return {'name': spec.get('name', path.stem), 'steps': steps}
+
+
+def _select_json(data, selector: str):
+    value = data
+    for key in filter(None, selector.split('.')):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def fingerprint(step: Step, root: Path = ROOT_DIR, needed: Optional[List[str]] = None) -> str:
+    """
+    Hash everything a step reads: its command, env values and input files.
+
+    Missing input files hash as missing, so a step re-runs once they appear.
+
+    Args:
+        step: Step to fingerprint
+        root: Directory input paths are relative to
+        needed: Last fingerprints of the steps in 'needs', so a step re-runs
+            after a step it needs ran with different inputs
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([step.cmd, step.dir, needed or []]).encode('utf-8'))
+    for name in sorted(step.env):
+        digest.update(f"\0env:{name}={os.environ.get(name, '')}".encode('utf-8'))
+
+    for spec in step.inputs:
+        if isinstance(spec, dict):
+            path = root / spec['file']
+            digest.update(f"\0json:{spec['file']}".encode('utf-8'))
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                selected = [_select_json(data, selector) for selector in spec.get('json', [''])]
+                digest.update(json.dumps(selected, sort_keys=True).encode('utf-8'))
+            except (OSError, json.JSONDecodeError):
+                digest.update(b'\0missing')
+            continue
+
+        matches = sorted(glob.glob(str(root / spec), recursive=True))
+        digest.update(f"\0files:{spec}:{len(matches)}".encode('utf-8'))
+        for match in matches:
+            if not os.path.isfile(match):
+                continue
+            digest.update(f"\0{os.path.relpath(match, root)}".encode('utf-8'))
+            with open(match, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+class PipelineState:
+    """Last fingerprint, status and timing of each step, persisted as JSON."""
+
+    def __init__(self, path: Path, pipeline_name: str):
+        self.path = path
+        self.pipeline_name = pipeline_name
+        self._lock = threading.Lock()
+        self.data: Dict = {}
+        if path.exists():
+            try:
+                with open(path, 'r') as f:
+                    self.data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️  Ignoring unreadable state file {path}: {e}")
+
+    def get(self, step: str) -> Dict:
+        with self._lock:
+            return dict(self.data.get(self.pipeline_name, {}).get(step, {}))
+
+    def record(self, step: str, entry: Dict) -> None:
+        with self._lock:
+            self.data.setdefault(self.pipeline_name, {})[step] = entry
+            self._save()
+
+    def reset(self) -> None:
+        """Forget every step of this pipeline, so the next run executes all of them."""
+        with self._lock:
+            if self.data.pop(self.pipeline_name, None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        text = json.dumps(self.data, indent=2, sort_keys=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+
+class PipelineRunner:
+    """
+    Runs the steps of a loaded pipeline.
+
+    Args:
+        pipeline: Result of load_pipeline
+        state: Fingerprint / timing state
+        workers: Maximum steps running at once
+        force: Run every step regardless of fingerprints
+        force_steps: Names of steps to run regardless of fingerprints
+        dry_run: Only report which steps would run
+        root: Repository root that step paths are relative to
+    """
+
+    def __init__(self, pipeline: Dict, state: PipelineState, workers: int = DEFAULT_WORKERS,
+                 force: bool = False, force_steps: Optional[List[str]] = None,
+                 dry_run: bool = False, root: Path = ROOT_DIR):
+        self.steps: Dict[str, Step] = pipeline['steps']
+        self.state = state
+        self.workers = workers
+        self.force = force
+        self.force_steps = set(force_steps or [])
+        self.dry_run = dry_run
+        self.root = root
+        self._print_lock = threading.Lock()
+
+        unknown = self.force_steps - set(self.steps)
+        if unknown:
+            raise PipelineError(f"Unknown step(s) for --force-step: {', '.join(sorted(unknown))}")
+
+    def _log(self, step: str, line: str) -> None:
+        with self._print_lock:
+            print(f"[{step}] {line}", flush=True)
+
+    def is_current(self, step: Step, current: str) -> bool:
+        """True if the step ran successfully with this fingerprint and its outputs exist."""
+        if self.force or step.name in self.force_steps or not step.cache:
+            return False
+        last = self.state.get(step.name)
+        if last.get('status') != 'ok' or last.get('fingerprint') != current:
+            return False
+        return all(glob.glob(str(self.root / output)) for output in step.outputs)
+
+    def _execute(self, step: Step) -> None:
+        """Run the step's command, prefixing its output with the step name."""
+        args = [os.path.expandvars(arg) for arg in step.cmd]
+        process = subprocess.Popen(
+            args,
+            cwd=self.root / step.dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        for line in process.stdout:
+            self._log(step.name, line.rstrip('\n'))
+        returncode = process.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, args)
+
+    def run_step(self, step: Step) -> Dict:
+        """Run one step unless it is current; returns its result entry."""
+        needed = [self.state.get(name).get('fingerprint', '') for name in sorted(step.needs)]
+        current = fingerprint(step, self.root, needed)
+        if self.is_current(step, current):
+            last = self.state.get(step.name)
+            self._log(step.name, f"⊘ unchanged since {last.get('finished_at', '?')}, skipped")
+            return {'status': 'cached', 'seconds': 0.0, 'last_seconds': last.get('seconds')}
+        if self.dry_run:
+            self._log(step.name, f"▶ would run: {' '.join(step.cmd)}")
+            return {'status': 'would_run', 'seconds': 0.0}
+
+        self._log(step.name, f"▶ {' '.join(step.cmd)}")
+        started = time.perf_counter()
+        status = 'failed'
+        try:
+            self._execute(step)
+            missing = [o for o in step.outputs if not glob.glob(str(self.root / o))]
+            if missing:
+                raise PipelineError(f"Step finished but did not write: {', '.join(missing)}")
+            status = 'ok'
+        finally:
+            # A failed run replaces the last good fingerprint, so the step runs again next time
+            seconds = round(time.perf_counter() - started, 3)
+            telemetry.record(f"step:{step.name}", seconds, error=status != 'ok')
+            telemetry.count('failures', int(status != 'ok'))
+            self.state.record(step.name, {
+                'status': status,
+                'fingerprint': current,
+                'seconds': seconds,
+                'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            })
+        self._log(step.name, f"✓ done in {seconds:.1f}s")
+        return {'status': 'ran', 'seconds': seconds}
+
+    def run(self) -> Dict[str, Dict]:
+        """
+        Run all steps, each once its dependencies have succeeded (or were cached).
+
+        A failed step's dependents are skipped; independent branches keep going.
+
+        Returns:
+            {step: {'status': 'ran' | 'cached' | 'would_run' | 'failed' | 'skipped', 'seconds', ...}}
+        """
+        results: Dict[str, Dict] = {}
+        pending = dict(self.steps)
+        running = {}
+        succeeded = ('ran', 'cached', 'would_run')
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    statuses = [results.get(dep, {}).get('status') for dep in step.deps]
+                    if any(s in ('failed', 'skipped') for s in statuses):
+                        results[name] = {'status': 'skipped', 'seconds': 0.0, 'error': 'dependency failed'}
+                        del pending[name]
+                    elif all(s in succeeded for s in statuses):
+                        running[executor.submit(self.run_step, step)] = name
+                        del pending[name]
+
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        results[name] = {'status': 'failed', 'seconds': 0.0, 'error': str(e)}
+                        self._log(name, f"✗ {e}")
+
+        return {name: results[name] for name in self.steps}
+
+
+def print_summary(name: str, results: Dict[str, Dict], seconds: float) -> None:
+    """Print per-step status and timings."""
+    print(f"\n{'='*60}")
+    print(f"Pipeline '{name}' finished in {seconds:.1f}s")
+    print(f"{'='*60}")
+    marks = {'ran': '✓', 'cached': '⊘', 'would_run': '▶', 'failed': '✗', 'skipped': '⊘'}
+    for step, result in results.items():
+        if result['status'] == 'cached' and result.get('last_seconds') is not None:
+            timing = f"cached (last run {result['last_seconds']:.1f}s)"
+        elif result['status'] == 'skipped':
+            timing = f"skipped - {result.get('error', '')}"
+        elif result['status'] == 'failed':
+            timing = f"failed - {result.get('error', '')}"
+        else:
+            timing = f"{result['seconds']:.1f}s" if result['status'] == 'ran' else result['status']
+        print(f"  {marks[result['status']]} {step:<28} {timing}")
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python pipeline.py <pipeline.json> [--workers N] [--force] [--force-step NAME]
+            [--dry-run] [--state-file PATH] [--report PATH]
+        python pipeline.py <pipeline.json> --reset
+    """
+    parser = argparse.ArgumentParser(
+        description="Run a pipeline of setup steps concurrently, skipping steps whose inputs are unchanged",
+        epilog=(
+            "Example:\n"
+            "  python pipeline.py tasks/pipeline/json/infrastructure-up.json\n"
+            "  python pipeline.py tasks/pipeline/json/infrastructure-up.json --dry-run\n"
+            "  python pipeline.py tasks/pipeline/json/infrastructure-up.json --force-step upload-to-stage\n"
+            "  python pipeline.py tasks/pipeline/json/infrastructure-up.json --reset"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("pipeline", type=Path, help="Pipeline definition (JSON)")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                        help=f"Maximum steps running at once (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--force", action="store_true", help="Run every step, ignoring fingerprints")
+    parser.add_argument("--force-step", action="append", default=[], metavar="NAME",
+                        help="Run this step even if its inputs are unchanged (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Show which steps would run")
+    parser.add_argument("--reset", action="store_true",
+                        help="Forget the recorded fingerprints of this pipeline and exit (use after teardown)")
+    parser.add_argument("--state-file", type=Path, default=ROOT_DIR / DEFAULT_STATE_FILE,
+                        help=f"Fingerprint and timing state (default: {DEFAULT_STATE_FILE})")
+    parser.add_argument("--report", type=Path, help="Write per-step results and timings here as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        pipeline = load_pipeline(args.pipeline)
+        if args.reset:
+            PipelineState(args.state_file, pipeline['name']).reset()
+            print(f"✓ Cleared recorded state of pipeline '{pipeline['name']}' in {args.state_file}")
+            return
+        runner = PipelineRunner(
+            pipeline,
+            PipelineState(args.state_file, pipeline['name']),
+            workers=args.workers,
+            force=args.force,
+            force_steps=args.force_step,
+            dry_run=args.dry_run
+        )
+        results = runner.run()
+    except (OSError, json.JSONDecodeError, PipelineError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    seconds = time.perf_counter() - started
+    print_summary(pipeline['name'], results, seconds)
+
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, 'w') as f:
+            json.dump({'pipeline': pipeline['name'], 'seconds': round(seconds, 3), 'steps': results}, f, indent=2)
+
+    sys.exit(1 if any(r['status'] in ('failed', 'skipped') for r in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    with telemetry.run('pipeline'):
+        main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+eventgen - generate large, reproducible customer_events files for load testing
+
+Writes synthetic events in the same shape as upload/customer_events_00N.json:
+event_id, timestamp and event_type at the top level, PII under customer.*
+(and the other nested objects the sample events use), plus per-type
+payloads such as orders, tickets and calls. Files are named
+customer_events_<NNNNN>.json so the stage pattern the COPY in the notebook
+uses ('.*customer_events_.*\\.json') picks them up unchanged.
+
+Output is streamed: each file is written event by event, and files are
+spread over a process pool. Every file's content depends only on --seed and
+its index, so the same options always produce byte-identical files,
+whatever the number of workers.
+
+Knobs:
+    --events / --size-mb   total number of events, or total size to reach
+    --files                number of files the total is split over
+    --customers            size of the customer pool events are drawn from
+    --skew                 Zipf exponent of customer and event-type popularity
+                           (0 = uniform; 1.1 = a few customers dominate)
+    --null-rate            probability that each optional PII field is null
+    --format               ndjson (one event per line) or json (one array per file;
+                           COPY then needs STRIP_OUTER_ARRAY = TRUE)
+
+Usage:
+    python eventgen.py [output_dir] [--events N | --size-mb N] [--files N] [--workers N]
+        [--seed N] [--customers N] [--skew S] [--null-rate R] [--format ndjson|json]
+        [--start ISO-DATE] [--days N]
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
+
+DEFAULT_OUTPUT_DIR = ROOT_DIR / 'output' / 'eventgen'
+DEFAULT_START = '2024-11-01T00:00:00Z'
+FORMATS = ('ndjson', 'json')
+FILE_PREFIX = 'customer_events_'
+MB = 1024 * 1024
+
+# Names this tool writes; only these are cleared from the output directory
+FILE_NAME_RE = re.compile(r'^customer_events_\d{5}\.json$')
+
+FIRST_NAMES = ['Alice', 'Bob', 'Carol', 'David', 'Emma', 'Frank', 'Grace', 'Henry', 'Isabella', 'James',
+               'Karen', 'Liam', 'Maria', 'Noah', 'Olivia', 'Paul', 'Quinn', 'Rosa', 'Samuel', 'Tara',
+               'Umar', 'Vera', 'William', 'Ximena', 'Yusuf', 'Zoe']
+LAST_NAMES = ['Johnson', 'Smith', 'Garcia', 'Chen', 'Williams', 'Brown', 'Rodriguez', 'Martinez', 'Lee',
+              'Wilson', 'Anderson', 'Taylor', 'Thomas', 'Moore', 'Jackson', 'Martin', 'Thompson', 'White',
+              'Lopez', 'Harris', 'Clark', 'Lewis', 'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott']
+EMAIL_DOMAINS = ['email.com', 'example.com', 'mail.net', 'inbox.org']
+STREETS = ['Main St', 'Oak Ave', 'Pine Rd', 'Maple Dr', 'Cedar Ln', 'Elm St', 'Lake Blvd', 'Hill Way']
+CITIES = [('San Francisco', 'CA', '941'), ('Austin', 'TX', '787'), ('Seattle', 'WA', '981'),
+          ('Denver', 'CO', '802'), ('Boston', 'MA', '021'), ('Chicago', 'IL', '606'),
+          ('Miami', 'FL', '331'), ('Portland', 'OR', '972')]
+PRODUCTS = [('PROD-001', 'Laptop Stand', 149.99), ('PROD-002', 'Wireless Mouse', 29.99),
+            ('PROD-003', 'USB-C Hub', 59.99), ('PROD-004', 'Mechanical Keyboard', 119.0),
+            ('PROD-005', 'Monitor Arm', 89.5), ('PROD-006', 'Webcam', 74.99),
+            ('PROD-007', 'Desk Lamp', 39.0), ('PROD-008', 'Noise Cancelling Headphones', 249.0)]
+TICKET_SUBJECTS = ['Order not received', 'Charged twice', 'Cannot log in', 'Damaged item',
+                   'Change shipping address', 'Cancel subscription']
+PAYMENT_METHODS = ['credit_card', 'debit_card', 'paypal', 'apple_pay']
+
+# Timestamps spread over this many seconds after --start by default
+DEFAULT_DAYS = 30
+
+# PII fields that --null-rate may null out; identifiers are always present
+NULLABLE_FIELDS = {'name', 'email', 'phone', 'ssn', 'date_of_birth', 'billing_address', 'ip_address'}
+
+
+def parse_start(value: str) -> datetime:
+    """Parse an ISO-8601 date or timestamp (a trailing Z means UTC)."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def zipf_cum_weights(n: int, skew: float) -> List[float]:
+    """Cumulative weights of a Zipf(skew) distribution over ranks 1..n (skew 0 = uniform)."""
+    return list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+
+def customer(cid: int) -> Dict[str, str]:
+    """
+    PII of customer `cid`, derived from the id alone.
+
+    The same customer therefore has the same name, email and SSN in every
+    event and every file, so joins and redaction checks line up.
+    """
+    first = FIRST_NAMES[cid % len(FIRST_NAMES)]
+    last = LAST_NAMES[(cid // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    city, state, zip_prefix = CITIES[(cid * 7) % len(CITIES)]
+    mix = (cid * 2654435761) & 0xFFFFFFFF
+    return {
+        'id': f"cust_{cid:08d}",
+        'name': f"{first} {last}",
+        'email': f"{first.lower()}.{last.lower()}{cid}@{EMAIL_DOMAINS[cid % len(EMAIL_DOMAINS)]}",
+        'phone': f"+1-555-{mix % 900 + 100:03d}-{(mix // 900) % 10000:04d}",
+        'ssn': f"{mix % 665 + 100:03d}-{(mix // 665) % 90 + 10:02d}-{(mix // 59850) % 9000 + 1000:04d}",
+        'date_of_birth': f"{1950 + mix % 50}-{mix % 12 + 1:02d}-{mix % 28 + 1:02d}",
+        'billing_address': f"{mix % 9000 + 100} {STREETS[mix % len(STREETS)]}, {city}, {state} "
+                           f"{zip_prefix}{mix % 100:02d}",
+        'ip_address': f"198.51.{mix % 256}.{(mix // 256) % 254 + 1}",
+    }
+
+
+def _address(rng: random.Random) -> Dict[str, str]:
+    city, state, zip_prefix = rng.choice(CITIES)
+    return {'street': f"{rng.randint(100, 9999)} {rng.choice(STREETS)}", 'city': city, 'state': state,
+            'zip': f"{zip_prefix}{rng.randint(0, 99):02d}"}
+
+
+def _purchase(rng: random.Random, c: Dict, n: int) -> Dict:
+    items = []
+    for product_id, name, price in rng.sample(PRODUCTS, rng.randint(1, 3)):
+        items.append({'product_id': product_id, 'name': name, 'quantity': rng.randint(1, 4), 'price': price})
+    total = round(sum(item['quantity'] * item['price'] for item in items), 2)
+    return {
+        'customer': {k: c[k] for k in ('id', 'name', 'email', 'phone', 'ssn')},
+        'order': {'order_id': f"ORD-{n:010d}", 'total_amount': total, 'currency': 'USD', 'items': items},
+        'payment': {'method': rng.choice(PAYMENT_METHODS), 'card_last_four': f"{rng.randint(0, 9999):04d}",
+                    'billing_address': _address(rng)},
+    }
+
+
+def _support_ticket(rng: random.Random, c: Dict, n: int) -> Dict:
+    return {
+        'customer': {k: c[k] for k in ('id', 'name', 'email', 'phone')},
+        'ticket': {'ticket_id': f"TKT-{n:010d}", 'subject': rng.choice(TICKET_SUBJECTS),
+                   'priority': rng.choice(['low', 'medium', 'high']),
+                   'description': f"Customer {c['name']} reports: {rng.choice(TICKET_SUBJECTS).lower()}. "
+                                  f"Reach them at {c['phone']} or {c['email']}."},
+    }
+
+
+def _account_update(rng: random.Random, c: Dict, n: int) -> Dict:
+    new_phone = f"+1-555-{rng.randint(100, 999)}-{rng.randint(0, 9999):04d}"
+    return {
+        'customer': {k: c[k] for k in ('id', 'name', 'email', 'date_of_birth', 'ssn')},
+        'changes': {'address': _address(rng), 'phone': {'old': c['phone'], 'new': new_phone}},
+    }
+
+
+def _login_failed(rng: random.Random, c: Dict, n: int) -> Dict:
+    return {
+        'username': c['email'].split('@')[0],
+        'email': c['email'],
+        'ip_address': c['ip_address'],
+        'failure_reason': rng.choice(['invalid_password', 'account_locked', 'mfa_timeout']),
+        'attempts': rng.randint(1, 6),
+    }
+
+
+def _refund(rng: random.Random, c: Dict, n: int) -> Dict:
+    return {
+        'customer': {k: c[k] for k in ('id', 'name', 'email', 'billing_address')},
+        'refund': {'order_id': f"ORD-{rng.randint(0, max(1, n)):010d}", 'amount': round(rng.uniform(5, 500), 2),
+                   'reason': rng.choice(['damaged', 'late_delivery', 'wrong_item', 'changed_mind'])},
+    }
+
+
+def _customer_service_call(rng: random.Random, c: Dict, n: int) -> Dict:
+    return {
+        'caller': {'name': c['name'], 'phone': c['phone'], 'account_id': c['id'], 'email': c['email'],
+                   'ssn': c['ssn']},
+        'call_duration_seconds': rng.randint(30, 1800),
+        'agent_id': f"agent_{rng.randint(1, 200):03d}",
+        'resolution': rng.choice(['issue_resolved', 'escalated', 'callback_scheduled']),
+        'notes': f"Caller verified with SSN {c['ssn']}. Card ending in {rng.randint(0, 9999):04d} discussed.",
+    }
+
+
+def _cart_abandoned(rng: random.Random, c: Dict, n: int) -> Dict:
+    return {
+        'session_id': f"sess_{rng.getrandbits(48):012x}",
+        'user': {'id': c['id'], 'email': c['email']},
+        'cart_value': round(rng.uniform(10, 900), 2),
+        'items_count': rng.randint(1, 8),
+    }
+
+
+# Event types in popularity order (rank 1 first) for --skew
+EVENT_TYPES: List[Tuple[str, Callable[[random.Random, Dict, int], Dict]]] = [
+    ('purchase', _purchase),
+    ('support_ticket', _support_ticket),
+    ('login_failed', _login_failed),
+    ('cart_abandoned', _cart_abandoned),
+    ('account_update', _account_update),
+    ('refund_request', _refund),
+    ('customer_service_call', _customer_service_call),
+]
+
+
+def _null_fields(value, rng: random.Random, rate: float):
+    """Null out nullable PII fields in nested objects with probability `rate` each."""
+    if isinstance(value, dict):
+        return {k: (None if k in NULLABLE_FIELDS and isinstance(v, str) and rng.random() < rate
+                    else _null_fields(v, rng, rate)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_null_fields(v, rng, rate) for v in value]
+    return value
+
+
+class EventGenerator:
+    """Deterministic event stream for one output file."""
+
+    def __init__(self, seed: int, file_index: int, customers: int, skew: float, null_rate: float,
+                 start: datetime, days: float):
+        # Seeded from (seed, file index) so a file never depends on which worker wrote it
+        self.rng = random.Random(f"{seed}:{file_index}")
+        self.file_index = file_index
+        self.customer_weights = zipf_cum_weights(customers, skew)
+        self.type_weights = zipf_cum_weights(len(EVENT_TYPES), skew)
+        self.null_rate = null_rate
+        self.start = start
+        self.span_seconds = max(1, int(days * 86400))
+        self.count = 0
+
+    def _pick(self, cum_weights: List[float]) -> int:
+        return bisect.bisect_left(cum_weights, self.rng.random() * cum_weights[-1])
+
+    def next_event(self) -> Dict:
+        n = self.count
+        self.count += 1
+        cid = self._pick(self.customer_weights) + 1
+        event_type, build = EVENT_TYPES[self._pick(self.type_weights)]
+        timestamp = self.start + timedelta(seconds=self.rng.randrange(self.span_seconds))
+        event = {
+            'event_id': f"evt_{self.file_index:05d}_{n:09d}",
+            'timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'event_type': event_type,
+        }
+        payload = build(self.rng, customer(cid), self.file_index * 1_000_000_000 + n)
+        if self.null_rate:
+            payload = _null_fields(payload, self.rng, self.null_rate)
+        event.update(payload)
+        return event
+
+
+def file_name(index: int) -> str:
+    return f"{FILE_PREFIX}{index:05d}.json"
+
+
+def write_file(path: Path, generator: EventGenerator, events: Optional[int], max_bytes: Optional[int],
+               fmt: str) -> Dict:
+    """
+    Stream events into one file until `events` are written or `max_bytes` is reached.
+
+    Returns:
+        {'file', 'events', 'bytes'}
+    """
+    written = 0
+    size = 0
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        if fmt == 'json':
+            f.write('[\n')
+            size += 2
+        while (events is None or written < events) and (max_bytes is None or size < max_bytes):
+            line = json.dumps(generator.next_event())
+            if fmt == 'json' and written:
+                line = ',\n' + line
+            elif fmt == 'ndjson':
+                line += '\n'
+            f.write(line)
+            # json.dumps escapes non-ASCII, so characters are bytes
+            size += len(line)
+            written += 1
+        if fmt == 'json':
+            f.write('\n]\n')
+            size += 3
+    os.replace(tmp, path)
+    return {'file': path.name, 'events': written, 'bytes': size}
+
+
+def _write_file_task(args: Tuple) -> Dict:
+    path, generator_args, events, max_bytes, fmt = args
+    return write_file(path, EventGenerator(*generator_args), events, max_bytes, fmt)
+
+
+def generate(
+    output_dir: Path,
+    files: int,
+    events: Optional[int] = None,
+    size_mb: Optional[float] = None,
+    seed: int = 42,
+    customers: int = 10000,
+    skew: float = 1.1,
+    null_rate: float = 0.0,
+    fmt: str = 'ndjson',
+    start: str = DEFAULT_START,
+    days: float = DEFAULT_DAYS,
+    workers: Optional[int] = None,
+    verbose: bool = True
+) -> Dict:
+    """
+    Generate `files` files holding `events` events, or about `size_mb` MB, in total.
+
+    Returns:
+        Manifest: {'options': {...}, 'files': [{'file', 'events', 'bytes'}], 'events', 'bytes', 'seconds'}
+
+    Raises:
+        ValueError: On invalid options
+    """
+    if (events is None) == (size_mb is None):
+        raise ValueError("Give exactly one of events or size_mb")
+    if files < 1 or customers < 1 or not 0 <= null_rate <= 1 or skew < 0:
+        raise ValueError("files and customers must be positive, null_rate in [0, 1] and skew >= 0")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    start_at = parse_start(start)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for stale in output_dir.iterdir():
+        if stale.is_file() and FILE_NAME_RE.match(stale.name):
+            stale.unlink()
+
+    tasks = []
+    for index in range(files):
+        generator_args = (seed, index, customers, skew, null_rate, start_at, days)
+        if events is not None:
+            per_file, extra = divmod(events, files)
+            tasks.append((output_dir / file_name(index), generator_args, per_file + (index < extra), None, fmt))
+        else:
+            tasks.append((output_dir / file_name(index), generator_args, None,
+                          max(1, int(size_mb * MB / files)), fmt))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, files))
+    if verbose:
+        target = f"{events:,} events" if events is not None else f"{size_mb} MB"
+        print(f"Generating {target} in {files} {fmt} file(s) under {output_dir}")
+        print(f"  Seed {seed}, {customers:,} customers, skew {skew}, null rate {null_rate}, workers {workers}")
+
+    started = time.perf_counter()
+    results = []
+    if workers == 1:
+        results = [_write_file_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_write_file_task, tasks))
+    seconds = time.perf_counter() - started
+
+    total_events = sum(r['events'] for r in results)
+    total_bytes = sum(r['bytes'] for r in results)
+    if verbose:
+        rate = total_bytes / seconds / MB if seconds else 0.0
+        print(f"  ✓ {total_events:,} events, {total_bytes / MB:.1f} MB in {seconds:.1f}s ({rate:.1f} MB/s)")
+
+    return {
+        'options': {
+            'seed': seed, 'files': files, 'events': events, 'size_mb': size_mb, 'customers': customers,
+            'skew': skew, 'null_rate': null_rate, 'format': fmt, 'start': start, 'days': days,
+        },
+        'files': results,
+        'events': total_events,
+        'bytes': total_bytes,
+        'seconds': round(seconds, 3),
+    }
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python eventgen.py [output_dir] [--events N | --size-mb N] [--files N] [--workers N]
+            [--seed N] [--customers N] [--skew S] [--null-rate R] [--format ndjson|json]
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate reproducible synthetic customer_events files for load testing",
+        epilog=(
+            "Example:\n"
+            "  python eventgen.py --events 1000000 --files 16\n"
+            "  python eventgen.py ./output/eventgen --size-mb 2048 --files 32 --seed 7 --null-rate 0.05\n"
+            "  python eventgen.py --events 50000 --files 1 --format json --skew 0"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("output_dir", nargs='?', type=Path, default=DEFAULT_OUTPUT_DIR,
+                        help="Directory receiving the files (default: output/eventgen)")
+    total = parser.add_mutually_exclusive_group()
+    total.add_argument("--events", type=int, help="Total number of events (default: 100000)")
+    total.add_argument("--size-mb", type=float, help="Generate about this many MB in total instead")
+    parser.add_argument("--files", type=int, default=8, help="Number of output files (default: 8)")
+    parser.add_argument("--workers", "-w", type=int, help="Writer processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--customers", type=int, default=10000, help="Customer pool size (default: 10000)")
+    parser.add_argument("--skew", type=float, default=1.1,
+                        help="Zipf exponent for customer and event-type popularity, 0 = uniform (default: 1.1)")
+    parser.add_argument("--null-rate", type=float, default=0.0,
+                        help="Probability that each optional PII field is null (default: 0)")
+    parser.add_argument("--format", choices=FORMATS, default='ndjson', help="File format (default: ndjson)")
+    parser.add_argument("--start", default=DEFAULT_START, help=f"Earliest event timestamp (default: {DEFAULT_START})")
+    parser.add_argument("--days", type=float, default=DEFAULT_DAYS,
+                        help=f"Days the timestamps are spread over (default: {DEFAULT_DAYS})")
+    parser.add_argument("--manifest", type=Path,
+                        help="Write options and per-file counts here (default: output/eventgen-manifest.json)")
+    args = parser.parse_args()
+
+    if args.events is None and args.size_mb is None:
+        args.events = 100000
+
+    try:
+        manifest = generate(
+            args.output_dir,
+            files=args.files,
+            events=args.events,
+            size_mb=args.size_mb,
+            seed=args.seed,
+            customers=args.customers,
+            skew=args.skew,
+            null_rate=args.null_rate,
+            fmt=args.format,
+            start=args.start,
+            days=args.days,
+            workers=args.workers
+        )
+    except (OSError, ValueError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # Kept out of output_dir so uploading that directory only sends events
+    manifest_path = args.manifest or ROOT_DIR / 'output' / 'eventgen-manifest.json'
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"  Manifest: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+shredbench - compare shredded and unshredded VARIANT scans on a local Iceberg catalog
+
+Builds each table the benchmark queries read twice in the local warehouse:
+as is (one unshredded VARIANT column, as sparkbench builds it) and as
+<TABLE>_SHREDDED, rewritten by variantshred with the hot paths shredded.
+Every query then runs against both layouts in the same session. The
+queries are the notebook's SELECTs plus two that filter and group on a hot
+path, which is where Parquet can skip data rather than only decode less.
+
+For each query and layout it records scan time (median of --runs, through
+the 'noop' sink) and bytes read per run, taken from Spark's stage input
+metrics. It also records the size of each table and which hot paths the
+data files actually shred.
+
+Usage:
+    python shredbench.py [--scale N] [--runs N] [--warmup N] [--paths PATH:TYPE,...]
+        [--profile NAME] [--conf KEY=VALUE ...] [--output PATH] [--rebuild]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Make sibling pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sparkbench.sparkbench import (  # noqa: E402
+    DEFAULT_DATA_DIR,
+    DEFAULT_NOTEBOOK,
+    build_local_tables,
+    extract_notebook_queries,
+    referenced_tables,
+    time_query,
+)
+from sparksession.sparksession import (  # noqa: E402
+    DEFAULT_WAREHOUSE,
+    PROFILES,
+    ROOT_DIR,
+    SparkSessionError,
+    create_session,
+    error_summary,
+    parse_overrides,
+    spark_errors,
+)
+from variantshred.variantshred import (  # noqa: E402
+    DEFAULT_COLUMN,
+    DEFAULT_HOT_PATHS,
+    READ_SHREDDING_CONF,
+    describe_table,
+    parse_hot_paths,
+    write_shredded,
+)
+
+SHREDDED_SUFFIX = '_SHREDDED'
+LAYOUTS = ['unshredded', 'shredded']
+
+# Hot-path filters and aggregates, added to the notebook's projections
+FILTER_QUERIES: List[Dict[str, str]] = [
+    {
+        'name': 'filter-type',
+        'sql': "SELECT variant_get(EVENT_DATA, '$.event_id', 'string') AS event_id,\n"
+               "variant_get(EVENT_DATA, '$.customer.email', 'string') AS customer_email\n"
+               "FROM RAW.CUSTOMER_EVENTS\n"
+               "WHERE variant_get(EVENT_DATA, '$.event_type', 'string') = 'purchase'",
+    },
+    {
+        'name': 'count-by-type',
+        'sql': "SELECT variant_get(EVENT_DATA, '$.event_type', 'string') AS event_type, count(*) AS events\n"
+               "FROM RAW.CUSTOMER_EVENTS\n"
+               "GROUP BY 1",
+    },
+]
+
+
+def shredded_sql(sql: str, tables: List[str]) -> str:
+    """Point a query at the _SHREDDED copies of the tables it reads."""
+    for table in tables:
+        sql = re.sub(rf'\b{re.escape(table)}\b', table + SHREDDED_SUFFIX, sql)
+    return sql
+
+
+def input_bytes(spark) -> Optional[int]:
+    """
+    Total bytes read by all completed stages so far, from the Spark UI's REST API.
+
+    Returns None when the UI is disabled or does not answer.
+    """
+    url = spark.sparkContext.uiWebUrl
+    if not url:
+        return None
+    app_id = spark.sparkContext.applicationId
+    try:
+        with urllib.request.urlopen(f"{url}/api/v1/applications/{app_id}/stages?status=complete", timeout=10) as r:
+            return sum(stage.get('inputBytes', 0) for stage in json.load(r))
+    except (OSError, ValueError):
+        return None
+
+
+def measure(spark, sql: str, runs: int, warmup: int) -> Dict:
+    """time_query plus the bytes read per run (averaged over every run, warm-up included)."""
+    before = input_bytes(spark)
+    timing = time_query(spark, sql, runs, warmup)
+    after = input_bytes(spark)
+    timing['bytes_read'] = (after - before) // (runs + warmup) if before is not None and after is not None else None
+    return timing
+
+
+def prepare_tables(spark, tables: List[str], paths, data_dir: Path, scale: int, profile: str,
+                   rebuild: bool) -> Dict[str, Dict]:
+    """
+    Build the unshredded tables (if needed) and their shredded copies.
+
+    Returns:
+        {table name: describe_table(...)} for both layouts
+
+    Raises:
+        SparkSessionError: If a shredded copy has no shredded path, since comparing
+            it with the original would compare one layout with itself
+    """
+    missing = [t for t in tables + [t + SHREDDED_SUFFIX for t in tables] if not spark.catalog.tableExists(t)]
+    if rebuild or missing:
+        counts = build_local_tables(spark, tables, data_dir, scale, profile)
+        for table in tables:
+            print(f"  ✓ {table}: {counts[table]:,} rows")
+            spark.sql(f"DROP TABLE IF EXISTS {table + SHREDDED_SUFFIX}")
+            write_shredded(spark, table + SHREDDED_SUFFIX, f"SELECT {DEFAULT_COLUMN} FROM {table}", paths,
+                           table_properties=PROFILES[profile]['table_properties'])
+            print(f"  ✓ {table + SHREDDED_SUFFIX}: shredded copy")
+
+    described = {}
+    for table in tables:
+        for name in (table, table + SHREDDED_SUFFIX):
+            described[name] = describe_table(spark, name, DEFAULT_COLUMN, paths)
+        if not described[table + SHREDDED_SUFFIX]['shredded_paths']:
+            raise SparkSessionError(
+                f"{table + SHREDDED_SUFFIX} has no shredded paths in its data files; refusing to compare it "
+                f"with {table}. Rebuild it with --rebuild"
+            )
+    return described
+
+
+def print_summary(queries: List[Dict], tables: Dict[str, Dict], paths) -> None:
+    """Per-query time and bytes read for both layouts, then table sizes."""
+    print(f"\n{'='*60}")
+    print("Median seconds / MB read per run")
+    print(f"{'='*60}")
+    print(f"  {'query':<16}{'unshredded':>22}{'shredded':>30}")
+    for query in queries:
+        cells = []
+        base = query['layouts']['unshredded']
+        for layout in LAYOUTS:
+            entry = query['layouts'][layout]
+            seconds = entry['seconds']['median']
+            read = f"{entry['bytes_read'] / 1e6:.1f} MB" if entry['bytes_read'] is not None else 'n/a'
+            change = ''
+            if layout != 'unshredded' and base['seconds']['median']:
+                change = f" ({(seconds - base['seconds']['median']) / base['seconds']['median']:+.0%})"
+            cells.append(f"{seconds:.3f}s{change} / {read}")
+        print(f"  {query['name']:<16}{cells[0]:>22}{cells[1]:>30}")
+
+    print(f"\n{'Table':<40}{'Files':>6}{'MB':>10}  Shredded paths")
+    for name, info in tables.items():
+        shredded = info['shredded_paths'] or []
+        print(f"{name:<40}{info['files']:>6}{info['bytes'] / 1e6:>10.1f}  {len(shredded)}/{len(paths)}")
+    if any(name.endswith(SHREDDED_SUFFIX) and len(info['shredded_paths'] or []) < len(paths)
+           for name, info in tables.items()):
+        print("\n⚠️  The shredded tables do not shred every hot path; the others are read from the variant blob.")
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python shredbench.py [--scale N] [--runs N] [--warmup N] [--paths PATH:TYPE,...] [--output PATH]
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare shredded and unshredded VARIANT scan time and bytes read on a local Iceberg catalog",
+        epilog=(
+            "Example:\n"
+            "  python shredbench.py\n"
+            "  python shredbench.py --scale 5000 --runs 10 --rebuild\n"
+            "  python shredbench.py --paths '$.event_type:string,$.customer.email:string' --rebuild"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scale", type=int, default=1000,
+                        help="Times each NDJSON record is repeated (default: 1000)")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs per query and layout (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs first (default: 1)")
+    parser.add_argument("--paths", default=','.join(f"{p}:{t}" for p, t in DEFAULT_HOT_PATHS),
+                        help="Comma-separated PATH:TYPE hot paths to shred (default: the notebook's fields)")
+    parser.add_argument("--profile", default='tuned', choices=list(PROFILES),
+                        help="Session profile (default: tuned)")
+    parser.add_argument("--warehouse", type=Path, default=ROOT_DIR / DEFAULT_WAREHOUSE,
+                        help=f"Local warehouse directory (default: {DEFAULT_WAREHOUSE})")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR,
+                        help="NDJSON files loaded into the tables (default: upload/)")
+    parser.add_argument("--notebook", type=Path, default=DEFAULT_NOTEBOOK,
+                        help="Notebook to take the projection queries from")
+    parser.add_argument("--conf", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra Spark setting (repeatable)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild both layouts even if they exist")
+    parser.add_argument("--output", type=Path,
+                        help="Result file (default: output/spark-bench/shredbench-<timestamp>.json)")
+    args = parser.parse_args()
+
+    try:
+        paths = parse_hot_paths(args.paths)
+        queries = extract_notebook_queries(args.notebook) + FILTER_QUERIES
+        tables = referenced_tables(queries)
+        overrides = dict(READ_SHREDDING_CONF, **parse_overrides(args.conf))
+
+        print(f"{'='*60}")
+        print(f"shredbench: {len(queries)} queries x {len(LAYOUTS)} layouts, profile '{args.profile}'")
+        print(f"Runs: {args.runs} (+{args.warmup} warm-up), local data {args.data_dir} x{args.scale}")
+        print(f"{'='*60}")
+
+        started = time.perf_counter()
+        spark = create_session(args.profile, 'local', args.warehouse, overrides=overrides)
+        print("\n▶ Tables")
+        described = prepare_tables(spark, tables, paths, args.data_dir, args.scale, args.profile, args.rebuild)
+
+        print("\n▶ Queries")
+        results = []
+        for query in queries:
+            entry = dict(query, layouts={})
+            for layout in LAYOUTS:
+                sql = query['sql'] if layout == 'unshredded' else shredded_sql(query['sql'], tables)
+                timing = measure(spark, sql, args.runs, args.warmup)
+                entry['layouts'][layout] = timing
+                print(f"  ✓ {query['name']:<16} {layout:<11} median {timing['seconds']['median']:.3f}s")
+            results.append(entry)
+        spark.stop()
+    except (OSError, json.JSONDecodeError, SparkSessionError, *spark_errors()) as e:
+        print(f"\nERROR: {error_summary(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    print_summary(results, described, paths)
+
+    output = args.output or ROOT_DIR / 'output' / 'spark-bench' / (
+        f"shredbench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'profile': args.profile,
+            'scale': args.scale,
+            'runs': args.runs,
+            'warmup': args.warmup,
+            'hot_paths': [f"{p}:{t}" for p, t in paths],
+            'total_seconds': round(time.perf_counter() - started, 3),
+            'tables': described,
+            'queries': results,
+        }, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+sparkbench - time the Horizon VARIANT notebook's queries under different session profiles
+
+Extracts the spark.sql(\"\"\"SELECT ...\"\"\") queries from
+horizon_v3_variant_spark.ipynb (or reads them from --query-file). Each
+query runs --warmup times unmeasured and then --runs times measured, once
+per sparksession profile. Every profile gets a fresh session.
+A measured run executes the whole query through the 'noop' sink, so
+timings cover the full scan and variant_get work rather than the 20 rows
+.show() fetches. The physical plan of each query is recorded so a change in
+timing can be traced to a change in the plan.
+
+With --catalog local (the default) the tables the queries read are built in
+a Hadoop-catalog Iceberg warehouse on local disk. They are format-version 3
+with a single VARIANT column, EVENT_DATA, parsed from the NDJSON files in
+upload/ and repeated --scale times. This works offline, so read settings
+can be tuned before pointing the same queries at the Horizon REST catalog
+(--catalog horizon).
+
+Usage:
+    python sparkbench.py [--profiles notebook,tuned] [--runs N] [--warmup N]
+        [--catalog local|horizon] [--scale N] [--data-dir DIR] [--notebook PATH]
+        [--query-file PATH] [--conf KEY=VALUE ...] [--output PATH] [--rebuild]
+"""
+
+import argparse
+import io
+import json
+import re
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Make sibling pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sparksession.sparksession import (  # noqa: E402
+    DEFAULT_WAREHOUSE,
+    PROFILES,
+    ROOT_DIR,
+    SparkSessionError,
+    apply_table_properties,
+    build_conf,
+    create_session,
+    parse_overrides,
+    redact_conf,
+)
+
+DEFAULT_NOTEBOOK = ROOT_DIR / 'tasks' / 'python' / 'notebook' / 'horizon_v3_variant_spark.ipynb'
+DEFAULT_DATA_DIR = ROOT_DIR / 'upload'
+DEFAULT_PROFILES = ['notebook', 'tuned']
+
+SQL_CALL_RE = re.compile(r'spark\.sql\(\s*(?:"""|\'\'\')(.*?)(?:"""|\'\'\')\s*\)', re.S)
+TABLE_RE = re.compile(r'\bFROM\s+([A-Za-z_][\w]*\.[A-Za-z_][\w]*)', re.I)
+
+
+def extract_notebook_queries(notebook: Path) -> List[Dict[str, str]]:
+    """
+    Return the SELECT queries passed to spark.sql(\"\"\"...\"\"\") in a notebook.
+
+    Returns:
+        [{'name': 'cell-<index>', 'sql': str}] in cell order
+    """
+    with open(notebook, 'r') as f:
+        cells = json.load(f).get('cells', [])
+    queries = []
+    for index, cell in enumerate(cells):
+        if cell.get('cell_type') != 'code':
+            continue
+        source = ''.join(cell.get('source', []))
+        for n, match in enumerate(SQL_CALL_RE.finditer(source)):
+            sql = match.group(1).strip()
+            if sql.upper().startswith(('SELECT', 'WITH')):
+                queries.append({'name': f"cell-{index}" + (f"-{n}" if n else ''), 'sql': sql})
+    return queries
+
+
+def read_query_file(path: Path) -> List[Dict[str, str]]:
+    """Read ';'-separated queries from a file, named after the file and their position."""
+    statements = [s.strip() for s in path.read_text().split(';') if s.strip()]
+    return [{'name': f"{path.stem}-{i}", 'sql': sql} for i, sql in enumerate(statements, 1)]
+
+
+def referenced_tables(queries: List[Dict[str, str]]) -> List[str]:
+    """NAMESPACE.TABLE identifiers read by the queries, in first-use order."""
+    tables: List[str] = []
+    for query in queries:
+        for table in TABLE_RE.findall(query['sql']):
+            if table not in tables:
+                tables.append(table)
+    return tables
+
+
+def build_local_tables(spark, tables: List[str], data_dir: Path, scale: int, profile: str) -> Dict[str, int]:
+    """
+    Create each table as an Iceberg v3 table with one VARIANT column, EVENT_DATA.
+
+    The rows are the NDJSON records in data_dir, repeated `scale` times.
+
+    Returns:
+        {table: row count}
+    """
+    files = sorted(str(p) for p in data_dir.glob('*.json'))
+    if not files:
+        raise SparkSessionError(f"No .json files in {data_dir}")
+
+    spark.read.text(files).where("trim(value) != ''").createOrReplaceTempView('sparkbench_source')
+    properties = {'format-version': '3', **PROFILES[profile]['table_properties']}
+    assignments = ', '.join(f"'{key}'='{value}'" for key, value in properties.items())
+
+    counts = {}
+    for table in tables:
+        namespace = table.split('.')[0]
+        spark.sql(f"CREATE NAMESPACE IF NOT EXISTS {namespace}")
+        spark.sql(f"DROP TABLE IF EXISTS {table}")
+        spark.sql(f"CREATE TABLE {table} (EVENT_DATA VARIANT) USING iceberg TBLPROPERTIES ({assignments})")
+        spark.sql(
+            f"INSERT INTO {table} "
+            f"SELECT parse_json(value) FROM sparkbench_source CROSS JOIN range({max(1, scale)})"
+        )
+        counts[table] = spark.table(table).count()
+    return counts
+
+
+def physical_plan(df) -> str:
+    """Formatted physical plan of a DataFrame (what df.explain('formatted') prints)."""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        df.explain(mode='formatted')
+    return buffer.getvalue().strip()
+
+
+def time_query(spark, sql: str, runs: int, warmup: int) -> Dict:
+    """
+    Run a query to completion warmup + runs times.
+
+    Returns:
+        {'seconds': {'min', 'median', 'max', 'samples'}, 'plan': str}
+    """
+    def execute() -> float:
+        started = time.perf_counter()
+        spark.sql(sql).write.format('noop').mode('overwrite').save()
+        return time.perf_counter() - started
+
+    for _ in range(warmup):
+        execute()
+    samples = [execute() for _ in range(runs)]
+    return {
+        'seconds': {
+            'min': round(min(samples), 4),
+            'median': round(statistics.median(samples), 4),
+            'max': round(max(samples), 4),
+            'samples': [round(s, 4) for s in samples],
+        },
+        'plan': physical_plan(spark.sql(sql)),
+    }
+
+
+def run_benchmark(
+    queries: List[Dict[str, str]],
+    profiles: List[str],
+    catalog: str,
+    warehouse: Path,
+    data_dir: Path,
+    scale: int,
+    runs: int,
+    warmup: int,
+    overrides: Dict[str, str],
+    rebuild: bool
+) -> List[Dict]:
+    """
+    Benchmark every query under every profile.
+
+    Returns:
+        One entry per profile: {'profile', 'conf', 'setup_seconds', 'tables', 'queries': [...]}
+    """
+    tables = referenced_tables(queries)
+    results = []
+    for profile in profiles:
+        print(f"\n▶ Profile '{profile}'")
+        started = time.perf_counter()
+        spark = create_session(profile, catalog, warehouse, overrides=overrides)
+        counts: Dict[str, Optional[int]] = {}
+        if catalog == 'local':
+            # Built once; later profiles only switch the tables' read properties
+            if (rebuild and profile == profiles[0]) or not all(spark.catalog.tableExists(t) for t in tables):
+                counts = build_local_tables(spark, tables, data_dir, scale, profile)
+            else:
+                for table in tables:
+                    apply_table_properties(spark, table, profile)
+                    counts[table] = spark.table(table).count()
+        else:
+            for table in tables:
+                counts[table] = None
+        setup_seconds = round(time.perf_counter() - started, 3)
+        print(f"  Session and tables ready in {setup_seconds:.1f}s")
+
+        entries = []
+        for query in queries:
+            timing = time_query(spark, query['sql'], runs, warmup)
+            print(f"  ✓ {query['name']:<16} median {timing['seconds']['median']:.3f}s "
+                  f"(min {timing['seconds']['min']:.3f}s, max {timing['seconds']['max']:.3f}s)")
+            entries.append(dict(query, **timing))
+
+        results.append({
+            'profile': profile,
+            'conf': redact_conf({k: v for k, v in spark.sparkContext.getConf().getAll()}),
+            'setup_seconds': setup_seconds,
+            'tables': counts,
+            'queries': entries,
+        })
+        spark.stop()
+    return results
+
+
+def print_summary(results: List[Dict]) -> None:
+    """Median per query and profile, relative to the first profile."""
+    print(f"\n{'='*60}")
+    print("Median seconds per query")
+    print(f"{'='*60}")
+    profiles = [r['profile'] for r in results]
+    print(f"  {'query':<16}" + ''.join(f"{p:>14}" for p in profiles))
+    for i, query in enumerate(results[0]['queries']):
+        base = query['seconds']['median']
+        cells = []
+        for result in results:
+            median = result['queries'][i]['seconds']['median']
+            change = f" ({(median - base) / base:+.0%})" if result is not results[0] and base else ''
+            cells.append(f"{median:.3f}{change}")
+        print(f"  {query['name']:<16}" + ''.join(f"{c:>14}" for c in cells))
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python sparkbench.py [--profiles notebook,tuned] [--runs N] [--warmup N]
+            [--catalog local|horizon] [--scale N] [--output PATH]
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Horizon VARIANT notebook's queries under Spark session profiles",
+        epilog=(
+            "Example:\n"
+            "  python sparkbench.py\n"
+            "  python sparkbench.py --profiles notebook,vectorized,tuned --scale 2000 --runs 10\n"
+            "  python sparkbench.py --catalog horizon --profiles notebook,tuned\n"
+            "  python sparkbench.py --conf spark.sql.files.maxPartitionBytes=67108864"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--profiles", default=','.join(DEFAULT_PROFILES),
+                        help=f"Comma-separated profiles: {', '.join(PROFILES)} (default: notebook,tuned)")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs per query (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per query first (default: 1)")
+    parser.add_argument("--catalog", default='local', choices=['local', 'horizon'],
+                        help="Run against a local Hadoop-catalog warehouse or the Horizon catalog (default: local)")
+    parser.add_argument("--warehouse", type=Path, default=ROOT_DIR / DEFAULT_WAREHOUSE,
+                        help=f"Local warehouse directory (default: {DEFAULT_WAREHOUSE})")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR,
+                        help="NDJSON files loaded into the local tables (default: upload/)")
+    parser.add_argument("--scale", type=int, default=1000,
+                        help="Times each record is repeated in the local tables (default: 1000)")
+    parser.add_argument("--notebook", type=Path, default=DEFAULT_NOTEBOOK,
+                        help="Notebook to take the queries from (default: horizon_v3_variant_spark.ipynb)")
+    parser.add_argument("--query-file", type=Path, help="Read ';'-separated queries from this file instead")
+    parser.add_argument("--conf", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra Spark setting applied to every profile (repeatable)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the local tables even if they exist")
+    parser.add_argument("--output", type=Path,
+                        help="Result file (default: output/spark-bench/sparkbench-<timestamp>.json)")
+    args = parser.parse_args()
+
+    profiles = [p for p in args.profiles.split(',') if p]
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown or not profiles:
+        parser.error(f"unknown profile(s): {', '.join(unknown)} (choose from {', '.join(PROFILES)})")
+
+    try:
+        queries = read_query_file(args.query_file) if args.query_file else extract_notebook_queries(args.notebook)
+        if not queries:
+            raise SparkSessionError("No SELECT queries found")
+        overrides = parse_overrides(args.conf)
+        # Fail on missing Horizon settings before starting a JVM
+        build_conf(profiles[0], args.catalog, args.warehouse, overrides=overrides)
+
+        print(f"{'='*60}")
+        print(f"sparkbench: {len(queries)} quer{'y' if len(queries) == 1 else 'ies'}, "
+              f"profiles {profiles}, catalog '{args.catalog}'")
+        print(f"Runs: {args.runs} (+{args.warmup} warm-up)" +
+              (f", local data {args.data_dir} x{args.scale}" if args.catalog == 'local' else ''))
+        print(f"{'='*60}")
+
+        started = time.perf_counter()
+        results = run_benchmark(queries, profiles, args.catalog, args.warehouse, args.data_dir,
+                                args.scale, args.runs, args.warmup, overrides, args.rebuild)
+    except (OSError, json.JSONDecodeError, SparkSessionError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print_summary(results)
+
+    output = args.output or ROOT_DIR / 'output' / 'spark-bench' / (
+        f"sparkbench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'catalog': args.catalog,
+            'scale': args.scale if args.catalog == 'local' else None,
+            'runs': args.runs,
+            'warmup': args.warmup,
+            'total_seconds': round(time.perf_counter() - started, 3),
+            'profiles': results,
+        }, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
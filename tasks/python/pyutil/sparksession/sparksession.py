@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+sparksession - build the demo's SparkSession from named tuning profiles
+
+The Horizon notebook builds its session inline with the default local[*]
+settings. This module builds the same session from two independent parts:
+
+    catalog   'horizon'  the Snowflake Horizon Iceberg REST catalog (same settings
+                         as the notebook, read from the SPARK_* environment variables)
+              'local'    a Hadoop-catalog Iceberg warehouse on local disk, so read
+                         performance can be tuned offline
+    profile   Spark / Iceberg read settings (see PROFILES)
+
+Profiles:
+    notebook     what horizon_v3_variant_spark.ipynb uses today (Iceberg
+                 vectorization off, Spark defaults otherwise)
+    vectorized   vectorized Parquet/Iceberg reads, including nested columns
+    tuned        vectorized reads plus split sizing, shuffle partitions sized
+                 to the local cores, adaptive execution and catalog caching
+
+A profile has three kinds of settings. 'conf' holds Spark session settings.
+'catalog' holds Iceberg catalog properties, prefixed with the catalog's name.
+'table_properties' holds Iceberg table read properties, which are applied to
+tables the benchmark creates locally or set with ALTER TABLE.
+
+Usage:
+    python sparksession.py [--profile NAME] [--catalog horizon|local] [--warehouse PATH]
+        [--conf KEY=VALUE ...] [--show]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
+
+DEFAULT_ICEBERG_VERSION = '1.10.0'
+DEFAULT_WAREHOUSE = 'output/spark-warehouse'
+HORIZON_CATALOG = 'horizoncatalog'
+LOCAL_CATALOG = 'localcatalog'
+
+MB = 1024 * 1024
+
+# Settings every profile shares: a quiet local driver bound to loopback, as in the notebook
+BASE_CONF: Dict[str, str] = {
+    'spark.ui.port': '0',
+    'spark.driver.bindAddress': '127.0.0.1',
+    'spark.driver.host': '127.0.0.1',
+    'spark.driver.port': '0',
+    'spark.blockManager.port': '0',
+    'spark.ui.showConsoleProgress': 'false',
+    'spark.sql.extensions': 'org.apache.iceberg.spark.extensions.IcebergSparkSessionExtensions',
+}
+
+PROFILES: Dict[str, Dict[str, Dict[str, str]]] = {
+    'notebook': {
+        'conf': {
+            'spark.sql.iceberg.vectorization.enabled': 'false',
+        },
+        'catalog': {},
+        'table_properties': {},
+    },
+    'vectorized': {
+        'conf': {
+            'spark.sql.iceberg.vectorization.enabled': 'true',
+            'spark.sql.parquet.enableVectorizedReader': 'true',
+            'spark.sql.parquet.enableNestedColumnVectorizedReader': 'true',
+        },
+        'catalog': {},
+        'table_properties': {
+            'read.parquet.vectorization.enabled': 'true',
+            'read.parquet.vectorization.batch-size': '5000',
+        },
+    },
+    'tuned': {
+        'conf': {
+            'spark.sql.iceberg.vectorization.enabled': 'true',
+            'spark.sql.parquet.enableVectorizedReader': 'true',
+            'spark.sql.parquet.enableNestedColumnVectorizedReader': 'true',
+            'spark.sql.files.maxPartitionBytes': str(128 * MB),
+            'spark.sql.files.openCostInBytes': str(4 * MB),
+            # Replaced with 2x the local cores by build_conf
+            'spark.sql.shuffle.partitions': 'auto',
+            'spark.sql.adaptive.enabled': 'true',
+            'spark.sql.adaptive.coalescePartitions.enabled': 'true',
+            'spark.serializer': 'org.apache.spark.serializer.KryoSerializer',
+        },
+        'catalog': {
+            # Keep loaded table metadata for 5 minutes instead of re-reading it per query
+            'cache-enabled': 'true',
+            'cache.expiration-interval-ms': '300000',
+        },
+        'table_properties': {
+            'read.parquet.vectorization.enabled': 'true',
+            'read.parquet.vectorization.batch-size': '5000',
+            'read.split.target-size': str(128 * MB),
+            'read.split.open-file-cost': str(4 * MB),
+        },
+    },
+}
+
+
+class SparkSessionError(Exception):
+    """Raised when a session cannot be configured (unknown profile, missing settings)."""
+
+
+def iceberg_packages(version: str = DEFAULT_ICEBERG_VERSION, with_aws: bool = True) -> str:
+    """Maven coordinates of the Iceberg runtime (and AWS bundle for S3FileIO)."""
+    packages = [f"org.apache.iceberg:iceberg-spark-runtime-4.0_2.13:{version}"]
+    if with_aws:
+        packages.append(f"org.apache.iceberg:iceberg-aws-bundle:{version}")
+    return ','.join(packages)
+
+
+def horizon_catalog_conf(name: str = HORIZON_CATALOG, env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Catalog settings for the Snowflake Horizon REST catalog, as in the notebook.
+
+    Reads SPARK_HORIZON_CATALOG_URI, SPARK_CATALOG_NAME, SPARK_SNOWFLAKE_PAT,
+    SPARK_HORIZON_ROLE and AWS_REGION.
+
+    Raises:
+        SparkSessionError: If a required variable is not set
+    """
+    env = os.environ if env is None else env
+    required = ['SPARK_HORIZON_CATALOG_URI', 'SPARK_CATALOG_NAME', 'SPARK_SNOWFLAKE_PAT',
+                'SPARK_HORIZON_ROLE', 'AWS_REGION']
+    missing = [var for var in required if not env.get(var)]
+    if missing:
+        raise SparkSessionError(f"Missing environment variables for the Horizon catalog: {', '.join(missing)}")
+
+    prefix = f"spark.sql.catalog.{name}"
+    return {
+        prefix: 'org.apache.iceberg.spark.SparkCatalog',
+        f"{prefix}.type": 'rest',
+        f"{prefix}.uri": env['SPARK_HORIZON_CATALOG_URI'],
+        f"{prefix}.warehouse": env['SPARK_CATALOG_NAME'],
+        f"{prefix}.header.X-Iceberg-Access-Delegation": 'vended-credentials',
+        f"{prefix}.io-impl": 'org.apache.iceberg.aws.s3.S3FileIO',
+        f"{prefix}.file-io-impl": 'org.apache.iceberg.aws.s3.S3FileIO',
+        f"{prefix}.client.region": env['AWS_REGION'],
+        f"{prefix}.credential": env['SPARK_SNOWFLAKE_PAT'],
+        f"{prefix}.scope": env['SPARK_HORIZON_ROLE'],
+    }
+
+
+def local_catalog_conf(warehouse: Path, name: str = LOCAL_CATALOG) -> Dict[str, str]:
+    """Catalog settings for a Hadoop-catalog Iceberg warehouse on local disk."""
+    prefix = f"spark.sql.catalog.{name}"
+    return {
+        prefix: 'org.apache.iceberg.spark.SparkCatalog',
+        f"{prefix}.type": 'hadoop',
+        f"{prefix}.warehouse": str(Path(warehouse).resolve()),
+    }
+
+
+def build_conf(
+    profile: str = 'notebook',
+    catalog: str = 'horizon',
+    warehouse: Path = ROOT_DIR / DEFAULT_WAREHOUSE,
+    iceberg_version: str = DEFAULT_ICEBERG_VERSION,
+    overrides: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """
+    Assemble the full Spark configuration for a profile and catalog.
+
+    Args:
+        profile: Name in PROFILES
+        catalog: 'horizon' or 'local'
+        warehouse: Local warehouse directory (local catalog only)
+        iceberg_version: Iceberg runtime version to pull
+        overrides: Settings applied last, e.g. from --conf
+
+    Returns:
+        {spark setting: value}
+
+    Raises:
+        SparkSessionError: On an unknown profile or catalog, or missing Horizon settings
+    """
+    if profile not in PROFILES:
+        raise SparkSessionError(f"Unknown profile '{profile}' (expected one of: {', '.join(PROFILES)})")
+    if catalog == 'horizon':
+        catalog_name, catalog_conf = HORIZON_CATALOG, horizon_catalog_conf()
+    elif catalog == 'local':
+        catalog_name, catalog_conf = LOCAL_CATALOG, local_catalog_conf(warehouse)
+    else:
+        raise SparkSessionError(f"Unknown catalog '{catalog}' (expected 'horizon' or 'local')")
+
+    conf = dict(BASE_CONF)
+    conf['spark.jars.packages'] = iceberg_packages(iceberg_version, with_aws=catalog == 'horizon')
+    conf['spark.sql.defaultCatalog'] = catalog_name
+    conf.update(catalog_conf)
+    conf.update(PROFILES[profile]['conf'])
+    for key, value in PROFILES[profile]['catalog'].items():
+        conf[f"spark.sql.catalog.{catalog_name}.{key}"] = value
+    if conf.get('spark.sql.shuffle.partitions') == 'auto':
+        conf['spark.sql.shuffle.partitions'] = str(max(2, 2 * (os.cpu_count() or 1)))
+    conf.update(overrides or {})
+    return conf
+
+
+def create_session(
+    profile: str = 'notebook',
+    catalog: str = 'horizon',
+    warehouse: Path = ROOT_DIR / DEFAULT_WAREHOUSE,
+    master: str = 'local[*]',
+    app_name: str = 'iceberg-variant-demo',
+    iceberg_version: str = DEFAULT_ICEBERG_VERSION,
+    overrides: Optional[Dict[str, str]] = None
+):
+    """
+    Create (or replace) the active SparkSession with a profile's settings.
+
+    Any running session is stopped first, because most of these settings
+    only take effect when the SparkContext starts.
+
+    Returns:
+        pyspark.sql.SparkSession
+
+    Raises:
+        SparkSessionError: If pyspark is missing, the configuration is invalid,
+            or Spark does not start (e.g. the Iceberg packages cannot be resolved)
+    """
+    conf = build_conf(profile, catalog, warehouse, iceberg_version, overrides)
+    try:
+        from pyspark.errors import PySparkRuntimeError
+        from pyspark.sql import SparkSession
+    except ImportError:
+        raise SparkSessionError(
+            "pyspark is not installed. Install with: conda env create -f environment.yml "
+            "(or pip install pyspark)"
+        )
+
+    active = SparkSession.getActiveSession()
+    if active is not None:
+        active.stop()
+
+    builder = SparkSession.builder.master(master).appName(app_name)
+    for key, value in conf.items():
+        builder = builder.config(key, value)
+    try:
+        spark = builder.getOrCreate()
+    except PySparkRuntimeError as e:
+        # The JVM's own error (an unresolved package, a missing JAVA_HOME) is printed above
+        raise SparkSessionError(
+            f"Spark did not start ({e.getCondition()}). spark.jars.packages needs Maven access "
+            f"on first use: {conf.get('spark.jars.packages') or 'none'}"
+        )
+    spark.sparkContext.setLogLevel("ERROR")
+    return spark
+
+
+def spark_errors() -> Tuple[type, ...]:
+    """
+    Exception types a running session raises for failed SQL and JVM calls.
+
+    For `except (SparkSessionError, *spark_errors())` in entry points; empty
+    when pyspark is not installed.
+    """
+    try:
+        from py4j.protocol import Py4JError
+        from pyspark.errors import PySparkException
+    except ImportError:
+        return ()
+    return (PySparkException, Py4JError)
+
+
+def error_summary(e: Exception) -> str:
+    """First line of an exception's message (Spark errors carry the plan or a JVM stack trace)."""
+    # A Py4JJavaError's own message only names the JVM call that failed
+    java_exception = getattr(e, 'java_exception', None)
+    lines = str(java_exception.toString() if java_exception is not None else e).strip().splitlines()
+    message = lines[0] if lines else 'no message'
+    return f"{type(e).__name__}: {message}" if isinstance(e, spark_errors()) else message
+
+
+def apply_table_properties(spark, table: str, profile: str) -> None:
+    """
+    Set a profile's Iceberg read properties on an existing table.
+
+    Properties that other profiles set but this one does not are removed,
+    so the table reads with the table defaults for them.
+    """
+    properties = PROFILES[profile]['table_properties']
+    others = sorted({key for p in PROFILES.values() for key in p['table_properties']} - set(properties))
+    if others:
+        keys = ', '.join(f"'{key}'" for key in others)
+        spark.sql(f"ALTER TABLE {table} UNSET TBLPROPERTIES IF EXISTS ({keys})")
+    if properties:
+        assignments = ', '.join(f"'{key}'='{value}'" for key, value in properties.items())
+        spark.sql(f"ALTER TABLE {table} SET TBLPROPERTIES ({assignments})")
+
+
+def parse_overrides(items: List[str]) -> Dict[str, str]:
+    """Parse KEY=VALUE strings (as given to --conf)."""
+    overrides = {}
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep or not key:
+            raise SparkSessionError(f"Expected KEY=VALUE, got '{item}'")
+        overrides[key.strip()] = value
+    return overrides
+
+
+def redact_conf(conf: Dict[str, str]) -> Dict[str, str]:
+    """Hide credentials before printing or saving a configuration."""
+    return {key: ('****' if key.endswith(('.credential', '.token')) else value) for key, value in conf.items()}
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python sparksession.py [--profile NAME] [--catalog horizon|local] [--warehouse PATH]
+            [--conf KEY=VALUE ...] [--show]
+    """
+    parser = argparse.ArgumentParser(
+        description="Print or try out the Spark configuration of a tuning profile",
+        epilog=(
+            "Example:\n"
+            "  python sparksession.py --profile tuned --catalog local\n"
+            "  python sparksession.py --profile tuned --catalog horizon --show\n"
+            "\n"
+            "In a notebook:\n"
+            "  sys.path.insert(0, '../pyutil/sparksession')\n"
+            "  from sparksession import create_session\n"
+            "  spark = create_session(profile='tuned')"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--profile", default='tuned', choices=list(PROFILES), help="Tuning profile (default: tuned)")
+    parser.add_argument("--catalog", default='local', choices=['horizon', 'local'],
+                        help="Iceberg catalog (default: local)")
+    parser.add_argument("--warehouse", type=Path, default=ROOT_DIR / DEFAULT_WAREHOUSE,
+                        help=f"Local catalog warehouse (default: {DEFAULT_WAREHOUSE})")
+    parser.add_argument("--iceberg-version", default=os.environ.get('SPARK_ICEBERG_VERSION', DEFAULT_ICEBERG_VERSION),
+                        help="Iceberg runtime version (default: $SPARK_ICEBERG_VERSION or 1.10.0)")
+    parser.add_argument("--conf", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra Spark setting, applied last (repeatable)")
+    parser.add_argument("--show", action="store_true",
+                        help="Also start the session and run SHOW NAMESPACES")
+    args = parser.parse_args()
+
+    try:
+        overrides = parse_overrides(args.conf)
+        conf = build_conf(args.profile, args.catalog, args.warehouse, args.iceberg_version, overrides)
+        print(f"{'='*60}")
+        print(f"Profile '{args.profile}', catalog '{args.catalog}'")
+        print(f"{'='*60}")
+        for key, value in sorted(redact_conf(conf).items()):
+            print(f"  {key} = {value}")
+        table_properties = PROFILES[args.profile]['table_properties']
+        if table_properties:
+            print("\nIceberg table read properties:")
+            for key, value in table_properties.items():
+                print(f"  {key} = {value}")
+
+        if args.show:
+            spark = create_session(args.profile, args.catalog, args.warehouse,
+                                   iceberg_version=args.iceberg_version, overrides=overrides)
+            spark.sql("SHOW NAMESPACES").show()
+            spark.stop()
+    except SparkSessionError as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
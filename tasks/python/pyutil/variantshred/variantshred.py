@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+variantshred - write CUSTOMER_EVENTS as Iceberg v3 tables with shredded VARIANT columns
+
+An unshredded VARIANT column stores each value as one binary blob, so every
+variant_get(EVENT_DATA, '$.customer.email', ...) decodes the whole value
+for every row. A shredded column also stores a configured set of hot paths
+as typed Parquet columns (typed_value) next to the blob. Those columns
+carry their own statistics, so Spark and Parquet can prune and filter on
+them without touching the rest of the value.
+
+The writer creates a table from the NDJSON files in upload/ (--data-dir)
+or copies another table (--source). Iceberg's own Spark writer stores
+VARIANT unshredded whatever the session settings say, so the rows are
+written by Spark's Parquet writer instead, which shreds with the forced
+schema, into a new directory under the table's data location. The
+table's current rows are then deleted and the new files registered with
+Iceberg's add_files procedure, which references them as they are. These
+are two commits: readers can briefly see an empty table, and if add_files
+fails the table is rolled back to its previous snapshot and the new files
+are removed. A table cannot be rewritten in place, since a failure between
+the two commits would leave nothing to read the rows from.
+
+After the write one data file's Parquet footer is read to report which hot
+paths were actually shredded; the tool exits 1 if none were.
+
+Hot paths are given as PATH:TYPE pairs, for example '$.customer.email:string'.
+The default set covers the fields the notebook's queries read.
+
+Usage:
+    python variantshred.py [--data-dir DIR | --source TABLE] [--target TABLE]
+        [--paths PATH:TYPE,...] [--column NAME] [--scale N]
+        [--catalog local|horizon] [--profile NAME] [--conf KEY=VALUE ...]
+"""
+
+import argparse
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Make sibling pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sparksession.sparksession import (  # noqa: E402
+    DEFAULT_WAREHOUSE,
+    PROFILES,
+    ROOT_DIR,
+    SparkSessionError,
+    create_session,
+    error_summary,
+    parse_overrides,
+    spark_errors,
+)
+
+DEFAULT_COLUMN = 'EVENT_DATA'
+DEFAULT_DATA_DIR = ROOT_DIR / 'upload'
+DEFAULT_TARGET = 'RAW.CUSTOMER_EVENTS_SHREDDED'
+
+# The paths the notebook projects, plus the customer id used for joins
+DEFAULT_HOT_PATHS: List[Tuple[str, str]] = [
+    ('$.event_id', 'string'),
+    ('$.event_type', 'string'),
+    ('$.timestamp', 'string'),
+    ('$.customer.id', 'string'),
+    ('$.customer.name', 'string'),
+    ('$.customer.email', 'string'),
+    ('$.customer.phone', 'string'),
+]
+
+SHREDDABLE_TYPES = {'string', 'boolean', 'int', 'bigint', 'double', 'decimal(18,2)', 'date', 'timestamp'}
+PATH_RE = re.compile(r'^\$(\.[A-Za-z_][\w]*)+$')
+
+# Spark's Parquet settings for writing and reading shredded variants.
+# forceShreddingSchemaForTest is the only way to choose the shredded paths
+# up front (Spark otherwise infers them per file); it is marked internal.
+# Its value is a DDL field list ('a string, b struct<c:int>') applied to
+# every VARIANT column written.
+WRITE_SHREDDING_CONF = 'spark.sql.variant.writeShredding.enabled'
+SHREDDING_SCHEMA_CONF = 'spark.sql.variant.forceShreddingSchemaForTest'
+READ_SHREDDING_CONF: Dict[str, str] = {
+    'spark.sql.variant.allowReadingShredded': 'true',
+    'spark.sql.variant.pushVariantIntoScan': 'true',
+}
+
+
+def parse_hot_paths(spec: str) -> List[Tuple[str, str]]:
+    """
+    Parse 'PATH:TYPE,PATH:TYPE' into [(path, type)].
+
+    Raises:
+        SparkSessionError: On a malformed path or an unsupported type
+    """
+    paths = []
+    for item in (part.strip() for part in spec.split(',')):
+        if not item:
+            continue
+        path, _, type_name = item.rpartition(':')
+        path, type_name = path.strip(), type_name.strip().lower()
+        if not PATH_RE.match(path):
+            raise SparkSessionError(f"Expected a path like $.customer.email, got '{path or item}'")
+        if type_name not in SHREDDABLE_TYPES:
+            raise SparkSessionError(
+                f"Unsupported type '{type_name}' for {path} (expected one of: {', '.join(sorted(SHREDDABLE_TYPES))})"
+            )
+        paths.append((path, type_name))
+    if not paths:
+        raise SparkSessionError("No hot paths given")
+    return paths
+
+
+def shredding_schema(paths: List[Tuple[str, str]]) -> str:
+    """
+    Nested struct type covering the hot paths.
+
+    [('$.event_id', 'string'), ('$.customer.email', 'string')]
+        -> 'struct<event_id:string,customer:struct<email:string>>'
+    """
+    tree: Dict = {}
+    for path, type_name in paths:
+        node = tree
+        fields = path[2:].split('.')
+        for field in fields[:-1]:
+            child = node.setdefault(field, {})
+            if not isinstance(child, dict):
+                raise SparkSessionError(f"{path} is nested under a path already shredded as {child}")
+            node = child
+        if isinstance(node.get(fields[-1]), dict):
+            raise SparkSessionError(f"{path} is both a leaf and an object")
+        node[fields[-1]] = type_name
+
+    def render(node: Dict) -> str:
+        fields = [f"{name}:{render(value) if isinstance(value, dict) else value}" for name, value in node.items()]
+        return f"struct<{','.join(fields)}>"
+
+    return render(tree)
+
+
+def shredding_fields(paths: List[Tuple[str, str]]) -> str:
+    """
+    shredding_schema as the DDL field list Spark's forced shredding schema takes.
+
+    [('$.event_id', 'string'), ('$.customer.email', 'string')]
+        -> 'event_id string, customer struct<email:string>'
+    """
+    fields = []
+    depth = 0
+    field_start = len('struct<')
+    schema = shredding_schema(paths)
+    for i, char in enumerate(schema[field_start:-1], field_start):
+        if char == '<':
+            depth += 1
+        elif char == '>':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            fields.append(schema[field_start:i])
+            field_start = i + 1
+    fields.append(schema[field_start:-1])
+    return ', '.join(field.replace(':', ' ', 1) for field in fields)
+
+
+def shredding_conf(paths: List[Tuple[str, str]]) -> Dict[str, str]:
+    """Session settings that make the next Parquet write shred VARIANT columns on the hot paths."""
+    return {
+        WRITE_SHREDDING_CONF: 'true',
+        SHREDDING_SCHEMA_CONF: shredding_fields(paths),
+        **READ_SHREDDING_CONF,
+    }
+
+
+def set_conf(spark, settings: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """Set runtime settings and return the previous values (None = unset)."""
+    previous = {}
+    for key, value in settings.items():
+        previous[key] = spark.conf.get(key, None)
+        spark.conf.set(key, value)
+    return previous
+
+
+def restore_conf(spark, previous: Dict[str, Optional[str]]) -> None:
+    """Undo set_conf."""
+    for key, value in previous.items():
+        if value is None:
+            spark.conf.unset(key)
+        else:
+            spark.conf.set(key, value)
+
+
+def write_shredded_files(
+    spark,
+    directory: str,
+    select_sql: str,
+    paths: List[Tuple[str, str]],
+    column: str = DEFAULT_COLUMN
+) -> None:
+    """Write the rows of `select_sql` as Parquet files in `directory`, with `column` shredded."""
+    previous = set_conf(spark, shredding_conf(paths))
+    try:
+        spark.sql(f"SELECT {column} FROM ({select_sql})").write.mode('errorifexists').parquet(directory)
+    finally:
+        restore_conf(spark, previous)
+
+
+def table_location(spark, table: str) -> str:
+    """Base location of a table, from DESCRIBE TABLE EXTENDED."""
+    for row in spark.sql(f"DESCRIBE TABLE EXTENDED {table}").collect():
+        if row[0] == 'Location':
+            return row[1].rstrip('/')
+    raise SparkSessionError(f"DESCRIBE TABLE EXTENDED {table} reports no location")
+
+
+def current_snapshot(spark, table: str) -> Optional[int]:
+    """Id of the table's current snapshot, or None for a table without one."""
+    rows = spark.sql(
+        f"SELECT snapshot_id FROM {table}.history WHERE is_current_ancestor ORDER BY made_current_at DESC LIMIT 1"
+    ).collect()
+    return rows[0][0] if rows else None
+
+
+def remove_directory(spark, directory: str) -> None:
+    """Recursively delete a directory through the session's Hadoop filesystem."""
+    path = spark._jvm.org.apache.hadoop.fs.Path(directory)
+    path.getFileSystem(spark._jsc.hadoopConfiguration()).delete(path, True)
+
+
+def write_shredded(
+    spark,
+    target: str,
+    select_sql: str,
+    paths: List[Tuple[str, str]],
+    column: str = DEFAULT_COLUMN,
+    table_properties: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Replace the rows of `target` with those of `select_sql` (one VARIANT column), shredded.
+
+    The target is created as a format-version 3 Iceberg table if it does not
+    exist. `select_sql` must not read the target: its rows are deleted before
+    the new files are registered.
+
+    Raises:
+        SparkSessionError: If a step fails; the target is rolled back to its
+            previous snapshot and the new files are removed
+    """
+    properties = {'format-version': '3', **(table_properties or {})}
+    assignments = ', '.join(f"'{key}'='{value}'" for key, value in properties.items())
+    spark.sql(f"CREATE NAMESPACE IF NOT EXISTS {target.rsplit('.', 1)[0]}")
+    spark.sql(f"CREATE TABLE IF NOT EXISTS {target} ({column} VARIANT) USING iceberg TBLPROPERTIES ({assignments})")
+
+    catalog = spark.catalog.currentCatalog()
+    directory = f"{table_location(spark, target)}/data/variantshred-{uuid.uuid4().hex[:12]}"
+    previous = current_snapshot(spark, target)
+    try:
+        write_shredded_files(spark, directory, select_sql, paths, column)
+        spark.sql(f"DELETE FROM {target}")
+        spark.sql(f"CALL {catalog}.system.add_files(table => '{target}', source_table => '`parquet`.`{directory}`')")
+    except spark_errors() as e:
+        if previous is not None and current_snapshot(spark, target) != previous:
+            spark.sql(f"CALL {catalog}.system.rollback_to_snapshot(table => '{target}', snapshot_id => {previous})")
+        remove_directory(spark, directory)
+        raise SparkSessionError(f"Writing {target} failed, table left as it was: {error_summary(e)}")
+
+
+def ndjson_select(spark, data_dir: Path, scale: int = 1, column: str = DEFAULT_COLUMN) -> str:
+    """
+    Register the NDJSON files in data_dir as a view and return a SELECT of them as VARIANT.
+
+    Each record is repeated `scale` times.
+    """
+    files = sorted(str(p) for p in data_dir.glob('*.json'))
+    if not files:
+        raise SparkSessionError(f"No .json files in {data_dir}")
+    spark.read.text(files).where("trim(value) != ''").createOrReplaceTempView('variantshred_source')
+    return f"SELECT parse_json(value) AS {column} FROM variantshred_source CROSS JOIN range({max(1, scale)})"
+
+
+def data_files(spark, table: str) -> List[Dict]:
+    """Current data files of an Iceberg table: [{'path', 'bytes', 'rows'}]."""
+    rows = spark.sql(
+        f"SELECT file_path, file_size_in_bytes, record_count FROM {table}.files WHERE content = 0"
+    ).collect()
+    return [{'path': r[0], 'bytes': r[1], 'rows': r[2]} for r in rows]
+
+
+def parquet_schema(spark, path: str) -> str:
+    """Parquet schema of a data file, read from its footer through the JVM."""
+    jvm = spark._jvm
+    input_file = jvm.org.apache.parquet.hadoop.util.HadoopInputFile.fromPath(
+        jvm.org.apache.hadoop.fs.Path(path), spark._jsc.hadoopConfiguration())
+    reader = jvm.org.apache.parquet.hadoop.ParquetFileReader.open(input_file)
+    try:
+        return reader.getFooter().getFileMetaData().getSchema().toString()
+    finally:
+        reader.close()
+
+
+def shredded_paths(schema: str, column: str, paths: List[Tuple[str, str]]) -> List[str]:
+    """
+    Hot paths stored as typed columns under `column` in a Parquet schema.
+
+    A shredded field sits inside its parent's typed_value group and has a
+    typed_value leaf of its own:
+        optional group EVENT_DATA { ... optional group typed_value {
+            optional group customer { ... optional group typed_value {
+                optional group email { optional binary value; optional binary typed_value (STRING); }
+    """
+    leaves = set()
+    stack: List[str] = []
+    for line in (line.strip() for line in schema.splitlines()):
+        if line.endswith('{'):
+            match = re.match(r'(?:message|(?:required|optional|repeated)\s+group)\s+(\w+)', line)
+            stack.append(match.group(1) if match else '')
+        elif line == '}':
+            if stack:
+                stack.pop()
+        elif line.endswith(';'):
+            match = re.match(r'(?:required|optional|repeated)\s+\S+\s+(\w+)', line)
+            if match:
+                leaves.add('/'.join(stack[1:] + [match.group(1)]))
+
+    shredded = []
+    for path, _ in paths:
+        parts = [column, 'typed_value']
+        for field in path[2:].split('.'):
+            parts += [field, 'typed_value']
+        if '/'.join(parts) in leaves:
+            shredded.append(path)
+    return shredded
+
+
+def describe_table(spark, table: str, column: str, paths: List[Tuple[str, str]]) -> Dict:
+    """
+    Size and shredding state of a table.
+
+    Returns:
+        {'files', 'bytes', 'rows', 'shredded_paths': [...] or None if there are no files}
+    """
+    files = data_files(spark, table)
+    shredded = shredded_paths(parquet_schema(spark, files[0]['path']), column, paths) if files else None
+    return {
+        'files': len(files),
+        'bytes': sum(f['bytes'] for f in files),
+        'rows': sum(f['rows'] for f in files),
+        'shredded_paths': shredded,
+    }
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python variantshred.py [--data-dir DIR | --source TABLE] [--target TABLE]
+            [--paths PATH:TYPE,...] [--scale N] [--catalog local|horizon]
+    """
+    parser = argparse.ArgumentParser(
+        description="Write an Iceberg v3 table with a shredded VARIANT column",
+        epilog=(
+            "Example:\n"
+            "  python variantshred.py\n"
+            "  python variantshred.py --scale 1000 --target RAW.CUSTOMER_EVENTS_SHREDDED\n"
+            "  python variantshred.py --source RAW.CUSTOMER_EVENTS --target RAW.CUSTOMER_EVENTS\n"
+            "  python variantshred.py --paths '$.event_type:string,$.order.total_amount:double'"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR,
+                        help="Create the table from the NDJSON files here (default: upload/)")
+    source.add_argument("--source", help="Copy this table instead (must differ from --target)")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help=f"Table to write (default: {DEFAULT_TARGET})")
+    parser.add_argument("--column", default=DEFAULT_COLUMN, help=f"VARIANT column (default: {DEFAULT_COLUMN})")
+    parser.add_argument("--paths", default=','.join(f"{p}:{t}" for p, t in DEFAULT_HOT_PATHS),
+                        help="Comma-separated PATH:TYPE hot paths (default: the notebook's fields)")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Times each NDJSON record is repeated (default: 1)")
+    parser.add_argument("--catalog", default='local', choices=['local', 'horizon'],
+                        help="Iceberg catalog (default: local)")
+    parser.add_argument("--warehouse", type=Path, default=ROOT_DIR / DEFAULT_WAREHOUSE,
+                        help=f"Local catalog warehouse (default: {DEFAULT_WAREHOUSE})")
+    parser.add_argument("--profile", default='tuned', choices=list(PROFILES),
+                        help="Session profile (default: tuned)")
+    parser.add_argument("--conf", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra Spark setting (repeatable)")
+    parser.add_argument("--table-property", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra Iceberg table property for a new table (repeatable)")
+    args = parser.parse_args()
+    if args.source and args.source.lower() == args.target.lower():
+        parser.error("--source and --target must differ; write a copy and swap the names instead")
+
+    try:
+        paths = parse_hot_paths(args.paths)
+        overrides = parse_overrides(args.conf)
+        table_properties = dict(PROFILES[args.profile]['table_properties'], **parse_overrides(args.table_property))
+
+        print(f"{'='*60}")
+        print(f"Shredding {args.column} into {args.target}")
+        print(f"{'='*60}")
+        print(f"Hot paths: {', '.join(f'{p}:{t}' for p, t in paths)}")
+        print(f"Shredding schema: {shredding_schema(paths)}")
+
+        started = time.perf_counter()
+        spark = create_session(args.profile, args.catalog, args.warehouse, overrides=overrides)
+        if args.source:
+            select_sql = f"SELECT {args.column} FROM {args.source}"
+        else:
+            select_sql = ndjson_select(spark, args.data_dir, args.scale, args.column)
+        write_shredded(spark, args.target, select_sql, paths, args.column, table_properties)
+        summary = describe_table(spark, args.target, args.column, paths)
+        spark.stop()
+    except (SparkSessionError, *spark_errors()) as e:
+        print(f"\nERROR: {error_summary(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✓ Wrote {summary['rows']:,} rows in {summary['files']} file(s), "
+          f"{summary['bytes']:,} bytes ({time.perf_counter() - started:.1f}s)")
+    shredded = summary['shredded_paths'] or []
+    for path, _ in paths:
+        print(f"  {'✓' if path in shredded else '✗'} {path}")
+    if not shredded:
+        print(f"\nERROR: No hot path is shredded in {args.target}'s data files; "
+              f"it has the same layout as an unshredded table", file=sys.stderr)
+        sys.exit(1)
+    if len(shredded) < len(paths):
+        print("\n⚠️  Not every hot path was shredded; the others are read from the variant blob.")
+
+
+if __name__ == "__main__":
+    main()
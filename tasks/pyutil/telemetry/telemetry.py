@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+telemetry - phase timings and counters for the task tools
+
+Shared by the snow-cli and aws-cli Python tools so every run leaves a record
+of where its time went. A tool wraps main() in run(), marks phases with
+span() and bumps counters with count():
+
+    with telemetry.run('snowcliput'):
+        with telemetry.span('scan'):
+            files = get_upload_files(...)
+        telemetry.count('files', len(files))
+
+Spans are aggregated per phase (calls, total seconds, slowest call, errors),
+so a phase entered once per file from several threads is still one entry.
+When the run ends, two files are written under output/telemetry/:
+
+    runs.jsonl    one JSON line per run, appended, for charting over time
+    <tool>.prom   OpenMetrics textfile with the tool's last run, replaced
+                  atomically so a node_exporter textfile collector can read it
+
+Phase names used by the tools: scan, render, subprocess, subprocess_start
+(Popen until the child exists, i.e. process start overhead), upload, write.
+Counters: files, bytes, failures, subprocesses.
+
+Environment:
+    TELEMETRY=off             record nothing
+    TELEMETRY_DIR             output directory (default: output/telemetry)
+    TELEMETRY_PARENT_RUN_ID   run_id of the run that started this one, so a
+                              pipeline's steps can be grouped under it
+
+Telemetry never fails a tool: outside run() span() and count() do nothing,
+and a write error is reported as a warning.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+DEFAULT_DIR = ROOT_DIR / 'output' / 'telemetry'
+RUN_LOG_NAME = 'runs.jsonl'
+PARENT_ENV = 'TELEMETRY_PARENT_RUN_ID'
+
+METRIC_PREFIX = 'task'
+
+
+def enabled() -> bool:
+    """False when TELEMETRY is set to off/0/false/no."""
+    return os.environ.get('TELEMETRY', 'on').strip().lower() not in ('off', '0', 'false', 'no')
+
+
+def telemetry_dir() -> Path:
+    """Directory for runs.jsonl and the .prom files."""
+    return Path(os.environ.get('TELEMETRY_DIR') or DEFAULT_DIR)
+
+
+class Run:
+    """Phase timings and counters for one tool run. Safe to use from several threads."""
+
+    def __init__(self, tool: str, parent_run_id: Optional[str] = None):
+        self.tool = tool
+        self.run_id = uuid.uuid4().hex[:16]
+        self.parent_run_id = parent_run_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float, error: bool = False) -> None:
+        """Add one timed call of a phase."""
+        with self._lock:
+            stats = self.phases.setdefault(phase, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'errors': 0})
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            if error:
+                stats['errors'] += 1
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Add value to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Time the block as one call of phase; an exception counts as an error and propagates."""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(phase, time.perf_counter() - start, error)
+
+    def summary(self, status: str, exit_code: int) -> Dict:
+        """The run as one JSON-serialisable record."""
+        with self._lock:
+            phases = {name: dict(stats, seconds=round(stats['seconds'], 6),
+                                 max_seconds=round(stats['max_seconds'], 6))
+                      for name, stats in self.phases.items()}
+            counters = dict(self.counters)
+        return {
+            'run_id': self.run_id,
+            'parent_run_id': self.parent_run_id,
+            'tool': self.tool,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec='milliseconds'),
+            'duration_s': round(time.perf_counter() - self._start, 6),
+            'status': status,
+            'exit_code': exit_code,
+            'phases': phases,
+            'counters': counters,
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_openmetrics(record: Dict) -> str:
+    """
+    OpenMetrics exposition of one run record.
+
+    Every family is a gauge holding the value from the tool's last run, since
+    each file is rewritten per run rather than accumulated.
+    """
+    tool = _label(record['tool'])
+    ended = datetime.fromisoformat(record['started_at']).timestamp() + record['duration_s']
+    families = [
+        ('run_duration_seconds', 'Wall time of the last run.', 'seconds',
+         [('', record['duration_s'])]),
+        ('run_success', '1 if the last run exited 0, else 0.', '',
+         [('', 1 if record['status'] == 'ok' else 0)]),
+        ('run_timestamp_seconds', 'When the last run finished.', 'seconds',
+         [('', round(ended, 3))]),
+        ('phase_seconds', 'Total time spent in each phase in the last run.', 'seconds',
+         [(f',phase="{_label(p)}"', s['seconds']) for p, s in sorted(record['phases'].items())]),
+        ('phase_max_seconds', 'Slowest single call of each phase in the last run.', 'seconds',
+         [(f',phase="{_label(p)}"', s['max_seconds']) for p, s in sorted(record['phases'].items())]),
+        ('phase_calls', 'Times each phase was entered in the last run.', '',
+         [(f',phase="{_label(p)}"', s['calls']) for p, s in sorted(record['phases'].items())]),
+        ('phase_errors', 'Calls of each phase that raised in the last run.', '',
+         [(f',phase="{_label(p)}"', s['errors']) for p, s in sorted(record['phases'].items())]),
+        ('counter', 'Files, bytes, failures etc. counted in the last run.', '',
+         [(f',name="{_label(n)}"', v) for n, v in sorted(record['counters'].items())]),
+    ]
+
+    lines = []
+    for name, help_text, unit, samples in families:
+        if not samples:
+            continue
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        if unit:
+            lines.append(f"# UNIT {metric} {unit}")
+        lines.append(f"# HELP {metric} {help_text}")
+        for labels, value in samples:
+            lines.append(f'{metric}{{tool="{tool}"{labels}}} {_number(value)}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def write_run(record: Dict, directory: Optional[Path] = None) -> None:
+    """Append record to runs.jsonl and replace <tool>.prom with it."""
+    directory = directory or telemetry_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with open(directory / RUN_LOG_NAME, 'a') as f:
+        f.write(json.dumps(record, sort_keys=True) + '\n')
+
+    prom = directory / f"{record['tool']}.prom"
+    tmp = prom.with_name(f".{prom.name}.{os.getpid()}.tmp")
+    tmp.write_text(render_openmetrics(record))
+    os.replace(tmp, prom)
+
+
+_current: Optional[Run] = None
+
+
+def current() -> Optional[Run]:
+    """The active run, or None outside run() or with telemetry off."""
+    return _current
+
+
+@contextmanager
+def run(tool: str) -> Iterator[Optional[Run]]:
+    """
+    Record the enclosed block as one run of tool.
+
+    The outcome comes from how the block ends: normally or SystemExit(0) is
+    'ok', any other SystemExit is 'failed' with its code, and an exception is
+    'error'. SystemExit and exceptions propagate unchanged. Child processes
+    inherit the run_id as their parent.
+
+    Args:
+        tool: Name used in the run log and for the .prom file
+
+    Yields:
+        The Run, or None when telemetry is off
+    """
+    global _current
+    if not enabled():
+        yield None
+        return
+
+    record_run = Run(tool, parent_run_id=os.environ.get(PARENT_ENV) or None)
+    previous, _current = _current, record_run
+    previous_env = os.environ.get(PARENT_ENV)
+    os.environ[PARENT_ENV] = record_run.run_id
+    status, exit_code = 'ok', 0
+    try:
+        yield record_run
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            exit_code = e.code or 0
+        else:
+            exit_code = 1
+        status = 'ok' if exit_code == 0 else 'failed'
+        raise
+    except BaseException:
+        status, exit_code = 'error', 1
+        raise
+    finally:
+        _current = previous
+        if previous_env is None:
+            os.environ.pop(PARENT_ENV, None)
+        else:
+            os.environ[PARENT_ENV] = previous_env
+        try:
+            write_run(record_run.summary(status, exit_code))
+        except OSError as e:
+            print(f"⚠️  Telemetry not written: {e}", file=sys.stderr)
+
+
+@contextmanager
+def span(phase: str) -> Iterator[None]:
+    """Time the block as one call of phase in the active run (no-op without one)."""
+    active = _current
+    if active is None:
+        yield
+        return
+    with active.span(phase):
+        yield
+
+
+def record(phase: str, seconds: float, error: bool = False) -> None:
+    """Add an already-measured call of phase to the active run."""
+    if _current is not None:
+        _current.record(phase, seconds, error)
+
+
+def count(name: str, value: float = 1) -> None:
+    """Add value to a counter of the active run."""
+    if _current is not None:
+        _current.count(name, value)
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+snowclibench - benchmark snowclisp and snowcliput against a scriptable fake snow CLI
+
+Puts bench/bin/snow (a fake Snowflake CLI with configurable latency, failure
+rate and output volume) first on PATH and measures, for each file count:
+
+    scan     get_sorted_sql_files over a recursive tree of numbered .sql files,
+             cold and with a warm scan cache
+    upload   upload_directory_to_stage throughput for each workers:batch-size
+             configuration, through the real 'cli' backend
+    e2e      wall-clock runtime of the snowclisp.py and snowcliput.py commands
+
+Results are written as JSON with one entry per benchmark id (for example
+'upload/w4-b100/n=1000'). Passing an earlier result file with --compare
+reports the change per id and flags entries that got slower than the
+threshold, so a regression shows up before the tools reach the pipelines.
+
+This is a benchmark, not a test suite: it only fails (with --fail-on-regression)
+when a comparison finds a regression.
+
+Usage:
+    python snowclibench.py [--sizes 10,1000,10000] [--benchmarks scan,upload,e2e]
+        [--repeat N] [--latency-ms MS] [--stmt-latency-ms MS] [--failure-rate P]
+        [--output-rows N] [--file-size-bytes N] [--upload-configs W:B,...]
+        [--max-invocations N] [--output PATH] [--compare PATH] [--threshold F]
+        [--fail-on-regression] [--workdir DIR]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+SNOW_CLI_DIR = BENCH_DIR.parent
+ROOT_DIR = SNOW_CLI_DIR.parent.parent
+FAKE_SNOW_DIR = BENCH_DIR / 'bin'
+
+# Make the pyutil modules importable when run as a script
+sys.path.insert(0, str(SNOW_CLI_DIR / 'pyutil'))
+
+from snowclibackend.snowclibackend import SnowCliBackend  # noqa: E402
+from snowclisp.snowclisp import get_sorted_sql_files  # noqa: E402
+from snowcliput.snowcliput import upload_directory_to_stage  # noqa: E402
+
+RESULT_SCHEMA_VERSION = 1
+DEFAULT_SIZES = [10, 1000, 10000]
+DEFAULT_BENCHMARKS = ['scan', 'upload', 'e2e']
+DEFAULT_UPLOAD_CONFIGS = [(1, 0), (4, 0), (4, 100)]
+DEFAULT_MAX_INVOCATIONS = 500
+DEFAULT_THRESHOLD = 0.25
+# Differences below this are timer noise, whatever the relative change
+NOISE_FLOOR_SECONDS = 0.005
+
+FILES_PER_SQL_DIR = 100
+BENCH_STAGE = '@bench_db.bench_schema.bench_stage'
+BENCH_CONNECTION = 'bench'
+
+
+def build_sql_tree(root: Path, count: int) -> None:
+    """Write `count` numbered .sql files in batch-N directories, plus ~10% unnumbered files."""
+    for i in range(count):
+        batch_dir = root / f"batch-{i // FILES_PER_SQL_DIR}"
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        (batch_dir / f"{i % FILES_PER_SQL_DIR:03d}-step_{i}.sql").write_text(
+            f"-- generated by snowclibench\nCREATE OR REPLACE TABLE bench_{i} (id INT);\n"
+        )
+        if i % 10 == 0:
+            (batch_dir / f"notes_{i}.sql").write_text("SELECT 1;\n")
+
+
+def build_upload_dir(root: Path, count: int, size: int) -> None:
+    """Write `count` JSON files of roughly `size` bytes each."""
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        record = json.dumps({'id': i, 'payload': ''})
+        padding = max(0, size - len(record) - 1)
+        (root / f"events_{i:06d}.json").write_text(
+            json.dumps({'id': i, 'payload': 'x' * padding}) + '\n'
+        )
+
+
+def timed_runs(fn: Callable[[], Optional[Dict]], repeat: int,
+               before: Optional[Callable[[], None]] = None) -> Tuple[Dict, Dict]:
+    """
+    Run fn `repeat` times.
+
+    Returns:
+        ({'min', 'median', 'max'} in seconds, extra values returned by the last run)
+    """
+    samples = []
+    extra: Dict = {}
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        extra = fn() or {}
+        samples.append(time.perf_counter() - started)
+    return {
+        'min': round(min(samples), 6),
+        'median': round(statistics.median(samples), 6),
+        'max': round(max(samples), 6),
+    }, extra
+
+
+def result_entry(benchmark: str, variant: str, files: int, seconds: Dict, runs: int, **extra) -> Dict:
+    return dict({
+        'id': f"{benchmark}/{variant}/n={files}",
+        'benchmark': benchmark,
+        'variant': variant,
+        'files': files,
+        'runs': runs,
+        'seconds': seconds,
+    }, **extra)
+
+
+def bench_scan(sql_dir: Path, files: int, repeat: int, workdir: Path) -> List[Dict]:
+    """Time get_sorted_sql_files without and with a warm scan cache."""
+    results = []
+    seconds, extra = timed_runs(
+        lambda: {'matched': len(get_sorted_sql_files(str(sql_dir), recursive=True)[0])}, repeat)
+    results.append(result_entry('scan', 'cold', files, seconds, repeat, **extra))
+
+    cache_path = workdir / f"scan-cache-{files}.json"
+    get_sorted_sql_files(str(sql_dir), recursive=True, cache_path=cache_path)
+    seconds, extra = timed_runs(
+        lambda: {'matched': len(get_sorted_sql_files(str(sql_dir), recursive=True, cache_path=cache_path)[0])},
+        repeat)
+    results.append(result_entry('scan', 'cached', files, seconds, repeat, **extra))
+    return results
+
+
+def _clear_stage(stage_dir: Path) -> None:
+    shutil.rmtree(stage_dir, ignore_errors=True)
+    stage_dir.mkdir(parents=True, exist_ok=True)
+
+
+def bench_upload(upload_dir: Path, files: int, file_size: int, configs: List[Tuple[int, int]],
+                 repeat: int, max_invocations: int, stage_dir: Path) -> List[Dict]:
+    """Time upload_directory_to_stage for each workers:batch-size configuration."""
+    results = []
+    total_bytes = sum(p.stat().st_size for p in upload_dir.iterdir())
+    for workers, batch_size in configs:
+        variant = f"w{workers}-b{batch_size}"
+        invocations = -(-files // max(batch_size, 1))
+        if invocations > max_invocations:
+            print(f"  ⊘ upload/{variant}/n={files}: {invocations} snow invocations > --max-invocations, skipped")
+            continue
+
+        def run() -> Dict:
+            with redirect_stdout(io.StringIO()):
+                successful, failed, _ = upload_directory_to_stage(
+                    BENCH_CONNECTION, upload_dir, BENCH_STAGE, workers=workers, batch_size=batch_size,
+                    verbose=False, backend=SnowCliBackend(BENCH_CONNECTION)
+                )
+            return {'successful': successful, 'failed': failed}
+
+        seconds, extra = timed_runs(run, repeat, before=lambda: _clear_stage(stage_dir))
+        median = seconds['median'] or 1e-9
+        results.append(result_entry(
+            'upload', variant, files, seconds, repeat,
+            invocations=invocations,
+            files_per_second=round(files / median, 1),
+            mb_per_second=round(total_bytes / median / (1024 * 1024), 3),
+            bytes=total_bytes,
+            file_size_bytes=file_size,
+            **extra
+        ))
+    return results
+
+
+def _run_command(args: List[str], cwd: Path) -> Dict:
+    proc = subprocess.run(args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          stdin=subprocess.DEVNULL, text=True)
+    entry = {'returncode': proc.returncode}
+    if proc.returncode != 0:
+        entry['error'] = (proc.stderr or '').strip().splitlines()[-1:] or ['']
+    return entry
+
+
+def bench_e2e(sql_dir: Path, upload_dir: Path, files: int, repeat: int,
+              upload_config: Tuple[int, int], max_invocations: int, stage_dir: Path) -> List[Dict]:
+    """Time the snowclisp.py and snowcliput.py commands end to end."""
+    results = []
+    python = sys.executable
+    pyutil = SNOW_CLI_DIR / 'pyutil'
+
+    seconds, extra = timed_runs(lambda: _run_command(
+        [python, str(pyutil / 'snowclisp' / 'snowclisp.py'), str(sql_dir), BENCH_CONNECTION, '--recursive'],
+        SNOW_CLI_DIR), repeat)
+    results.append(result_entry('e2e', 'snowclisp', files, seconds, repeat, **extra))
+
+    workers, batch_size = upload_config
+    variant = f"snowcliput-w{workers}-b{batch_size}"
+    invocations = -(-files // max(batch_size, 1))
+    if invocations > max_invocations:
+        print(f"  ⊘ e2e/{variant}/n={files}: {invocations} snow invocations > --max-invocations, skipped")
+        return results
+    seconds, extra = timed_runs(lambda: _run_command(
+        [python, str(pyutil / 'snowcliput' / 'snowcliput.py'), str(upload_dir), BENCH_CONNECTION, BENCH_STAGE,
+         '--workers', str(workers), '--batch-size', str(batch_size), '--backend', 'cli'],
+        SNOW_CLI_DIR), repeat, before=lambda: _clear_stage(stage_dir))
+    results.append(result_entry('e2e', variant, files, seconds, repeat, invocations=invocations, **extra))
+    return results
+
+
+def compare_results(current: List[Dict], baseline: List[Dict], threshold: float) -> List[Dict]:
+    """
+    Compare median timings by benchmark id.
+
+    Returns:
+        One row per id present in both runs: {'id', 'baseline', 'current', 'change', 'regression'}
+    """
+    previous = {entry['id']: entry for entry in baseline}
+    rows = []
+    for entry in current:
+        old = previous.get(entry['id'])
+        if not old:
+            continue
+        before, after = old['seconds']['median'], entry['seconds']['median']
+        change = (after - before) / before if before else 0.0
+        rows.append({
+            'id': entry['id'],
+            'baseline': before,
+            'current': after,
+            'change': round(change, 4),
+            'regression': change > threshold and after - before > NOISE_FLOOR_SECONDS,
+        })
+    return rows
+
+
+def print_results(results: List[Dict]) -> None:
+    print(f"\n{'='*60}")
+    print("Benchmark results (median of runs)")
+    print(f"{'='*60}")
+    for entry in results:
+        detail = ''
+        if 'files_per_second' in entry:
+            detail = f"  {entry['files_per_second']:>9.1f} files/s  {entry['mb_per_second']:.2f} MB/s"
+        if entry.get('failed') or entry.get('returncode'):
+            detail += '  ✗ failures'
+        print(f"  {entry['id']:<40} {entry['seconds']['median']:>9.4f}s{detail}")
+
+
+def print_comparison(rows: List[Dict], threshold: float) -> None:
+    print(f"\n{'='*60}")
+    print(f"Comparison with baseline (regression: > {threshold:.0%} slower)")
+    print(f"{'='*60}")
+    if not rows:
+        print("  No benchmark ids in common with the baseline")
+        return
+    for row in rows:
+        mark = '✗' if row['regression'] else '✓'
+        print(f"  {mark} {row['id']:<40} {row['baseline']:>9.4f}s -> {row['current']:>9.4f}s ({row['change']:+.1%})")
+
+
+def parse_upload_configs(value: str) -> List[Tuple[int, int]]:
+    configs = []
+    for item in filter(None, value.split(',')):
+        workers, _, batch_size = item.partition(':')
+        configs.append((int(workers), int(batch_size or 0)))
+    return configs
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python snowclibench.py [--sizes 10,1000,10000] [--benchmarks scan,upload,e2e] [--repeat N]
+            [--compare PATH] [--fail-on-regression] ...
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark snowclisp and snowcliput against a scriptable fake snow CLI",
+        epilog=(
+            "Example:\n"
+            "  python snowclibench.py\n"
+            "  python snowclibench.py --sizes 10,1000 --latency-ms 50 --output baseline.json\n"
+            "  python snowclibench.py --compare baseline.json --fail-on-regression\n"
+            "  python snowclibench.py --benchmarks upload --upload-configs 8:50,8:200 --failure-rate 0.01"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated file counts (default: 10,1000,10000)")
+    parser.add_argument("--benchmarks", default=','.join(DEFAULT_BENCHMARKS),
+                        help="Comma-separated benchmarks to run: scan, upload, e2e (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3)")
+    parser.add_argument("--latency-ms", type=float, default=0,
+                        help="Fake snow delay per invocation, like connection setup (default: 0)")
+    parser.add_argument("--stmt-latency-ms", type=float, default=0,
+                        help="Fake snow delay per statement (default: 0)")
+    parser.add_argument("--failure-rate", type=float, default=0,
+                        help="Probability that a fake snow statement fails (default: 0)")
+    parser.add_argument("--output-rows", type=int, default=0,
+                        help="Extra result rows fake snow prints per statement (default: 0)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for injected failures (default: 42)")
+    parser.add_argument("--file-size-bytes", type=int, default=1024,
+                        help="Size of each generated upload file (default: 1024)")
+    parser.add_argument("--upload-configs", default=','.join(f"{w}:{b}" for w, b in DEFAULT_UPLOAD_CONFIGS),
+                        help="Comma-separated workers:batch-size pairs (default: 1:0,4:0,4:100); "
+                             "the last one is used for the e2e snowcliput run")
+    parser.add_argument("--max-invocations", type=int, default=DEFAULT_MAX_INVOCATIONS,
+                        help=f"Skip upload configurations needing more snow invocations than this "
+                             f"(default: {DEFAULT_MAX_INVOCATIONS})")
+    parser.add_argument("--output", type=Path,
+                        help="Result file (default: output/bench/snowclibench-<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Relative slowdown counted as a regression (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if the comparison finds a regression")
+    parser.add_argument("--workdir", type=Path,
+                        help="Keep generated files here instead of a temporary directory")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    benchmarks = [name for name in args.benchmarks.split(',') if name]
+    unknown = set(benchmarks) - set(DEFAULT_BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    upload_configs = parse_upload_configs(args.upload_configs)
+    if not upload_configs:
+        parser.error("--upload-configs needs at least one workers:batch-size pair")
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r') as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error: cannot read baseline {args.compare}: {e}")
+            sys.exit(1)
+
+    knobs = {
+        'latency_ms': args.latency_ms,
+        'stmt_latency_ms': args.stmt_latency_ms,
+        'failure_rate': args.failure_rate,
+        'output_rows': args.output_rows,
+        'seed': args.seed,
+        'file_size_bytes': args.file_size_bytes,
+        'upload_configs': [f"{w}:{b}" for w, b in upload_configs],
+        'max_invocations': args.max_invocations,
+        'repeat': args.repeat,
+    }
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix='snowclibench-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    stage_dir = workdir / 'stage'
+
+    # The fake CLI reads its knobs from the environment, which subprocesses inherit;
+    # the scripts under test record their telemetry in the work directory, not output/
+    os.environ['PATH'] = f"{FAKE_SNOW_DIR}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ.update({
+        'TELEMETRY_DIR': str(workdir / 'telemetry'),
+        'FAKESNOW_LATENCY_MS': str(args.latency_ms),
+        'FAKESNOW_STMT_LATENCY_MS': str(args.stmt_latency_ms),
+        'FAKESNOW_FAILURE_RATE': str(args.failure_rate),
+        'FAKESNOW_OUTPUT_ROWS': str(args.output_rows),
+        'FAKESNOW_SEED': str(args.seed),
+        'FAKESNOW_STAGE_DIR': str(stage_dir),
+    })
+
+    print(f"{'='*60}")
+    print(f"snowclibench: sizes {sizes}, benchmarks {benchmarks}, {args.repeat} run(s) each")
+    print(f"Fake snow: {FAKE_SNOW_DIR / 'snow'}")
+    print(f"Work directory: {workdir}")
+    print(f"{'='*60}")
+
+    results: List[Dict] = []
+    started = time.perf_counter()
+    try:
+        for files in sizes:
+            sql_dir = workdir / f"sql-{files}"
+            upload_dir = workdir / f"upload-{files}"
+            if not sql_dir.exists():
+                build_sql_tree(sql_dir, files)
+            if not upload_dir.exists():
+                build_upload_dir(upload_dir, files, args.file_size_bytes)
+
+            print(f"\n▶ {files} files")
+            if 'scan' in benchmarks:
+                results.extend(bench_scan(sql_dir, files, args.repeat, workdir))
+            if 'upload' in benchmarks:
+                results.extend(bench_upload(upload_dir, files, args.file_size_bytes, upload_configs,
+                                            args.repeat, args.max_invocations, stage_dir))
+            if 'e2e' in benchmarks:
+                results.extend(bench_e2e(sql_dir, upload_dir, files, args.repeat, upload_configs[-1],
+                                         args.max_invocations, stage_dir))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+
+    report = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'knobs': knobs,
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'results': results,
+    }
+
+    regressions = []
+    if baseline is not None:
+        if baseline.get('knobs') != knobs:
+            print("\n⚠️  Baseline was recorded with different knobs; timings may not be comparable")
+        rows = compare_results(results, baseline.get('results', []), args.threshold)
+        print_comparison(rows, args.threshold)
+        report['comparison'] = {'baseline': str(args.compare), 'threshold': args.threshold, 'rows': rows}
+        regressions = [row for row in rows if row['regression']]
+
+    output = args.output or ROOT_DIR / 'output' / 'bench' / (
+        f"snowclibench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+    if regressions:
+        print(f"✗ {len(regressions)} regression(s) above {args.threshold:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
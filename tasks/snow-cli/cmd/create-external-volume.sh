@@ -85,3 +85,8 @@ else
     echo "Failed to create external volume"
     exit 1
 fi
+
+# The volume changed, so cached DESC / SHOW results for it are stale
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+python3 "$SCRIPT_DIR/../pyutil/snowclicache/snowclicache.py" invalidate --match "*EXTERNAL VOLUME*" \
+  || echo "Warning: could not clear cached external volume metadata"
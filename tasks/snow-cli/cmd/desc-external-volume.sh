@@ -12,11 +12,6 @@ SQL_FILE="$1"
 EXTERNAL_VOLUME_NAME="$2"
 OUTPUT_FILE="${3:-output/external-volume-desc.json}"
 
-# Derive the storage location output file from the main output file
-OUTPUT_DIR=$(dirname "$OUTPUT_FILE")
-OUTPUT_BASENAME=$(basename "$OUTPUT_FILE" .json)
-STORAGE_LOCATION_FILE="${OUTPUT_DIR}/${OUTPUT_BASENAME}-storage-location.json"
-
 # Check if SQL file exists
 if [ ! -f "$SQL_FILE" ]; then
     echo "Error: SQL file not found at $SQL_FILE"
@@ -29,41 +24,23 @@ if [ -z "$EXTERNAL_VOLUME_NAME" ]; then
     exit 1
 fi
 
-# Create output directory if it doesn't exist
-mkdir -p "$OUTPUT_DIR"
+# Check if CLI_CONNECTION_NAME is set
+if [ -z "${CLI_CONNECTION_NAME:-}" ]; then
+    echo "Error: CLI_CONNECTION_NAME environment variable not set"
+    exit 1
+fi
 
-echo "Describing Snowflake external volume: $EXTERNAL_VOLUME_NAME"
 echo "Output file: $OUTPUT_FILE"
 echo ""
 
-# Run snow CLI with templating and JSON_EXT format
-snow sql -f "$SQL_FILE" \
-  --enable-templating JINJA \
-  --format JSON_EXT \
-  -D external_volume_name="$EXTERNAL_VOLUME_NAME" \
-  > "$OUTPUT_FILE"
+# Render, run (or answer from the metadata cache, see pyutil/snowclicache) and
+# extract STORAGE_LOCATION_1 into <output>-storage-location.json in one process
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
-# Check if command was successful
-if [ $? -eq 0 ]; then
+if python3 "$SCRIPT_DIR/../pyutil/snowclicache/snowclicache.py" desc-external-volume \
+  "$CLI_CONNECTION_NAME" "$SQL_FILE" "$EXTERNAL_VOLUME_NAME" --output "$OUTPUT_FILE"; then
     echo ""
     echo "External volume description saved successfully"
-    echo "Output file: $OUTPUT_FILE"
-    
-    # Extract STORAGE_LOCATION_1 JSON from the output
-    echo ""
-    echo "Extracting storage location details..."
-    
-    # Find the element where parent_property = STORAGE_LOCATIONS and property = STORAGE_LOCATION_1
-    # The property_value is a JSON string that needs to be unquoted
-    STORAGE_LOCATION_JSON=$(jq -r '.[] | select(.parent_property == "STORAGE_LOCATIONS" and .property == "STORAGE_LOCATION_1") | .property_value' "$OUTPUT_FILE")
-    
-    if [ -n "$STORAGE_LOCATION_JSON" ] && [ "$STORAGE_LOCATION_JSON" != "null" ]; then
-        # Parse the JSON string and write it as formatted JSON to the file
-        echo "$STORAGE_LOCATION_JSON" | jq '.' > "$STORAGE_LOCATION_FILE"
-        echo "Storage location details saved to: $STORAGE_LOCATION_FILE"
-    else
-        echo "Warning: Could not find STORAGE_LOCATION_1 in the output"
-    fi
 else
     echo ""
     echo "Failed to describe external volume"
@@ -40,3 +40,8 @@ else
     echo "Failed to drop external volume (it may not exist)"
     exit 0
 fi
+
+# The volume changed, so cached DESC / SHOW results for it are stale
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+python3 "$SCRIPT_DIR/../pyutil/snowclicache/snowclicache.py" invalidate --match "*EXTERNAL VOLUME*" \
+  || echo "Warning: could not clear cached external volume metadata"
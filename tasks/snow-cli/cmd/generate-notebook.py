@@ -4,6 +4,16 @@ Generates a Snowflake notebook and snowflake.yml from templates by substituting
 
 Usage:
     python3 generate-notebook.py --template <template.ipynb> --output <output.ipynb>
+    python3 generate-notebook.py --template <template.ipynb> --matrix <envs.csv|envs.yaml|env-dir> --output-dir <dir>
+
+Batch mode renders one project per variable set into <output-dir>/<name>/, in
+a process pool. Templates are loaded once, files are written atomically,
+and outputs whose content has not changed are left untouched.
+
+--redaction-mode incremental replaces the template's full-table AI_REDACT
+cell ('redact') with the cells in iceberg_v3_redact_incremental_cells.ipynb:
+a watermark on (event_timestamp, event_id), a loop that redacts and MERGEs
+only unseen rows --redact-batch-size at a time, and per-batch report cells.
 
 Environment variables used for substitution:
     - DEMO_WAREHOUSE_NAME
@@ -15,10 +25,39 @@ Environment variables used for substitution:
 """
 
 import argparse
+import csv
+import hashlib
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Make the shared pyutil modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "pyutil"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "pyutil"))
+
+from snowclirender.snowclirender import TemplateRenderError, render  # noqa: E402
+from telemetry import telemetry  # noqa: E402
+
+SNOWFLAKE_YML_TEMPLATE_NAME = "iceberg_v3_demo_snowflake_yml_template.yml"
+INCREMENTAL_REDACT_TEMPLATE_NAME = "iceberg_v3_redact_incremental_cells.ipynb"
+DEFAULT_NOTEBOOK_NAME = "iceberg_v3_demo_notebook.ipynb"
+
+REDACTION_MODES = ("full", "incremental")
+REDACT_CELL_NAME = "redact"
+DEFAULT_REDACT_BATCH_SIZE = 1000
+
+# Template variable -> environment variable (or matrix column) supplying it
+TEMPLATE_VARIABLES = {
+    "demo_warehouse_name": "DEMO_WAREHOUSE_NAME",
+    "demo_engineer_role_name": "DEMO_ENGINEER_ROLE_NAME",
+    "demo_database_name": "DEMO_DATABASE_NAME",
+    "demo_schema_name": "DEMO_SCHEMA_NAME",
+    "external_volume_name": "EXTERNAL_VOLUME_NAME",
+    "internal_named_stage": "INTERNAL_NAMED_STAGE",
+}
 
 
 def get_required_env(var_name: str) -> str:
@@ -30,39 +69,81 @@ def get_required_env(var_name: str) -> str:
     return value
 
 
-def substitute_variables(text: str, variables: dict) -> str:
-    """Substitute Jinja-style variables in text."""
-    result = text
-    for key, value in variables.items():
-        result = result.replace(f"{{{{ {key} }}}}", value)
-    return result
+def substitute_variables(text: str, variables: dict, name: str = "<template>") -> str:
+    """Substitute Jinja-style variables in text (fails on undefined variables)."""
+    return render(text, variables, name)
 
 
-def generate_notebook(template_path: Path, output_path: Path, variables: dict) -> None:
-    """Read template notebook, substitute variables, and write output."""
-    with open(template_path, 'r') as f:
-        notebook = json.load(f)
+def write_if_changed(output_path: Path, content: str) -> bool:
+    """
+    Atomically write content unless the file already holds exactly that content.
 
-    for cell in notebook.get('cells', []):
-        if 'source' in cell:
-            if isinstance(cell['source'], list):
-                cell['source'] = [substitute_variables(line, variables) for line in cell['source']]
-            else:
-                cell['source'] = substitute_variables(cell['source'], variables)
+    Returns:
+        True if the file was written, False if it was unchanged
+    """
+    data = content.encode('utf-8')
+    try:
+        with open(output_path, 'rb') as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    except FileNotFoundError:
+        pass
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+    return True
 
-    with open(output_path, 'w') as f:
-        json.dump(notebook, f, indent=1)
 
-    print(f"Generated notebook: {output_path}")
+def apply_redaction_mode(notebook: dict, mode: str, template_dir: Path) -> dict:
+    """
+    Return the notebook with its redaction cell swapped for the given mode.
 
+    'full' keeps the template as is (CREATE OR REPLACE ... AS SELECT over all
+    rows). 'incremental' replaces the cell named 'redact' with the cells of
+    the incremental redaction template found next to the notebook template.
 
-def generate_snowflake_yml(template_path: Path, output_path: Path, variables: dict) -> None:
-    """Read snowflake.yml template, substitute variables, and write output."""
-    with open(template_path, 'r') as f:
-        content = f.read()
+    Raises:
+        ValueError: On an unknown mode or a template without a 'redact' cell
+    """
+    if mode not in REDACTION_MODES:
+        raise ValueError(f"Unknown redaction mode '{mode}' (expected one of: {', '.join(REDACTION_MODES)})")
+    if mode == "full":
+        return notebook
+
+    with open(template_dir / INCREMENTAL_REDACT_TEMPLATE_NAME, 'r') as f:
+        incremental_cells = json.load(f).get('cells', [])
 
+    cells = notebook.get('cells', [])
+    names = [cell.get('metadata', {}).get('name') for cell in cells]
+    if REDACT_CELL_NAME not in names:
+        raise ValueError(f"Template has no '{REDACT_CELL_NAME}' cell to replace for incremental redaction")
+    index = names.index(REDACT_CELL_NAME)
+    return dict(notebook, cells=cells[:index] + incremental_cells + cells[index + 1:])
+
+
+def render_notebook(notebook: dict, variables: dict, template_name: str) -> str:
+    """Substitute variables in every cell of a parsed notebook and return the notebook JSON."""
+    cells = []
+    for i, cell in enumerate(notebook.get('cells', [])):
+        cell = dict(cell)
+        if 'source' in cell:
+            name = f"{template_name} cell {cell.get('metadata', {}).get('name', i)}"
+            if isinstance(cell['source'], list):
+                # Render the cell as one text, then split it back into lines
+                source = substitute_variables(''.join(cell['source']), variables, name)
+                cell['source'] = source.splitlines(keepends=True)
+            else:
+                cell['source'] = substitute_variables(cell['source'], variables, name)
+        cells.append(cell)
+
+    return json.dumps(dict(notebook, cells=cells), indent=1)
+
+
+def render_snowflake_yml(content: str, variables: dict, template_name: str) -> str:
+    """Substitute variables in a snowflake.yml template."""
     yml_variables = variables.copy()
     yml_variables["internal_named_stage"] = yml_variables["internal_named_stage"].lstrip("@")
     
@@ -70,37 +151,340 @@ def generate_snowflake_yml(template_path: Path, output_path: Path, variables: di
     if "." in schema_name:
         yml_variables["demo_schema_name"] = schema_name.split(".", 1)[1]
 
-    content = substitute_variables(content, yml_variables)
+    return substitute_variables(content, yml_variables, template_name)
+
+
+def generate_notebook(template_path: Path, output_path: Path, variables: dict, redaction_mode: str = "full") -> None:
+    """Read template notebook, substitute variables, and write output."""
+    with telemetry.span('render'):
+        with open(template_path, 'r') as f:
+            notebook = apply_redaction_mode(json.load(f), redaction_mode, template_path.parent)
+        content = render_notebook(notebook, variables, str(template_path))
+
+    with telemetry.span('write'):
+        written = write_if_changed(output_path, content)
+    telemetry.count('files', int(written))
+    if written:
+        print(f"Generated notebook: {output_path}")
+    else:
+        print(f"Notebook unchanged: {output_path}")
+
+
+def generate_snowflake_yml(template_path: Path, output_path: Path, variables: dict) -> None:
+    """Read snowflake.yml template, substitute variables, and write output."""
+    with telemetry.span('render'):
+        with open(template_path, 'r') as f:
+            content = render_snowflake_yml(f.read(), variables, str(template_path))
+
+    with telemetry.span('write'):
+        written = write_if_changed(output_path, content)
+    telemetry.count('files', int(written))
+    if written:
+        print(f"Generated snowflake.yml: {output_path}")
+    else:
+        print(f"snowflake.yml unchanged: {output_path}")
+
+
+def parse_env_file(env_path: Path) -> Dict[str, str]:
+    """Parse KEY=VALUE lines (optionally 'export'ed or quoted) from an env file."""
+    values = {}
+    with open(env_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            if line.startswith('export '):
+                line = line[len('export '):]
+            key, value = line.split('=', 1)
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+                value = value[1:-1]
+            elif ' #' in value:
+                value = value.split(' #', 1)[0].rstrip()
+            values[key.strip()] = value
+    return values
+
+
+def check_project_name(name: str) -> None:
+    """
+    Reject project names that would not be a single directory under the output directory.
+
+    Raises:
+        ValueError: If the name contains a path separator or '..', or is '.'
+    """
+    if '/' in name or '\\' in name or '..' in name or name == '.':
+        raise ValueError(f"Invalid project name '{name}': must not contain '/', '\\' or '..'")
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, 'w') as f:
-        f.write(content)
+def load_matrix(matrix_path: Path) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    Load variable sets for batch mode.
 
-    print(f"Generated snowflake.yml: {output_path}")
+    Accepted forms:
+        - CSV with a 'name' column plus one column per variable
+        - YAML list of mappings with a 'name' key, or a mapping of name -> variables
+        - Directory of *.env files, one per environment (named after the file)
+
+    Variables use the environment variable names (e.g. DEMO_DATABASE_NAME);
+    anything a set leaves out falls back to the current environment.
+
+    Returns:
+        List of (name, variables) in file order
+
+    Raises:
+        ValueError: On an unreadable matrix or an invalid project name
+    """
+    if matrix_path.is_dir():
+        env_files = sorted(matrix_path.glob('*.env'))
+        for env_file in env_files:
+            check_project_name(env_file.stem)
+        return [(env_file.stem, parse_env_file(env_file)) for env_file in env_files]
+
+    if matrix_path.suffix.lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML matrices require PyYAML. Install with: pip install pyyaml")
+        try:
+            with open(matrix_path, 'r') as f:
+                data = yaml.safe_load(f) or []
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {matrix_path}: {e}")
+        if isinstance(data, dict):
+            entries = [dict(values or {}, name=name) for name, values in data.items()]
+        else:
+            entries = list(data)
+        if not all(isinstance(entry, dict) for entry in entries):
+            raise ValueError(f"{matrix_path}: every entry must be a mapping of variables")
+    elif matrix_path.suffix.lower() == '.csv':
+        with open(matrix_path, 'r', newline='') as f:
+            entries = list(csv.DictReader(f))
+    else:
+        raise ValueError(f"Unsupported matrix format: {matrix_path} (expected .csv, .yaml/.yml or a directory of .env files)")
+
+    matrix = []
+    for i, entry in enumerate(entries, 1):
+        values = {str(k): '' if v is None else str(v) for k, v in entry.items()}
+        name = values.pop('name', '').strip()
+        if not name:
+            raise ValueError(f"{matrix_path}: entry {i} has no 'name'")
+        check_project_name(name)
+        matrix.append((name, values))
+    return matrix
+
+
+def resolve_variables(values: Dict[str, str], environ: Optional[Dict[str, str]] = None,
+                      extra: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Build template variables from a variable set, falling back to the environment.
+
+    Raises:
+        ValueError: If any required variable is missing
+    """
+    environ = os.environ if environ is None else environ
+    # Matrix columns may use either the environment name or the template name
+    lookup = {key.upper(): value for key, value in values.items() if value != ''}
+    variables = {}
+    missing = []
+    for template_name, env_name in TEMPLATE_VARIABLES.items():
+        value = lookup.get(env_name) or environ.get(env_name)
+        if not value:
+            missing.append(env_name)
+        variables[template_name] = value
+    if missing:
+        raise ValueError(f"missing variable(s): {', '.join(missing)}")
+    variables.update(extra or {})
+    return variables
+
+
+# Templates parsed once in the parent and handed to each worker process once
+_batch_templates: dict = {}
+
+
+def _init_batch_worker(templates: dict) -> None:
+    _batch_templates.update(templates)
+
+
+def _render_project(job: Tuple[str, Dict[str, str], str]) -> Tuple[str, List[Tuple[str, bool]], Optional[str]]:
+    """
+    Render and write one project (notebook plus snowflake.yml).
+
+    Returns:
+        Tuple of (name, [(path, written)], error)
+    """
+    name, values, output_path = job
+    output_path = Path(output_path)
+    results = []
+    try:
+        variables = resolve_variables(values, extra=_batch_templates.get('extra_variables'))
+        notebook = render_notebook(_batch_templates['notebook'], variables, _batch_templates['notebook_name'])
+        results.append((str(output_path), write_if_changed(output_path, notebook)))
+
+        if _batch_templates.get('yml') is not None:
+            yml_variables = variables.copy()
+            yml_variables["notebook_file"] = output_path.name
+            yml_variables["notebook_file_path"] = str(output_path)
+            yml = render_snowflake_yml(_batch_templates['yml'], yml_variables, _batch_templates['yml_name'])
+            yml_path = output_path.parent / "snowflake.yml"
+            results.append((str(yml_path), write_if_changed(yml_path, yml)))
+    except (ValueError, TemplateRenderError, OSError) as e:
+        return name, results, str(e)
+    return name, results, None
+
+
+def generate_batch(
+    template_path: Path,
+    matrix: List[Tuple[str, Dict[str, str]]],
+    output_dir: Path,
+    notebook_name: str = DEFAULT_NOTEBOOK_NAME,
+    workers: Optional[int] = None,
+    redaction_mode: str = "full",
+    extra_variables: Optional[Dict[str, str]] = None
+) -> int:
+    """
+    Render one project per variable set into output_dir/<name>/ using a process pool.
+
+    Args:
+        template_path: Notebook template
+        matrix: Output of load_matrix
+        output_dir: Root directory for generated projects
+        notebook_name: File name of each generated notebook
+        workers: Worker processes (default: CPU count)
+        redaction_mode: 'full' or 'incremental' (see apply_redaction_mode)
+        extra_variables: Template variables that are the same for every project
+
+    Returns:
+        Number of projects that failed
+
+    Raises:
+        ValueError: On duplicate project names or a project directory outside output_dir
+    """
+    root = output_dir.resolve()
+    for name, _ in matrix:
+        check_project_name(name)
+        if (root / name).resolve().parent != root:
+            raise ValueError(f"Invalid project name '{name}': resolves outside {output_dir}")
+
+    with open(template_path, 'r') as f:
+        templates = {
+            'notebook': apply_redaction_mode(json.load(f), redaction_mode, template_path.parent),
+            'notebook_name': str(template_path),
+            'extra_variables': dict(extra_variables or {}),
+        }
+    yml_template = template_path.parent / SNOWFLAKE_YML_TEMPLATE_NAME
+    if yml_template.exists():
+        templates['yml'] = yml_template.read_text()
+        templates['yml_name'] = str(yml_template)
+    else:
+        print(f"Warning: snowflake.yml template not found at {yml_template}")
+
+    names = [name for name, _ in matrix]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate project names in matrix: {', '.join(duplicates)}")
+
+    jobs = [(name, values, str(output_dir / name / notebook_name)) for name, values in matrix]
+    written = unchanged = failed = 0
+
+    # Workers render and write together, so the batch is one 'render' span
+    with telemetry.span('render'), ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_batch_worker, initargs=(templates,)) as executor:
+        for name, results, error in executor.map(_render_project, jobs, chunksize=max(1, len(jobs) // 64)):
+            if error:
+                failed += 1
+                print(f"  ✗ {name}: {error}")
+                continue
+            changed = [path for path, was_written in results if was_written]
+            telemetry.count('files', len(changed))
+            if changed:
+                written += 1
+                print(f"  ✓ {name}: wrote {len(changed)} file(s)")
+            else:
+                unchanged += 1
+    telemetry.count('failures', failed)
+
+    print()
+    print(f"Projects: {len(jobs)} total, {written} written, {unchanged} unchanged, {failed} failed")
+    return failed
+
+
+def positive_int(value: str) -> int:
+    """argparse type for a whole number of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate notebook from template")
     parser.add_argument("--template", "-t", required=True, help="Path to template notebook")
-    parser.add_argument("--output", "-o", required=True, help="Output notebook path")
+    parser.add_argument("--output", "-o", help="Output notebook path (in batch mode, only its file name is used)")
+    parser.add_argument("--matrix", "-m", help="Batch mode: CSV, YAML or directory of .env files with one variable set per project")
+    parser.add_argument("--output-dir", help="Batch mode: directory receiving one project directory per variable set")
+    parser.add_argument("--workers", "-w", type=int, help="Batch mode: worker processes (default: CPU count)")
+    parser.add_argument("--redaction-mode", choices=REDACTION_MODES,
+                        default=os.environ.get("REDACTION_MODE") or "full",
+                        help="AI_REDACT step: rebuild the whole table (full) or redact only new rows "
+                             "(incremental) (default: $REDACTION_MODE or full)")
+    # A string default goes through positive_int too, so a bad $REDACT_BATCH_SIZE is a usage error
+    parser.add_argument("--redact-batch-size", type=positive_int,
+                        default=os.environ.get("REDACT_BATCH_SIZE") or str(DEFAULT_REDACT_BATCH_SIZE),
+                        help=f"Incremental mode: rows redacted per batch "
+                             f"(default: $REDACT_BATCH_SIZE or {DEFAULT_REDACT_BATCH_SIZE})")
     args = parser.parse_args()
 
     template_path = Path(args.template)
-    output_path = Path(args.output)
 
     if not template_path.exists():
         print(f"Error: Template not found: {template_path}")
         return 1
+    extra_variables = {"redact_batch_size": str(args.redact_batch_size)}
+
+    if args.matrix:
+        if not args.output_dir:
+            print("Error: --matrix requires --output-dir")
+            return 1
+        if args.workers is not None and args.workers < 1:
+            print("Error: --workers must be at least 1")
+            return 1
+        try:
+            matrix = load_matrix(Path(args.matrix))
+            if not matrix:
+                print(f"Error: No variable sets found in {args.matrix}")
+                return 1
+            print(f"Generating {len(matrix)} notebook project(s) from templates...")
+            print(f"  Notebook template: {template_path}")
+            print(f"  Output directory: {args.output_dir}")
+            print()
+            failed = generate_batch(
+                template_path,
+                matrix,
+                Path(args.output_dir),
+                notebook_name=Path(args.output).name if args.output else DEFAULT_NOTEBOOK_NAME,
+                workers=args.workers,
+                redaction_mode=args.redaction_mode,
+                extra_variables=extra_variables
+            )
+        except (OSError, ValueError, TemplateRenderError) as e:
+            print(f"Error: {e}")
+            return 1
+        return 1 if failed else 0
+
+    if not args.output:
+        print("Error: --output is required (or use --matrix with --output-dir)")
+        return 1
+
+    output_path = Path(args.output)
 
     variables = {
-        "demo_warehouse_name": get_required_env("DEMO_WAREHOUSE_NAME"),
-        "demo_engineer_role_name": get_required_env("DEMO_ENGINEER_ROLE_NAME"),
-        "demo_database_name": get_required_env("DEMO_DATABASE_NAME"),
-        "demo_schema_name": get_required_env("DEMO_SCHEMA_NAME"),
-        "external_volume_name": get_required_env("EXTERNAL_VOLUME_NAME"),
-        "internal_named_stage": get_required_env("INTERNAL_NAMED_STAGE"),
+        template_name: get_required_env(env_name)
+        for template_name, env_name in TEMPLATE_VARIABLES.items()
     }
+    variables.update(extra_variables)
 
     print("Generating notebook project from templates...")
     print(f"  Notebook template: {template_path}")
@@ -111,22 +495,29 @@ def main():
     print(f"  Schema: {variables['demo_schema_name']}")
     print(f"  External Volume: {variables['external_volume_name']}")
     print(f"  Internal Stage: {variables['internal_named_stage']}")
+    print(f"  Redaction: {args.redaction_mode}" +
+          (f" ({args.redact_batch_size} rows per batch)" if args.redaction_mode == "incremental" else ""))
     print()
 
-    generate_notebook(template_path, output_path, variables)
+    try:
+        generate_notebook(template_path, output_path, variables, args.redaction_mode)
 
-    snowflake_yml_template = template_path.parent / "iceberg_v3_demo_snowflake_yml_template.yml"
-    if snowflake_yml_template.exists():
-        snowflake_yml_output = output_path.parent / "snowflake.yml"
-        yml_variables = variables.copy()
-        yml_variables["notebook_file"] = output_path.name
-        yml_variables["notebook_file_path"] = str(output_path)
-        generate_snowflake_yml(snowflake_yml_template, snowflake_yml_output, yml_variables)
-    else:
-        print(f"Warning: snowflake.yml template not found at {snowflake_yml_template}")
+        snowflake_yml_template = template_path.parent / SNOWFLAKE_YML_TEMPLATE_NAME
+        if snowflake_yml_template.exists():
+            snowflake_yml_output = output_path.parent / "snowflake.yml"
+            yml_variables = variables.copy()
+            yml_variables["notebook_file"] = output_path.name
+            yml_variables["notebook_file_path"] = str(output_path)
+            generate_snowflake_yml(snowflake_yml_template, snowflake_yml_output, yml_variables)
+        else:
+            print(f"Warning: snowflake.yml template not found at {snowflake_yml_template}")
+    except (OSError, ValueError, TemplateRenderError) as e:
+        print(f"Error: {e}")
+        return 1
 
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    with telemetry.run('generate-notebook'):
+        sys.exit(main())
@@ -2,16 +2,18 @@
 set -euo pipefail
 
 # Generates a Snowflake notebook from a template by substituting variables
-# Usage: ./generate-notebook.sh TEMPLATE_FILE OUTPUT_FILE
+# Usage: ./generate-notebook.sh TEMPLATE_FILE OUTPUT_FILE [generate-notebook.py options...]
 
 if [ $# -lt 2 ]; then
-    echo "Usage: $0 TEMPLATE_FILE OUTPUT_FILE"
+    echo "Usage: $0 TEMPLATE_FILE OUTPUT_FILE [generate-notebook.py options...]"
     echo "Example: $0 notebook/iceberg_v3_template.ipynb notebook/v3_iceberg_demo/iceberg_v3_demo_notebook.ipynb"
+    echo "         $0 notebook/iceberg_v3_template.ipynb notebook/v3_iceberg_demo/iceberg_v3_demo_notebook.ipynb --redaction-mode incremental"
     exit 1
 fi
 
 TEMPLATE_FILE="$1"
 OUTPUT_FILE="$2"
+shift 2
 
 # Check if template file exists
 if [ ! -f "$TEMPLATE_FILE" ]; then
@@ -20,7 +22,7 @@ if [ ! -f "$TEMPLATE_FILE" ]; then
 fi
 
 # Run the Python script to generate the notebook
-python3 cmd/generate-notebook.py --template "$TEMPLATE_FILE" --output "$OUTPUT_FILE"
+python3 cmd/generate-notebook.py --template "$TEMPLATE_FILE" --output "$OUTPUT_FILE" "$@"
 
 if [ $? -eq 0 ]; then
     echo ""
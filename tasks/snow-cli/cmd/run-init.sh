@@ -53,9 +53,13 @@ echo "  Engineer Role: $DEMO_ENGINEER_ROLE_NAME"
 echo "  Engineer User: $DEMO_ENGINEER_USER_NAME"
 echo ""
 
-# Run snow CLI with templating
-snow sql -f "$SQL_FILE" \
-  --enable-templating JINJA \
+# Render the SQL locally (fails fast on undefined variables), then run it
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+RENDERED_SQL="$(mktemp "${TMPDIR:-/tmp}/run-init.XXXXXX.sql")"
+trap 'rm -f "$RENDERED_SQL"' EXIT
+
+python3 "$SCRIPT_DIR/../pyutil/snowclirender/snowclirender.py" "$SQL_FILE" \
+  -o "$RENDERED_SQL" \
   -D demo_warehouse_name="$DEMO_WAREHOUSE_NAME" \
   -D your_external_volume_name="$EXTERNAL_VOLUME_NAME" \
   -D demo_database_name="$DEMO_DATABASE_NAME" \
@@ -64,6 +68,8 @@ snow sql -f "$SQL_FILE" \
   -D demo_engineer_role_name="$DEMO_ENGINEER_ROLE_NAME" \
   -D demo_engineer_user_name="$DEMO_ENGINEER_USER_NAME"
 
+snow sql -f "$RENDERED_SQL"
+
 # Check if command was successful
 if [ $? -eq 0 ]; then
     echo ""
@@ -76,3 +82,7 @@ else
     echo "Initialization failed"
     exit 1
 fi
+
+# The script creates and replaces objects, so no cached metadata can be trusted
+python3 "$SCRIPT_DIR/../pyutil/snowclicache/snowclicache.py" invalidate \
+  || echo "Warning: could not clear cached Snowflake metadata"
@@ -0,0 +1,956 @@
+#!/usr/bin/env python3
+"""
+snowclibackend - pluggable SQL execution backends for the snow cli utilities
+
+Shared by snowclisp and snowcliput so both tools can run against:
+    cli        the Snowflake CLI ('snow sql'), one subprocess per call (default)
+    connector  the Snowflake Python connector, with long-lived pooled connections
+    fake       an in-memory backend for tests and dry runs
+"""
+
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Make the shared tasks/pyutil modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'pyutil'))
+
+from telemetry import telemetry  # noqa: E402
+
+BACKEND_NAMES = ('cli', 'connector', 'fake')
+DEFAULT_BACKEND = os.environ.get('SNOWCLI_BACKEND', 'cli')
+
+# Streaming callbacks: on_output(stream, line) receives 'stdout'/'stderr'
+# lines without their newline; on_file(index, sql_file) fires as each file starts
+OutputCallback = Callable[[str, str], None]
+FileCallback = Callable[[int, Path], None]
+
+# Profiling callback: on_statement(profile) receives one dict per statement with
+# file, index (1-based within the file), statement, query_id, start (epoch
+# seconds), duration_s and status
+StatementCallback = Callable[[Dict[str, Any]], None]
+
+# Marker selected between files by the cli backend so file boundaries
+# show up in the output stream of a single 'snow sql' session
+FILE_MARKER = 'snowclibackend:file:'
+FILE_MARKER_RE = re.compile(re.escape(FILE_MARKER) + r'(\d+)')
+# Column alias of the marker query, and the table borders the CLI draws around its result
+FILE_MARKER_ALIAS = 'snowclibackend_file_marker'
+FILE_MARKER_ALIAS_RE = re.compile(re.escape(FILE_MARKER_ALIAS), re.I)
+TABLE_BORDER_RE = re.compile(r'^\s*[+|][-+|=\s]*$')
+
+# Files PUT stores as they are instead of gzipping them with AUTO_COMPRESS
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.zst', '.br', '.deflate', '.raw_deflate')
+
+# PATTERN = '<regex>' option of LIST / GET / REMOVE, as a SQL string literal
+PATTERN_OPTION_RE = re.compile(r"PATTERN\s*=\s*'((?:[^'\\]|''|\\.)*)'", re.I)
+
+
+class SnowflakeBackendError(Exception):
+    """Raised when a backend fails to execute SQL."""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stdout: str = '', stderr: str = ''):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class SnowflakeCancelledError(SnowflakeBackendError):
+    """Raised when in-flight work is abandoned because its cancel event was set."""
+
+
+def split_sql_statements(sql: str) -> List[str]:
+    """
+    Split a SQL script into statements on top-level semicolons.
+
+    Semicolons inside quoted strings, quoted identifiers, $$-delimited
+    blocks and comments are ignored. Comment-only fragments are dropped.
+
+    Args:
+        sql: SQL script text
+
+    Returns:
+        List of statements without the trailing semicolon
+    """
+    statements = []
+    current = []
+    i = 0
+    length = len(sql)
+
+    while i < length:
+        ch = sql[i]
+
+        if sql.startswith('--', i) or sql.startswith('//', i):
+            end = sql.find('\n', i)
+            end = length if end == -1 else end
+            current.append(sql[i:end])
+            i = end
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            end = length if end == -1 else end + 2
+            current.append(sql[i:end])
+            i = end
+        elif sql.startswith('$$', i):
+            end = sql.find('$$', i + 2)
+            end = length if end == -1 else end + 2
+            current.append(sql[i:end])
+            i = end
+        elif ch in ("'", '"'):
+            j = i + 1
+            while j < length:
+                if sql[j] == '\\' and ch == "'":
+                    j += 2
+                    continue
+                if sql[j] == ch:
+                    # Doubled quote is an escaped quote
+                    if j + 1 < length and sql[j + 1] == ch:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            current.append(sql[i:j + 1])
+            i = j + 1
+        elif ch == ';':
+            statements.append(''.join(current))
+            current = []
+            i += 1
+        else:
+            current.append(ch)
+            i += 1
+
+    statements.append(''.join(current))
+
+    return [s.strip() for s in statements if _strip_sql_comments(s).strip()]
+
+
+def _strip_sql_comments(sql: str) -> str:
+    """Remove line and block comments (used to detect comment-only fragments)."""
+    sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.S)
+    return re.sub(r'(--|//)[^\n]*', '', sql)
+
+
+def normalize_rows(data: Any) -> List[Dict[str, Any]]:
+    """
+    Flatten CLI JSON output (a list of rows, or a list of result sets) into rows.
+
+    Args:
+        data: Parsed JSON output of 'snow sql --format JSON'
+
+    Returns:
+        Rows in statement order, with lower-cased column names
+    """
+    rows = []
+    pending = [data]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, list):
+            pending.extend(reversed(item))
+        elif isinstance(item, dict):
+            rows.append({str(k).lower(): v for k, v in item.items()})
+    return rows
+
+
+class SnowflakeBackend:
+    """
+    Base class for SQL execution backends.
+
+    Backends are safe to call from multiple threads; each concurrent call
+    runs in its own session.
+    """
+
+    name = 'base'
+
+    def __init__(self, connection_name: str):
+        self.connection_name = connection_name
+
+    def query(self, sql: str) -> List[Dict[str, Any]]:
+        """
+        Run one or more statements and return the rows of all result sets.
+
+        Args:
+            sql: SQL text; multiple statements are separated by semicolons
+
+        Returns:
+            Result rows with lower-cased column names
+
+        Raises:
+            SnowflakeBackendError: If execution fails
+        """
+        raise NotImplementedError
+
+    def execute_files(
+        self,
+        sql_files: List[Path],
+        cancel: Optional[threading.Event] = None,
+        on_output: Optional[OutputCallback] = None,
+        on_file: Optional[FileCallback] = None
+    ) -> Tuple[str, str]:
+        """
+        Execute SQL files in order within a single session.
+
+        Args:
+            sql_files: SQL file paths, in execution order
+            cancel: Event that, once set, abandons the work as soon as possible
+            on_output: Receives output line by line as it arrives; nothing is
+                buffered, so the returned text and error output are empty
+            on_file: Called with (1-based index, path) as each file starts; the
+                cli backend runs an extra marker query per file to detect this,
+                so pass it only when needed
+
+        Returns:
+            Tuple of (stdout, stderr) text suitable for printing
+
+        Raises:
+            SnowflakeCancelledError: If cancel was set before execution finished
+            SnowflakeBackendError: If execution fails
+        """
+        raise NotImplementedError
+
+    def profile_files(
+        self,
+        sql_files: List[Path],
+        on_statement: StatementCallback,
+        cancel: Optional[threading.Event] = None
+    ) -> None:
+        """
+        Execute SQL files in order within a single session, timing each statement.
+
+        Result sets are discarded. Statements that ran before a failure are
+        reported when the backend can attribute them.
+
+        Args:
+            sql_files: SQL file paths, in execution order
+            on_statement: Receives one profile dict per executed statement
+            cancel: Event that, once set, abandons the work as soon as possible
+
+        Raises:
+            SnowflakeCancelledError: If cancel was set before execution finished
+            SnowflakeBackendError: If execution fails
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any sessions held by the backend."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SnowCliBackend(SnowflakeBackend):
+    """Runs every call as a 'snow sql' subprocess."""
+
+    name = 'cli'
+
+    # How often a running subprocess checks its cancel event
+    CANCEL_POLL_SECONDS = 0.2
+
+    # Appended to a profiled run, in the same session, to read back per-statement timings
+    PROFILE_HISTORY_SQL = (
+        "SELECT query_id, query_text, start_time, total_elapsed_time, execution_status "
+        "FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => {limit})) "
+        "WHERE query_text NOT ILIKE '%QUERY_HISTORY_BY_SESSION%' "
+        "ORDER BY start_time"
+    )
+
+    @staticmethod
+    def _popen(cmd: List[str], bufsize: int = -1) -> subprocess.Popen:
+        """Start cmd with piped output, timing the start as the 'subprocess_start' phase."""
+        try:
+            with telemetry.span('subprocess_start'):
+                return subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    bufsize=bufsize
+                )
+        except FileNotFoundError:
+            raise SnowflakeBackendError(
+                "'snow' command not found. Install with: pip install snowflake-cli-labs"
+            )
+
+    def _run(
+        self,
+        args: List[str],
+        cancel: Optional[threading.Event] = None,
+        on_output: Optional[OutputCallback] = None
+    ) -> subprocess.CompletedProcess:
+        cmd = ['snow', 'sql', '-c', self.connection_name] + args
+        telemetry.count('subprocesses')
+        with telemetry.span('subprocess'):
+            if on_output is not None:
+                return self._run_streaming(cmd, cancel, on_output)
+            return self._run_buffered(cmd, cancel)
+
+    def _run_buffered(self, cmd: List[str], cancel: Optional[threading.Event]) -> subprocess.CompletedProcess:
+        """Run cmd and return its whole output once it exits."""
+        proc = self._popen(cmd)
+
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=None if cancel is None else self.CANCEL_POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel.is_set():
+                    proc.terminate()
+                    stdout, stderr = proc.communicate()
+                    raise SnowflakeCancelledError(
+                        "Cancelled", returncode=proc.returncode, stdout=stdout or '', stderr=stderr or ''
+                    )
+
+        if proc.returncode != 0:
+            details = (stderr or stdout or '').strip()
+            raise SnowflakeBackendError(
+                f"snow sql exited with code {proc.returncode}: {details}",
+                returncode=proc.returncode,
+                stdout=stdout or '',
+                stderr=stderr or ''
+            )
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    def _run_streaming(
+        self,
+        cmd: List[str],
+        cancel: Optional[threading.Event],
+        on_output: OutputCallback
+    ) -> subprocess.CompletedProcess:
+        """Run cmd, forwarding each output line to on_output instead of buffering it."""
+        proc = self._popen(cmd, bufsize=1)
+
+        # One reader per pipe so neither can fill up and block the process;
+        # the lock keeps callbacks from interleaving mid-line
+        lock = threading.Lock()
+
+        def pump(pipe, stream: str) -> None:
+            for line in pipe:
+                with lock:
+                    on_output(stream, line.rstrip('\n'))
+            pipe.close()
+
+        readers = [
+            threading.Thread(target=pump, args=(proc.stdout, 'stdout'), daemon=True),
+            threading.Thread(target=pump, args=(proc.stderr, 'stderr'), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        cancelled = False
+        while True:
+            try:
+                proc.wait(timeout=self.CANCEL_POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    proc.terminate()
+                    proc.wait()
+                    cancelled = True
+                    break
+
+        for reader in readers:
+            reader.join()
+
+        if cancelled:
+            raise SnowflakeCancelledError("Cancelled", returncode=proc.returncode)
+        if proc.returncode != 0:
+            raise SnowflakeBackendError(
+                f"snow sql exited with code {proc.returncode}",
+                returncode=proc.returncode
+            )
+        return subprocess.CompletedProcess(cmd, proc.returncode, '', '')
+
+    def query(self, sql: str) -> List[Dict[str, Any]]:
+        result = self._run(['--format', 'JSON', '-q', sql])
+        if not result.stdout.strip():
+            return []
+        try:
+            return normalize_rows(json.loads(result.stdout))
+        except ValueError as e:
+            raise SnowflakeBackendError(f"Unreadable JSON output from snow sql: {e}", stdout=result.stdout)
+
+    def execute_files(
+        self,
+        sql_files: List[Path],
+        cancel: Optional[threading.Event] = None,
+        on_output: Optional[OutputCallback] = None,
+        on_file: Optional[FileCallback] = None
+    ) -> Tuple[str, str]:
+        # One invocation with multiple -f flags keeps all files in one session.
+        # The CLI gives no per-file signal, so when on_file is given a one-row
+        # marker query runs ahead of each file and is picked out of the output.
+        # The markers are real queries: each one shows up in QUERY_HISTORY, and
+        # LAST_QUERY_ID() in a file's first statement refers to its marker.
+        if on_file is None:
+            args = []
+            for sql_file in sql_files:
+                args.extend(['-f', str(sql_file)])
+            result = self._run(args, cancel, on_output)
+            return result.stdout, result.stderr
+
+        # Without a sink, output is collected and returned as usual
+        buffered: Dict[str, List[str]] = {'stdout': [], 'stderr': []}
+        sink = on_output or (lambda stream, line: buffered[stream].append(line))
+
+        # The marker shows up both in the echoed statement and in its result
+        # row, framed by the header and borders of a one-cell table. All of
+        # that is dropped, and each file is announced once.
+        last_index = 0
+        # None outside a marker block, 'head' before its result row, 'tail' after
+        block = None
+
+        def forward(stream: str, line: str) -> None:
+            nonlocal last_index, block
+            match = FILE_MARKER_RE.search(line)
+            if match:
+                index = int(match.group(1))
+                if index > last_index:
+                    last_index = index
+                    on_file(index, sql_files[index - 1])
+                block = 'head' if FILE_MARKER_ALIAS_RE.search(line) else 'tail'
+            elif block == 'head' and (FILE_MARKER_ALIAS_RE.search(line) or TABLE_BORDER_RE.match(line)):
+                pass
+            elif block == 'tail' and TABLE_BORDER_RE.match(line):
+                block = None
+            else:
+                block = None
+                sink(stream, line)
+
+        with tempfile.TemporaryDirectory(prefix='snowclibackend-') as marker_dir:
+            args = []
+            for i, sql_file in enumerate(sql_files, 1):
+                marker = Path(marker_dir) / f"{i:05d}.sql"
+                marker.write_text(f"SELECT '{FILE_MARKER}{i}' AS {FILE_MARKER_ALIAS};\n")
+                args.extend(['-f', str(marker), '-f', str(sql_file)])
+            try:
+                self._run(args, cancel, forward)
+            except SnowflakeBackendError as e:
+                e.stdout = e.stdout or '\n'.join(buffered['stdout'])
+                e.stderr = e.stderr or '\n'.join(buffered['stderr'])
+                raise
+        return '\n'.join(buffered['stdout']), '\n'.join(buffered['stderr'])
+
+    def profile_files(
+        self,
+        sql_files: List[Path],
+        on_statement: StatementCallback,
+        cancel: Optional[threading.Event] = None
+    ) -> None:
+        # Starting a 'snow' process per statement would time process startup
+        # and lose session state, so the files run in one invocation and the
+        # session's query history supplies server-side timings afterwards.
+        # Statements are matched to history rows in order; a failed run has
+        # no history to read back.
+        statements = []
+        for sql_file in sql_files:
+            with open(sql_file, 'r') as f:
+                for i, statement in enumerate(split_sql_statements(f.read()), 1):
+                    statements.append((sql_file, i, statement))
+
+        with tempfile.TemporaryDirectory(prefix='snowclibackend-') as tmp_dir:
+            history_file = Path(tmp_dir) / 'query_history.sql'
+            history_file.write_text(self.PROFILE_HISTORY_SQL.format(limit=len(statements) + 100) + ';\n')
+            args = ['--format', 'JSON']
+            for sql_file in sql_files:
+                args.extend(['-f', str(sql_file)])
+            args.extend(['-f', str(history_file)])
+            result = self._run(args, cancel)
+
+        try:
+            data = json.loads(result.stdout) if result.stdout.strip() else []
+        except ValueError as e:
+            raise SnowflakeBackendError(f"Unreadable JSON output from snow sql: {e}", stdout=result.stdout)
+        # Multi-statement output is a list of result sets; the history is the last one
+        if data and isinstance(data[0], list):
+            data = data[-1]
+        history = normalize_rows(data)[-len(statements):] if statements else []
+        offset = len(statements) - len(history)
+
+        for n, (sql_file, i, statement) in enumerate(statements):
+            row = history[n - offset] if n >= offset else {}
+            on_statement({
+                'file': sql_file.name,
+                'index': i,
+                'statement': statement,
+                'query_id': row.get('query_id'),
+                'start': _to_epoch(row.get('start_time')),
+                'duration_s': (row['total_elapsed_time'] / 1000.0) if row.get('total_elapsed_time') is not None else None,
+                'status': 'success' if str(row.get('execution_status', 'SUCCESS')).upper().startswith('SUCCESS') else 'failed',
+            })
+
+
+def _to_epoch(value: Any) -> Optional[float]:
+    """Convert an ISO timestamp (or epoch number) from query history to epoch seconds."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace(' ', 'T')).timestamp()
+    except ValueError:
+        return None
+
+
+class ConnectorBackend(SnowflakeBackend):
+    """
+    Runs SQL in-process through the Snowflake Python connector.
+
+    Connections are opened lazily, reused across calls and kept in a pool
+    of up to pool_size sessions, so concurrent callers each get their own
+    session and nobody pays for a new login per statement.
+    """
+
+    name = 'connector'
+
+    def __init__(self, connection_name: str, pool_size: int = 1):
+        super().__init__(connection_name)
+        try:
+            import snowflake.connector  # noqa: F401
+        except ImportError:
+            raise SnowflakeBackendError(
+                "The connector backend requires snowflake-connector-python. "
+                "Install with: pip install snowflake-connector-python"
+            )
+        self.pool_size = max(1, pool_size)
+        self._idle: 'queue.LifoQueue' = queue.LifoQueue()
+        self._opened: List[Any] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    def _connect(self):
+        import snowflake.connector
+        try:
+            return snowflake.connector.connect(connection_name=self.connection_name)
+        except Exception as e:
+            raise SnowflakeBackendError(f"Failed to connect with '{self.connection_name}': {e}")
+
+    @contextmanager
+    def session(self) -> Iterator[Any]:
+        """Borrow a pooled connection for the duration of the block."""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                with self._lock:
+                    self._opened.append(conn)
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def query(self, sql: str) -> List[Dict[str, Any]]:
+        from snowflake.connector import DictCursor
+        rows = []
+        with self.session() as conn:
+            try:
+                for cursor in conn.execute_string(sql, cursor_class=DictCursor):
+                    if cursor.description:
+                        rows.extend(cursor.fetchall())
+            except Exception as e:
+                raise SnowflakeBackendError(str(e))
+        return normalize_rows(rows)
+
+    def execute_files(
+        self,
+        sql_files: List[Path],
+        cancel: Optional[threading.Event] = None,
+        on_output: Optional[OutputCallback] = None,
+        on_file: Optional[FileCallback] = None
+    ) -> Tuple[str, str]:
+        lines = []
+        with self.session() as conn:
+            for i, sql_file in enumerate(sql_files, 1):
+                if on_file is not None:
+                    on_file(i, sql_file)
+                try:
+                    with open(sql_file, 'r') as f:
+                        # Statements are sent one at a time, so cancellation
+                        # takes effect at the next statement boundary
+                        for cursor in conn.execute_stream(f):
+                            _emit(_format_cursor(cursor), lines, on_output)
+                            if cancel is not None and cancel.is_set():
+                                raise SnowflakeCancelledError("Cancelled", stdout='\n'.join(lines))
+                except SnowflakeCancelledError:
+                    raise
+                except Exception as e:
+                    raise SnowflakeBackendError(
+                        f"Failed executing {sql_file.name}: {e}",
+                        stdout='\n'.join(lines)
+                    )
+        return '\n'.join(lines), ''
+
+    def profile_files(
+        self,
+        sql_files: List[Path],
+        on_statement: StatementCallback,
+        cancel: Optional[threading.Event] = None
+    ) -> None:
+        with self.session() as conn:
+            for sql_file in sql_files:
+                with open(sql_file, 'r') as f:
+                    cursors = conn.execute_stream(f)
+                    i = 0
+                    while True:
+                        if cancel is not None and cancel.is_set():
+                            raise SnowflakeCancelledError("Cancelled")
+                        start = time.time()
+                        try:
+                            # execute_stream runs the next statement when advanced
+                            cursor = next(cursors)
+                        except StopIteration:
+                            break
+                        except Exception as e:
+                            on_statement({
+                                'file': sql_file.name,
+                                'index': i + 1,
+                                'statement': None,
+                                'query_id': getattr(e, 'sfqid', None),
+                                'start': start,
+                                'duration_s': time.time() - start,
+                                'status': 'failed',
+                            })
+                            raise SnowflakeBackendError(f"Failed executing {sql_file.name}: {e}")
+                        i += 1
+                        on_statement({
+                            'file': sql_file.name,
+                            'index': i,
+                            'statement': (cursor.query or '').strip(),
+                            'query_id': cursor.sfqid,
+                            'start': start,
+                            'duration_s': time.time() - start,
+                            'status': 'success',
+                        })
+
+    def close(self) -> None:
+        with self._lock:
+            opened, self._opened = self._opened, []
+        for conn in opened:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _emit(text: str, lines: List[str], on_output: Optional[OutputCallback]) -> None:
+    """Forward text line by line when streaming, otherwise collect it."""
+    if on_output is None:
+        lines.append(text)
+    else:
+        for line in text.splitlines():
+            on_output('stdout', line)
+
+
+def _format_cursor(cursor) -> str:
+    """Render a cursor's statement and result as plain text."""
+    header = (cursor.query or '').strip()
+    if not cursor.description:
+        return header
+    columns = [col[0] for col in cursor.description]
+    body = ['\t'.join(columns)]
+    for row in cursor.fetchall():
+        body.append('\t'.join('' if v is None else str(v) for v in row))
+    return '\n'.join([header] + body)
+
+
+class FakeBackend(SnowflakeBackend):
+    """
+    In-memory backend for tests and dry runs.
+
+    Records every statement in `executed`. PUT, LIST, GET, REMOVE and COPY
+    operate on an in-memory stage store; other statements succeed with a status row
+    unless they match `fail_pattern`. Canned results can be registered
+    with `respond`.
+    """
+
+    name = 'fake'
+
+    def __init__(
+        self,
+        connection_name: str = 'fake',
+        fail_pattern: Optional[str] = None,
+        latency: float = 0.0
+    ):
+        super().__init__(connection_name)
+        self.latency = latency
+        self.executed: List[str] = []
+        self.stages: Dict[str, Dict[str, bytes]] = {}
+        self.loaded: Dict[str, set] = {}
+        self.fail_pattern = re.compile(fail_pattern, re.I) if fail_pattern else None
+        self._responses: List[Tuple[re.Pattern, List[Dict[str, Any]]]] = []
+        self._lock = threading.Lock()
+
+    def respond(self, pattern: str, rows: List[Dict[str, Any]]) -> None:
+        """Return `rows` for statements matching the regex `pattern`."""
+        self._responses.append((re.compile(pattern, re.I), rows))
+
+    def query(self, sql: str) -> List[Dict[str, Any]]:
+        rows = []
+        for statement in split_sql_statements(sql):
+            rows.extend(self._execute(statement))
+        return normalize_rows(rows)
+
+    def execute_files(
+        self,
+        sql_files: List[Path],
+        cancel: Optional[threading.Event] = None,
+        on_output: Optional[OutputCallback] = None,
+        on_file: Optional[FileCallback] = None
+    ) -> Tuple[str, str]:
+        lines = []
+        for i, sql_file in enumerate(sql_files, 1):
+            if on_file is not None:
+                on_file(i, sql_file)
+            with open(sql_file, 'r') as f:
+                for statement in split_sql_statements(f.read()):
+                    if cancel is not None and cancel.is_set():
+                        raise SnowflakeCancelledError("Cancelled", stdout='\n'.join(lines))
+                    rows = self._execute(statement)
+                    _emit('\n'.join([statement] + [json.dumps(row) for row in rows]), lines, on_output)
+        return '\n'.join(lines), ''
+
+    def profile_files(
+        self,
+        sql_files: List[Path],
+        on_statement: StatementCallback,
+        cancel: Optional[threading.Event] = None
+    ) -> None:
+        for sql_file in sql_files:
+            with open(sql_file, 'r') as f:
+                for i, statement in enumerate(split_sql_statements(f.read()), 1):
+                    if cancel is not None and cancel.is_set():
+                        raise SnowflakeCancelledError("Cancelled")
+                    start = time.time()
+                    profile = {
+                        'file': sql_file.name,
+                        'index': i,
+                        'statement': statement,
+                        'query_id': str(uuid.uuid4()),
+                        'start': start,
+                    }
+                    try:
+                        self._execute(statement)
+                    except SnowflakeBackendError:
+                        on_statement(dict(profile, duration_s=time.time() - start, status='failed'))
+                        raise
+                    on_statement(dict(profile, duration_s=time.time() - start, status='success'))
+
+    def _execute(self, statement: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.executed.append(statement)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.fail_pattern and self.fail_pattern.search(statement):
+            raise SnowflakeBackendError(f"Fake failure for statement: {statement}", returncode=1)
+
+        for pattern, rows in self._responses:
+            if pattern.search(statement):
+                return [dict(row) for row in rows]
+
+        keyword = statement.split(None, 1)[0].upper() if statement.split() else ''
+        if keyword == 'PUT':
+            return self._put(statement)
+        if keyword in ('LIST', 'LS'):
+            return self._list(statement)
+        if keyword in ('REMOVE', 'RM'):
+            return self._remove(statement)
+        if keyword == 'GET':
+            return self._get(statement)
+        if keyword == 'COPY':
+            return self._copy(statement)
+        return [{'status': 'Statement executed successfully.'}]
+
+    @staticmethod
+    def _split_stage(location: str) -> Tuple[str, str]:
+        """'@db.sch.STG/a/b' -> ('stg', 'a/b')"""
+        location = location.strip().strip("'").lstrip('@')
+        stage, _, path = location.partition('/')
+        return stage.split('.')[-1].strip('"').lower(), path.strip('/')
+
+    def _select(self, statement: str, location: str) -> Tuple[str, Dict[str, bytes]]:
+        """
+        Stage files a LIST / GET / REMOVE location and PATTERN select.
+
+        Like Snowflake, the location path is a plain prefix ('@stg/a.json'
+        also selects 'a.json.gz', '@stg/dir' also 'dir2/x'), and PATTERN must
+        match the whole listed name, stage name included.
+        """
+        location = location.strip().strip("'").lstrip('@')
+        stage_part, _, prefix = location.partition('/')
+        stage = stage_part.split('.')[-1].strip('"').lower()
+        pattern_match = PATTERN_OPTION_RE.search(statement)
+        pattern = None
+        if pattern_match:
+            # Undo SQL literal escaping: '' is a quote, a backslash escapes the next character
+            literal = pattern_match.group(1).replace("''", "'")
+            pattern = re.compile(re.sub(r'\\(.)', r'\1', literal), re.S)
+        with self._lock:
+            files = dict(self.stages.get(stage, {}))
+        return stage, {
+            name: data for name, data in sorted(files.items())
+            if name.startswith(prefix) and (pattern is None or pattern.fullmatch(f"{stage}/{name}"))
+        }
+
+    def _put(self, statement: str) -> List[Dict[str, Any]]:
+        match = re.match(r"PUT\s+'?file://([^'\s]+)'?\s+(\S+)(.*)$", statement, re.I | re.S)
+        if not match:
+            raise SnowflakeBackendError(f"Unparseable PUT: {statement}")
+        source, location, options = match.groups()
+        stage, path = self._split_stage(location)
+        compress = re.search(r'AUTO_COMPRESS\s*=\s*TRUE', options, re.I) is not None
+
+        parent = Path(source).parent
+        sources = sorted(p for p in parent.iterdir() if p.is_file() and fnmatch.fnmatch(p.name, Path(source).name))
+
+        rows = []
+        with self._lock:
+            files = self.stages.setdefault(stage, {})
+            for src in sources:
+                data = src.read_bytes()
+                target = src.name
+                if compress and not target.endswith(COMPRESSED_SUFFIXES):
+                    data = gzip.compress(data)
+                    target += '.gz'
+                files[f"{path}/{target}" if path else target] = data
+                rows.append({
+                    'source': src.name,
+                    'target': target,
+                    'source_size': src.stat().st_size,
+                    'target_size': len(data),
+                    'status': 'UPLOADED',
+                    'message': '',
+                })
+        return rows
+
+    def _list(self, statement: str) -> List[Dict[str, Any]]:
+        location = statement.split(None, 1)[1] if len(statement.split()) > 1 else ''
+        stage, files = self._select(statement, location.split()[0] if location else '')
+        return [
+            {
+                'name': f"{stage}/{name}",
+                'size': len(data),
+                'md5': hashlib.md5(data).hexdigest(),
+                'last_modified': '',
+            }
+            for name, data in files.items()
+        ]
+
+    def _get(self, statement: str) -> List[Dict[str, Any]]:
+        match = re.match(r"GET\s+'?(@[^'\s]+)'?\s+'?file://([^'\s]+)'?", statement, re.I)
+        if not match:
+            raise SnowflakeBackendError(f"Unparseable GET: {statement}")
+        location, target = match.groups()
+        _, files = self._select(statement, location)
+
+        # Like Snowflake, files land in the target directory under their base name
+        rows = []
+        for name, data in files.items():
+            destination = Path(target) / Path(name).name
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            destination.write_bytes(data)
+            rows.append({'file': name, 'size': len(data), 'status': 'DOWNLOADED', 'message': ''})
+        return rows
+
+    def _copy(self, statement: str) -> List[Dict[str, Any]]:
+        # COPY INTO <table> FROM <stage> FILES = (...) of NDJSON (optionally
+        # gzipped) files; unparseable lines count as errors, and files already
+        # loaded with the same content are skipped unless FORCE = TRUE
+        match = re.match(r"COPY\s+INTO\s+(\S+)\s+FROM\s+'?(@[^'\s]+)'?(.*)$", statement, re.I | re.S)
+        if not match:
+            raise SnowflakeBackendError(f"Unparseable COPY: {statement}")
+        table, location, options = match.groups()
+        stage, path = self._split_stage(location)
+        files_match = re.search(r"FILES\s*=\s*\(([^)]*)\)", options, re.I)
+        names = re.findall(r"'([^']*)'", files_match.group(1)) if files_match else None
+        force = re.search(r'FORCE\s*=\s*TRUE', options, re.I) is not None
+
+        rows = []
+        with self._lock:
+            files = dict(self.stages.get(stage, {}))
+            loaded = self.loaded.setdefault(table.upper(), set())
+            if names is None:
+                names = [n[len(path) + 1:] if path else n for n in files if not path or n.startswith(f"{path}/")]
+            for name in names:
+                key = f"{path}/{name}" if path else name
+                data = files.get(key)
+                if data is None:
+                    rows.append({'file': f"{stage}/{key}", 'status': 'LOAD_FAILED', 'rows_parsed': 0,
+                                 'rows_loaded': 0, 'errors_seen': 1, 'first_error': 'File not found'})
+                    continue
+                fingerprint = f"{key}:{hashlib.md5(data).hexdigest()}"
+                if fingerprint in loaded and not force:
+                    continue
+                if key.endswith('.gz'):
+                    data = gzip.decompress(data)
+                parsed = errors = 0
+                first_error = None
+                for line in data.decode('utf-8', errors='replace').splitlines():
+                    if not line.strip():
+                        continue
+                    parsed += 1
+                    try:
+                        json.loads(line)
+                    except ValueError as e:
+                        errors += 1
+                        first_error = first_error or str(e)
+                loaded.add(fingerprint)
+                status = 'LOADED' if not errors else ('PARTIALLY_LOADED' if errors < parsed else 'LOAD_FAILED')
+                rows.append({'file': f"{stage}/{key}", 'status': status, 'rows_parsed': parsed,
+                             'rows_loaded': parsed - errors, 'errors_seen': errors, 'first_error': first_error})
+        return rows or [{'status': 'Copy executed with 0 files processed.'}]
+
+    def _remove(self, statement: str) -> List[Dict[str, Any]]:
+        location = statement.split(None, 1)[1].split()[0]
+        stage, selected = self._select(statement, location)
+        removed = []
+        with self._lock:
+            files = self.stages.get(stage, {})
+            for name in selected:
+                files.pop(name, None)
+                removed.append({'name': f"{stage}/{name}", 'result': 'removed'})
+        return removed
+
+
+def get_backend(name: str, connection_name: str, pool_size: int = 1) -> SnowflakeBackend:
+    """
+    Create a backend by name.
+
+    Args:
+        name: One of BACKEND_NAMES
+        connection_name: Snowflake CLI / connector connection name
+        pool_size: Maximum concurrent sessions (connector backend only)
+
+    Returns:
+        A SnowflakeBackend instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name == 'cli':
+        return SnowCliBackend(connection_name)
+    if name == 'connector':
+        return ConnectorBackend(connection_name, pool_size=pool_size)
+    if name == 'fake':
+        return FakeBackend(connection_name)
+    raise ValueError(f"Unknown backend '{name}' (expected one of: {', '.join(BACKEND_NAMES)})")
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+snowclicache - on-disk TTL cache for read-only Snowflake metadata queries
+
+Every 'snow sql' call pays a full CLI login, and the task wrappers repeat the
+same lookups (DESC EXTERNAL VOLUME, LIST @stage, SHOW ...) on every run.
+CachedBackend wraps any snowclibackend backend and answers single DESC /
+DESCRIBE / SHOW / LIST / LS statements from the cache while they are younger
+than the TTL. Entries are keyed on connection, role and the rendered query
+text, and stored one file per entry under output/snowclicache/ so concurrent
+tools never rewrite each other's entries.
+
+Anything else that runs through a CachedBackend (PUT, REMOVE, DDL, SQL
+files) drops the connection's entries, since it may have changed what they
+describe. DDL run outside the Python tools is followed by an explicit
+'snowclicache.py invalidate' in the shell wrappers.
+
+Usage:
+    python snowclicache.py query <connection> (-q SQL | -f FILE [-D name=value ...])
+        [--role ROLE] [--ttl SECONDS] [--refresh] [--output PATH]
+    python snowclicache.py desc-external-volume <connection> <sql_file> <volume_name> [--output PATH]
+    python snowclicache.py invalidate [--connection NAME] [--match GLOB] [--expired]
+    python snowclicache.py list
+
+Environment:
+    SNOWCLI_CACHE_TTL   default TTL in seconds (default: 3600; 0 disables the cache)
+    SNOWFLAKE_ROLE      role part of the cache key when --role is not given
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Make sibling and shared tasks/pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'pyutil'))
+
+from snowclibackend.snowclibackend import (  # noqa: E402
+    BACKEND_NAMES,
+    DEFAULT_BACKEND,
+    SnowflakeBackend,
+    SnowflakeBackendError,
+    get_backend,
+    split_sql_statements,
+)
+from snowclirender.snowclirender import TemplateRenderError, parse_definitions, render_file  # noqa: E402
+from telemetry import telemetry  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
+
+DEFAULT_CACHE_DIR = 'output/snowclicache'
+DEFAULT_TTL_SECONDS = int(os.environ.get('SNOWCLI_CACHE_TTL') or 3600)
+
+# Statements whose results only describe objects and never change them
+CACHEABLE_RE = re.compile(r'^\s*(DESC|DESCRIBE|SHOW|LIST|LS)\b', re.IGNORECASE)
+
+STORAGE_LOCATION_PARENT = 'STORAGE_LOCATIONS'
+STORAGE_LOCATION_PROPERTY = 'STORAGE_LOCATION_1'
+
+
+def cacheable_statement(sql: str) -> Optional[str]:
+    """
+    The statement to cache sql under, or None if sql must always run.
+
+    Only a single read-only metadata statement is cacheable; the trailing
+    semicolon and surrounding whitespace are not part of the key.
+    """
+    statements = split_sql_statements(sql)
+    if len(statements) != 1 or not CACHEABLE_RE.match(statements[0]):
+        return None
+    return statements[0].strip()
+
+
+class QueryCache:
+    """Query results persisted one JSON file per (connection, role, query)."""
+
+    def __init__(self, cache_dir: Path, ttl: int = DEFAULT_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    @staticmethod
+    def key(connection_name: str, role: str, query: str) -> str:
+        return hashlib.sha256('\0'.join([connection_name, role, query]).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, connection_name: str, role: str, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached rows for the query, or None if missing, expired or unreadable."""
+        try:
+            with open(self._path(self.key(connection_name, role, query)), 'r') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if time.time() - entry.get('cached_at', 0) >= self.ttl:
+            return None
+        return entry['rows']
+
+    def put(self, connection_name: str, role: str, query: str, rows: List[Dict[str, Any]]) -> None:
+        """Store rows for the query, replacing any previous entry atomically."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(self.key(connection_name, role, query))
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'connection': connection_name,
+                'role': role,
+                'query': query,
+                'cached_at': time.time(),
+                'rows': rows,
+            }, f, default=str)
+        os.replace(tmp_path, path)
+
+    def entries(self) -> List[Tuple[Path, Dict]]:
+        """Every readable entry with its file, oldest first."""
+        entries = []
+        for path in self.cache_dir.glob('*.json') if self.cache_dir.is_dir() else []:
+            try:
+                with open(path, 'r') as f:
+                    entries.append((path, json.load(f)))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return sorted(entries, key=lambda item: item[1].get('cached_at', 0))
+
+    def invalidate(
+        self,
+        connection_name: Optional[str] = None,
+        match: Optional[str] = None,
+        expired_only: bool = False
+    ) -> int:
+        """
+        Remove entries, all of them unless filtered.
+
+        Args:
+            connection_name: Only entries of this connection
+            match: Only entries whose query matches this case-insensitive glob
+            expired_only: Only entries older than the TTL
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        now = time.time()
+        for path, entry in self.entries():
+            if connection_name is not None and entry.get('connection') != connection_name:
+                continue
+            if match is not None and not fnmatch.fnmatch(entry.get('query', '').upper(), match.upper()):
+                continue
+            if expired_only and now - entry.get('cached_at', 0) < self.ttl:
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class CachedBackend(SnowflakeBackend):
+    """
+    A backend that answers read-only metadata queries from a QueryCache.
+
+    Everything else is passed to the wrapped backend, after which the
+    connection's cached entries are dropped.
+    """
+
+    def __init__(self, backend: SnowflakeBackend, cache: QueryCache, role: Optional[str] = None):
+        super().__init__(backend.connection_name)
+        self.backend = backend
+        self.cache = cache
+        self.role = role if role is not None else os.environ.get('SNOWFLAKE_ROLE', '')
+        self.name = backend.name
+
+    def query(self, sql: str) -> List[Dict[str, Any]]:
+        statement = cacheable_statement(sql)
+        if statement is None:
+            try:
+                return self.backend.query(sql)
+            finally:
+                self.invalidate()
+
+        rows = self.cache.get(self.connection_name, self.role, statement)
+        if rows is not None:
+            telemetry.count('cache_hits')
+            return rows
+        telemetry.count('cache_misses')
+        rows = self.backend.query(sql)
+        self.cache.put(self.connection_name, self.role, statement, rows)
+        return rows
+
+    def refresh(self, sql: str) -> List[Dict[str, Any]]:
+        """Run a cacheable query against Snowflake and replace its cached rows."""
+        statement = cacheable_statement(sql)
+        rows = self.backend.query(sql)
+        if statement is not None:
+            self.cache.put(self.connection_name, self.role, statement, rows)
+        return rows
+
+    def execute_files(self, sql_files, cancel=None, on_output=None, on_file=None):
+        try:
+            return self.backend.execute_files(sql_files, cancel, on_output, on_file)
+        finally:
+            self.invalidate()
+
+    def profile_files(self, sql_files, on_statement, cancel=None):
+        try:
+            return self.backend.profile_files(sql_files, on_statement, cancel)
+        finally:
+            self.invalidate()
+
+    def invalidate(self) -> int:
+        """Drop every cached entry of this backend's connection."""
+        return self.cache.invalidate(connection_name=self.connection_name)
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def cached_backend(
+    backend: SnowflakeBackend,
+    ttl: int = DEFAULT_TTL_SECONDS,
+    cache_dir: Optional[Path] = None,
+    role: Optional[str] = None
+) -> SnowflakeBackend:
+    """Wrap backend in a CachedBackend, or return it unchanged when ttl is 0."""
+    if ttl <= 0:
+        return backend
+    return CachedBackend(backend, QueryCache(cache_dir or ROOT_DIR / DEFAULT_CACHE_DIR, ttl), role)
+
+
+def extract_storage_location(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The STORAGE_LOCATION_1 details from DESC EXTERNAL VOLUME rows.
+
+    Snowflake returns them as a JSON string in property_value.
+
+    Returns:
+        The parsed storage location, or None if the rows do not contain it
+    """
+    for row in rows:
+        if (row.get('parent_property') == STORAGE_LOCATION_PARENT
+                and row.get('property') == STORAGE_LOCATION_PROPERTY):
+            value = row.get('property_value')
+            if not value:
+                return None
+            return json.loads(value) if isinstance(value, str) else value
+    return None
+
+
+def write_json(path: Path, data: Any) -> None:
+    """Write data as indented JSON, atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def storage_location_path(output: Path) -> Path:
+    """output/external-volume-desc.json -> output/external-volume-desc-storage-location.json"""
+    return output.with_name(f"{output.stem}-storage-location.json")
+
+
+def describe_external_volume(backend: SnowflakeBackend, sql_file: Path, volume_name: str,
+                             output: Path) -> Optional[Path]:
+    """
+    Run the DESC EXTERNAL VOLUME template and write its rows and storage location.
+
+    Returns:
+        The storage location file, or None if the description has no STORAGE_LOCATION_1
+    """
+    with telemetry.span('render'):
+        sql = render_file(sql_file, {'external_volume_name': volume_name})
+    rows = backend.query(sql)
+
+    with telemetry.span('write'):
+        write_json(output, rows)
+        location = extract_storage_location(rows)
+        if location is None:
+            return None
+        location_path = storage_location_path(output)
+        write_json(location_path, location)
+    return location_path
+
+
+def print_entries(cache: QueryCache) -> None:
+    """One line per cached entry with its age and whether it is still fresh."""
+    now = time.time()
+    entries = cache.entries()
+    print(f"{'='*60}")
+    print(f"Cached queries in {cache.cache_dir} (TTL {cache.ttl}s): {len(entries)}")
+    print(f"{'='*60}")
+    for _, entry in entries:
+        age = now - entry.get('cached_at', 0)
+        mark = '✓' if age < cache.ttl else '✗'
+        role = f" as {entry['role']}" if entry.get('role') else ''
+        query = ' '.join(entry.get('query', '').split())
+        print(f"  {mark} {age:>7.0f}s  {entry.get('connection')}{role}: {query[:80]}")
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python snowclicache.py query <connection> (-q SQL | -f FILE) [--ttl SECONDS] [--refresh]
+        python snowclicache.py desc-external-volume <connection> <sql_file> <volume_name> [--output PATH]
+        python snowclicache.py invalidate [--connection NAME] [--match GLOB] [--expired]
+        python snowclicache.py list
+    """
+    parser = argparse.ArgumentParser(
+        description="Cache read-only Snowflake metadata queries (DESC, SHOW, LIST) on disk with a TTL",
+        epilog=(
+            "Example:\n"
+            "  python snowclicache.py query my_connection -q 'SHOW STAGES IN SCHEMA DEMO_DB.RAW'\n"
+            "  python snowclicache.py query my_connection -f sql/batch-0/desc_external_volume.sql "
+            "-D external_volume_name=iceberg_ext_vol\n"
+            "  python snowclicache.py desc-external-volume my_connection sql/batch-0/desc_external_volume.sql "
+            "iceberg_ext_vol --output ../../output/external-volume-desc.json\n"
+            "  python snowclicache.py invalidate --match '*EXTERNAL VOLUME iceberg_ext_vol*'\n"
+            "  python snowclicache.py invalidate --connection my_connection"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--cache-dir", type=Path, default=ROOT_DIR / DEFAULT_CACHE_DIR,
+                        help=f"Cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL_SECONDS,
+                        help="Seconds a cached result stays valid; 0 always queries "
+                             "(default: $SNOWCLI_CACHE_TTL or 3600)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = commands.add_parser("query", help="Run a metadata query, answering from the cache if fresh")
+    query_parser.add_argument("connection_name", help="Snowflake CLI connection name")
+    source = query_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-q", "--query", help="SQL text")
+    source.add_argument("-f", "--file", type=Path, help="SQL template file, rendered with -D definitions")
+    query_parser.add_argument("-D", "--define", action="append", default=[], metavar="NAME=VALUE",
+                              help="Template variable for --file (repeatable)")
+    query_parser.add_argument("--role", help="Role part of the cache key (default: $SNOWFLAKE_ROLE)")
+    query_parser.add_argument("--refresh", action="store_true", help="Query Snowflake and replace the cached rows")
+    query_parser.add_argument("--output", "-o", type=Path, help="Write the rows here instead of stdout")
+    query_parser.add_argument("--backend", choices=BACKEND_NAMES, default=DEFAULT_BACKEND,
+                              help=f"SQL execution backend (default: {DEFAULT_BACKEND}, or $SNOWCLI_BACKEND)")
+
+    desc_parser = commands.add_parser("desc-external-volume",
+                                      help="Describe an external volume and extract STORAGE_LOCATION_1")
+    desc_parser.add_argument("connection_name", help="Snowflake CLI connection name")
+    desc_parser.add_argument("sql_file", type=Path, help="DESC EXTERNAL VOLUME template")
+    desc_parser.add_argument("volume_name", help="External volume name")
+    desc_parser.add_argument("--output", "-o", type=Path, default=ROOT_DIR / 'output' / 'external-volume-desc.json',
+                             help="Description file; the storage location goes next to it as "
+                                  "<name>-storage-location.json (default: output/external-volume-desc.json)")
+    desc_parser.add_argument("--role", help="Role part of the cache key (default: $SNOWFLAKE_ROLE)")
+    desc_parser.add_argument("--backend", choices=BACKEND_NAMES, default=DEFAULT_BACKEND,
+                             help=f"SQL execution backend (default: {DEFAULT_BACKEND}, or $SNOWCLI_BACKEND)")
+
+    invalidate_parser = commands.add_parser("invalidate", help="Remove cached entries (all unless filtered)")
+    invalidate_parser.add_argument("--connection", help="Only entries of this connection")
+    invalidate_parser.add_argument("--match", metavar="GLOB", help="Only entries whose query matches (case-insensitive)")
+    invalidate_parser.add_argument("--expired", action="store_true", help="Only entries older than the TTL")
+
+    commands.add_parser("list", help="Show cached entries and their age")
+    args = parser.parse_args()
+
+    cache = QueryCache(args.cache_dir, max(args.ttl, 0))
+
+    if args.command == 'list':
+        print_entries(cache)
+        return
+    if args.command == 'invalidate':
+        removed = cache.invalidate(args.connection, args.match, args.expired)
+        print(f"✓ Removed {removed} cached entr{'y' if removed == 1 else 'ies'} from {args.cache_dir}")
+        return
+
+    backend = None
+    try:
+        backend = CachedBackend(get_backend(args.backend, args.connection_name), cache, args.role)
+        if args.command == 'desc-external-volume':
+            print(f"Describing Snowflake external volume: {args.volume_name}")
+            location_path = describe_external_volume(backend, args.sql_file, args.volume_name, args.output)
+            print(f"✓ External volume description saved to: {args.output}")
+            if location_path is None:
+                print("⚠️  Could not find STORAGE_LOCATION_1 in the output")
+            else:
+                print(f"✓ Storage location details saved to: {location_path}")
+            return
+
+        sql = render_file(args.file, parse_definitions(args.define)) if args.file else args.query
+        if cacheable_statement(sql) is None:
+            print("ERROR: only a single DESC, SHOW or LIST statement can be cached", file=sys.stderr)
+            sys.exit(1)
+        rows = backend.refresh(sql) if args.refresh else backend.query(sql)
+        if args.output:
+            write_json(args.output, rows)
+            print(f"✓ {len(rows)} row(s) written to {args.output}")
+        else:
+            print(json.dumps(rows, indent=4, default=str))
+    except (OSError, ValueError, TemplateRenderError, SnowflakeBackendError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if backend is not None:
+            backend.close()
+
+
+if __name__ == "__main__":
+    with telemetry.run('snowclicache'):
+        main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+snowclichunk - split JSON files into size-targeted, compressed chunks before PUT
+
+Streams JSON arrays or NDJSON without loading whole files into memory and
+writes NDJSON chunks of roughly --chunk-size-mb each. Chunks are
+compressed in a process pool (gzip, or zstd when the zstandard package is
+installed), and the matching PUT/COPY SOURCE_COMPRESSION value is reported.
+
+Chunk names keep the source name as a prefix
+(customer_events_001.json -> customer_events_001_00000.json.gz), so stage
+patterns like '.*customer_events_.*\\.json(\\.gz|\\.zst)?' keep matching.
+
+Usage:
+    python snowclichunk.py <input_dir> <output_dir> [--chunk-size-mb N]
+        [--compression gzip|zstd|none] [--workers N] [--coalesce]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+COMPRESSIONS = ('gzip', 'zstd', 'none')
+DEFAULT_CHUNK_SIZE_MB = 100
+
+# PUT / COPY SOURCE_COMPRESSION value and file extension per codec
+SOURCE_COMPRESSION = {'gzip': 'GZIP', 'zstd': 'ZSTD', 'none': 'NONE'}
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+
+# Names this tool writes; only these are cleared from the output directory
+CHUNK_NAME_RE = re.compile(r'_\d{5}\.json(\.gz|\.zst)?$')
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Largest single record read into memory (Snowflake's VARIANT limit); a bigger
+# "record" means the file is not NDJSON or a JSON array of records
+MAX_RECORD_BYTES = 128 * 1024 * 1024
+
+
+def iter_ndjson_records(path: Path, max_record_bytes: int = MAX_RECORD_BYTES) -> Iterator[bytes]:
+    """
+    Yield each non-blank line of an NDJSON file, reading one line at a time.
+
+    Raises:
+        ValueError: If a line is not a JSON value or is longer than max_record_bytes
+    """
+    with open(path, 'rb') as f:
+        line_number = 0
+        while True:
+            line = f.readline(max_record_bytes + 1)
+            if not line:
+                return
+            line_number += 1
+            if len(line) > max_record_bytes:
+                raise ValueError(f"{path}: line {line_number} is longer than {max_record_bytes} bytes; "
+                                 f"expected NDJSON (one record per line) or a JSON array")
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                json.loads(line)
+            except ValueError:
+                raise ValueError(f"{path}: line {line_number} is not a JSON value; "
+                                 f"expected NDJSON (one record per line) or a JSON array")
+            yield line
+
+
+def iter_json_array_records(path: Path, block_size: int = READ_BLOCK_SIZE,
+                            max_record_bytes: int = MAX_RECORD_BYTES) -> Iterator[bytes]:
+    """
+    Yield the elements of a top-level JSON array as compact JSON, reading in blocks.
+
+    Only the current element and one read block are held in memory.
+
+    Raises:
+        ValueError: If the file is not a well-formed JSON array, or an element
+            does not parse within max_record_bytes
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(block_size)
+        eof = len(buffer) < block_size
+        pos = 0
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            if eof:
+                return False
+            more = f.read(block_size)
+            if len(more) < block_size:
+                eof = True
+            buffer = buffer[pos:] + more
+            pos = 0
+            return bool(more)
+
+        def skip(chars: str) -> Optional[str]:
+            """Skip the given characters; return the next one (None at EOF)."""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not fill():
+                    return None
+
+        if skip(' \t\r\n\ufeff') != '[':
+            raise ValueError(f"{path}: expected a JSON array")
+        pos += 1
+
+        expect_value = True
+        while True:
+            char = skip(' \t\r\n')
+            if char is None:
+                raise ValueError(f"{path}: unterminated JSON array")
+            if char == ']':
+                return
+            if char == ',':
+                if expect_value:
+                    raise ValueError(f"{path}: unexpected ',' at offset {pos}")
+                pos += 1
+                expect_value = True
+                continue
+            if not expect_value:
+                raise ValueError(f"{path}: expected ',' or ']' at offset {pos}")
+
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A value ending at the buffer edge (e.g. a number) may continue in the next block
+                    if end < len(buffer) or eof:
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError(f"{path}: invalid JSON near offset {pos}")
+                # Stop reading ahead for an element that never parses instead of buffering the file
+                if len(buffer) - pos > max_record_bytes:
+                    raise ValueError(f"{path}: invalid JSON or an element longer than "
+                                     f"{max_record_bytes} bytes near offset {pos}")
+                fill()
+
+            pos = end
+            expect_value = False
+            yield json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def iter_json_records(path: Path) -> Iterator[bytes]:
+    """Yield records from a JSON array file or an NDJSON file (detected from the first byte)."""
+    with open(path, 'rb') as f:
+        head = f.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+    if head.startswith(b'['):
+        return iter_json_array_records(path)
+    return iter_ndjson_records(path)
+
+
+def compress_chunk(data: bytes, output_path: str, compression: str, level: Optional[int] = None) -> Dict:
+    """
+    Compress one chunk and write it atomically (runs in a worker process).
+
+    Returns:
+        Dict with the chunk's 'file', 'raw_bytes' and 'bytes'
+    """
+    if compression == 'gzip':
+        # mtime=0 keeps output byte-identical across runs, so unchanged
+        # chunks are recognised by the upload manifest
+        payload = gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    elif compression == 'zstd':
+        import zstandard
+        payload = zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    else:
+        payload = data
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, output_path)
+
+    return {'file': os.path.basename(output_path), 'raw_bytes': len(data), 'bytes': len(payload)}
+
+
+class _ChunkStream:
+    """
+    Accumulates records and hands each full chunk to the process pool.
+
+    Streams share one queue of in-flight chunks, so the pool stays busy
+    across input files while memory stays bounded.
+    """
+
+    def __init__(self, prefix: str, output_dir: Path, target_bytes: int, compression: str,
+                 level: Optional[int], executor: ProcessPoolExecutor, max_in_flight: int,
+                 in_flight: Deque[Tuple[Future, int]], results: List[Dict]):
+        self.prefix = prefix
+        self.output_dir = output_dir
+        self.target_bytes = target_bytes
+        self.compression = compression
+        self.level = level
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.results = results
+        self.in_flight = in_flight
+        self.parts: List[bytes] = []
+        self.size = 0
+        self.records = 0
+        self.index = 0
+
+    def add(self, record: bytes) -> None:
+        self.parts.append(record)
+        self.parts.append(b'\n')
+        self.size += len(record) + 1
+        self.records += 1
+        if self.size >= self.target_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.parts:
+            return
+        # Bound memory: wait for the oldest chunk before queueing another
+        while len(self.in_flight) >= self.max_in_flight:
+            self._collect(self.in_flight.popleft())
+
+        name = f"{self.prefix}_{self.index:05d}.json{EXTENSIONS[self.compression]}"
+        future = self.executor.submit(
+            compress_chunk, b''.join(self.parts), str(self.output_dir / name), self.compression, self.level
+        )
+        self.in_flight.append((future, self.records))
+
+        self.index += 1
+        self.parts, self.size, self.records = [], 0, 0
+
+    def drain(self) -> None:
+        """Wait for every queued chunk."""
+        while self.in_flight:
+            self._collect(self.in_flight.popleft())
+
+    def _collect(self, entry: Tuple[Future, int]) -> None:
+        future, records = entry
+        result = future.result()
+        result['records'] = records
+        self.results.append(result)
+
+
+def _common_prefix(names: List[str]) -> str:
+    """Longest common name prefix, trimmed of trailing separators and digits."""
+    prefix = os.path.commonprefix(names) if names else ''
+    return prefix.rstrip('0123456789').rstrip('_-.') or 'chunk'
+
+
+def chunk_directory(
+    input_dir: Path,
+    output_dir: Path,
+    chunk_size_mb: float = DEFAULT_CHUNK_SIZE_MB,
+    compression: str = 'gzip',
+    workers: Optional[int] = None,
+    coalesce: bool = False,
+    level: Optional[int] = None,
+    verbose: bool = True
+) -> Dict:
+    """
+    Split every *.json file in input_dir into compressed NDJSON chunks in output_dir.
+
+    Args:
+        input_dir: Directory of JSON array or NDJSON files
+        output_dir: Directory receiving the chunks (previous chunks are removed)
+        chunk_size_mb: Target uncompressed size per chunk
+        compression: One of COMPRESSIONS
+        workers: Compression processes (default: CPU count)
+        coalesce: Pack records from all inputs into one evenly sized sequence of
+            chunks instead of chunking each input separately
+        level: Compression level (codec default when None)
+        verbose: Print progress
+
+    Returns:
+        Dict with 'source_compression', 'chunks' (file, records, raw_bytes, bytes)
+        and 'inputs'
+
+    Raises:
+        ValueError: On an unknown codec, a missing zstandard package or malformed input
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}' (expected one of: {', '.join(COMPRESSIONS)})")
+    if compression == 'zstd':
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValueError("zstd compression requires the zstandard package. Install with: pip install zstandard")
+    if not input_dir.is_dir():
+        raise NotADirectoryError(f"Path is not a directory: {input_dir}")
+    if output_dir.resolve() == input_dir.resolve():
+        raise ValueError("The output directory must differ from the input directory")
+
+    inputs = sorted(p for p in input_dir.iterdir() if p.is_file() and p.suffix.lower() == '.json')
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for stale in output_dir.iterdir():
+        if stale.is_file() and CHUNK_NAME_RE.search(stale.name):
+            stale.unlink()
+
+    target_bytes = max(1, int(chunk_size_mb * 1024 * 1024))
+    workers = workers or os.cpu_count() or 1
+    results: List[Dict] = []
+
+    if verbose:
+        print(f"Chunking {len(inputs)} file(s) from {input_dir} into {output_dir}")
+        print(f"  Target chunk size: {chunk_size_mb} MB, compression: {compression}, workers: {workers}")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight: Deque[Tuple[Future, int]] = deque()
+
+        def new_stream(prefix: str) -> _ChunkStream:
+            return _ChunkStream(prefix, output_dir, target_bytes, compression, level,
+                                executor, workers * 2, in_flight, results)
+
+        stream = None
+        if coalesce:
+            stream = new_stream(_common_prefix([p.stem for p in inputs]))
+            for path in inputs:
+                for record in iter_json_records(path):
+                    stream.add(record)
+            stream.flush()
+        else:
+            for path in inputs:
+                stream = new_stream(path.stem)
+                for record in iter_json_records(path):
+                    stream.add(record)
+                stream.flush()
+        if stream is not None:
+            stream.drain()
+
+    results.sort(key=lambda r: r['file'])
+
+    if verbose:
+        raw = sum(r['raw_bytes'] for r in results)
+        packed = sum(r['bytes'] for r in results)
+        ratio = (packed / raw * 100) if raw else 0.0
+        print(f"  ✓ {len(results)} chunk(s), {sum(r['records'] for r in results)} record(s), "
+              f"{raw} -> {packed} bytes ({ratio:.1f}%)")
+        print(f"  SOURCE_COMPRESSION = {SOURCE_COMPRESSION[compression]}")
+
+    return {
+        'source_compression': SOURCE_COMPRESSION[compression],
+        'inputs': [p.name for p in inputs],
+        'chunks': results,
+    }
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python snowclichunk.py <input_dir> <output_dir> [--chunk-size-mb N]
+            [--compression gzip|zstd|none] [--workers N] [--coalesce] [--report PATH]
+    """
+    parser = argparse.ArgumentParser(
+        description="Split JSON / NDJSON files into size-targeted compressed chunks for stage upload",
+        epilog=(
+            "Example:\n"
+            "  python snowclichunk.py ./upload ./output/chunks --chunk-size-mb 128 --compression gzip\n"
+            "  python snowclichunk.py ./upload ./output/chunks --coalesce --compression zstd"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input_dir", type=Path, help="Directory of .json files (JSON arrays or NDJSON)")
+    parser.add_argument("output_dir", type=Path, help="Directory receiving the chunks")
+    parser.add_argument("--chunk-size-mb", type=float, default=DEFAULT_CHUNK_SIZE_MB,
+                        help=f"Target uncompressed chunk size in MB (default: {DEFAULT_CHUNK_SIZE_MB})")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default='gzip',
+                        help="Chunk compression (default: gzip)")
+    parser.add_argument("--level", type=int, help="Compression level (default: codec default)")
+    parser.add_argument("--workers", "-w", type=int, help="Compression processes (default: CPU count)")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Pack records from all inputs into evenly sized chunks")
+    parser.add_argument("--report", type=Path,
+                        help="Write the chunk list and SOURCE_COMPRESSION hint here as JSON")
+    args = parser.parse_args()
+
+    if args.chunk_size_mb <= 0:
+        print("Error: --chunk-size-mb must be positive", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        report = chunk_directory(
+            args.input_dir,
+            args.output_dir,
+            chunk_size_mb=args.chunk_size_mb,
+            compression=args.compression,
+            workers=args.workers,
+            coalesce=args.coalesce,
+            level=args.level
+        )
+    except (OSError, ValueError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+snowcliget - download (mirror) files from a Snowflake stage using GET
+
+The counterpart of snowcliput. The stage is listed with one LIST query, the
+listing is filtered locally (--pattern), and the files that are missing or
+changed locally are fetched by concurrent GET invocations, --batch-size
+files per 'snow sql' call so the CLI login is paid once per batch.
+
+A file is skipped when the local copy already matches the stage: same size
+and MD5 as LIST reports, checked against a manifest of earlier downloads
+first so unchanged files are not re-hashed. With --decompress, .gz (and .zst,
+with the zstandard package) files are stream-decompressed after download and
+the manifest is what proves a local file is current. A run that would
+decompress two stage files onto one local name (a.json and a.json.gz) is
+refused before anything is downloaded.
+
+Each GET writes into a private temporary directory inside the target, and
+finished files are moved into place with a rename, so an interrupted run
+never leaves a partial file under a final name.
+
+Usage:
+    python snowcliget.py <directory> <connection_name> <stage_name>
+        [--pattern REGEX] [--workers N] [--batch-size N] [--parallel N]
+        [--decompress] [--manifest PATH] [--force] [--backend cli|connector|fake]
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Make sibling and shared tasks/pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'pyutil'))
+
+from snowclibackend.snowclibackend import (  # noqa: E402
+    BACKEND_NAMES,
+    DEFAULT_BACKEND,
+    SnowCliBackend,
+    SnowflakeBackend,
+    SnowflakeBackendError,
+    get_backend,
+)
+from snowcliput.snowcliput import (  # noqa: E402
+    exact_stage_file_pattern,
+    get_stage_path_prefix,
+    list_stage_files,
+    load_manifest,
+    normalize_stage_name,
+    save_manifest,
+    stage_pattern_literal,
+)
+from telemetry import telemetry  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
+
+DEFAULT_MANIFEST = 'output/snowcliget-manifest.json'
+DECOMPRESSED_SUFFIXES = ('.gz', '.zst')
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def local_relative_path(stage_file: str, stage_name: str, decompress: bool) -> str:
+    """
+    Where a stage file lands relative to the target directory.
+
+    The path below the stage path given on the command line is kept, so
+    '@stg/raw' mirrors 'raw/2024/a.json.gz' to '2024/a.json.gz'
+    ('2024/a.json' with decompress).
+    """
+    prefix = get_stage_path_prefix(stage_name)
+    relative = stage_file[len(prefix) + 1:] if prefix else stage_file
+    if decompress and relative.endswith(DECOMPRESSED_SUFFIXES):
+        relative = relative.rsplit('.', 1)[0]
+    return relative
+
+
+def compute_md5(file_path: Path) -> str:
+    """MD5 of a file, read in 1 MB blocks."""
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def is_current(local_path: Path, listed: Dict, entry: Optional[Dict], decompress: bool) -> bool:
+    """
+    True if local_path already holds the stage file described by listed.
+
+    The manifest entry from the last download answers without reading the
+    file when neither side changed since. Otherwise, for files kept as
+    downloaded, size and MD5 are compared with LIST; multipart MD5s
+    ('<hash>-<parts>') cannot be recomputed locally, so only size counts.
+    Decompressed files can only be vouched for by the manifest.
+    """
+    try:
+        stat = local_path.stat()
+    except FileNotFoundError:
+        return False
+
+    if (entry and entry.get('stage_size') == listed['size'] and entry.get('stage_md5') == listed['md5']
+            and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns
+            and entry.get('decompressed', False) == decompress):
+        return True
+    if decompress or stat.st_size != listed['size']:
+        return False
+    if not listed['md5'] or '-' in listed['md5']:
+        return True
+    return compute_md5(local_path) == listed['md5']
+
+
+def plan_download(
+    stage_name: str,
+    stage_listing: Dict[str, Dict],
+    target_dir: Path,
+    stage_manifest: Dict[str, Dict],
+    pattern: Optional[str] = None,
+    decompress: bool = False,
+    force: bool = False
+) -> Tuple[List[Tuple[str, Path]], List[str]]:
+    """
+    Decide which stage files need to be downloaded.
+
+    Returns:
+        Tuple of ([(stage_file, local_path)] to download, [stage_file] already current)
+
+    Raises:
+        ValueError: If decompress maps two stage files (e.g. a.json and a.json.gz) to one local file
+    """
+    regex = re.compile(pattern) if pattern else None
+    local_paths: Dict[str, List[str]] = {}
+    for stage_file in sorted(stage_listing):
+        if regex and not regex.search(stage_file):
+            continue
+        local_paths.setdefault(local_relative_path(stage_file, stage_name, decompress), []).append(stage_file)
+    collisions = {local: files for local, files in local_paths.items() if len(files) > 1}
+    if collisions:
+        details = '; '.join(f"{local} <- {', '.join(files)}" for local, files in sorted(collisions.items()))
+        raise ValueError(f"--decompress would write several stage files to the same local file "
+                         f"({details}); narrow --pattern or download without --decompress")
+
+    to_download = []
+    unchanged = []
+    for local_relative, (stage_file,) in local_paths.items():
+        listed = stage_listing[stage_file]
+        local_path = target_dir / local_relative
+        if not force and is_current(local_path, listed, stage_manifest.get(stage_file), decompress):
+            unchanged.append(stage_file)
+        else:
+            to_download.append((stage_file, local_path))
+    return to_download, unchanged
+
+
+def build_get_query(stage_name: str, stage_file: str, target_dir: Path, parallel: Optional[int] = None) -> str:
+    """
+    Build a GET statement for exactly one stage file.
+
+    GET treats its location as a prefix, so the file's directory is fetched
+    with a PATTERN matching only the file ('a.json' must not bring 'a.json.gz').
+
+    Args:
+        stage_name: Stage name as given on the command line (its path is ignored)
+        stage_file: Stage-relative file name, as returned by list_stage_files
+        target_dir: Absolute local directory GET writes into
+        parallel: GET PARALLEL option, or None for the server default
+    """
+    stage = normalize_stage_name(stage_name).split('/', 1)[0]
+    directory = stage_file.rsplit('/', 1)[0] + '/' if '/' in stage_file else ''
+    get_query = (
+        f"GET '{stage}/{directory}' 'file://{target_dir.as_posix()}/' "
+        f"PATTERN = {stage_pattern_literal(exact_stage_file_pattern([stage_file]))}"
+    )
+    if parallel is not None:
+        get_query += f" PARALLEL={parallel}"
+    return get_query
+
+
+def open_decompressed(path: Path):
+    """Open a .gz or .zst file for streamed reading of its decompressed content."""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Decompressing .zst files requires the zstandard package. Install with: pip install zstandard")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def install_file(downloaded: Path, local_path: Path, decompress: bool) -> None:
+    """Move a downloaded file into place, decompressing it on the way if asked."""
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    if not (decompress and downloaded.name.endswith(DECOMPRESSED_SUFFIXES)):
+        os.replace(downloaded, local_path)
+        return
+
+    tmp_path = downloaded.with_name(downloaded.name + '.out')
+    with telemetry.span('decompress'):
+        with open_decompressed(downloaded) as source, open(tmp_path, 'wb') as target:
+            shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
+    os.replace(tmp_path, local_path)
+    downloaded.unlink()
+
+
+def download_batch(
+    connection_name: str,
+    stage_name: str,
+    batch: List[Tuple[str, Path]],
+    work_dir: Path,
+    decompress: bool = False,
+    parallel: Optional[int] = None,
+    backend: Optional[SnowflakeBackend] = None
+) -> List[Tuple[str, Path, bool, str]]:
+    """
+    Download a group of stage files in one CLI invocation.
+
+    Every file gets its own directory under work_dir, so files with the same
+    base name in different stage folders cannot collide.
+
+    Returns:
+        List of (stage_file, local_path, success, message) for every file in the batch
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    batch_dir = Path(tempfile.mkdtemp(prefix='batch-', dir=work_dir))
+    file_dirs = [batch_dir / f"{i:05d}" for i in range(len(batch))]
+    queries = [
+        build_get_query(stage_name, stage_file, file_dir, parallel)
+        for (stage_file, _), file_dir in zip(batch, file_dirs)
+    ]
+
+    outcomes = []
+    try:
+        try:
+            rows = backend.query(';\n'.join(queries))
+        except SnowflakeBackendError as e:
+            return [(stage_file, local_path, False, f"Failed to download {stage_file}: {e}")
+                    for stage_file, local_path in batch]
+
+        messages = {Path(str(row.get('file', ''))).name: row.get('message') or row.get('status') for row in rows}
+        for (stage_file, local_path), file_dir in zip(batch, file_dirs):
+            downloaded = [p for p in file_dir.rglob('*') if p.is_file()] if file_dir.is_dir() else []
+            if len(downloaded) != 1:
+                reason = messages.get(Path(stage_file).name) or 'not returned by GET'
+                outcomes.append((stage_file, local_path, False, f"Failed to download {stage_file}: {reason}"))
+                continue
+            try:
+                install_file(downloaded[0], local_path, decompress)
+            except (OSError, ValueError, EOFError) as e:
+                outcomes.append((stage_file, local_path, False, f"Failed to write {local_path}: {e}"))
+                continue
+            outcomes.append((stage_file, local_path, True, 'DOWNLOADED'))
+    finally:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+    return outcomes
+
+
+def download_files(
+    connection_name: str,
+    stage_name: str,
+    files: List[Tuple[str, Path]],
+    target_dir: Path,
+    decompress: bool = False,
+    verbose: bool = True,
+    workers: int = 1,
+    batch_size: int = 1,
+    parallel: Optional[int] = None,
+    backend: Optional[SnowflakeBackend] = None
+) -> List[Tuple[str, Path, bool, str]]:
+    """
+    Download stage files into target_dir with a bounded pool of GET invocations.
+
+    Returns:
+        List of (stage_file, local_path, success, message), one per file
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    batch_size = max(1, batch_size)
+    batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+    target_dir.mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix='.snowcliget-', dir=target_dir))
+
+    outcomes = []
+    try:
+        with telemetry.span('download'), ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(download_batch, connection_name, stage_name, batch, work_dir,
+                                decompress, parallel, backend)
+                for batch in batches
+            ]
+            # Report in completion order so progress is visible as workers finish
+            for future in as_completed(futures):
+                for stage_file, local_path, success, message in future.result():
+                    if verbose:
+                        print(f"  Downloading: {stage_file}... {'✓' if success else '✗'}")
+                        if not success:
+                            print(f"    Error: {message}", file=sys.stderr)
+                    outcomes.append((stage_file, local_path, success, message))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    downloaded = [local_path for _, local_path, success, _ in outcomes if success]
+    telemetry.count('files', len(downloaded))
+    telemetry.count('bytes', sum(local_path.stat().st_size for local_path in downloaded))
+    telemetry.count('failures', len(outcomes) - len(downloaded))
+    return outcomes
+
+
+def mirror_stage(
+    connection_name: str,
+    stage_name: str,
+    target_dir: Path,
+    manifest_path: Path,
+    pattern: Optional[str] = None,
+    decompress: bool = False,
+    force: bool = False,
+    verbose: bool = True,
+    workers: int = 1,
+    batch_size: int = 1,
+    parallel: Optional[int] = None,
+    backend: Optional[SnowflakeBackend] = None
+) -> Tuple[int, int, List[str], int]:
+    """
+    Download every stage file (matching pattern) that is missing or changed locally.
+
+    Returns:
+        Tuple of (successful_count, failed_count, error_messages, unchanged_count)
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    stage_key = normalize_stage_name(stage_name)
+    manifest = load_manifest(manifest_path)
+    stage_manifest = manifest['stages'].setdefault(stage_key, {})
+
+    with telemetry.span('list'):
+        stage_listing = list_stage_files(connection_name, stage_name, backend)
+    with telemetry.span('scan'):
+        to_download, unchanged = plan_download(
+            stage_name, stage_listing, target_dir, stage_manifest, pattern, decompress, force
+        )
+
+    if verbose:
+        print(f"\nManifest: {manifest_path}")
+        print(f"  Stage files:  {len(stage_listing)}")
+        print(f"  Unchanged:    {len(unchanged)}")
+        print(f"  To download:  {len(to_download)}")
+
+    outcomes = []
+    if to_download:
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"Downloading {len(to_download)} file(s) from stage: {stage_name}")
+            print(f"Connection: {connection_name}")
+            print(f"Target directory: {target_dir}")
+            print(f"Workers: {workers}, batch size: {batch_size}")
+            print(f"{'='*60}\n")
+        outcomes = download_files(
+            connection_name, stage_name, to_download, target_dir, decompress,
+            verbose, workers, batch_size, parallel, backend
+        )
+
+    # Remember what each local file was downloaded from; a failed download
+    # keeps its previous entry, which no longer matches the stage
+    for stage_file, local_path, success, _ in outcomes:
+        if not success:
+            continue
+        stat = local_path.stat()
+        stage_manifest[stage_file] = {
+            'local_file': local_path.relative_to(target_dir).as_posix(),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'stage_size': stage_listing[stage_file]['size'],
+            'stage_md5': stage_listing[stage_file]['md5'],
+            'decompressed': decompress,
+        }
+    for stage_file in list(stage_manifest):
+        if stage_file not in stage_listing:
+            del stage_manifest[stage_file]
+    with telemetry.span('write'):
+        save_manifest(manifest_path, manifest)
+
+    successful = sum(1 for _, _, success, _ in outcomes if success)
+    failed = len(outcomes) - successful
+    error_messages = [message for _, _, success, message in outcomes if not success]
+    if verbose and outcomes:
+        print(f"\n{'='*60}")
+        print("Download Summary:")
+        print(f"  Successful: {successful}/{len(outcomes)}")
+        print(f"  Failed:     {failed}/{len(outcomes)}")
+        print(f"{'='*60}")
+    return successful, failed, error_messages, len(unchanged)
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python snowcliget.py <directory> <connection_name> <stage_name>
+            [--pattern REGEX] [--workers N] [--batch-size N] [--parallel N]
+            [--decompress] [--manifest PATH] [--force] [--backend cli|connector|fake]
+
+    Example:
+        python snowcliget.py ./output/stage-mirror my_connection @json_stage --workers 8 --batch-size 50
+    """
+    parser = argparse.ArgumentParser(
+        description="Download files from a Snowflake stage to a directory using GET, skipping unchanged files",
+        epilog=(
+            "Example:\n"
+            "  python snowcliget.py ./output/stage-mirror my_connection json_stage\n"
+            "  python snowcliget.py ./data demo_connection @json_stage --workers 8 --batch-size 50\n"
+            "  python snowcliget.py ./rejects demo_connection @json_stage/raw --pattern 'customer_events_.*' --decompress"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("directory", help="Directory to download into (created if missing)")
+    parser.add_argument("connection_name", help="Snowflake CLI connection name")
+    parser.add_argument("stage_name", help="Snowflake stage name (with or without @ prefix), optionally with a path")
+    parser.add_argument("--pattern", help="Only download stage files whose stage-relative name matches this regex")
+    parser.add_argument("--workers", "-w", type=int, default=4,
+                        help="Number of concurrent GET invocations (default: 4)")
+    parser.add_argument("--batch-size", type=int, default=20,
+                        help="Files fetched per GET invocation (default: 20)")
+    parser.add_argument("--parallel", type=int,
+                        help="GET PARALLEL option: threads used to download each file (1-99)")
+    parser.add_argument("--decompress", action="store_true",
+                        help="Decompress .gz (and .zst) files after download, dropping the extension")
+    parser.add_argument("--manifest", type=Path, default=ROOT_DIR / DEFAULT_MANIFEST,
+                        help=f"Download manifest used to skip unchanged files (default: {DEFAULT_MANIFEST})")
+    parser.add_argument("--force", action="store_true", help="Download every matching file, even if unchanged")
+    parser.add_argument("--backend", choices=BACKEND_NAMES, default=DEFAULT_BACKEND,
+                        help=f"SQL execution backend (default: {DEFAULT_BACKEND}, or $SNOWCLI_BACKEND)")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        print("Error: --workers must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    if args.batch_size < 1:
+        print("Error: --batch-size must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    if args.parallel is not None and not 1 <= args.parallel <= 99:
+        print("Error: --parallel must be between 1 and 99", file=sys.stderr)
+        sys.exit(1)
+
+    if not args.connection_name.strip() or not args.stage_name.strip():
+        print("Error: Connection and stage names cannot be empty", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.pattern:
+            re.compile(args.pattern)
+    except re.error as e:
+        print(f"Error: Invalid --pattern: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    backend = None
+    try:
+        backend = get_backend(args.backend, args.connection_name, pool_size=args.workers)
+        successful, failed, error_messages, unchanged = mirror_stage(
+            connection_name=args.connection_name,
+            stage_name=args.stage_name,
+            target_dir=Path(args.directory),
+            manifest_path=args.manifest,
+            pattern=args.pattern,
+            decompress=args.decompress,
+            force=args.force,
+            verbose=True,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            parallel=args.parallel,
+            backend=backend
+        )
+
+        if failed > 0:
+            print(f"\n⚠️  {failed} file(s) failed to download:", file=sys.stderr)
+            for msg in error_messages:
+                print(f"  - {msg}", file=sys.stderr)
+            sys.exit(1)
+
+        if successful == 0:
+            if unchanged > 0:
+                print(f"\n✓ All {unchanged} file(s) already up to date in {args.directory}")
+            else:
+                print("\n⚠️  No files matched on the stage.")
+            sys.exit(0)
+
+        print(f"\n✓ Successfully downloaded {successful} file(s) to {args.directory}")
+        if unchanged > 0:
+            print(f"  ({unchanged} unchanged file(s) skipped)")
+        sys.exit(0)
+
+    except (OSError, ValueError, SnowflakeBackendError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if backend is not None:
+            backend.close()
+
+
+if __name__ == "__main__":
+    with telemetry.run('snowcliget'):
+        main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+snowcliload - pipelined PUT-then-COPY ingestion into a Snowflake table
+
+Uploading with snowcliput and then running one COPY INTO over the whole
+stage makes the load wait for the last upload. snowcliload splits the files
+into batches and COPYs each batch as soon as its PUT finishes, while later
+batches are still uploading, so loading overlaps uploading:
+
+    PUT batch 1 | PUT batch 2     | PUT batch 3     |
+                | COPY batch 1    | COPY batch 2    | COPY batch 3
+
+Every COPY names its files explicitly (FILES = (...)), so a batch loads
+exactly what was just uploaded and nothing else on the stage. COPY's
+per-file result rows are kept, and each batch reports rows parsed, rows
+loaded, errors seen and the first error per file. ON_ERROR = 'CONTINUE'
+therefore no longer hides rejected rows. The report is printed and written
+as JSON.
+
+Usage:
+    python snowcliload.py <directory> <connection_name> <stage_name> <table>
+        [--batch-size N] [--workers N] [--copy-workers N] [--parallel N]
+        [--file-format SQL] [--on-error VALUE] [--no-compress] [--force]
+        [--report PATH] [--backend cli|connector|fake]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Make sibling and shared tasks/pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'pyutil'))
+
+from snowclibackend.snowclibackend import (  # noqa: E402
+    BACKEND_NAMES,
+    DEFAULT_BACKEND,
+    SnowflakeBackend,
+    SnowflakeBackendError,
+    get_backend,
+)
+from snowcliput.snowcliput import (  # noqa: E402
+    get_put_target_name,
+    get_upload_files,
+    normalize_stage_name,
+    upload_batch_to_stage,
+)
+from telemetry import telemetry  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
+
+DEFAULT_REPORT = 'output/snowcliload-report.json'
+DEFAULT_FILE_FORMAT = "TYPE = 'JSON'"
+DEFAULT_ON_ERROR = 'CONTINUE'
+
+# COPY statuses of a file that loaded at least some rows
+LOADED_STATUSES = ('LOADED', 'PARTIALLY_LOADED')
+
+
+def build_copy_query(
+    table: str,
+    stage_name: str,
+    file_names: List[str],
+    file_format: str = DEFAULT_FILE_FORMAT,
+    on_error: str = DEFAULT_ON_ERROR,
+    force: bool = False
+) -> str:
+    """
+    Build a COPY INTO statement that loads exactly the named stage files.
+
+    Args:
+        table: Target table
+        stage_name: Stage (and path) the files were PUT to
+        file_names: File names relative to the stage path
+        file_format: FILE_FORMAT body, e.g. "TYPE = 'JSON'" or "FORMAT_NAME = 'my_format'"
+        on_error: ON_ERROR option (CONTINUE, SKIP_FILE, ABORT_STATEMENT, ...)
+        force: Reload files even if the table's load metadata says they were loaded
+    """
+    files = ', '.join("'" + name.replace("'", "''") + "'" for name in file_names)
+    copy_query = (
+        f"COPY INTO {table} FROM {normalize_stage_name(stage_name)} "
+        f"FILES = ({files}) FILE_FORMAT = ({file_format}) ON_ERROR = '{on_error}'"
+    )
+    if force:
+        copy_query += " FORCE = TRUE"
+    return copy_query
+
+
+def summarize_copy_results(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-file and total load figures from COPY result rows.
+
+    A COPY that finds nothing new returns one status row and no file rows,
+    which counts as zero files.
+    """
+    files = []
+    for row in rows:
+        if not row.get('file'):
+            continue
+        files.append({
+            'file': row['file'],
+            'status': str(row.get('status', '')).upper(),
+            'rows_parsed': int(row.get('rows_parsed') or 0),
+            'rows_loaded': int(row.get('rows_loaded') or 0),
+            'errors_seen': int(row.get('errors_seen') or 0),
+            'first_error': row.get('first_error'),
+        })
+    return {
+        'copy_results': files,
+        'rows_parsed': sum(f['rows_parsed'] for f in files),
+        'rows_loaded': sum(f['rows_loaded'] for f in files),
+        'errors_seen': sum(f['errors_seen'] for f in files),
+        'files_failed': sum(1 for f in files if f['status'] not in LOADED_STATUSES),
+    }
+
+
+class LoadPipeline:
+    """
+    Uploads batches on one thread pool and COPYs each finished batch on another.
+
+    Batch results are collected in a list guarded by a lock, since COPYs
+    finish on the copy pool's threads.
+    """
+
+    def __init__(
+        self,
+        connection_name: str,
+        stage_name: str,
+        table: str,
+        backend: SnowflakeBackend,
+        workers: int = 2,
+        copy_workers: int = 1,
+        parallel: Optional[int] = None,
+        auto_compress: bool = True,
+        file_format: str = DEFAULT_FILE_FORMAT,
+        on_error: str = DEFAULT_ON_ERROR,
+        force: bool = False,
+        verbose: bool = True
+    ):
+        self.connection_name = connection_name
+        self.stage_name = stage_name
+        self.table = table
+        self.backend = backend
+        self.workers = workers
+        self.copy_workers = copy_workers
+        self.parallel = parallel
+        self.auto_compress = auto_compress
+        self.file_format = file_format
+        self.on_error = on_error
+        self.force = force
+        self.verbose = verbose
+        self.batches: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def _log(self, line: str) -> None:
+        if self.verbose:
+            with self._lock:
+                print(line, flush=True)
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self._started, 3)
+
+    def upload(self, index: int, files: List[Path]) -> Dict[str, Any]:
+        """PUT one batch; returns its report entry with the upload half filled in."""
+        started = self._elapsed()
+        with telemetry.span('upload'):
+            outcomes = upload_batch_to_stage(
+                self.connection_name,
+                files,
+                self.stage_name,
+                auto_compress=self.auto_compress,
+                overwrite=True,
+                parallel=self.parallel,
+                backend=self.backend
+            )
+        uploaded = [file_path for file_path, success, _ in outcomes if success]
+        telemetry.count('files', len(uploaded))
+        telemetry.count('bytes', sum(file_path.stat().st_size for file_path in uploaded))
+        telemetry.count('failures', len(outcomes) - len(uploaded))
+
+        batch = {
+            'batch': index,
+            'files': len(files),
+            'uploaded': len(uploaded),
+            'upload_errors': [message for _, success, message in outcomes if not success],
+            'upload_started_s': started,
+            'upload_seconds': round(self._elapsed() - started, 3),
+            'staged_files': [get_put_target_name(file_path, self.auto_compress) for file_path in uploaded],
+        }
+        mark = '✓' if not batch['upload_errors'] else '⚠️ '
+        self._log(f"  {mark} PUT  batch {index:>4}: {len(uploaded)}/{len(files)} file(s) "
+                  f"in {batch['upload_seconds']:.1f}s")
+        return batch
+
+    def copy(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """COPY the files one uploaded batch put on the stage; fills in the load half."""
+        started = self._elapsed()
+        batch['copy_started_s'] = started
+        if batch['staged_files']:
+            sql = build_copy_query(self.table, self.stage_name, batch['staged_files'],
+                                   self.file_format, self.on_error, self.force)
+            try:
+                with telemetry.span('copy'):
+                    batch.update(summarize_copy_results(self.backend.query(sql)))
+                batch['copy_error'] = None
+            except SnowflakeBackendError as e:
+                batch.update(summarize_copy_results([]))
+                batch['copy_error'] = str(e)
+                telemetry.count('failures')
+        else:
+            batch.update(summarize_copy_results([]))
+            batch['copy_error'] = None
+        batch['copy_seconds'] = round(self._elapsed() - started, 3)
+        telemetry.count('rows_loaded', batch['rows_loaded'])
+        telemetry.count('rows_rejected', batch['errors_seen'])
+
+        if batch['copy_error']:
+            self._log(f"  ✗ COPY batch {batch['batch']:>4}: {batch['copy_error']}")
+        else:
+            mark = '✓' if not batch['errors_seen'] and not batch['files_failed'] else '⚠️ '
+            self._log(f"  {mark} COPY batch {batch['batch']:>4}: {batch['rows_loaded']:,} row(s) loaded, "
+                      f"{batch['errors_seen']:,} error(s) in {batch['copy_seconds']:.1f}s")
+        with self._lock:
+            self.batches.append(batch)
+        return batch
+
+    def run(self, files: List[Path], batch_size: int) -> List[Dict[str, Any]]:
+        """
+        Upload and load all files, each batch's COPY starting as soon as its PUT is done.
+
+        Returns:
+            Report entries, one per batch, in batch order
+        """
+        batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+        copies: List[Future] = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='put') as uploads, \
+                ThreadPoolExecutor(max_workers=self.copy_workers, thread_name_prefix='copy') as loads:
+            futures = [uploads.submit(self.upload, i, batch) for i, batch in enumerate(batches, 1)]
+            for future in as_completed(futures):
+                copies.append(loads.submit(self.copy, future.result()))
+            for copy in copies:
+                copy.result()
+        return sorted(self.batches, key=lambda batch: batch['batch'])
+
+
+def summarize_load(batches: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Totals over all batches, including how much time the overlap saved."""
+    upload_seconds = sum(batch['upload_seconds'] for batch in batches)
+    copy_seconds = sum(batch['copy_seconds'] for batch in batches)
+    return {
+        'batches': len(batches),
+        'files': sum(batch['files'] for batch in batches),
+        'uploaded': sum(batch['uploaded'] for batch in batches),
+        'upload_failed': sum(len(batch['upload_errors']) for batch in batches),
+        'copy_failed_batches': sum(1 for batch in batches if batch['copy_error']),
+        'files_failed': sum(batch['files_failed'] for batch in batches),
+        'rows_parsed': sum(batch['rows_parsed'] for batch in batches),
+        'rows_loaded': sum(batch['rows_loaded'] for batch in batches),
+        'errors_seen': sum(batch['errors_seen'] for batch in batches),
+        'wall_seconds': round(wall_seconds, 3),
+        'upload_seconds': round(upload_seconds, 3),
+        'copy_seconds': round(copy_seconds, 3),
+    }
+
+
+def print_load_summary(batches: List[Dict[str, Any]], totals: Dict[str, Any], top: int = 10) -> None:
+    """Per-batch rows loaded and errors, the files with errors, then totals."""
+    print(f"\n{'='*60}")
+    print("Load Summary:")
+    print(f"{'='*60}")
+    print(f"  {'batch':>5} {'files':>6} {'rows loaded':>12} {'errors':>8}  PUT / COPY seconds")
+    for batch in batches:
+        print(f"  {batch['batch']:>5} {batch['uploaded']:>6} {batch['rows_loaded']:>12,} "
+              f"{batch['errors_seen']:>8,}  {batch['upload_seconds']:.1f} / {batch['copy_seconds']:.1f}")
+
+    problems = [f for batch in batches for f in batch['copy_results']
+                if f['errors_seen'] or f['status'] not in LOADED_STATUSES]
+    if problems:
+        print(f"\n⚠️  {len(problems)} file(s) with rejected rows:")
+        for f in sorted(problems, key=lambda f: -f['errors_seen'])[:top]:
+            print(f"  - {f['file']}: {f['status']}, {f['errors_seen']:,} error(s); first: {f['first_error']}")
+        if len(problems) > top:
+            print(f"  ... and {len(problems) - top} more (see the report)")
+
+    print(f"\n  Files:        {totals['uploaded']}/{totals['files']} uploaded")
+    print(f"  Rows loaded:  {totals['rows_loaded']:,} of {totals['rows_parsed']:,} parsed "
+          f"({totals['errors_seen']:,} error(s))")
+    print(f"  Time:         {totals['wall_seconds']:.1f}s wall; PUT {totals['upload_seconds']:.1f}s + "
+          f"COPY {totals['copy_seconds']:.1f}s if run back to back")
+    print(f"{'='*60}")
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python snowcliload.py <directory> <connection_name> <stage_name> <table>
+            [--batch-size N] [--workers N] [--copy-workers N] [--parallel N]
+            [--file-format SQL] [--on-error VALUE] [--no-compress] [--force]
+            [--report PATH] [--backend cli|connector|fake]
+
+    Example:
+        python snowcliload.py ./upload my_connection @json_stage DEMO_DB.RAW.CUSTOMER_EVENTS --batch-size 50
+    """
+    parser = argparse.ArgumentParser(
+        description="Upload files to a stage and COPY each batch into a table while the next batch uploads",
+        epilog=(
+            "Example:\n"
+            "  python snowcliload.py ./upload my_connection @json_stage DEMO_DB.RAW.CUSTOMER_EVENTS\n"
+            "  python snowcliload.py ./output/eventgen demo_connection @json_stage RAW.CUSTOMER_EVENTS "
+            "--batch-size 50 --workers 4 --copy-workers 2\n"
+            "  python snowcliload.py ./data demo_connection @json_stage RAW.CUSTOMER_EVENTS "
+            "--file-format \"FORMAT_NAME = 'RAW.JSON_FORMAT'\" --on-error SKIP_FILE"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("directory", help="Path to directory containing files to load")
+    parser.add_argument("connection_name", help="Snowflake CLI connection name")
+    parser.add_argument("stage_name", help="Snowflake internal stage name (with or without @ prefix)")
+    parser.add_argument("table", help="Table to COPY into (qualified, or resolved in the connection's schema)")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="Files per PUT and COPY (default: 100)")
+    parser.add_argument("--workers", "-w", type=int, default=2,
+                        help="Concurrent PUT invocations (default: 2)")
+    parser.add_argument("--copy-workers", type=int, default=1,
+                        help="Concurrent COPY statements (default: 1)")
+    parser.add_argument("--parallel", type=int,
+                        help="PUT PARALLEL option: threads used to upload each file (1-99)")
+    parser.add_argument("--file-format", default=DEFAULT_FILE_FORMAT,
+                        help=f"COPY FILE_FORMAT body (default: \"{DEFAULT_FILE_FORMAT}\")")
+    parser.add_argument("--on-error", default=DEFAULT_ON_ERROR,
+                        help=f"COPY ON_ERROR option (default: {DEFAULT_ON_ERROR})")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="Upload files as they are (AUTO_COMPRESS=FALSE)")
+    parser.add_argument("--force", action="store_true",
+                        help="COPY with FORCE = TRUE, reloading files the table has already loaded")
+    parser.add_argument("--report", type=Path, default=ROOT_DIR / DEFAULT_REPORT,
+                        help=f"JSON report with per-batch and per-file results (default: {DEFAULT_REPORT})")
+    parser.add_argument("--backend", choices=BACKEND_NAMES, default=DEFAULT_BACKEND,
+                        help=f"SQL execution backend (default: {DEFAULT_BACKEND}, or $SNOWCLI_BACKEND)")
+    args = parser.parse_args()
+
+    for name in ('batch_size', 'workers', 'copy_workers'):
+        if getattr(args, name) < 1:
+            print(f"Error: --{name.replace('_', '-')} must be at least 1", file=sys.stderr)
+            sys.exit(1)
+
+    if args.parallel is not None and not 1 <= args.parallel <= 99:
+        print("Error: --parallel must be between 1 and 99", file=sys.stderr)
+        sys.exit(1)
+
+    if not args.connection_name.strip() or not args.stage_name.strip() or not args.table.strip():
+        print("Error: Connection, stage and table names cannot be empty", file=sys.stderr)
+        sys.exit(1)
+
+    backend = None
+    try:
+        print(f"Scanning directory: {args.directory}")
+        with telemetry.span('scan'):
+            files = get_upload_files(Path(args.directory))
+        if not files:
+            print("\n⚠️  No files to load.")
+            sys.exit(0)
+
+        # One session per concurrent PUT and COPY with the connector backend
+        backend = get_backend(args.backend, args.connection_name, pool_size=args.workers + args.copy_workers)
+
+        print(f"\n{'='*60}")
+        print(f"Loading {len(files)} file(s) into {args.table} via stage {args.stage_name}")
+        print(f"Connection: {args.connection_name}")
+        print(f"Batches of {args.batch_size}; {args.workers} PUT worker(s), {args.copy_workers} COPY worker(s)")
+        print(f"{'='*60}\n")
+
+        started = time.perf_counter()
+        pipeline = LoadPipeline(
+            args.connection_name,
+            args.stage_name,
+            args.table,
+            backend,
+            workers=args.workers,
+            copy_workers=args.copy_workers,
+            parallel=args.parallel,
+            auto_compress=not args.no_compress,
+            file_format=args.file_format,
+            on_error=args.on_error,
+            force=args.force
+        )
+        batches = pipeline.run(files, args.batch_size)
+        totals = summarize_load(batches, time.perf_counter() - started)
+        print_load_summary(batches, totals)
+
+        with telemetry.span('write'):
+            args.report.parent.mkdir(parents=True, exist_ok=True)
+            with open(args.report, 'w') as f:
+                json.dump({
+                    'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    'connection': args.connection_name,
+                    'stage': normalize_stage_name(args.stage_name),
+                    'table': args.table,
+                    'batch_size': args.batch_size,
+                    'totals': totals,
+                    'batches': batches,
+                }, f, indent=2)
+        print(f"\nReport: {args.report}")
+
+        if totals['upload_failed'] or totals['copy_failed_batches'] or totals['files_failed']:
+            print(f"\n⚠️  {totals['upload_failed']} upload(s), {totals['copy_failed_batches']} COPY batch(es) "
+                  f"and {totals['files_failed']} file load(s) failed", file=sys.stderr)
+            sys.exit(1)
+
+        print(f"\n✓ Loaded {totals['rows_loaded']:,} row(s) into {args.table}")
+        sys.exit(0)
+
+    except (OSError, ValueError, SnowflakeBackendError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if backend is not None:
+            backend.close()
+
+
+if __name__ == "__main__":
+    with telemetry.run('snowcliload'):
+        main()
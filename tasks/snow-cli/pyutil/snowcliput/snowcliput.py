@@ -3,13 +3,37 @@
 upload_to_snowflake.py - Upload files to Snowflake internal stage using PUT command
 
 Uploads all files from the snow-cli/upload directory to a Snowflake internal stage
-using the Snowflake CLI and PUT command.
+using the Snowflake CLI and PUT command. SQL runs through a snowclibackend
+backend ('cli' by default, or 'connector' for pooled in-process sessions).
 """
 
-import subprocess
+import argparse
+import hashlib
+import json
+import os
+import re
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+# Make sibling and shared tasks/pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'pyutil'))
+
+from snowclibackend.snowclibackend import (  # noqa: E402
+    BACKEND_NAMES,
+    COMPRESSED_SUFFIXES,
+    DEFAULT_BACKEND,
+    SnowCliBackend,
+    SnowflakeBackend,
+    SnowflakeBackendError,
+    get_backend,
+)
+from snowclicache.snowclicache import cached_backend  # noqa: E402
+from snowclichunk.snowclichunk import COMPRESSIONS, chunk_directory  # noqa: E402
+from telemetry import telemetry  # noqa: E402
 
 
 def get_upload_files(upload_dir: Path) -> List[Path]:
@@ -28,7 +52,8 @@ def get_upload_files(upload_dir: Path) -> List[Path]:
     if not upload_dir.is_dir():
         raise NotADirectoryError(f"Path is not a directory: {upload_dir}")
     
-    files = [f for f in upload_dir.iterdir() if f.is_file()]
+    with telemetry.span('scan'):
+        files = [f for f in upload_dir.iterdir() if f.is_file()]
     
     if not files:
         print(f"Warning: No files found in {upload_dir}")
@@ -37,77 +62,370 @@ def get_upload_files(upload_dir: Path) -> List[Path]:
     return sorted(files)
 
 
-def upload_file_to_stage(
-    connection_name: str,
-    file_path: Path,
+def build_put_query(
+    source: str,
     stage_name: str,
     auto_compress: bool = True,
     overwrite: bool = True,
-    verbose: bool = True
-) -> Tuple[bool, str]:
+    parallel: Optional[int] = None,
+    source_compression: Optional[str] = None
+) -> str:
     """
-    Upload a single file to Snowflake internal stage using PUT command.
+    Build a PUT statement for a local file or wildcard source.
     
     Args:
-        connection_name: Snowflake CLI connection name
-        file_path: Path to the file to upload
+        source: Absolute local path or wildcard (e.g., '/data/*')
         stage_name: Snowflake stage name (e.g., '@my_stage' or 'my_stage')
-        auto_compress: Auto-compress file during upload
+        auto_compress: Auto-compress files during upload
         overwrite: Overwrite existing files
-        verbose: Print execution details
+        parallel: Number of threads PUT uses per file (1-99), or None for the server default
+        source_compression: SOURCE_COMPRESSION of already-compressed files (e.g. 'GZIP'),
+            or None to let PUT auto-detect
         
     Returns:
-        Tuple of (success: bool, message: str)
+        The PUT statement
     """
     # Ensure stage name starts with @
     if not stage_name.startswith('@'):
         stage_name = f'@{stage_name}'
     
-    # Build the PUT command
     auto_compress_str = 'TRUE' if auto_compress else 'FALSE'
     overwrite_str = 'TRUE' if overwrite else 'FALSE'
     
     put_query = (
-        f"PUT 'file://{file_path.absolute()}' {stage_name} "
+        f"PUT 'file://{source}' {stage_name} "
         f"AUTO_COMPRESS={auto_compress_str} OVERWRITE={overwrite_str}"
     )
     
-    cmd = ['snow', 'sql', '-c', connection_name, '-q', put_query]
+    if parallel is not None:
+        put_query += f" PARALLEL={parallel}"
+    
+    if source_compression is not None:
+        put_query += f" SOURCE_COMPRESSION={source_compression}"
+    
+    return put_query
+
+
+def parse_put_results(rows: List[Dict[str, Any]]) -> Dict[str, Tuple[bool, str]]:
+    """
+    Turn the result rows of one or more PUT statements into per-file results.
+    
+    Args:
+        rows: PUT result rows (lower-cased column names)
+        
+    Returns:
+        Dict mapping source file name to (success, message)
+    """
+    results = {}
+    for row in rows:
+        source = row.get('source')
+        if not source:
+            continue
+        status = str(row.get('status', '')).upper()
+        success = status in ('UPLOADED', 'SKIPPED')
+        results[source] = (success, row.get('message') or status)
+    
+    return results
+
+
+def put_result_for(put_results: Dict[str, Tuple[bool, str]], file_path: Path) -> Tuple[bool, str]:
+    """
+    Look up one file in parse_put_results output.
+    
+    A file PUT did not report was not uploaded, so it counts as a failure.
+    """
+    return put_results.get(file_path.name, (False, 'not reported by PUT'))
+
+
+def upload_file_to_stage(
+    connection_name: str,
+    file_path: Path,
+    stage_name: str,
+    auto_compress: bool = True,
+    overwrite: bool = True,
+    verbose: bool = True,
+    parallel: Optional[int] = None,
+    backend: Optional[SnowflakeBackend] = None,
+    source_compression: Optional[str] = None
+) -> Tuple[bool, str]:
+    """
+    Upload a single file to Snowflake internal stage using PUT command.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        file_path: Path to the file to upload
+        stage_name: Snowflake stage name (e.g., '@my_stage' or 'my_stage')
+        auto_compress: Auto-compress file during upload
+        overwrite: Overwrite existing files
+        verbose: Print execution details
+        parallel: PUT PARALLEL option, or None for the server default
+        backend: Execution backend (default: snow CLI for connection_name)
+        source_compression: PUT SOURCE_COMPRESSION option, or None to auto-detect
+        
+    Returns:
+        Tuple of (success: bool, message: str)
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    put_query = build_put_query(
+        str(file_path.absolute()),
+        stage_name,
+        auto_compress,
+        overwrite,
+        parallel,
+        source_compression
+    )
     
     if verbose:
         print(f"  Uploading: {file_path.name}...", end=' ', flush=True)
     
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        put_results = parse_put_results(backend.query(put_query))
+        
+        # PUT reports per-file status; a file it skipped or rejected is a failure
+        success, message = put_result_for(put_results, file_path)
+        if not success:
+            raise SnowflakeBackendError(message)
         
         if verbose:
             print("✓")
         
-        return True, result.stdout
+        return True, message
         
-    except subprocess.CalledProcessError as e:
+    except SnowflakeBackendError as e:
         error_msg = f"Failed to upload {file_path.name}"
         if verbose:
             print("✗")
             print(f"    Error: {error_msg}", file=sys.stderr)
-            if e.stderr:
-                print(f"    Details: {e.stderr}", file=sys.stderr)
+            print(f"    Details: {(e.stderr or str(e)).strip()}", file=sys.stderr)
         
         return False, error_msg
 
 
+def upload_batch_to_stage(
+    connection_name: str,
+    file_paths: List[Path],
+    stage_name: str,
+    auto_compress: bool = True,
+    overwrite: bool = True,
+    parallel: Optional[int] = None,
+    backend: Optional[SnowflakeBackend] = None,
+    source_compression: Optional[str] = None
+) -> List[Tuple[Path, bool, str]]:
+    """
+    Upload a group of files to Snowflake internal stage in one CLI invocation.
+    
+    When the group is every file in a single directory, one wildcard PUT is
+    issued for the directory. Otherwise one PUT statement per file is sent in
+    the same 'snow sql' call, so the CLI startup and login are paid once.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        file_paths: Paths of the files to upload
+        stage_name: Snowflake stage name
+        auto_compress: Auto-compress files during upload
+        overwrite: Overwrite existing files
+        parallel: PUT PARALLEL option, or None for the server default
+        backend: Execution backend (default: snow CLI for connection_name)
+        source_compression: PUT SOURCE_COMPRESSION option, or None to auto-detect
+        
+    Returns:
+        List of (file_path, success, message) for every file in the group
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    parent_dirs = {f.absolute().parent for f in file_paths}
+    
+    if len(parent_dirs) == 1:
+        parent_dir = parent_dirs.pop()
+        directory_files = {f.absolute() for f in parent_dir.iterdir() if f.is_file()}
+    else:
+        parent_dir = None
+        directory_files = set()
+    
+    if parent_dir is not None and directory_files == {f.absolute() for f in file_paths}:
+        queries = [build_put_query(f"{parent_dir}/*", stage_name, auto_compress, overwrite, parallel, source_compression)]
+    else:
+        queries = [
+            build_put_query(str(f.absolute()), stage_name, auto_compress, overwrite, parallel, source_compression)
+            for f in file_paths
+        ]
+    
+    try:
+        put_results = parse_put_results(backend.query(';\n'.join(queries)))
+    except SnowflakeBackendError as e:
+        return [(f, False, f"Failed to upload {f.name}: {e}") for f in file_paths]
+    
+    outcomes = []
+    for file_path in file_paths:
+        success, message = put_result_for(put_results, file_path)
+        if not success:
+            message = f"Failed to upload {file_path.name}: {message}"
+        outcomes.append((file_path, success, message))
+    
+    return outcomes
+
+
+def _upload_single(
+    connection_name: str,
+    file_paths: List[Path],
+    stage_name: str,
+    auto_compress: bool,
+    overwrite: bool,
+    parallel: Optional[int],
+    backend: Optional[SnowflakeBackend],
+    source_compression: Optional[str] = None
+) -> List[Tuple[Path, bool, str]]:
+    """Worker-pool adapter: upload a one-file batch without interleaved output."""
+    file_path = file_paths[0]
+    success, message = upload_file_to_stage(
+        connection_name,
+        file_path,
+        stage_name,
+        auto_compress,
+        overwrite,
+        verbose=False,
+        parallel=parallel,
+        backend=backend,
+        source_compression=source_compression
+    )
+    return [(file_path, success, message)]
+
+
+def upload_files_to_stage(
+    connection_name: str,
+    files: List[Path],
+    stage_name: str,
+    auto_compress: bool = True,
+    overwrite: bool = True,
+    verbose: bool = True,
+    workers: int = 1,
+    parallel: Optional[int] = None,
+    batch_size: int = 0,
+    backend: Optional[SnowflakeBackend] = None,
+    source_compression: Optional[str] = None
+) -> List[Tuple[Path, bool, str]]:
+    """
+    Upload a list of files to Snowflake internal stage.
+    
+    With workers > 1 the uploads run in a bounded thread pool. With
+    batch_size > 0 files are grouped so one CLI invocation moves a whole
+    batch; batches are spread over the same worker pool.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        files: Paths of the files to upload
+        stage_name: Snowflake stage name
+        auto_compress: Auto-compress files during upload
+        overwrite: Overwrite existing files
+        verbose: Print per-file progress
+        workers: Maximum number of concurrent CLI invocations
+        parallel: PUT PARALLEL option, or None for the server default
+        batch_size: Files per PUT invocation (0 uploads one file per invocation)
+        backend: Execution backend (default: snow CLI for connection_name)
+        source_compression: PUT SOURCE_COMPRESSION option, or None to auto-detect
+        
+    Returns:
+        List of (file_path, success, message), one per file
+    """
+    with telemetry.span('upload'):
+        outcomes = _upload_files(
+            connection_name, files, stage_name, auto_compress, overwrite, verbose,
+            workers, parallel, batch_size, backend, source_compression
+        )
+    
+    uploaded = [file_path for file_path, success, _ in outcomes if success]
+    telemetry.count('files', len(uploaded))
+    telemetry.count('bytes', sum(file_path.stat().st_size for file_path in uploaded))
+    telemetry.count('failures', len(outcomes) - len(uploaded))
+    return outcomes
+
+
+def _upload_files(
+    connection_name: str,
+    files: List[Path],
+    stage_name: str,
+    auto_compress: bool,
+    overwrite: bool,
+    verbose: bool,
+    workers: int,
+    parallel: Optional[int],
+    batch_size: int,
+    backend: Optional[SnowflakeBackend],
+    source_compression: Optional[str]
+) -> List[Tuple[Path, bool, str]]:
+    """Upload files and return their outcomes; see upload_files_to_stage."""
+    backend = backend or SnowCliBackend(connection_name)
+    outcomes = []
+    
+    if workers <= 1 and batch_size <= 0:
+        for file_path in files:
+            success, message = upload_file_to_stage(
+                connection_name,
+                file_path,
+                stage_name,
+                auto_compress,
+                overwrite,
+                verbose,
+                parallel,
+                backend,
+                source_compression
+            )
+            outcomes.append((file_path, success, message))
+        return outcomes
+    
+    if batch_size > 0:
+        batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+    else:
+        batches = [[f] for f in files]
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(
+                upload_batch_to_stage if batch_size > 0 else _upload_single,
+                connection_name,
+                batch,
+                stage_name,
+                auto_compress,
+                overwrite,
+                parallel,
+                backend,
+                source_compression
+            )
+            for batch in batches
+        ]
+        
+        # Report in completion order so progress is visible as workers finish
+        for future in as_completed(futures):
+            for file_path, success, message in future.result():
+                if verbose:
+                    print(f"  Uploading: {file_path.name}... {'✓' if success else '✗'}")
+                    if not success:
+                        print(f"    Error: {message}", file=sys.stderr)
+                outcomes.append((file_path, success, message))
+    
+    return outcomes
+
+
+def print_upload_summary(successful: int, failed: int, total: int) -> None:
+    """Print the upload summary banner."""
+    print(f"\n{'='*60}")
+    print(f"Upload Summary:")
+    print(f"  Successful: {successful}/{total}")
+    print(f"  Failed:     {failed}/{total}")
+    print(f"{'='*60}")
+
+
 def upload_directory_to_stage(
     connection_name: str,
     upload_dir: Path,
     stage_name: str,
     auto_compress: bool = True,
     overwrite: bool = True,
-    verbose: bool = True
+    verbose: bool = True,
+    workers: int = 1,
+    parallel: Optional[int] = None,
+    batch_size: int = 0,
+    backend: Optional[SnowflakeBackend] = None,
+    source_compression: Optional[str] = None
 ) -> Tuple[int, int, List[str]]:
     """
     Upload all files from a directory to Snowflake internal stage.
@@ -119,6 +437,11 @@ def upload_directory_to_stage(
         auto_compress: Auto-compress files during upload
         overwrite: Overwrite existing files
         verbose: Print execution details
+        workers: Maximum number of concurrent CLI invocations
+        parallel: PUT PARALLEL option, or None for the server default
+        batch_size: Files per PUT invocation (0 uploads one file per invocation)
+        backend: Execution backend (default: snow CLI for connection_name)
+        source_compression: PUT SOURCE_COMPRESSION option, or None to auto-detect
         
     Returns:
         Tuple of (successful_count, failed_count, error_messages)
@@ -133,36 +456,430 @@ def upload_directory_to_stage(
         print(f"Uploading {len(files)} file(s) to stage: {stage_name}")
         print(f"Connection: {connection_name}")
         print(f"Source directory: {upload_dir}")
+        if workers > 1 or batch_size > 0:
+            print(f"Workers: {workers}, batch size: {batch_size or 1}")
         print(f"{'='*60}\n")
     
-    successful = 0
-    failed = 0
-    error_messages = []
+    outcomes = upload_files_to_stage(
+        connection_name,
+        files,
+        stage_name,
+        auto_compress,
+        overwrite,
+        verbose,
+        workers,
+        parallel,
+        batch_size,
+        backend,
+        source_compression
+    )
+    
+    successful = sum(1 for _, success, _ in outcomes if success)
+    failed = len(outcomes) - successful
+    error_messages = [message for _, success, message in outcomes if not success]
+    
+    if verbose:
+        print_upload_summary(successful, failed, len(files))
+    
+    return successful, failed, error_messages
+
+
+def normalize_stage_name(stage_name: str) -> str:
+    """Return the stage name with a leading @ and no trailing slash."""
+    if not stage_name.startswith('@'):
+        stage_name = f'@{stage_name}'
+    return stage_name.rstrip('/')
+
+
+def get_stage_path_prefix(stage_name: str) -> str:
+    """
+    Return the path inside the stage that PUT targets (e.g., '@db.s.stg/a/b' -> 'a/b').
+    
+    Args:
+        stage_name: Snowflake stage name, optionally followed by a path
+        
+    Returns:
+        The path prefix without surrounding slashes, or '' for the stage root
+    """
+    _, _, path = normalize_stage_name(stage_name).partition('/')
+    return path.strip('/')
+
+
+def get_put_target_name(file_path: Path, auto_compress: bool) -> str:
+    """
+    Return the name PUT gives a local file, relative to the stage path.
+    
+    AUTO_COMPRESS gzips a file and adds .gz, except for files that are
+    already compressed (.gz, .bz2, .zst, ...), which are stored as they are.
+    """
+    if auto_compress and not file_path.name.endswith(COMPRESSED_SUFFIXES):
+        return f"{file_path.name}.gz"
+    return file_path.name
+
+
+def get_stage_file_name(file_path: Path, stage_name: str, auto_compress: bool) -> str:
+    """Return the stage-relative name PUT gives a local file."""
+    name = get_put_target_name(file_path, auto_compress)
+    prefix = get_stage_path_prefix(stage_name)
+    return f"{prefix}/{name}" if prefix else name
+
+
+def compute_file_digests(file_path: Path, chunk_size: int = 1024 * 1024) -> Tuple[str, str]:
+    """
+    Compute the SHA-256 and MD5 digests of a file in a single streamed pass.
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Bytes read per iteration
+        
+    Returns:
+        Tuple of (sha256_hex, md5_hex)
+    """
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+            md5.update(chunk)
+    return sha256.hexdigest(), md5.hexdigest()
+
+
+def load_manifest(manifest_path: Path) -> Dict:
+    """
+    Load the upload manifest, or return an empty one if it does not exist.
+    
+    The manifest maps stage name -> local file name -> file state:
+    {"stages": {"@stage": {"a.json": {"size": 1, "mtime_ns": 1, "sha256": "...",
+    "md5": "...", "stage_file": "a.json", "stage_size": 1, "stage_md5": "..."}}}}
+    """
+    if not manifest_path.exists():
+        return {'version': 1, 'stages': {}}
+    
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    
+    manifest.setdefault('version', 1)
+    manifest.setdefault('stages', {})
+    return manifest
+
+
+def save_manifest(manifest_path: Path, manifest: Dict) -> None:
+    """Write the upload manifest atomically."""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f".{manifest_path.name}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def list_stage_files(
+    connection_name: str,
+    stage_name: str,
+    backend: Optional[SnowflakeBackend] = None
+) -> Dict[str, Dict]:
+    """
+    List a stage with a single LIST query.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        stage_name: Snowflake stage name
+        backend: Execution backend (default: snow CLI for connection_name)
+        
+    Returns:
+        Dict mapping stage-relative file name to {'size': int, 'md5': str}
+        
+    Raises:
+        SnowflakeBackendError: If the LIST query fails
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    stage_name = normalize_stage_name(stage_name)
+    prefix = get_stage_path_prefix(stage_name)
+    
+    listing = {}
+    for row in backend.query(f"LIST {stage_name}"):
+        # LIST returns names prefixed with the unqualified stage name
+        _, _, relative_name = str(row.get('name', '')).partition('/')
+        if not relative_name:
+            continue
+        if prefix and not relative_name.startswith(f"{prefix}/"):
+            continue
+        listing[relative_name] = {
+            'size': int(row.get('size') or 0),
+            'md5': row.get('md5'),
+        }
+    
+    return listing
+
+
+def plan_incremental_upload(
+    files: List[Path],
+    stage_name: str,
+    stage_manifest: Dict[str, Dict],
+    stage_listing: Dict[str, Dict],
+    auto_compress: bool
+) -> Tuple[List[Path], List[Path], Dict[str, Dict]]:
+    """
+    Decide which local files need to be uploaded.
+    
+    A file is unchanged when its content hash matches the manifest and the
+    stage still holds the object the manifest recorded. Hashes are reused
+    from the manifest when size and mtime have not changed. Without a
+    manifest entry, a file PUT stores unmodified (no AUTO_COMPRESS, or
+    already compressed) is also considered unchanged when the stage MD5 and
+    size match the local file.
+    
+    Args:
+        files: Local files
+        stage_name: Snowflake stage name
+        stage_manifest: Manifest entries for this stage
+        stage_listing: Result of list_stage_files
+        auto_compress: Whether PUT compresses files on upload
+        
+    Returns:
+        Tuple of (files_to_upload, unchanged_files, local_state) where
+        local_state maps file name to its current size/mtime/digests
+    """
+    to_upload = []
+    unchanged = []
+    local_state = {}
     
     for file_path in files:
-        success, message = upload_file_to_stage(
+        stat = file_path.stat()
+        entry = stage_manifest.get(file_path.name)
+        
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            sha256, md5 = entry['sha256'], entry.get('md5')
+        else:
+            sha256, md5 = compute_file_digests(file_path)
+        
+        stage_file = get_stage_file_name(file_path, stage_name, auto_compress)
+        local_state[file_path.name] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'md5': md5,
+            'stage_file': stage_file,
+        }
+        
+        listed = stage_listing.get(stage_file)
+        if listed is None:
+            to_upload.append(file_path)
+            continue
+        
+        if (
+            entry
+            and entry.get('sha256') == sha256
+            and entry.get('stage_file') == stage_file
+            and entry.get('stage_size') == listed['size']
+            and entry.get('stage_md5') in (None, listed['md5'])
+        ):
+            unchanged.append(file_path)
+        elif (
+            get_put_target_name(file_path, auto_compress) == file_path.name
+            and listed['md5'] == md5
+            and listed['size'] == stat.st_size
+        ):
+            unchanged.append(file_path)
+        else:
+            to_upload.append(file_path)
+    
+    return to_upload, unchanged, local_state
+
+
+def stage_pattern_literal(regex: str) -> str:
+    """
+    Quote a regex for a PATTERN option.
+    
+    Snowflake string literals treat a backslash as an escape character, so
+    backslashes are doubled (and quotes doubled) for the regex to arrive intact.
+    """
+    return "'" + regex.replace('\\', '\\\\').replace("'", "''") + "'"
+
+
+def exact_stage_file_pattern(stage_files: List[str]) -> str:
+    """
+    Regex matching exactly the given stage-relative files.
+    
+    LIST, GET and REMOVE treat a location as a prefix ('@stg/a.json' also
+    selects 'a.json.gz'), so statements meant for one file add this as their
+    PATTERN. It is matched against the whole listed name, which is the
+    unqualified stage name followed by the stage-relative name (see
+    list_stage_files), so 'a.json' does not also match 'dir/a.json'.
+    """
+    return '^[^/]+/(' + '|'.join(re.escape(name) for name in stage_files) + ')$'
+
+
+def build_remove_query(stage_name: str, stage_file: str) -> str:
+    """Build a REMOVE statement that deletes exactly one stage file."""
+    stage_root, _, _ = normalize_stage_name(stage_name).partition('/')
+    directory = stage_file.rsplit('/', 1)[0] + '/' if '/' in stage_file else ''
+    return (
+        f"REMOVE '{stage_root}/{directory}' "
+        f"PATTERN = {stage_pattern_literal(exact_stage_file_pattern([stage_file]))}"
+    )
+
+
+def remove_stage_files(
+    connection_name: str,
+    stage_name: str,
+    stage_files: List[str],
+    backend: Optional[SnowflakeBackend] = None
+) -> Tuple[int, List[str]]:
+    """
+    Remove files from a stage in a single CLI invocation.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        stage_name: Snowflake stage name
+        stage_files: Stage-relative file names to remove
+        backend: Execution backend (default: snow CLI for connection_name)
+        
+    Returns:
+        Tuple of (removed_count, error_messages)
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    if not stage_files:
+        return 0, []
+    
+    queries = [build_remove_query(stage_name, name) for name in stage_files]
+    
+    try:
+        backend.query(';\n'.join(queries))
+    except SnowflakeBackendError as e:
+        return 0, [f"Failed to remove stage files: {e}"]
+    
+    return len(stage_files), []
+
+
+def sync_directory_to_stage(
+    connection_name: str,
+    upload_dir: Path,
+    stage_name: str,
+    manifest_path: Path,
+    prune: bool = False,
+    auto_compress: bool = True,
+    verbose: bool = True,
+    workers: int = 1,
+    parallel: Optional[int] = None,
+    batch_size: int = 0,
+    backend: Optional[SnowflakeBackend] = None,
+    source_compression: Optional[str] = None
+) -> Tuple[int, int, List[str], int, int]:
+    """
+    Upload only new or modified files, tracked by a content-addressed manifest.
+    
+    The stage is listed once up front, and once more after uploading to
+    record what the stage now holds.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        upload_dir: Path to the directory containing files to upload
+        stage_name: Snowflake stage name
+        manifest_path: Path of the JSON manifest to read and update
+        prune: Remove stage files that have no local counterpart
+        auto_compress: Auto-compress files during upload
+        verbose: Print execution details
+        workers: Maximum number of concurrent CLI invocations
+        parallel: PUT PARALLEL option, or None for the server default
+        batch_size: Files per PUT invocation (0 uploads one file per invocation)
+        backend: Execution backend (default: snow CLI for connection_name)
+        source_compression: PUT SOURCE_COMPRESSION option, or None to auto-detect
+        
+    Returns:
+        Tuple of (successful_count, failed_count, error_messages,
+        unchanged_count, pruned_count)
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    files = get_upload_files(upload_dir)
+    stage_key = normalize_stage_name(stage_name)
+    
+    manifest = load_manifest(manifest_path)
+    stage_manifest = manifest['stages'].setdefault(stage_key, {})
+    stage_listing = list_stage_files(connection_name, stage_name, backend)
+    
+    to_upload, unchanged, local_state = plan_incremental_upload(
+        files,
+        stage_name,
+        stage_manifest,
+        stage_listing,
+        auto_compress
+    )
+    
+    if verbose:
+        print(f"\nManifest: {manifest_path}")
+        print(f"  Local files:  {len(files)}")
+        print(f"  Stage files:  {len(stage_listing)}")
+        print(f"  Unchanged:    {len(unchanged)}")
+        print(f"  To upload:    {len(to_upload)}")
+    
+    outcomes = []
+    if to_upload:
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"Uploading {len(to_upload)} new or modified file(s) to stage: {stage_name}")
+            print(f"Connection: {connection_name}")
+            print(f"Source directory: {upload_dir}")
+            print(f"{'='*60}\n")
+        
+        outcomes = upload_files_to_stage(
             connection_name,
-            file_path,
+            to_upload,
             stage_name,
             auto_compress,
-            overwrite,
-            verbose
+            True,
+            verbose,
+            workers,
+            parallel,
+            batch_size,
+            backend,
+            source_compression
         )
-        
-        if success:
-            successful += 1
-        else:
-            failed += 1
-            error_messages.append(message)
+        stage_listing = list_stage_files(connection_name, stage_name, backend)
     
-    if verbose:
-        print(f"\n{'='*60}")
-        print(f"Upload Summary:")
-        print(f"  Successful: {successful}/{len(files)}")
-        print(f"  Failed:     {failed}/{len(files)}")
-        print(f"{'='*60}")
+    successful = sum(1 for _, success, _ in outcomes if success)
+    failed = len(outcomes) - successful
+    error_messages = [message for _, success, message in outcomes if not success]
     
-    return successful, failed, error_messages
+    if verbose and outcomes:
+        print_upload_summary(successful, failed, len(outcomes))
+    
+    pruned = 0
+    if prune:
+        expected = {state['stage_file'] for state in local_state.values()}
+        orphans = sorted(name for name in stage_listing if name not in expected)
+        if verbose and orphans:
+            print(f"\nPruning {len(orphans)} stage file(s) with no local counterpart:")
+            for name in orphans:
+                print(f"  - {name}")
+        pruned, prune_errors = remove_stage_files(connection_name, stage_name, orphans, backend)
+        failed += len(prune_errors)
+        telemetry.count('failures', len(prune_errors))
+        error_messages.extend(prune_errors)
+    
+    # Record the stage object behind every local file. A failed upload keeps
+    # its previous entry, since the stage may still hold the old content;
+    # files gone locally or missing from the stage are dropped.
+    failed_names = {file_path.name for file_path, success, _ in outcomes if not success}
+    new_stage_manifest = {}
+    for name, state in local_state.items():
+        if name in failed_names:
+            if name in stage_manifest:
+                new_stage_manifest[name] = stage_manifest[name]
+            continue
+        listed = stage_listing.get(state['stage_file'])
+        if listed is None:
+            continue
+        new_stage_manifest[name] = dict(
+            state,
+            stage_size=listed['size'],
+            stage_md5=listed['md5'],
+        )
+    
+    manifest['stages'][stage_key] = new_stage_manifest
+    with telemetry.span('write'):
+        save_manifest(manifest_path, manifest)
+    
+    return successful, failed, error_messages, len(unchanged), pruned
 
 
 def main():
@@ -171,25 +888,82 @@ def main():
     
     Usage:
         python snowcliput.py <directory> <connection_name> <stage_name>
+            [--workers N] [--parallel N] [--batch-size N] [--manifest PATH [--prune]]
+            [--backend cli|connector|fake] [--cache-ttl SECONDS]
+            [--chunk-size-mb N [--compression gzip|zstd|none] [--chunk-dir PATH] [--coalesce]]
     
     Example:
         python snowcliput.py ./tasks/snow-cli/upload my_connection loss_evidence
-        python snowcliput.py ./data my_connection @loss_evidence
-    """
-    if len(sys.argv) < 4:
-        print("Usage: python snowcliput.py <directory> <connection_name> <stage_name>")
-        print("\nArguments:")
-        print("  directory         : Path to directory containing files to upload")
-        print("  connection_name   : Snowflake CLI connection name")
-        print("  stage_name        : Snowflake internal stage name (with or without @ prefix)")
-        print("\nExample:")
-        print("  python snowcliput.py ./tasks/snow-cli/upload my_connection loss_evidence")
-        print("  python snowcliput.py ./data demo_connection @loss_evidence")
+        python snowcliput.py ./data my_connection @loss_evidence --workers 8 --batch-size 100
+        python snowcliput.py ./data my_connection @loss_evidence --manifest ./output/manifest.json --prune
+        python snowcliput.py ./data my_connection @loss_evidence --chunk-size-mb 128 --compression gzip
+    """
+    parser = argparse.ArgumentParser(
+        description="Upload files from a directory to a Snowflake internal stage using PUT",
+        epilog=(
+            "Example:\n"
+            "  python snowcliput.py ./tasks/snow-cli/upload my_connection loss_evidence\n"
+            "  python snowcliput.py ./data demo_connection @loss_evidence --workers 8 --batch-size 100\n"
+            "  python snowcliput.py ./data demo_connection @loss_evidence --manifest ./output/manifest.json --prune\n"
+            "  python snowcliput.py ./data demo_connection @loss_evidence --chunk-size-mb 128 --chunk-dir ./output/chunks"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("directory", help="Path to directory containing files to upload")
+    parser.add_argument("connection_name", help="Snowflake CLI connection name")
+    parser.add_argument("stage_name", help="Snowflake internal stage name (with or without @ prefix)")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Number of concurrent PUT invocations (default: 1)")
+    parser.add_argument("--parallel", type=int,
+                        help="PUT PARALLEL option: threads used to upload each file (1-99)")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Files moved per PUT invocation; 0 uploads one file per invocation (default: 0)")
+    parser.add_argument("--manifest", type=Path,
+                        help="Upload manifest; when set, only new or modified files are uploaded")
+    parser.add_argument("--prune", action="store_true",
+                        help="Remove stage files with no local counterpart (requires --manifest)")
+    parser.add_argument("--backend", choices=BACKEND_NAMES, default=DEFAULT_BACKEND,
+                        help=f"SQL execution backend (default: {DEFAULT_BACKEND}, or $SNOWCLI_BACKEND)")
+    parser.add_argument("--cache-ttl", type=int, default=0,
+                        help="Answer the manifest's stage LIST from the snowclicache metadata cache when it is "
+                             "younger than this many seconds; uploads and removals refresh it (default: 0, off)")
+    parser.add_argument("--chunk-size-mb", type=float,
+                        help="Split JSON / NDJSON inputs into compressed NDJSON chunks of about this "
+                             "uncompressed size before uploading")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default='gzip',
+                        help="Chunk compression with --chunk-size-mb (default: gzip)")
+    parser.add_argument("--chunk-dir", type=Path,
+                        help="Directory for chunks (default: a temporary directory); keep it stable "
+                             "with --manifest so unchanged chunks are not re-uploaded")
+    parser.add_argument("--chunk-workers", type=int,
+                        help="Compression processes (default: CPU count)")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Pack records from all inputs into evenly sized chunks")
+    args = parser.parse_args()
+    
+    directory = args.directory
+    connection_name = args.connection_name
+    stage_name = args.stage_name
+    
+    if args.workers < 1:
+        print("Error: --workers must be at least 1", file=sys.stderr)
         sys.exit(1)
     
-    directory = sys.argv[1]
-    connection_name = sys.argv[2]
-    stage_name = sys.argv[3]
+    if args.parallel is not None and not 1 <= args.parallel <= 99:
+        print("Error: --parallel must be between 1 and 99", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.batch_size < 0:
+        print("Error: --batch-size cannot be negative", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.prune and not args.manifest:
+        print("Error: --prune requires --manifest", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.chunk_size_mb is not None and args.chunk_size_mb <= 0:
+        print("Error: --chunk-size-mb must be positive", file=sys.stderr)
+        sys.exit(1)
     
     # Convert directory string to Path
     upload_dir = Path(directory)
@@ -203,18 +977,66 @@ def main():
         print("Error: Stage name cannot be empty", file=sys.stderr)
         sys.exit(1)
     
+    backend = None
+    chunk_tmp = None
     try:
+        # One backend for the whole run; the connector pool gets one session per worker
+        backend = cached_backend(get_backend(args.backend, connection_name, pool_size=args.workers), args.cache_ttl)
+        
         # Print directory being scanned (like snowclisp does)
         print(f"Scanning directory: {directory}")
         
-        successful, failed, error_messages = upload_directory_to_stage(
-            connection_name=connection_name,
-            upload_dir=upload_dir,
-            stage_name=stage_name,
-            auto_compress=False,
-            overwrite=True,
-            verbose=True
-        )
+        # Chunks are already compressed, so PUT must not compress them again
+        source_compression = None
+        if args.chunk_size_mb is not None:
+            chunk_dir = args.chunk_dir
+            if chunk_dir is None:
+                chunk_tmp = tempfile.TemporaryDirectory(prefix='snowcliput-chunks-')
+                chunk_dir = Path(chunk_tmp.name)
+            print()
+            with telemetry.span('chunk'):
+                report = chunk_directory(
+                    upload_dir,
+                    chunk_dir,
+                    chunk_size_mb=args.chunk_size_mb,
+                    compression=args.compression,
+                    workers=args.chunk_workers,
+                    coalesce=args.coalesce
+                )
+            upload_dir = chunk_dir
+            source_compression = report['source_compression']
+        
+        unchanged = 0
+        pruned = 0
+        if args.manifest:
+            successful, failed, error_messages, unchanged, pruned = sync_directory_to_stage(
+                connection_name=connection_name,
+                upload_dir=upload_dir,
+                stage_name=stage_name,
+                manifest_path=args.manifest,
+                prune=args.prune,
+                auto_compress=False,
+                verbose=True,
+                workers=args.workers,
+                parallel=args.parallel,
+                batch_size=args.batch_size,
+                backend=backend,
+                source_compression=source_compression
+            )
+        else:
+            successful, failed, error_messages = upload_directory_to_stage(
+                connection_name=connection_name,
+                upload_dir=upload_dir,
+                stage_name=stage_name,
+                auto_compress=False,
+                overwrite=True,
+                verbose=True,
+                workers=args.workers,
+                parallel=args.parallel,
+                batch_size=args.batch_size,
+                backend=backend,
+                source_compression=source_compression
+            )
         
         if failed > 0:
             print(f"\n⚠️  {failed} file(s) failed to upload:", file=sys.stderr)
@@ -222,11 +1044,19 @@ def main():
                 print(f"  - {msg}", file=sys.stderr)
             sys.exit(1)
         
+        if pruned > 0:
+            print(f"\n✓ Pruned {pruned} file(s) from {stage_name}")
+        
         if successful == 0:
-            print("\n⚠️  No files were uploaded.")
+            if unchanged > 0:
+                print(f"\n✓ All {unchanged} file(s) already up to date in {stage_name}")
+            else:
+                print("\n⚠️  No files were uploaded.")
             sys.exit(0)
         
         print(f"\n✓ Successfully uploaded {successful} file(s) to {stage_name}")
+        if unchanged > 0:
+            print(f"  ({unchanged} unchanged file(s) skipped)")
         sys.exit(0)
         
     except FileNotFoundError as e:
@@ -235,9 +1065,21 @@ def main():
     except NotADirectoryError as e:
         print(f"\nERROR: {e}", file=sys.stderr)
         sys.exit(1)
+    except ValueError as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    except SnowflakeBackendError as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"\nERROR: Unexpected error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if backend is not None:
+            backend.close()
+        if chunk_tmp is not None:
+            chunk_tmp.cleanup()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with telemetry.run('snowcliput'):
+        main()
\ No newline at end of file
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+snowclirender - compiled single-pass renderer for {{ variable }} templates
+
+Shared by generate-notebook.py and snowclisp so notebooks and SQL are
+rendered locally, the same way, before they reach Snowflake. A template is
+compiled once into literal chunks and variable slots (cached by content
+hash) and rendered with a single join. Undefined variables and unsupported
+expressions fail fast instead of being left in the output.
+
+Usage:
+    python snowclirender.py <template> [-D name=value ...] [--output PATH]
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+# '{{ name }}' placeholders; anything else between braces is rejected
+PLACEHOLDER_RE = re.compile(r'\{\{(.*?)\}\}', re.S)
+IDENTIFIER_RE = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*$')
+
+# Compiled templates kept in memory, keyed by SHA-256 of their text
+TEMPLATE_CACHE_SIZE = 256
+
+
+class TemplateRenderError(Exception):
+    """Raised when a template cannot be compiled or rendered."""
+
+    def __init__(self, message: str, missing: Optional[List[str]] = None):
+        super().__init__(message)
+        self.missing = missing or []
+
+
+class CompiledTemplate:
+    """
+    A template split into literal text and variable slots.
+
+    Attributes:
+        chunks: Literal text, one more entry than there are slots
+        slots: Variable name for each placeholder, in order
+        variables: Distinct variable names the template uses
+    """
+
+    def __init__(self, text: str, name: str = '<template>'):
+        self.name = name
+        self.chunks: List[str] = []
+        self.slots: List[str] = []
+
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            identifier = IDENTIFIER_RE.match(match.group(1))
+            if not identifier:
+                line = text.count('\n', 0, match.start()) + 1
+                raise TemplateRenderError(
+                    f"{name}:{line}: unsupported template expression '{match.group(0)}' "
+                    f"(only {{{{ variable }}}} placeholders are supported)"
+                )
+            self.chunks.append(text[position:match.start()])
+            self.slots.append(identifier.group(1))
+            position = match.end()
+        self.chunks.append(text[position:])
+
+        self.variables = sorted(set(self.slots))
+
+    def render(self, variables: Mapping[str, str]) -> str:
+        """
+        Substitute all placeholders in one pass.
+
+        Args:
+            variables: Variable values by name
+
+        Returns:
+            Rendered text
+
+        Raises:
+            TemplateRenderError: If any variable the template uses is undefined
+        """
+        missing = [name for name in self.variables if name not in variables]
+        if missing:
+            raise TemplateRenderError(
+                f"{self.name}: undefined template variable(s): {', '.join(missing)}",
+                missing=missing
+            )
+
+        parts = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            parts.append(str(variables[slot]))
+            parts.append(chunk)
+        return ''.join(parts)
+
+
+_cache: 'OrderedDict[str, CompiledTemplate]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compile_template(text: str, name: str = '<template>') -> CompiledTemplate:
+    """
+    Compile a template, reusing an earlier compilation of identical text.
+
+    Args:
+        text: Template text
+        name: Name used in error messages (e.g., the file path)
+
+    Returns:
+        The compiled template
+    """
+    key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    with _cache_lock:
+        template = _cache.get(key)
+        if template is not None:
+            _cache.move_to_end(key)
+            return template
+
+    template = CompiledTemplate(text, name)
+
+    with _cache_lock:
+        _cache[key] = template
+        while len(_cache) > TEMPLATE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return template
+
+
+def render(text: str, variables: Mapping[str, str], name: str = '<template>') -> str:
+    """
+    Render template text.
+
+    Args:
+        text: Template text
+        variables: Variable values by name
+        name: Name used in error messages
+
+    Returns:
+        Rendered text
+
+    Raises:
+        TemplateRenderError: On undefined variables or unsupported expressions
+    """
+    if '{{' not in text:
+        return text
+    return compile_template(text, name).render(variables)
+
+
+def render_file(path: Path, variables: Mapping[str, str]) -> str:
+    """
+    Render a template file.
+
+    Args:
+        path: Template file path
+        variables: Variable values by name
+
+    Returns:
+        Rendered text
+
+    Raises:
+        TemplateRenderError: On undefined variables or unsupported expressions
+    """
+    with open(path, 'r') as f:
+        return render(f.read(), variables, str(path))
+
+
+def parse_definitions(definitions: List[str]) -> Dict[str, str]:
+    """
+    Parse 'name=value' definitions (as given to -D) into a dict.
+
+    Args:
+        definitions: Strings of the form name=value
+
+    Returns:
+        Dict of variable values
+
+    Raises:
+        ValueError: If a definition has no '=' or an invalid name
+    """
+    variables: Dict[str, str] = {}
+    for definition in definitions:
+        name, sep, value = definition.partition('=')
+        name = name.strip()
+        if not sep or not IDENTIFIER_RE.match(name):
+            raise ValueError(f"Invalid variable definition '{definition}' (expected name=value)")
+        variables[name] = value
+    return variables
+
+
+def main() -> int:
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python snowclirender.py <template> [-D name=value ...] [--output PATH]
+    """
+    parser = argparse.ArgumentParser(
+        description="Render a {{ variable }} template locally, failing on undefined variables",
+        epilog=(
+            "Example:\n"
+            "  python snowclirender.py sql/batch-1/001-init.sql -D demo_database_name=DEMO -o /tmp/001-init.sql"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("template", type=Path, help="Template file to render")
+    parser.add_argument("-D", "--define", action="append", default=[], metavar="NAME=VALUE",
+                        help="Template variable (repeatable)")
+    parser.add_argument("--output", "-o", type=Path, help="Write here instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        text = render_file(args.template, parse_definitions(args.define))
+    except (OSError, ValueError, TemplateRenderError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,132 @@ SQL File Executor for Snowflake CLI
 Sorts and executes SQL files with numeric prefixes (e.g., 001-schema.sql)
 """
 
+import argparse
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
 import re
-import subprocess
 import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+# Make sibling and shared tasks/pyutil modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'pyutil'))
+
+from snowclibackend.snowclibackend import (  # noqa: E402
+    BACKEND_NAMES,
+    DEFAULT_BACKEND,
+    SnowCliBackend,
+    SnowflakeBackend,
+    SnowflakeBackendError,
+    SnowflakeCancelledError,
+    get_backend,
+)
+from snowclirender.snowclirender import (  # noqa: E402
+    TemplateRenderError,
+    parse_definitions,
+    render_file,
+)
+from telemetry import telemetry  # noqa: E402
+
+# Header directive that puts a file in a named concurrent group,
+# e.g. '-- snowclisp: group=grants'
+GROUP_DIRECTIVE_RE = re.compile(r'^\s*--\s*snowclisp:\s*group\s*=\s*([\w.-]+)', re.IGNORECASE)
+GROUP_DIRECTIVE_MAX_LINES = 10
+
+# Numbered files: 'NNN-name.sql', or multi-level 'NNN.NNN-name.sql'
+DEFAULT_PATTERN = r'^\d+(\.\d+)*-.*\.sql$'
+PREFIX_RE = re.compile(r'^(\d+(?:\.\d+)*)-')
+
+
+class StreamingOutput:
+    """
+    Sink for streamed SQL output.
+    
+    Echoes each line as it arrives, optionally tees it to a rotating log
+    file, and keeps only the last tail_lines lines in memory for error
+    reports. Safe to call from multiple threads.
+    """
+    
+    def __init__(
+        self,
+        echo: bool = True,
+        tail_lines: int = 200,
+        log_path: Optional[Path] = None,
+        log_max_bytes: int = 10 * 1024 * 1024,
+        log_backups: int = 3
+    ):
+        self.echo = echo
+        self._tail: deque = deque(maxlen=max(1, tail_lines))
+        self._lock = threading.Lock()
+        self._logger: Optional[logging.Logger] = None
+        
+        if log_path is not None:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=log_max_bytes, backupCount=log_backups, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._logger = logging.getLogger(f"snowclisp.output.{id(self)}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(handler)
+    
+    def __call__(self, stream: str, line: str) -> None:
+        """Handle one output line ('stdout' or 'stderr')."""
+        with self._lock:
+            self._tail.append((stream, line))
+            if self.echo:
+                print(line, file=sys.stderr if stream == 'stderr' else sys.stdout, flush=True)
+            if self._logger is not None:
+                self._logger.info(f"[{stream}] {line}")
+    
+    def note(self, message: str) -> None:
+        """Print a progress message and record it in the log (not the tail)."""
+        with self._lock:
+            print(message, flush=True)
+            if self._logger is not None:
+                self._logger.info(message.strip())
+    
+    def tail(self) -> Tuple[str, str]:
+        """Return the retained (stdout, stderr) tail as text."""
+        with self._lock:
+            lines = list(self._tail)
+        return (
+            '\n'.join(line for stream, line in lines if stream == 'stdout'),
+            '\n'.join(line for stream, line in lines if stream == 'stderr'),
+        )
+    
+    def close(self) -> None:
+        """Flush and close the log file."""
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                handler.close()
+                self._logger.removeHandler(handler)
+            self._logger = None
+
+
+def print_error_output(e: SnowflakeBackendError, output: Optional[StreamingOutput] = None) -> None:
+    """Print a failed execution's output, or the retained tail when streaming."""
+    stdout, stderr = (e.stdout, e.stderr)
+    if output is not None:
+        stdout, stderr = output.tail()
+        label = " (last lines)"
+    else:
+        label = ""
+    if stdout:
+        print(f"\nSTDOUT{label}:\n{stdout}", file=sys.stderr)
+    if stderr:
+        print(f"\nSTDERR{label}:\n{stderr}", file=sys.stderr)
 
 
 def extract_numeric_prefix(filename: str) -> int:
@@ -20,22 +141,144 @@ def extract_numeric_prefix(filename: str) -> int:
         filename: The filename to parse
         
     Returns:
-        Integer value of the numeric prefix, or -1 if no match
+        Integer value of the numeric prefix (its first level for
+        '002.010-' style prefixes), or -1 if no match
     """
-    match = re.match(r'^(\d+)-', filename)
-    if match:
-        return int(match.group(1))
+    parts = extract_prefix_parts(filename)
+    if parts:
+        return parts[0]
     return -1
 
 
-def get_sorted_sql_files(directory: str, pattern: str = r'^\d+-.*\.sql$') -> Tuple[List[Path], List[Path]]:
+def extract_prefix_parts(filename: str) -> Tuple[int, ...]:
+    """
+    Extract a possibly multi-level numeric prefix (e.g., '002.010-grants.sql' -> (2, 10))
+    
+    Args:
+        filename: The filename to parse
+        
+    Returns:
+        Tuple of the prefix's numeric levels, or () if no match
+    """
+    match = PREFIX_RE.match(filename)
+    if match:
+        return tuple(int(part) for part in match.group(1).split('.'))
+    return ()
+
+
+def format_prefix(parts: Tuple[int, ...]) -> str:
+    """Format prefix levels for display (e.g., (2, 10) -> '002.010')."""
+    return '.'.join(f"{part:03d}" for part in parts)
+
+
+def natural_sort_key(name: str) -> Tuple:
+    """
+    Sort key that orders embedded numbers numerically ('batch-2' < 'batch-10').
+    
+    Args:
+        name: File or directory name
+        
+    Returns:
+        Tuple alternating text and integer chunks
+    """
+    return tuple(
+        (0, int(chunk), chunk) if chunk.isdigit() else (1, 0, chunk.lower())
+        for chunk in re.split(r'(\d+)', name) if chunk
+    )
+
+
+def _scan_sql_tree(root: Path, pattern_re: re.Pattern, recursive: bool) -> Dict:
+    """
+    Walk the directory (or tree) once and record what the plan depends on.
+    
+    Symlinked directories are followed, but each directory is scanned only
+    once, so a link back up the tree cannot loop the walk.
+    
+    Returns:
+        Dict with 'dirs' ({relative_dir: mtime_ns}), 'matching' and
+        'non_matching' (relative POSIX paths)
+    """
+    dirs: Dict[str, int] = {}
+    matching: List[str] = []
+    non_matching: List[str] = []
+    pending = [root]
+    visited = set()
+    
+    while pending:
+        current = pending.pop()
+        stat = current.stat()
+        if (stat.st_dev, stat.st_ino) in visited:
+            continue
+        visited.add((stat.st_dev, stat.st_ino))
+        rel_dir = current.relative_to(root).as_posix()
+        dirs[rel_dir] = stat.st_mtime_ns
+        
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Hidden directories (.git, .venv, ...) are never SQL batches
+                    if recursive and not entry.name.startswith('.'):
+                        pending.append(Path(entry.path))
+                elif entry.is_file() and entry.name.lower().endswith('.sql'):
+                    rel_path = Path(entry.path).relative_to(root).as_posix()
+                    if pattern_re.match(entry.name):
+                        matching.append(rel_path)
+                    else:
+                        non_matching.append(rel_path)
+    
+    return {'dirs': dirs, 'matching': matching, 'non_matching': non_matching}
+
+
+def _load_scan_cache(cache_path: Path, cache_key: Dict, root: Path) -> Optional[Dict]:
+    """Return a cached scan if its key matches and no scanned directory has changed."""
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if cached.get('key') != cache_key:
+        return None
+    
+    # Adding, removing or renaming an entry updates its directory's mtime
+    for rel_dir, mtime_ns in cached['scan']['dirs'].items():
+        try:
+            if (root / rel_dir).stat().st_mtime_ns != mtime_ns:
+                return None
+        except OSError:
+            return None
+    
+    return cached['scan']
+
+
+def _save_scan_cache(cache_path: Path, cache_key: Dict, scan: Dict) -> None:
+    """Write the scan cache atomically."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'key': cache_key, 'scan': scan}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def get_sorted_sql_files(
+    directory: str,
+    pattern: str = DEFAULT_PATTERN,
+    recursive: bool = False,
+    cache_path: Optional[Path] = None
+) -> Tuple[List[Path], List[Path]]:
     """
     Get all SQL files from directory, separating those matching the numeric prefix pattern
     from those that don't.
     
+    Files are ordered by directory (natural sort, so 'batch-2' precedes
+    'batch-10', and files in a directory precede its subdirectories), then
+    by numeric prefix levels ('002' < '002.010' < '010'), then by name.
+    
     Args:
         directory: Path to directory containing SQL files
-        pattern: Regex pattern for matching files (default: NNN-*.sql)
+        pattern: Regex pattern for matching files (default: NNN-*.sql or NNN.NNN-*.sql)
+        recursive: Also scan subdirectories
+        cache_path: Reuse the scan stored here while no scanned directory's mtime has changed
         
     Returns:
         Tuple of (matching_files_sorted, non_matching_files)
@@ -48,41 +291,93 @@ def get_sorted_sql_files(directory: str, pattern: str = r'^\d+-.*\.sql$') -> Tup
     if not dir_path.is_dir():
         raise NotADirectoryError(f"Path is not a directory: {directory}")
     
-    # Get all SQL files
-    matching_files: List[Tuple[int, Path]] = []
-    non_matching_files: List[Path] = []
-    pattern_re = re.compile(pattern)
-    
-    # Iterate over all files in the directory
-    for file_path in dir_path.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() == '.sql':
-            if pattern_re.match(file_path.name):
-                # If the file matches the pattern, extract the numeric prefix
-                prefix = extract_numeric_prefix(file_path.name)
-                matching_files.append((prefix, file_path))
-                # If the file does not match the pattern, add it to the non-matching files
-            else:
-                non_matching_files.append(file_path)
+    cache_key = {'root': str(dir_path.resolve()), 'pattern': pattern, 'recursive': recursive}
+    scan = _load_scan_cache(cache_path, cache_key, dir_path) if cache_path else None
+    
+    if scan is None:
+        scan = _scan_sql_tree(dir_path, re.compile(pattern), recursive)
+        scan['matching'].sort(key=_sql_path_sort_key)
+        scan['non_matching'].sort(key=_sql_path_sort_key)
+        if cache_path:
+            _save_scan_cache(cache_path, cache_key, scan)
+    
+    return (
+        [dir_path / rel_path for rel_path in scan['matching']],
+        [dir_path / rel_path for rel_path in scan['non_matching']],
+    )
+
+
+def _sql_path_sort_key(rel_path: str) -> Tuple:
+    """Order by directories, then prefix levels, then name (a deterministic tie-break)."""
+    path = Path(rel_path)
+    return (
+        tuple(natural_sort_key(part) for part in path.parent.parts),
+        extract_prefix_parts(path.name),
+        natural_sort_key(path.name),
+    )
+
+
+def render_sql_files(
+    sql_files: List[Path],
+    root: Path,
+    variables: Dict[str, str],
+    output_dir: Path
+) -> List[Path]:
+    """
+    Render {{ variable }} placeholders into copies of the SQL files.
+    
+    Copies keep their paths relative to root, so ordering, grouping and
+    journal keys are unchanged. Every file is rendered before anything runs,
+    and all undefined variables are reported together.
+    
+    Args:
+        sql_files: SQL files to render, in execution order
+        root: Scanned directory
+        variables: Template variable values
+        output_dir: Directory receiving the rendered copies
+        
+    Returns:
+        Rendered file paths, in the same order
+        
+    Raises:
+        TemplateRenderError: If any file uses an undefined variable or an unsupported expression
+    """
+    rendered: List[Path] = []
+    errors: List[str] = []
     
-    # Sort matching files by numeric prefix
-    matching_files.sort(key=lambda x: x[0])
+    for sql_file in sql_files:
+        target = output_dir / sql_file.relative_to(root)
+        try:
+            text = render_file(sql_file, variables)
+        except TemplateRenderError as e:
+            errors.append(str(e))
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(text)
+        rendered.append(target)
     
-    # Return just the paths for matching files, sorted by numeric prefix
-    return [path for _, path in matching_files], non_matching_files
+    if errors:
+        raise TemplateRenderError("Cannot render SQL files:\n  " + "\n  ".join(errors))
+    
+    return rendered
 
 
 def execute_sql_files_with_snowflake_cli(
     connection_name: str,
     sql_files: List[Path],
-    verbose: bool = True
+    verbose: bool = True,
+    backend: Optional[SnowflakeBackend] = None,
+    output: Optional[StreamingOutput] = None
 ) -> bool:
     """
-    Execute SQL files using Snowflake CLI in a single command.
+    Execute SQL files in a single session.
     
     Args:
         connection_name: Snowflake CLI connection name
         sql_files: List of SQL file paths to execute (in order)
         verbose: Print execution details
+        backend: Execution backend (default: snow CLI for connection_name)
+        output: Stream output through this sink instead of buffering it
         
     Returns:
         True if all files executed successfully, False otherwise
@@ -91,38 +386,38 @@ def execute_sql_files_with_snowflake_cli(
         print("No SQL files to execute.")
         return True
     
+    backend = backend or SnowCliBackend(connection_name)
+    
     try:
-        # Build command with multiple -f flags
-        # Command: snow sql -c <connection_name> -f file1.sql -f file2.sql ...
-        cmd = ['snow', 'sql', '-c', connection_name]
-        
-        for sql_file in sql_files:
-            cmd.extend(['-f', str(sql_file)])
-        
         if verbose:
             print(f"\n{'='*60}")
             print(f"Executing {len(sql_files)} SQL file(s) in order:")
             for i, sql_file in enumerate(sql_files, 1):
                 print(f"  {i}. {sql_file.name}")
             print(f"{'='*60}")
-            print(f"Running command:")
-            print(f"  snow sql -c {connection_name} \\")
-            for sql_file in sql_files:
-                print(f"    -f {sql_file} \\")
+            if backend.name == 'cli':
+                # Command: snow sql -c <connection_name> -f file1.sql -f file2.sql ...
+                print(f"Running command:")
+                print(f"  snow sql -c {connection_name} \\")
+                for sql_file in sql_files:
+                    print(f"    -f {sql_file} \\")
+            else:
+                print(f"Running with {backend.name} backend")
             print()
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        if output is not None:
+            def on_file(index: int, sql_file: Path) -> None:
+                output.note(f"\n▶ [{index}/{len(sql_files)}] {sql_file.name}")
+            
+            stdout, stderr = backend.execute_files(sql_files, on_output=output, on_file=on_file)
+        else:
+            stdout, stderr = backend.execute_files(sql_files)
         
         if verbose:
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr, file=sys.stderr)
+            if stdout:
+                print(stdout)
+            if stderr:
+                print(stderr, file=sys.stderr)
         
         if verbose:
             print(f"\n{'='*60}")
@@ -131,24 +426,623 @@ def execute_sql_files_with_snowflake_cli(
         
         return True
             
-    except subprocess.CalledProcessError as e:
+    except SnowflakeBackendError as e:
+        if e.returncode is None and not e.stdout and not e.stderr and not (output and any(output.tail())):
+            # The backend could not run at all (e.g., 'snow' or the connector is missing)
+            print("\n" + "="*60, file=sys.stderr)
+            print(f"ERROR: {e}", file=sys.stderr)
+            print("="*60, file=sys.stderr)
+            return False
+        
         error_msg = f"\n{'='*60}\n✗ Failed to execute SQL files\n{'='*60}"
         print(error_msg, file=sys.stderr)
-        print(f"Error code: {e.returncode}", file=sys.stderr)
-        if e.stdout:
-            print(f"\nSTDOUT:\n{e.stdout}", file=sys.stderr)
-        if e.stderr:
-            print(f"\nSTDERR:\n{e.stderr}", file=sys.stderr)
+        if e.returncode is not None:
+            print(f"Error code: {e.returncode}", file=sys.stderr)
+        else:
+            print(f"Error: {e}", file=sys.stderr)
+        print_error_output(e, output)
         
         return False
+
+
+def profile_sql_files(
+    connection_name: str,
+    sql_files: List[Path],
+    verbose: bool = True,
+    backend: Optional[SnowflakeBackend] = None
+) -> Tuple[bool, List[Dict]]:
+    """
+    Execute SQL files in a single session, recording wall time and query ID per statement.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        sql_files: List of SQL file paths to execute (in order)
+        verbose: Print execution details
+        backend: Execution backend (default: snow CLI for connection_name)
+        
+    Returns:
+        Tuple of (success, statement_profiles)
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    profiles: List[Dict] = []
+    
+    def on_statement(profile: Dict) -> None:
+        profiles.append(profile)
+        if verbose and profile['duration_s'] is not None:
+            mark = '✓' if profile['status'] == 'success' else '✗'
+            print(f"  {mark} {profile['file']} #{profile['index']}: {profile['duration_s']:.3f}s")
+    
+    if verbose:
+        print(f"\n{'='*60}")
+        print(f"Profiling {len(sql_files)} SQL file(s) with {backend.name} backend:")
+        for i, sql_file in enumerate(sql_files, 1):
+            print(f"  {i}. {sql_file.name}")
+        print(f"{'='*60}")
+    
+    try:
+        backend.profile_files(sql_files, on_statement)
+    except SnowflakeBackendError as e:
+        print(f"\n{'='*60}\n✗ Failed to execute SQL files\n{'='*60}", file=sys.stderr)
+        print(f"Error: {e}", file=sys.stderr)
+        print_error_output(e)
+        return False, profiles
+    
+    return True, profiles
+
+
+def _profile_timeline(profiles: List[Dict]) -> List[Tuple[float, float, Dict]]:
+    """
+    Place statements on a timeline as (start_offset_s, duration_s, profile).
+    
+    Statements without a recorded start follow the previous statement.
+    """
+    starts = [p['start'] for p in profiles if p.get('start') is not None]
+    origin = min(starts) if starts else 0.0
+    timeline = []
+    cursor = 0.0
+    for profile in profiles:
+        duration = profile.get('duration_s') or 0.0
+        offset = profile['start'] - origin if profile.get('start') is not None else cursor
+        timeline.append((offset, duration, profile))
+        cursor = offset + duration
+    return timeline
+
+
+def write_profile_report(
+    profiles: List[Dict],
+    report_path: Path,
+    connection_name: str,
+    backend_name: str,
+    success: bool,
+    wall_time_s: float
+) -> None:
+    """
+    Write the per-statement profile as a JSON report.
+    
+    Args:
+        profiles: Statement profiles in execution order
+        report_path: Output JSON path
+        connection_name: Snowflake CLI connection name
+        backend_name: Backend the run used
+        success: Whether every statement succeeded
+        wall_time_s: Wall time of the whole run
+    """
+    files: Dict[str, float] = {}
+    for profile in profiles:
+        files[profile['file']] = files.get(profile['file'], 0.0) + (profile.get('duration_s') or 0.0)
+    
+    report = {
+        'connection': connection_name,
+        'backend': backend_name,
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'success': success,
+        'wall_time_s': round(wall_time_s, 3),
+        'files': [{'file': name, 'duration_s': round(total, 3)} for name, total in files.items()],
+        'statements': profiles,
+    }
+    
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+
+def write_chrome_trace(profiles: List[Dict], trace_path: Path) -> None:
+    """
+    Write statements as Chrome trace events (open in chrome://tracing or Perfetto).
+    
+    Each file is a span on the first track, with its statements nested under it.
+    
+    Args:
+        profiles: Statement profiles in execution order
+        trace_path: Output JSON path
+    """
+    events = []
+    file_spans: Dict[str, List[float]] = {}
+    
+    for offset, duration, profile in _profile_timeline(profiles):
+        span = file_spans.setdefault(profile['file'], [offset, offset + duration])
+        span[0] = min(span[0], offset)
+        span[1] = max(span[1], offset + duration)
+        events.append({
+            'name': f"{profile['file']} #{profile['index']}",
+            'cat': 'statement',
+            'ph': 'X',
+            'ts': round(offset * 1e6),
+            'dur': round(duration * 1e6),
+            'pid': 1,
+            'tid': 1,
+            'args': {
+                'query_id': profile.get('query_id'),
+                'status': profile.get('status'),
+                'statement': (profile.get('statement') or '')[:500],
+            },
+        })
+    
+    for name, (start, end) in file_spans.items():
+        events.append({
+            'name': name,
+            'cat': 'file',
+            'ph': 'X',
+            'ts': round(start * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': 1,
+            'tid': 1,
+        })
+    
+    trace_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(trace_path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def print_profile_summary(profiles: List[Dict], top: int = 10) -> None:
+    """
+    Print the top-N slowest statements.
+    
+    Args:
+        profiles: Statement profiles
+        top: Number of statements to show
+    """
+    timed = [p for p in profiles if p.get('duration_s') is not None]
+    total = sum(p['duration_s'] for p in timed)
+    
+    print(f"\n{'='*60}")
+    print(f"Slowest statements (top {min(top, len(timed))} of {len(profiles)}, {total:.3f}s total):")
+    print(f"{'='*60}")
+    if not timed:
+        print("  No statement timings available")
+    for profile in sorted(timed, key=lambda p: p['duration_s'], reverse=True)[:top]:
+        share = (profile['duration_s'] / total * 100) if total else 0.0
+        text = ' '.join((profile.get('statement') or '').split())
+        if len(text) > 50:
+            text = text[:47] + '...'
+        print(f"  {profile['duration_s']:>9.3f}s {share:5.1f}%  {profile['file']} #{profile['index']}  {text}")
+        if profile.get('query_id'):
+            print(f"  {'':>10} query_id: {profile['query_id']}")
+
+
+def read_group_directive(sql_file: Path) -> Optional[str]:
+    """
+    Read an explicit group name from the first lines of a SQL file.
+    
+    Args:
+        sql_file: Path to the SQL file
+        
+    Returns:
+        The declared group name, or None if the file declares no group
+    """
+    with open(sql_file, 'r') as f:
+        for _, line in zip(range(GROUP_DIRECTIVE_MAX_LINES), f):
+            match = GROUP_DIRECTIVE_RE.match(line)
+            if match:
+                return match.group(1)
+    return None
+
+
+def group_sql_files(sql_files: List[Path], root: Optional[Path] = None) -> List[Tuple[str, List[Path]]]:
+    """
+    Group sorted SQL files into steps that may run concurrently.
+    
+    Files in the same directory sharing a numeric prefix form one group. A
+    file that declares '-- snowclisp: group=<name>' joins that named group
+    instead; a named group runs at the position of its first member.
+    
+    Args:
+        sql_files: SQL files sorted by numeric prefix
+        root: Scanned directory, used to label groups from subdirectories
+        
+    Returns:
+        List of (group_label, files) in execution order
+    """
+    groups: Dict[str, List[Path]] = {}
+    
+    for sql_file in sql_files:
+        declared = read_group_directive(sql_file)
+        if declared:
+            label = f"group {declared}"
+        else:
+            label = f"prefix {format_prefix(extract_prefix_parts(sql_file.name))}"
+            if root is not None and sql_file.parent != root:
+                label = f"{sql_file.parent.relative_to(root).as_posix()} {label}"
+        groups.setdefault(label, []).append(sql_file)
+    
+    # dicts keep insertion order, i.e. the position of each group's first file
+    return list(groups.items())
+
+
+def _execute_timed(
+    backend: SnowflakeBackend,
+    sql_file: Path,
+    cancel: threading.Event,
+    output: Optional[StreamingOutput] = None
+) -> Tuple[str, str, float]:
+    """Run one file and return (stdout, stderr, duration_seconds)."""
+    # Concurrent files share the sink, so tag each line with its file
+    def tagged_output(stream: str, line: str) -> None:
+        output(stream, f"[{sql_file.name}] {line}")
+    
+    start = time.monotonic()
+    stdout, stderr = backend.execute_files([sql_file], cancel, on_output=tagged_output if output else None)
+    return stdout, stderr, time.monotonic() - start
+
+
+def execute_sql_file_groups(
+    connection_name: str,
+    groups: List[Tuple[str, List[Path]]],
+    workers: int = 4,
+    verbose: bool = True,
+    backend: Optional[SnowflakeBackend] = None,
+    journal: Optional['MigrationJournal'] = None,
+    output: Optional[StreamingOutput] = None
+) -> bool:
+    """
+    Execute groups of SQL files in order, running the files of each group concurrently.
+    
+    Every file in a group runs in its own session, so session state (SET
+    variables, USE statements) does not carry across files. When a file
+    fails, its running siblings are cancelled and no later group starts.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        groups: Output of group_sql_files
+        workers: Maximum concurrent sessions per group
+        verbose: Print execution details
+        backend: Execution backend (default: snow CLI for connection_name)
+        journal: Records each file as it succeeds, when given
+        output: Stream output through this sink instead of buffering it
+        
+    Returns:
+        True if all files executed successfully, False otherwise
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    total_files = sum(len(files) for _, files in groups)
+    
+    if verbose:
+        print(f"\n{'='*60}")
+        print(f"Executing {total_files} SQL file(s) in {len(groups)} group(s), up to {workers} at a time:")
+        for i, (label, files) in enumerate(groups, 1):
+            print(f"  {i}. {label}: {', '.join(f.name for f in files)}")
+        print(f"{'='*60}")
+    
+    for label, files in groups:
+        if verbose:
+            print(f"\n▶ {label} ({len(files)} file(s))")
+        
+        cancel = threading.Event()
+        failures: List[Tuple[Path, SnowflakeBackendError]] = []
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as executor:
+            futures = {
+                executor.submit(_execute_timed, backend, sql_file, cancel, output): sql_file
+                for sql_file in files
+            }
+            
+            for future in as_completed(futures):
+                sql_file = futures[future]
+                if future.cancelled():
+                    if verbose:
+                        print(f"  ⊘ {sql_file.name} (not started)")
+                    continue
+                try:
+                    stdout, stderr, duration = future.result()
+                except SnowflakeCancelledError:
+                    if verbose:
+                        print(f"  ⊘ {sql_file.name} (cancelled)")
+                    continue
+                except SnowflakeBackendError as e:
+                    if not cancel.is_set():
+                        # Fail fast: stop queued siblings and abort running ones
+                        cancel.set()
+                        for pending in futures:
+                            pending.cancel()
+                    failures.append((sql_file, e))
+                    print(f"  ✗ {sql_file.name}", file=sys.stderr)
+                    continue
+                
+                if journal is not None:
+                    journal.record(sql_file, duration)
+                
+                if verbose:
+                    print(f"  ✓ {sql_file.name} ({duration:.2f}s)")
+                    if stdout:
+                        print(stdout)
+                    if stderr:
+                        print(stderr, file=sys.stderr)
+        
+        if failures:
+            print(f"\n{'='*60}\n✗ Failed to execute SQL files in {label}\n{'='*60}", file=sys.stderr)
+            for sql_file, e in failures:
+                print(f"\n{sql_file.name}: {e}", file=sys.stderr)
+                if output is None:
+                    print_error_output(e)
+            if output is not None:
+                print_error_output(failures[0][1], output)
+            return False
+    
+    if verbose:
+        print(f"\n{'='*60}")
+        print(f"✓ Successfully executed all {total_files} SQL file(s)")
+        print(f"{'='*60}")
+    
+    return True
+
+
+class MigrationJournal:
+    """
+    Ledger of applied SQL files, kept in a local JSON Lines file, a Snowflake table, or both.
+    
+    Each applied file is recorded with its content hash and duration, keyed
+    by its path relative to the scanned directory. Reads merge both stores,
+    and the newest record per file wins. A read-only journal (dry runs)
+    never creates the table and treats a missing one as empty.
+    """
+    
+    def __init__(
+        self,
+        root: Path,
+        journal_path: Optional[Path] = None,
+        table_name: Optional[str] = None,
+        backend: Optional[SnowflakeBackend] = None,
+        read_only: bool = False
+    ):
+        if journal_path is None and table_name is None:
+            raise ValueError("A journal needs a local path, a table name, or both")
+        if table_name is not None and backend is None:
+            raise ValueError("A journal table needs a backend")
+        if table_name is not None and not re.match(r'^[\w$."]+$', table_name):
+            raise ValueError(f"Invalid journal table name: {table_name}")
+        
+        self.root = root
+        self.journal_path = journal_path
+        self.table_name = table_name
+        self.backend = backend
+        self.read_only = read_only
+        self._hashes: Dict[Path, str] = {}
+        self._lock = threading.Lock()
+    
+    def key(self, sql_file: Path) -> str:
+        """Return the ledger key for a file (its path relative to the root)."""
+        try:
+            return sql_file.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return sql_file.name
+    
+    def file_hash(self, sql_file: Path) -> str:
+        """Return the SHA-256 of a file's content, cached for the run."""
+        if sql_file not in self._hashes:
+            self._hashes[sql_file] = hashlib.sha256(sql_file.read_bytes()).hexdigest()
+        return self._hashes[sql_file]
+    
+    def load(self) -> Dict[str, Dict]:
+        """
+        Load the latest record for every applied file.
+        
+        Returns:
+            Dict mapping ledger key to {'sha256', 'duration_s', 'applied_at'}
+        """
+        applied: Dict[str, Dict] = {}
+        
+        if self.journal_path is not None and self.journal_path.exists():
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        applied[record['file']] = record
+        
+        if self.table_name is not None:
+            if not self.read_only:
+                self.backend.query(
+                    f"CREATE TABLE IF NOT EXISTS {self.table_name} ("
+                    f"file_name STRING, sha256 STRING, duration_s FLOAT, applied_at TIMESTAMP_TZ)"
+                )
+            try:
+                rows = self.backend.query(
+                    f"SELECT file_name, sha256, duration_s, applied_at FROM {self.table_name} "
+                    f"QUALIFY ROW_NUMBER() OVER (PARTITION BY file_name ORDER BY applied_at DESC) = 1"
+                )
+            except SnowflakeBackendError as e:
+                if not self.read_only or 'does not exist' not in f"{e} {e.stderr}":
+                    raise
+                rows = []
+            for row in rows:
+                # Snowflake returns upper-case column names
+                row = {k.lower(): v for k, v in row.items()}
+                if 'file_name' not in row:
+                    continue
+                record = {
+                    'file': row['file_name'],
+                    'sha256': row['sha256'],
+                    'duration_s': row['duration_s'],
+                    'applied_at': str(row['applied_at']),
+                }
+                local = applied.get(record['file'])
+                if local is None or str(local.get('applied_at', '')) < record['applied_at']:
+                    applied[record['file']] = record
+        
+        return applied
+    
+    def plan(self, sql_files: List[Path]) -> Tuple[List[Path], List[Path], List[Path]]:
+        """
+        Split files into pending, already-applied and drifted.
+        
+        Args:
+            sql_files: SQL files in execution order
+            
+        Returns:
+            Tuple of (pending, applied_unchanged, applied_drifted); drifted
+            files were applied before but their content has changed since
+        """
+        applied = self.load()
+        pending, unchanged, drifted = [], [], []
+        
+        for sql_file in sql_files:
+            record = applied.get(self.key(sql_file))
+            if record is None:
+                pending.append(sql_file)
+            elif record['sha256'] == self.file_hash(sql_file):
+                unchanged.append(sql_file)
+            else:
+                drifted.append(sql_file)
+        
+        return pending, unchanged, drifted
+    
+    def record(self, sql_file: Path, duration_s: float) -> None:
+        """Record a file as applied."""
+        record = {
+            'file': self.key(sql_file),
+            'sha256': self.file_hash(sql_file),
+            'duration_s': round(duration_s, 3),
+            'applied_at': datetime.now(timezone.utc).isoformat(),
+        }
+        
+        with self._lock:
+            if self.journal_path is not None:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.journal_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
             
-    except FileNotFoundError:
-        print("\n" + "="*60, file=sys.stderr)
-        print("ERROR: 'snow' command not found.", file=sys.stderr)
-        print("Please ensure Snowflake CLI is installed.", file=sys.stderr)
-        print("\nInstall with: pip install snowflake-cli-labs", file=sys.stderr)
-        print("="*60, file=sys.stderr)
+            if self.table_name is not None:
+                self.backend.query(
+                    f"INSERT INTO {self.table_name} (file_name, sha256, duration_s, applied_at) "
+                    f"SELECT '{record['file'].replace(chr(39), chr(39) * 2)}', '{record['sha256']}', "
+                    f"{record['duration_s']}, '{record['applied_at']}'::TIMESTAMP_TZ"
+                )
+
+
+def filter_journaled_files(
+    journal: MigrationJournal,
+    sql_files: List[Path],
+    reapply_drifted: bool = False,
+    verbose: bool = True
+) -> List[Path]:
+    """
+    Drop files the journal already records as applied and unchanged.
+    
+    Args:
+        journal: The migration journal
+        sql_files: SQL files in execution order
+        reapply_drifted: Re-run applied files whose content changed
+        verbose: Print the plan
+        
+    Returns:
+        The files that still need to run, in execution order
+    """
+    pending, unchanged, drifted = journal.plan(sql_files)
+    
+    for sql_file in drifted:
+        action = "will re-apply" if reapply_drifted else "skipping (use --reapply-drifted to re-run)"
+        print(f"⚠️  WARNING: {journal.key(sql_file)} changed since it was applied; {action}",
+              file=sys.stderr)
+    
+    to_run = set(pending) | (set(drifted) if reapply_drifted else set())
+    remaining = [f for f in sql_files if f in to_run]
+    
+    if verbose:
+        print(f"\nJournal: {len(unchanged)} applied, {len(drifted)} drifted, {len(pending)} pending")
+        if remaining:
+            print(f"Resuming at: {journal.key(remaining[0])}")
+    
+    return remaining
+
+
+def execute_sql_files_with_journal(
+    connection_name: str,
+    sql_files: List[Path],
+    journal: MigrationJournal,
+    verbose: bool = True,
+    backend: Optional[SnowflakeBackend] = None,
+    output: Optional[StreamingOutput] = None
+) -> bool:
+    """
+    Execute SQL files in order in one session, recording each applied file in the journal.
+    
+    The files run in a single execute_files call, so USE and SET carry over
+    from one file to the next as they do without a journal. A file is
+    recorded as soon as the backend reports that the next one has started
+    (the cli backend does so with a marker query per file), and the last
+    file once the run succeeds. Stops at the first failure; because only
+    applied files are recorded, the next run resumes at the failed file.
+    
+    Args:
+        connection_name: Snowflake CLI connection name
+        sql_files: SQL files still to apply, in order
+        journal: The migration journal
+        verbose: Print execution details
+        backend: Execution backend (default: snow CLI for connection_name)
+        output: Stream output through this sink instead of buffering it
+        
+    Returns:
+        True if all files executed successfully, False otherwise
+    """
+    backend = backend or SnowCliBackend(connection_name)
+    note = output.note if output is not None else print
+    
+    if verbose:
+        print(f"\n{'='*60}")
+        print(f"Executing {len(sql_files)} SQL file(s) in order, journaling each:")
+        for i, sql_file in enumerate(sql_files, 1):
+            print(f"  {i}. {journal.key(sql_file)}")
+        print(f"{'='*60}")
+    
+    current: Optional[Path] = None
+    started = 0.0
+    
+    def finish_current() -> None:
+        if current is None:
+            return
+        duration = time.monotonic() - started
+        journal.record(current, duration)
+        if verbose:
+            note(f"  ✓ {journal.key(current)} applied in {duration:.2f}s")
+    
+    def on_file(index: int, sql_file: Path) -> None:
+        nonlocal current, started
+        finish_current()
+        current, started = sql_file, time.monotonic()
+        if verbose:
+            note(f"\n[{index}/{len(sql_files)}] {journal.key(sql_file)}")
+    
+    try:
+        stdout, stderr = backend.execute_files(sql_files, on_output=output, on_file=on_file)
+    except SnowflakeBackendError as e:
+        failed = journal.key(current or sql_files[0])
+        print(f"\n{'='*60}\n✗ Failed to execute {failed}\n{'='*60}", file=sys.stderr)
+        print(f"Error: {e}", file=sys.stderr)
+        print_error_output(e, output)
+        print(f"\nRe-run to resume at {failed}", file=sys.stderr)
         return False
+    finish_current()
+    
+    if verbose:
+        if stdout:
+            print(stdout)
+        if stderr:
+            print(stderr, file=sys.stderr)
+        print(f"\n{'='*60}")
+        print(f"✓ Successfully executed all {len(sql_files)} SQL file(s)")
+        print(f"{'='*60}")
+    
+    return True
 
 
 def main():
@@ -156,27 +1050,120 @@ def main():
     Main entry point for command-line execution.
     
     Usage:
-        python script.py <directory> <connection_name>
+        python snowclisp.py <directory> <connection_name> [--backend cli|connector|fake]
+            [--parallel-groups [--workers N]]
+            [--journal PATH] [--journal-table NAME] [--reapply-drifted]
+            [--stream [--tail-lines N] [--log-file PATH]]
+            [--profile [--profile-report PATH] [--trace PATH] [--top N]]
+            [--recursive] [--scan-cache PATH] [--dry-run]
+            [-D name=value ...]
     """
-    if len(sys.argv) < 3:
-        print("Usage: python script.py <directory> <connection_name>")
-        print("\nExample:")
-        print("  python script.py ./tasks/sql my_snowflake_connection")
+    parser = argparse.ArgumentParser(
+        description="Sort and execute numbered SQL files (NNN-*.sql, NNN.NNN-*.sql) against Snowflake",
+        epilog=(
+            "Example:\n"
+            "  python snowclisp.py ./tasks/sql my_snowflake_connection\n"
+            "  python snowclisp.py ./tasks/sql my_snowflake_connection --backend connector\n"
+            "  python snowclisp.py ./tasks/sql my_snowflake_connection --parallel-groups --workers 8\n"
+            "  python snowclisp.py ./tasks/sql my_snowflake_connection --journal ./output/ledger.jsonl\n"
+            "  python snowclisp.py ./tasks/sql my_snowflake_connection --stream --log-file ./output/snowclisp.log\n"
+            "  python snowclisp.py ./tasks/sql my_snowflake_connection --profile --trace ./output/trace.json\n"
+            "  python snowclisp.py ./sql my_snowflake_connection --recursive --scan-cache ./output/scan.json --dry-run\n"
+            "  python snowclisp.py ./sql/batch-1 my_snowflake_connection -D demo_database_name=DEMO_DB"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("directory", help="Directory containing NNN-*.sql files")
+    parser.add_argument("connection_name", help="Snowflake CLI connection name")
+    parser.add_argument("--backend", choices=BACKEND_NAMES, default=DEFAULT_BACKEND,
+                        help=f"SQL execution backend (default: {DEFAULT_BACKEND}, or $SNOWCLI_BACKEND)")
+    parser.add_argument("--parallel-groups", action="store_true",
+                        help="Run files with the same numeric prefix (or the same "
+                             "'-- snowclisp: group=<name>' directive) concurrently, "
+                             "each in its own session; groups still run in prefix order")
+    parser.add_argument("--workers", "-w", type=int, default=4,
+                        help="Maximum concurrent sessions per group with --parallel-groups (default: 4)")
+    parser.add_argument("--journal", type=Path,
+                        help="Local JSON Lines ledger of applied files; applied, unchanged files are skipped")
+    parser.add_argument("--journal-table",
+                        help="Snowflake table used as the ledger (created if missing), e.g. DB.SCHEMA.SNOWCLISP_LEDGER")
+    parser.add_argument("--reapply-drifted", action="store_true",
+                        help="Re-run applied files whose content changed (default: warn and skip)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Print output line by line as it arrives instead of after the run")
+    parser.add_argument("--tail-lines", type=int, default=200,
+                        help="Output lines kept in memory for the error report with --stream (default: 200)")
+    parser.add_argument("--log-file", type=Path,
+                        help="Also write streamed output to this rotating log file (implies --stream)")
+    parser.add_argument("--log-max-bytes", type=int, default=10 * 1024 * 1024,
+                        help="Rotate the log file at this size (default: 10 MiB)")
+    parser.add_argument("--log-backups", type=int, default=3,
+                        help="Rotated log files to keep (default: 3)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time every statement and record its query ID (runs all files in one session)")
+    parser.add_argument("--profile-report", type=Path, default=Path("snowclisp-profile.json"),
+                        help="JSON report written with --profile (default: snowclisp-profile.json)")
+    parser.add_argument("--trace", type=Path, default=Path("snowclisp-trace.json"),
+                        help="Chrome trace-event file written with --profile (default: snowclisp-trace.json)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Slowest statements listed after a --profile run (default: 10)")
+    parser.add_argument("--recursive", "-r", action="store_true",
+                        help="Also run numbered files in subdirectories (e.g. sql/batch-0, sql/batch-1), "
+                             "in natural directory order, in the same session")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN,
+                        help=f"Regex a file name must match to run (default: {DEFAULT_PATTERN})")
+    parser.add_argument("--scan-cache", type=Path,
+                        help="Cache the directory scan here; reused until a scanned directory's mtime changes")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the execution plan and exit without running anything")
+    parser.add_argument("-D", "--define", action="append", default=[], metavar="NAME=VALUE",
+                        help="Render {{ NAME }} placeholders locally before execution (repeatable); "
+                             "undefined placeholders fail the run before anything executes")
+    args = parser.parse_args()
+    
+    if args.profile and (args.parallel_groups or args.journal or args.journal_table):
+        print("Error: --profile cannot be combined with --parallel-groups or a journal", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.workers < 1:
+        print("Error: --workers must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.tail_lines < 1:
+        print("Error: --tail-lines must be at least 1", file=sys.stderr)
         sys.exit(1)
     
-    directory = sys.argv[1]
-    connection_name = sys.argv[2]
+    directory = args.directory
+    connection_name = args.connection_name
     
+    backend = None
+    output = None
+    render_dir = None
     try:
+        if args.stream or args.log_file:
+            output = StreamingOutput(
+                tail_lines=args.tail_lines,
+                log_path=args.log_file,
+                log_max_bytes=args.log_max_bytes,
+                log_backups=args.log_backups
+            )
+        
         # Get sorted SQL files
         print(f"Scanning directory: {directory}")
-        sql_files, non_matching_files = get_sorted_sql_files(directory)
+        root = Path(directory)
+        with telemetry.span('scan'):
+            sql_files, non_matching_files = get_sorted_sql_files(
+                directory,
+                pattern=args.pattern,
+                recursive=args.recursive,
+                cache_path=args.scan_cache
+            )
         
         # Warn about non-matching files
         if non_matching_files:
             print(f"\n⚠️  WARNING: Found {len(non_matching_files)} SQL file(s) that don't match naming convention (NNN-*.sql):")
             for file_path in non_matching_files:
-                print(f"     - {file_path.name} (not processed)")
+                print(f"     - {file_path.relative_to(root).as_posix()} (not processed)")
         
         if not sql_files:
             print(f"\nNo SQL files with numeric prefix (NNN-*.sql) found in: {directory}")
@@ -184,23 +1171,105 @@ def main():
         
         print(f"\nFound {len(sql_files)} SQL file(s) with numeric prefix:")
         for i, sql_file in enumerate(sql_files, 1):
-            prefix = extract_numeric_prefix(sql_file.name)
-            print(f"  {i}. [{prefix:03d}] {sql_file.name}")
+            prefix = format_prefix(extract_prefix_parts(sql_file.name))
+            print(f"  {i}. [{prefix}] {sql_file.relative_to(root).as_posix()}")
+        
+        if args.define:
+            render_dir = tempfile.TemporaryDirectory(prefix='snowclisp-')
+            with telemetry.span('render'):
+                sql_files = render_sql_files(sql_files, root, parse_definitions(args.define), Path(render_dir.name))
+            root = Path(render_dir.name)
+            print(f"\nRendered {len(sql_files)} SQL file(s) with {len(args.define)} variable(s)")
         
-        # Execute all files in one command
         print(f"\nUsing Snowflake connection: {connection_name}")
-        success = execute_sql_files_with_snowflake_cli(
-            connection_name,
-            sql_files,
-            verbose=True
-        )
         
+        journal = None
+        if args.journal or args.journal_table:
+            # The connector pool gets one extra session so ledger writes
+            # never wait on a running file
+            pool_size = args.workers + 1 if args.parallel_groups else 2
+            backend = get_backend(args.backend, connection_name, pool_size=pool_size)
+            journal = MigrationJournal(
+                root,
+                journal_path=args.journal,
+                table_name=args.journal_table,
+                backend=backend,
+                read_only=args.dry_run
+            )
+            sql_files = filter_journaled_files(journal, sql_files, args.reapply_drifted)
+            if not sql_files:
+                print("\n✓ All SQL files are already applied.")
+                sys.exit(0)
+        
+        if args.dry_run:
+            if args.parallel_groups:
+                print("\nExecution groups:")
+                for i, (label, files) in enumerate(group_sql_files(sql_files, root), 1):
+                    print(f"  {i}. {label}: {', '.join(f.name for f in files)}")
+            print(f"\nDry run: {len(sql_files)} SQL file(s) would run; nothing was executed.")
+            sys.exit(0)
+        
+        execute_start = time.perf_counter()
+        if args.parallel_groups:
+            backend = backend or get_backend(args.backend, connection_name, pool_size=args.workers)
+            success = execute_sql_file_groups(
+                connection_name,
+                group_sql_files(sql_files, root),
+                workers=args.workers,
+                verbose=True,
+                backend=backend,
+                journal=journal,
+                output=output
+            )
+        elif args.profile:
+            backend = get_backend(args.backend, connection_name)
+            start = time.monotonic()
+            success, profiles = profile_sql_files(connection_name, sql_files, verbose=True, backend=backend)
+            wall_time = time.monotonic() - start
+            
+            with telemetry.span('write'):
+                write_profile_report(profiles, args.profile_report, connection_name, backend.name, success, wall_time)
+                write_chrome_trace(profiles, args.trace)
+            print_profile_summary(profiles, args.top)
+            print(f"\nProfile report: {args.profile_report}")
+            print(f"Trace events:   {args.trace}")
+        elif journal is not None:
+            success = execute_sql_files_with_journal(
+                connection_name,
+                sql_files,
+                journal,
+                verbose=True,
+                backend=backend,
+                output=output
+            )
+        else:
+            # Execute all files in one command
+            backend = get_backend(args.backend, connection_name)
+            success = execute_sql_files_with_snowflake_cli(
+                connection_name,
+                sql_files,
+                verbose=True,
+                backend=backend,
+                output=output
+            )
+        
+        telemetry.record('execute', time.perf_counter() - execute_start, error=not success)
+        telemetry.count('files', len(sql_files))
+        telemetry.count('failures', 0 if success else 1)
         sys.exit(0 if success else 1)
         
     except Exception as e:
         print(f"\nERROR: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if backend is not None:
+            backend.close()
+        if output is not None:
+            output.close()
+        if render_dir is not None:
+            render_dir.cleanup()
 
 
 if __name__ == "__main__":
-    main()
+    with telemetry.run('snowclisp'):
+        main()
@@ -0,0 +1,88 @@
+"""
+Tests for snowclisp and snowcliput run through the in-memory FakeBackend.
+
+Run with: python -m pytest tasks/snow-cli/pyutil/snowclisp
+"""
+
+import gzip
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from snowclisp import execute_sql_files_with_snowflake_cli  # noqa: E402
+from snowclibackend.snowclibackend import FakeBackend  # noqa: E402
+from snowcliput.snowcliput import upload_directory_to_stage  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_telemetry(monkeypatch):
+    monkeypatch.setenv('TELEMETRY', 'off')
+
+
+@pytest.fixture
+def sql_files(tmp_path):
+    sql_dir = tmp_path / 'sql'
+    sql_dir.mkdir()
+    (sql_dir / '001_setup.sql').write_text("USE ROLE loader;\nCREATE TABLE events (v VARIANT);\n")
+    (sql_dir / '002_load.sql').write_text("INSERT INTO events SELECT 1;\nSELECT COUNT(*) FROM events;\n")
+    return [sql_dir / '001_setup.sql', sql_dir / '002_load.sql']
+
+
+def test_execute_sql_files_runs_statements_in_order(sql_files):
+    backend = FakeBackend()
+
+    assert execute_sql_files_with_snowflake_cli('fake', sql_files, verbose=False, backend=backend)
+    assert backend.executed == [
+        'USE ROLE loader',
+        'CREATE TABLE events (v VARIANT)',
+        'INSERT INTO events SELECT 1',
+        'SELECT COUNT(*) FROM events',
+    ]
+
+
+def test_execute_sql_files_stops_at_failed_statement(sql_files, capsys):
+    backend = FakeBackend(fail_pattern=r'^INSERT')
+
+    assert not execute_sql_files_with_snowflake_cli('fake', sql_files, verbose=False, backend=backend)
+    assert backend.executed[-1] == 'INSERT INTO events SELECT 1'
+    assert 'SELECT COUNT(*) FROM events' not in backend.executed
+    assert 'Failed to execute SQL files' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('workers,batch_size', [(1, 0), (2, 2)])
+def test_upload_directory_to_stage(tmp_path, workers, batch_size):
+    upload_dir = tmp_path / 'upload'
+    upload_dir.mkdir()
+    (upload_dir / 'a.json').write_text('{"id": 1}\n')
+    (upload_dir / 'b.json').write_text('{"id": 2}\n')
+    (upload_dir / 'c.json.gz').write_bytes(gzip.compress(b'{"id": 3}\n'))
+    backend = FakeBackend()
+
+    successful, failed, errors = upload_directory_to_stage(
+        'fake', upload_dir, '@json_stage/raw', verbose=False,
+        workers=workers, batch_size=batch_size, backend=backend
+    )
+
+    assert (successful, failed, errors) == (3, 0, [])
+    stage = backend.stages['json_stage']
+    assert sorted(stage) == ['raw/a.json.gz', 'raw/b.json.gz', 'raw/c.json.gz']
+    assert gzip.decompress(stage['raw/a.json.gz']) == b'{"id": 1}\n'
+
+
+def test_upload_directory_to_stage_reports_failures(tmp_path):
+    upload_dir = tmp_path / 'upload'
+    upload_dir.mkdir()
+    (upload_dir / 'a.json').write_text('{"id": 1}\n')
+    (upload_dir / 'b.json').write_text('{"id": 2}\n')
+    backend = FakeBackend(fail_pattern=r'b\.json')
+
+    successful, failed, errors = upload_directory_to_stage(
+        'fake', upload_dir, '@json_stage', verbose=False, backend=backend
+    )
+
+    assert (successful, failed) == (1, 1)
+    assert 'b.json' in errors[0]
+    assert sorted(backend.stages['json_stage']) == ['a.json.gz']
@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+"""
+snowclivariant - profile the paths inside VARIANT data and generate typed projections
+
+Streams the JSON / NDJSON files that get loaded into EVENT_DATA and records,
+for every path, the observed types, presence and null rates, and an
+approximate distinct count (a KMV sketch with a fixed number of hashes, so
+memory per worker stays constant however large the files are). Files are
+profiled in parallel and the per-file profiles are merged.
+
+From the profile it generates:
+  - a Snowflake projection (event_data:path::TYPE) of every scalar path
+  - the equivalent Spark projection (variant_get(EVENT_DATA, '$.path', 'type'))
+  - a suggested list of typed columns for hot paths, with a CTAS that
+    materializes them so queries stop re-parsing the VARIANT
+
+It can also check the projections already written in notebooks or SQL files
+against the data and report paths that no longer exist or changed type.
+
+Usage:
+    python snowclivariant.py <input_dir> [--report PATH] [--snowflake-sql PATH]
+        [--spark-sql PATH] [--check FILE ...] [--workers N]
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from snowclichunk.snowclichunk import iter_json_records  # noqa: E402
+
+# Hashes kept per path for the distinct-count estimate (exact below this)
+DEFAULT_SKETCH_SIZE = 1024
+# Paths tracked per file; deeper map-like data beyond this is counted, not profiled
+DEFAULT_MAX_PATHS = 10000
+# Minimum share of records containing a path for it to count as hot
+DEFAULT_HOT_THRESHOLD = 0.5
+# Paths printed in the summary table
+DEFAULT_TOP = 30
+
+DEFAULT_TABLE = 'RAW.CUSTOMER_EVENTS'
+DEFAULT_COLUMN = 'EVENT_DATA'
+
+HASH_SPACE = 2 ** 64
+
+# A path is a tuple of object keys; ARRAY marks "any element of the array"
+ARRAY = None
+
+TIMESTAMP_RE = re.compile(
+    r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$'
+)
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+SIMPLE_KEY_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Observed value type -> resolved type, Snowflake cast, Spark variant_get type
+SNOWFLAKE_TYPES = {
+    'string': 'STRING',
+    'timestamp': 'TIMESTAMP',
+    'date': 'DATE',
+    'integer': 'NUMBER',
+    'float': 'FLOAT',
+    'boolean': 'BOOLEAN',
+    'array': 'ARRAY',
+    'object': 'OBJECT',
+    'variant': 'VARIANT',
+}
+SPARK_TYPES = {
+    'string': 'string',
+    'timestamp': 'timestamp',
+    'date': 'date',
+    'integer': 'bigint',
+    'float': 'double',
+    'boolean': 'boolean',
+    'array': 'variant',
+    'object': 'variant',
+    'variant': 'variant',
+}
+
+# Declared SQL types in existing queries, normalized for comparison
+DECLARED_TYPES = {
+    'STRING': 'string', 'VARCHAR': 'string', 'TEXT': 'string', 'CHAR': 'string',
+    'TIMESTAMP': 'timestamp', 'TIMESTAMP_NTZ': 'timestamp', 'TIMESTAMP_LTZ': 'timestamp',
+    'TIMESTAMP_TZ': 'timestamp', 'DATE': 'date',
+    'NUMBER': 'integer', 'INT': 'integer', 'INTEGER': 'integer', 'BIGINT': 'integer',
+    'LONG': 'integer', 'SMALLINT': 'integer',
+    'FLOAT': 'float', 'DOUBLE': 'float', 'REAL': 'float', 'DECIMAL': 'float',
+    'BOOLEAN': 'boolean', 'ARRAY': 'array', 'OBJECT': 'object', 'VARIANT': 'variant',
+}
+
+# Column names that need a prefix to be usable unquoted
+RESERVED_WORDS = {
+    'timestamp', 'date', 'time', 'order', 'user', 'group', 'table', 'select', 'from',
+    'where', 'by', 'limit', 'start', 'current', 'values', 'column', 'row', 'rows',
+}
+
+SNOWFLAKE_REF_RE = re.compile(
+    r'\b(\w+):((?:"[^"]+"|\w+)(?:(?:\.(?:"[^"]+"|\w+))|\[\d+\])*)::(\w+)'
+)
+SPARK_REF_RE = re.compile(
+    r"variant_get\(\s*(\w+)\s*,\s*'\$((?:\.\w+|\[\"[^\"]+\"\]|\[\d+\])+)'\s*,\s*'(\w+)'\s*\)"
+)
+
+
+class KMVSketch:
+    """
+    K-minimum-values distinct-count sketch.
+
+    Keeps the k smallest 64-bit hashes seen. The count is exact until more
+    than k distinct values have been seen, then estimated from the k-th
+    smallest hash.
+    """
+
+    def __init__(self, k: int = DEFAULT_SKETCH_SIZE, hashes: Iterable[int] = ()):
+        self.k = k
+        self._heap: List[int] = []  # negated, so the largest kept hash is on top
+        self._members: Set[int] = set()
+        for value in hashes:
+            self.add_hash(value)
+
+    def add_hash(self, value: int) -> None:
+        if value in self._members:
+            return
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, -value)
+            self._members.add(value)
+        elif value < -self._heap[0]:
+            evicted = -heapq.heapreplace(self._heap, -value)
+            self._members.discard(evicted)
+            self._members.add(value)
+
+    def add(self, token: bytes) -> None:
+        self.add_hash(int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), 'big'))
+
+    def merge(self, other: 'KMVSketch') -> None:
+        for value in other._members:
+            self.add_hash(value)
+
+    @property
+    def exact(self) -> bool:
+        return len(self._heap) < self.k
+
+    def estimate(self) -> int:
+        if self.exact:
+            return len(self._heap)
+        return int(round((self.k - 1) * HASH_SPACE / (-self._heap[0] + 1)))
+
+    def hashes(self) -> List[int]:
+        return sorted(self._members)
+
+
+class PathStats:
+    """Observations for one path: presence, nulls, value types and distinct values."""
+
+    def __init__(self, sketch_size: int = DEFAULT_SKETCH_SIZE):
+        self.present = 0
+        self.nulls = 0
+        self.types: Counter = Counter()
+        self.sketch = KMVSketch(sketch_size)
+
+    def to_dict(self) -> Dict:
+        return {
+            'present': self.present,
+            'nulls': self.nulls,
+            'types': dict(self.types),
+            'sketch': self.sketch.hashes(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, sketch_size: int) -> 'PathStats':
+        stats = cls(sketch_size)
+        stats.present = data['present']
+        stats.nulls = data['nulls']
+        stats.types.update(data['types'])
+        stats.sketch = KMVSketch(sketch_size, data['sketch'])
+        return stats
+
+    def merge(self, other: 'PathStats') -> None:
+        self.present += other.present
+        self.nulls += other.nulls
+        self.types.update(other.types)
+        self.sketch.merge(other.sketch)
+
+
+def value_type(value) -> str:
+    """Return the profile type of a decoded JSON value."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, str):
+        if TIMESTAMP_RE.match(value):
+            return 'timestamp'
+        if DATE_RE.match(value):
+            return 'date'
+        return 'string'
+    if isinstance(value, list):
+        return 'array'
+    return 'object'
+
+
+def resolve_type(types: Dict[str, int]) -> str:
+    """
+    Pick the column type for a path from its observed (non-null) value types.
+
+    Timestamps, dates and plain strings widen to string; integers and floats
+    widen to float; anything else mixed resolves to variant.
+    """
+    observed = {name for name, count in types.items() if count and name != 'null'}
+    if not observed:
+        return 'variant'
+    if len(observed) == 1:
+        return observed.pop()
+    if observed <= {'date', 'timestamp'}:
+        return 'timestamp'
+    if observed <= {'string', 'date', 'timestamp'}:
+        return 'string'
+    if observed <= {'integer', 'float'}:
+        return 'float'
+    return 'variant'
+
+
+def format_path(path: Tuple) -> str:
+    """Format a path in Snowflake notation (customer.email, order.items[].price)."""
+    text = ''
+    for key in path:
+        if key is ARRAY:
+            text += '[]'
+        else:
+            segment = key if SIMPLE_KEY_RE.match(key) else '"' + key.replace('"', '""') + '"'
+            text += ('.' if text else '') + segment
+    return text
+
+
+def snowflake_path(path: Tuple) -> str:
+    """Snowflake path expression for a path outside arrays (customer.email)."""
+    return format_path(path)
+
+
+def spark_path(path: Tuple) -> str:
+    """Spark JSON path for a path outside arrays ($.customer.email)."""
+    text = '$'
+    for key in path:
+        if SIMPLE_KEY_RE.match(key):
+            text += '.' + key
+        else:
+            text += '["' + key.replace('"', '\\"') + '"]'
+    return text
+
+
+def _profile_value(value, path: Tuple, profile: Dict[Tuple, PathStats], overflow: Counter,
+                   sketch_size: int, max_paths: int) -> None:
+    stats = profile.get(path)
+    if stats is None:
+        if len(profile) >= max_paths:
+            overflow[format_path(path[:1])] += 1
+            return
+        stats = profile[path] = PathStats(sketch_size)
+
+    kind = value_type(value)
+    stats.present += 1
+    stats.types[kind] += 1
+
+    if kind == 'null':
+        stats.nulls += 1
+    elif kind == 'object':
+        stats.sketch.add(b'o%d' % len(value))
+        for key, child in value.items():
+            _profile_value(child, path + (key,), profile, overflow, sketch_size, max_paths)
+    elif kind == 'array':
+        stats.sketch.add(b'a%d' % len(value))
+        for child in value:
+            _profile_value(child, path + (ARRAY,), profile, overflow, sketch_size, max_paths)
+    else:
+        stats.sketch.add((kind[0] + str(value)).encode('utf-8'))
+
+
+def profile_file(path: str, sketch_size: int = DEFAULT_SKETCH_SIZE,
+                 max_paths: int = DEFAULT_MAX_PATHS) -> Dict:
+    """
+    Profile every record of one JSON / NDJSON file.
+
+    Runs in a worker process; records are streamed, so memory is bounded by
+    the number of paths times the sketch size, not by the file size.
+
+    Args:
+        path: File to profile
+        sketch_size: Hashes kept per path for the distinct-count estimate
+        max_paths: Maximum number of distinct paths to profile
+
+    Returns:
+        Picklable profile: {'file', 'records', 'paths', 'overflow'}
+    """
+    profile: Dict[Tuple, PathStats] = {}
+    overflow: Counter = Counter()
+    records = 0
+
+    for raw in iter_json_records(Path(path)):
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: invalid JSON record {records + 1}: {e}")
+        records += 1
+        if isinstance(record, dict):
+            for key, value in record.items():
+                _profile_value(value, (key,), profile, overflow, sketch_size, max_paths)
+
+    return {
+        'file': path,
+        'records': records,
+        'paths': [(list(key), stats.to_dict()) for key, stats in profile.items()],
+        'overflow': dict(overflow),
+    }
+
+
+def profile_directory(input_dir: Path, workers: Optional[int] = None,
+                      sketch_size: int = DEFAULT_SKETCH_SIZE,
+                      max_paths: int = DEFAULT_MAX_PATHS) -> Dict:
+    """
+    Profile all .json files in a directory in parallel and merge the results.
+
+    Args:
+        input_dir: Directory of JSON arrays or NDJSON files
+        workers: Worker processes (default: CPU count)
+        sketch_size: Hashes kept per path for the distinct-count estimate
+        max_paths: Maximum number of distinct paths to profile per file
+
+    Returns:
+        Dict with 'files', 'records', 'overflow' and 'paths' (merged PathStats by path)
+
+    Raises:
+        ValueError: If the directory has no .json files or a file is malformed
+    """
+    files = sorted(str(p) for p in Path(input_dir).glob('*.json') if p.is_file())
+    if not files:
+        raise ValueError(f"No .json files found in {input_dir}")
+
+    merged: Dict[Tuple, PathStats] = {}
+    overflow: Counter = Counter()
+    records = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(profile_file, files, [sketch_size] * len(files), [max_paths] * len(files))
+        for result in results:
+            records += result['records']
+            overflow.update(result['overflow'])
+            for key, data in result['paths']:
+                stats = PathStats.from_dict(data, sketch_size)
+                path = tuple(key)
+                if path in merged:
+                    merged[path].merge(stats)
+                else:
+                    merged[path] = stats
+
+    return {'files': files, 'records': records, 'overflow': dict(overflow), 'paths': merged}
+
+
+def _column_name(path: Tuple, column: str, taken: Set[str]) -> str:
+    name = re.sub(r'[^a-z0-9_]+', '_', '_'.join(path).lower()).strip('_') or 'value'
+    if name in RESERVED_WORDS or name[0].isdigit():
+        name = f"{column.split('_')[0].lower()}_{name}"
+    candidate, suffix = name, 2
+    while candidate in taken:
+        candidate = f"{name}_{suffix}"
+        suffix += 1
+    taken.add(candidate)
+    return candidate
+
+
+def summarize(profile: Dict, column: str = DEFAULT_COLUMN,
+              hot_threshold: float = DEFAULT_HOT_THRESHOLD,
+              referenced: Optional[Set[str]] = None) -> List[Dict]:
+    """
+    Turn a merged profile into one summary row per path.
+
+    Paths inside arrays are profiled but are not projectable as columns, and
+    objects are represented by their children. A projectable path is hot when
+    it appears in at least hot_threshold of records or is referenced by an
+    existing query, and its type resolves to a scalar.
+
+    Args:
+        profile: Result of profile_directory
+        column: VARIANT column name used for generated column names
+        hot_threshold: Minimum presence for a path to be suggested
+        referenced: Paths (Snowflake notation) already used by existing queries
+
+    Returns:
+        Summary rows sorted by path
+    """
+    referenced = referenced or set()
+    records = profile['records'] or 1
+    taken: Set[str] = set()
+    rows = []
+
+    for path in sorted(profile['paths'], key=lambda p: [(k is ARRAY, k or '') for k in p]):
+        stats = profile['paths'][path]
+        resolved = resolve_type(stats.types)
+        in_array = ARRAY in path
+        projectable = not in_array and resolved != 'object'
+        name = format_path(path)
+        hot = (
+            projectable
+            and resolved not in ('array', 'variant')
+            and (stats.present / records >= hot_threshold or name in referenced)
+        )
+        rows.append({
+            'path': name,
+            'type': resolved,
+            'types': dict(stats.types),
+            'present': stats.present,
+            'presence': None if in_array else round(stats.present / records, 4),
+            'null_rate': round(stats.nulls / stats.present, 4) if stats.present else 0.0,
+            'distinct': stats.sketch.estimate(),
+            'distinct_exact': stats.sketch.exact,
+            'in_array': in_array,
+            'projectable': projectable,
+            'hot': hot,
+            'snowflake': f"{column.lower()}:{snowflake_path(path)}::{SNOWFLAKE_TYPES[resolved]}" if projectable else None,
+            'spark': f"variant_get({column}, '{spark_path(path)}', '{SPARK_TYPES[resolved]}')" if projectable else None,
+            'column': _column_name(path, column, taken) if projectable else None,
+        })
+    return rows
+
+
+def render_snowflake_sql(rows: List[Dict], table: str, column: str) -> str:
+    """Snowflake projection of every scalar path, plus a CTAS materializing the hot paths."""
+    projected = [r for r in rows if r['projectable']]
+    hot = [r for r in projected if r['hot']]
+
+    lines = [
+        '-- Generated by snowclivariant: projection of every scalar path in ' + column,
+        'SELECT',
+        ',\n'.join(f"    {r['snowflake']} AS {r['column']}" for r in projected),
+        f'FROM {table};',
+        '',
+    ]
+    if hot:
+        lines += [
+            '-- Suggested typed columns for hot paths; queries on the typed table',
+            '-- read these columns instead of parsing ' + column,
+            f'CREATE OR REPLACE TABLE {table}_TYPED AS',
+            'SELECT',
+            ',\n'.join([f"    {r['snowflake']} AS {r['column']}" for r in hot] + [f'    {column.lower()}']),
+            f'FROM {table};',
+            '',
+        ]
+    return '\n'.join(lines)
+
+
+def render_spark_sql(rows: List[Dict], table: str, column: str) -> str:
+    """Spark projection of every scalar path, plus the hot-path subset."""
+    projected = [r for r in rows if r['projectable']]
+    hot = [r for r in projected if r['hot']]
+
+    lines = [
+        '-- Generated by snowclivariant: projection of every scalar path in ' + column,
+        'SELECT',
+        ',\n'.join(f"{r['spark']} AS {r['column']}" for r in projected),
+        f'FROM {table}',
+        '',
+    ]
+    if hot:
+        lines += [
+            '-- Hot paths only',
+            'SELECT',
+            ',\n'.join(f"{r['spark']} AS {r['column']}" for r in hot),
+            f'FROM {table}',
+            '',
+        ]
+    return '\n'.join(lines)
+
+
+def _read_query_text(path: Path) -> str:
+    """Return the text of a SQL file, or the concatenated cell sources of a notebook."""
+    with open(path, 'r') as f:
+        text = f.read()
+    if path.suffix == '.ipynb':
+        notebook = json.loads(text)
+        return '\n'.join(''.join(cell.get('source', [])) for cell in notebook.get('cells', []))
+    return text
+
+
+def _normalize_reference(path: str) -> str:
+    """Normalize a Snowflake or Spark path reference to format_path notation."""
+    path = path.lstrip('.')
+    path = re.sub(r"\[(['\"])(.+?)\1\]", lambda m: '."' + m.group(2).replace('"', '""') + '"', path)
+    path = re.sub(r'\[\d+\]', '[]', path)
+    keys = []
+    for segment in re.findall(r'"(?:[^"]|"")+"|[^.\[\]]+|\[\]', path):
+        if segment == '[]':
+            keys.append(ARRAY)
+        else:
+            keys.append(segment[1:-1].replace('""', '"') if segment.startswith('"') else segment)
+    return format_path(tuple(keys))
+
+
+def find_references(files: List[Path], column: str = DEFAULT_COLUMN) -> List[Dict]:
+    """
+    Find existing VARIANT projections in notebooks or SQL files.
+
+    Recognizes event_data:path::TYPE and variant_get(EVENT_DATA, '$.path', 'type').
+
+    Returns:
+        One dict per reference: {'file', 'path', 'declared'}
+    """
+    references = []
+    for file_path in files:
+        text = _read_query_text(file_path)
+        for regex in (SNOWFLAKE_REF_RE, SPARK_REF_RE):
+            for match in regex.finditer(text):
+                if match.group(1).lower() != column.lower():
+                    continue
+                references.append({
+                    'file': str(file_path),
+                    'path': _normalize_reference(match.group(2)),
+                    'declared': match.group(3),
+                })
+    return references
+
+
+def check_references(references: List[Dict], rows: List[Dict]) -> List[Dict]:
+    """
+    Compare existing projections with the profile.
+
+    Returns:
+        Problems: references to paths never observed, or declared with a type
+        that does not match the observed one
+    """
+    by_path = {r['path']: r for r in rows}
+    problems = []
+    seen = set()
+    for ref in references:
+        key = (ref['file'], ref['path'], ref['declared'].upper())
+        if key in seen:
+            continue
+        seen.add(key)
+
+        row = by_path.get(ref['path'])
+        if row is None:
+            problems.append(dict(ref, problem='path not found in data'))
+            continue
+        declared = DECLARED_TYPES.get(ref['declared'].upper())
+        observed = row['type']
+        compatible = (
+            declared is None
+            or declared == observed
+            or declared == 'variant'
+            or (declared == 'string' and observed in ('date', 'timestamp'))
+            or (declared == 'float' and observed == 'integer')
+        )
+        if not compatible:
+            problems.append(dict(ref, problem=f"declared {ref['declared']}, data is {observed}"))
+    return problems
+
+
+def print_summary(profile: Dict, rows: List[Dict], problems: List[Dict], top: int = DEFAULT_TOP) -> None:
+    """Print the most common paths, hot-path suggestions and reference problems."""
+    print(f"\n{'='*60}")
+    print(f"Profiled {profile['records']} record(s) from {len(profile['files'])} file(s): "
+          f"{len(rows)} path(s)")
+    print(f"{'='*60}")
+    print(f"{'path':<40} {'type':<10} {'present':>8} {'nulls':>7} {'distinct':>9}")
+    shown = sorted(rows, key=lambda r: (not r['hot'], -r['present']))[:top]
+    for row in shown:
+        presence = f"{row['presence']:.0%}" if row['presence'] is not None else f"{row['present']}x"
+        distinct = f"{'' if row['distinct_exact'] else '~'}{row['distinct']}"
+        marker = '*' if row['hot'] else ' '
+        print(f"{marker}{row['path']:<39} {row['type']:<10} {presence:>8} "
+              f"{row['null_rate']:>7.0%} {distinct:>9}")
+    if len(rows) > len(shown):
+        print(f"  ... {len(rows) - len(shown)} less common path(s) omitted (see --report)")
+
+    hot = [r for r in rows if r['hot']]
+    print(f"\nSuggested typed columns ({len(hot)}, marked *):")
+    for row in hot:
+        print(f"  {row['column']} {SNOWFLAKE_TYPES[row['type']]}  <- {row['snowflake']}")
+
+    if profile['overflow']:
+        print(f"\n⚠️  Path limit reached; values under these top-level keys were not profiled: "
+              f"{', '.join(sorted(profile['overflow']))}")
+
+    if problems:
+        print(f"\n✗ {len(problems)} existing projection(s) out of sync with the data:")
+        for problem in problems:
+            print(f"  {problem['file']}: {problem['path']} ({problem['declared']}) - {problem['problem']}")
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python snowclivariant.py <input_dir> [--report PATH] [--snowflake-sql PATH]
+            [--spark-sql PATH] [--check FILE ...] [--workers N]
+    """
+    parser = argparse.ArgumentParser(
+        description="Profile VARIANT paths in JSON files and generate typed projection SQL",
+        epilog=(
+            "Example:\n"
+            "  python snowclivariant.py ./upload --snowflake-sql output/variant-projection.sql \\\n"
+            "      --spark-sql output/variant-projection-spark.sql --report output/variant-profile.json\n"
+            "  python snowclivariant.py ./upload --check notebook/iceberg_v3_template.ipynb --strict"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input_dir", type=Path, help="Directory of .json files (JSON arrays or NDJSON)")
+    parser.add_argument("--table", default=DEFAULT_TABLE, help=f"Table in generated SQL (default: {DEFAULT_TABLE})")
+    parser.add_argument("--column", default=DEFAULT_COLUMN, help=f"VARIANT column (default: {DEFAULT_COLUMN})")
+    parser.add_argument("--report", type=Path, help="Write the path profile here as JSON")
+    parser.add_argument("--snowflake-sql", type=Path, help="Write the Snowflake projection SQL here")
+    parser.add_argument("--spark-sql", type=Path, help="Write the Spark projection SQL here")
+    parser.add_argument("--check", type=Path, nargs='+', default=[], metavar="FILE",
+                        help="Notebooks / SQL files whose VARIANT projections to check against the data")
+    parser.add_argument("--strict", action="store_true",
+                        help="Exit with status 1 if a checked projection is out of sync")
+    parser.add_argument("--hot-threshold", type=float, default=DEFAULT_HOT_THRESHOLD,
+                        help=f"Minimum share of records containing a path to suggest it as a column "
+                             f"(default: {DEFAULT_HOT_THRESHOLD})")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"Paths to print in the summary table (default: {DEFAULT_TOP})")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--sketch-size", type=int, default=DEFAULT_SKETCH_SIZE,
+                        help=f"Hashes kept per path for distinct counts (default: {DEFAULT_SKETCH_SIZE})")
+    parser.add_argument("--max-paths", type=int, default=DEFAULT_MAX_PATHS,
+                        help=f"Maximum distinct paths profiled per file (default: {DEFAULT_MAX_PATHS})")
+    args = parser.parse_args()
+
+    if args.sketch_size < 2:
+        print("Error: --sketch-size must be at least 2", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        profile = profile_directory(args.input_dir, workers=args.workers,
+                                    sketch_size=args.sketch_size, max_paths=args.max_paths)
+        references = find_references(args.check, args.column)
+    except (OSError, ValueError) as e:
+        print(f"\nERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    rows = summarize(profile, args.column, args.hot_threshold, {r['path'] for r in references})
+    problems = check_references(references, rows)
+    print_summary(profile, rows, problems, args.top)
+
+    outputs = [
+        (args.snowflake_sql, lambda: render_snowflake_sql(rows, args.table, args.column)),
+        (args.spark_sql, lambda: render_spark_sql(rows, args.table, args.column)),
+        (args.report, lambda: json.dumps({
+            'files': profile['files'],
+            'records': profile['records'],
+            'overflow': profile['overflow'],
+            'paths': rows,
+            'problems': problems,
+        }, indent=2) + '\n'),
+    ]
+    for path, render in outputs:
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(render())
+            print(f"✓ Wrote {path}")
+
+    sys.exit(1 if problems and args.strict else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+preflight - validate tools, credentials, connections and environment variables concurrently
+
+Every check runs in its own thread and all failures are reported together,
+instead of stopping at the first one. Successful results are cached for a
+TTL, keyed on everything the result depends on (the tool binary's path,
+size and mtime, the relevant config files' mtimes and the environment
+values involved), so repeated validation inside nested tasks costs
+milliseconds instead of several CLI round trips. Failures are never cached.
+
+Check groups:
+    aws       aws CLI version, boto3 (awsprov, s3sync), AWS credentials (STS caller identity), region
+    snowcli   snow CLI version, Snowflake connection reachability
+    conda     conda version
+    jq        jq version
+    env       required environment variables (run-init.sh's REQUIRED_VARS plus
+              the AWS / Snowflake settings the setup tasks read)
+
+Usage:
+    python preflight.py [GROUP ...] [--ttl SECONDS] [--no-cache] [--cache-file PATH]
+        [--timeout SECONDS] [--workers N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
+
+DEFAULT_CACHE_FILE = 'output/preflight-cache.json'
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_TIMEOUT_SECONDS = 60
+RUN_INIT_SCRIPT = ROOT_DIR / 'tasks' / 'snow-cli' / 'cmd' / 'run-init.sh'
+
+AWS_ENV_VARS = ['S3_BUCKET_NAME', 'IAM_POLICY_NAME', 'IAM_ROLE_NAME', 'TRUST_POLICY_EXTERNAL_ID']
+# Have fallbacks (the AWS profile's region, the bucket root), so a missing one is only a warning
+OPTIONAL_AWS_ENV_VARS = ['AWS_REGION', 'S3_PREFIX']
+SNOWFLAKE_ENV_VARS = ['CLI_CONNECTION_NAME', 'EXTERNAL_VOLUME_NAME']
+
+INSTALL_HINTS = {
+    'aws': "brew install awscli (or see https://aws.amazon.com/cli/)",
+    'snow': "see https://docs.snowflake.com/en/developer-guide/snowflake-cli/installation/installation",
+    'conda': "see https://docs.conda.io/en/latest/miniconda.html",
+    'jq': "brew install jq",
+}
+
+
+class CheckFailed(Exception):
+    """Raised by a check with the message to show the user."""
+
+
+class Check:
+    """
+    One preflight check.
+
+    Args:
+        name: Unique check name (shown in the report)
+        run: Callable returning a detail string, raising CheckFailed on failure
+        key: Callable returning the parts the result depends on, or None to never cache
+        warnings: Callable returning warning lines to show even when the check passes
+    """
+
+    def __init__(self, name: str, run: Callable[[], str],
+                 key: Optional[Callable[[], List[str]]] = None,
+                 warnings: Optional[Callable[[], List[str]]] = None):
+        self.name = name
+        self.run = run
+        self.key = key
+        self.warnings = warnings
+
+
+def _file_stamp(path: Optional[str]) -> str:
+    """Identify a file by path, size and mtime ('-' if it does not exist)."""
+    if not path:
+        return '-'
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"{path}:-"
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _binary_stamp(tool: str) -> str:
+    path = shutil.which(tool)
+    return _file_stamp(os.path.realpath(path) if path else None)
+
+
+def _env_stamp(names: List[str]) -> str:
+    # Hashed so that credentials never end up in the cache file
+    values = json.dumps({name: os.environ.get(name, '') for name in names}, sort_keys=True)
+    return hashlib.sha256(values.encode('utf-8')).hexdigest()
+
+
+def _run(args: List[str], timeout: int) -> str:
+    """Run a command, returning stdout; raises CheckFailed with its error output."""
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise CheckFailed(f"'{' '.join(args)}' timed out after {timeout}s")
+    except OSError as e:
+        raise CheckFailed(f"'{' '.join(args)}' could not be run: {e}")
+    if result.returncode != 0:
+        output = (result.stderr or result.stdout).strip().splitlines()
+        raise CheckFailed(output[-1] if output else f"'{' '.join(args)}' exited with {result.returncode}")
+    return result.stdout.strip() or result.stderr.strip()
+
+
+def tool_check(tool: str, version_args: List[str], timeout: int) -> Check:
+    """Check that a CLI is on PATH and reports a version."""
+
+    def run() -> str:
+        if not shutil.which(tool):
+            raise CheckFailed(f"{tool} is not installed. To install: {INSTALL_HINTS.get(tool, tool)}")
+        return _run([tool] + version_args, timeout).splitlines()[0]
+
+    return Check(f"{tool}-installed", run, key=lambda: [_binary_stamp(tool)])
+
+
+def boto3_check() -> Check:
+    """Check that boto3 is importable; awsprov and s3sync cannot run without it."""
+
+    def run() -> str:
+        try:
+            import boto3
+        except ImportError:
+            raise CheckFailed("boto3 is not installed. Install with: pip install boto3")
+        return f"boto3 {boto3.__version__}"
+
+    # Importability depends on sys.path and site-packages, which the cache key cannot see
+    return Check('boto3-installed', run)
+
+
+def _aws_config_files() -> List[str]:
+    home = Path.home() / '.aws'
+    # The SSO cache directory changes on 'aws sso login', so a new login invalidates the cached result
+    return [os.environ.get('AWS_CONFIG_FILE', str(home / 'config')),
+            os.environ.get('AWS_SHARED_CREDENTIALS_FILE', str(home / 'credentials')),
+            str(home / 'sso' / 'cache')]
+
+
+AWS_CREDENTIAL_ENV = ['AWS_PROFILE', 'AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN',
+                      'AWS_REGION', 'AWS_DEFAULT_REGION', 'AWS_ENDPOINT_URL']
+
+
+def aws_credentials_check(timeout: int) -> Check:
+    """
+    Check that AWS credentials resolve and are accepted by STS.
+
+    Uses boto3 in-process when it is installed (one HTTPS call), otherwise
+    'aws sts get-caller-identity'.
+    """
+
+    def run() -> str:
+        try:
+            import boto3
+            import botocore.config
+            import botocore.exceptions
+        except ImportError:
+            if not shutil.which('aws'):
+                raise CheckFailed("Neither boto3 nor the aws CLI is installed")
+            identity = json.loads(_run(['aws', 'sts', 'get-caller-identity', '--output', 'json'], timeout))
+        else:
+            try:
+                session = boto3.Session(profile_name=os.environ.get('AWS_PROFILE') or None,
+                                        region_name=os.environ.get('AWS_REGION') or None)
+                if session.get_credentials() is None:
+                    raise CheckFailed("AWS credentials are not configured. Run 'aws configure sso' "
+                                      "(then 'aws sso login') or 'aws configure'")
+                identity = session.client('sts', endpoint_url=os.environ.get('AWS_ENDPOINT_URL') or None,
+                                          config=botocore.config.Config(
+                                              connect_timeout=timeout, read_timeout=timeout,
+                                              retries={'max_attempts': 2})
+                                          ).get_caller_identity()
+            except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+                raise CheckFailed(f"AWS credentials are configured but not valid: {e}")
+        return f"account {identity.get('Account')}, {identity.get('Arn')}"
+
+    def warnings() -> List[str]:
+        if os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION'):
+            return []
+        try:
+            import boto3
+            if boto3.Session(profile_name=os.environ.get('AWS_PROFILE') or None).region_name:
+                return []
+        except Exception:
+            pass
+        return ["No default AWS region configured (set AWS_REGION or run 'aws configure set region <region>')"]
+
+    return Check('aws-credentials', run,
+                 key=lambda: [_binary_stamp('aws')] + [_file_stamp(p) for p in _aws_config_files()]
+                 + [_env_stamp(AWS_CREDENTIAL_ENV)],
+                 warnings=warnings)
+
+
+def _snowflake_config_files() -> List[str]:
+    home = Path(os.environ.get('SNOWFLAKE_HOME', Path.home() / '.snowflake'))
+    return [str(home / 'config.toml'), str(home / 'connections.toml'),
+            str(Path.home() / '.config' / 'snowflake' / 'config.toml')]
+
+
+def snow_connection_check(timeout: int) -> Check:
+    """Check that the Snowflake CLI connection (CLI_CONNECTION_NAME, else the default) can connect."""
+
+    def run() -> str:
+        if not shutil.which('snow'):
+            raise CheckFailed("snow is not installed, cannot test the connection")
+        connection = os.environ.get('CLI_CONNECTION_NAME')
+        args = ['snow', 'connection', 'test'] + (['--connection', connection] if connection else [])
+        _run(args, timeout)
+        return f"connection '{connection or 'default'}' is reachable"
+
+    return Check('snow-connection', run,
+                 key=lambda: [_binary_stamp('snow')] + [_file_stamp(p) for p in _snowflake_config_files()]
+                 + [_env_stamp(['CLI_CONNECTION_NAME', 'SNOWFLAKE_HOME']
+                               + sorted(k for k in os.environ if k.startswith('SNOWFLAKE_CONNECTIONS_')))])
+
+
+def run_init_required_vars(script: Path = RUN_INIT_SCRIPT) -> List[str]:
+    """Read the REQUIRED_VARS array from run-init.sh, so the two lists cannot drift apart."""
+    try:
+        text = script.read_text()
+    except OSError:
+        return []
+    match = re.search(r'REQUIRED_VARS=\((.*?)\)', text, re.S)
+    return re.findall(r'"([A-Z0-9_]+)"', match.group(1)) if match else []
+
+
+def env_check() -> Check:
+    """Check that the environment variables the setup tasks require are set, warning about optional ones."""
+
+    def run() -> str:
+        required = list(dict.fromkeys(AWS_ENV_VARS + SNOWFLAKE_ENV_VARS + run_init_required_vars()))
+        missing = [name for name in required if not os.environ.get(name)]
+        if missing:
+            raise CheckFailed("Missing required environment variables: " + ', '.join(missing)
+                              + " (see .env/iceberg.env.template)")
+        return f"{len(required)} variables set"
+
+    def warnings() -> List[str]:
+        missing = [name for name in OPTIONAL_AWS_ENV_VARS if not os.environ.get(name)]
+        if not missing:
+            return []
+        return ["Optional environment variables not set: " + ', '.join(missing)
+                + " (AWS_REGION falls back to the AWS profile's region, S3_PREFIX to the bucket root)"]
+
+    # Reading the environment is cheaper than the cache, so this check is never cached
+    return Check('required-env', run, warnings=warnings)
+
+
+def build_checks(groups: List[str], timeout: int) -> List[Check]:
+    """Return the checks of the given groups, in a stable order without duplicates."""
+    factories: Dict[str, Callable[[], List[Check]]] = {
+        'aws': lambda: [tool_check('aws', ['--version'], timeout), boto3_check(), aws_credentials_check(timeout)],
+        'snowcli': lambda: [tool_check('snow', ['--version'], timeout), snow_connection_check(timeout)],
+        'conda': lambda: [tool_check('conda', ['--version'], timeout)],
+        'jq': lambda: [tool_check('jq', ['--version'], timeout)],
+        'env': lambda: [env_check()],
+    }
+    checks: Dict[str, Check] = {}
+    for group in groups:
+        for check in factories[group]():
+            checks.setdefault(check.name, check)
+    return list(checks.values())
+
+
+GROUPS = ['aws', 'snowcli', 'conda', 'jq', 'env']
+
+
+class ResultCache:
+    """Successful check results with the key they were computed for, persisted as JSON."""
+
+    def __init__(self, path: Path, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        self.data: Dict = {}
+        if path.exists():
+            try:
+                with open(path, 'r') as f:
+                    self.data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.data = {}
+
+    @staticmethod
+    def digest(parts: List[str]) -> str:
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, name: str, key: str) -> Optional[Dict]:
+        entry = self.data.get(name)
+        if entry and entry.get('key') == key and time.time() - entry.get('checked_at', 0) < self.ttl:
+            return entry
+        return None
+
+    def put(self, name: str, key: str, detail: str) -> None:
+        self.data[name] = {'key': key, 'detail': detail, 'checked_at': time.time()}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def run_checks(checks: List[Check], cache: Optional[ResultCache], workers: int) -> List[Dict]:
+    """
+    Run checks concurrently, answering from the cache where possible.
+
+    Returns:
+        One result per check, in input order:
+        {'name', 'ok', 'detail', 'cached', 'seconds', 'warnings'}
+    """
+
+    def execute(check: Check) -> Dict:
+        started = time.perf_counter()
+        key = cache.digest(check.key()) if cache and check.key else None
+        entry = cache.get(check.name, key) if key else None
+        if entry:
+            result = {'ok': True, 'detail': entry['detail'], 'cached': True}
+        else:
+            try:
+                result = {'ok': True, 'detail': check.run(), 'cached': False}
+            except CheckFailed as e:
+                result = {'ok': False, 'detail': str(e), 'cached': False}
+            except Exception as e:
+                result = {'ok': False, 'detail': f"{type(e).__name__}: {e}", 'cached': False}
+            if result['ok'] and key:
+                cache.put(check.name, key, result['detail'])
+        result.update({
+            'name': check.name,
+            'seconds': round(time.perf_counter() - started, 3),
+            'warnings': check.warnings() if result['ok'] and check.warnings else [],
+        })
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(checks) or 1))) as executor:
+        results = list(executor.map(execute, checks))
+    if cache:
+        cache.save()
+    return results
+
+
+def print_report(results: List[Dict], seconds: float) -> Tuple[int, int]:
+    """Print one line per check, then every failure; returns (passed, failed)."""
+    print(f"{'='*60}")
+    print("Preflight checks")
+    print(f"{'='*60}")
+    for result in results:
+        mark = '✓' if result['ok'] else '✗'
+        source = 'cached' if result['cached'] else f"{result['seconds']:.2f}s"
+        print(f"  {mark} {result['name']:<20} {result['detail']} ({source})")
+        for warning in result['warnings']:
+            print(f"  ⚠️  {warning}")
+
+    failed = [r for r in results if not r['ok']]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed in {seconds:.2f}s")
+    if failed:
+        print(f"\n✗ {len(failed)} check(s) failed:")
+        for result in failed:
+            print(f"  - {result['name']}: {result['detail']}")
+    return len(results) - len(failed), len(failed)
+
+
+def main():
+    """
+    Main entry point for command-line execution.
+
+    Usage:
+        python preflight.py [GROUP ...] [--ttl SECONDS] [--no-cache] [--cache-file PATH]
+            [--timeout SECONDS] [--workers N]
+    """
+    parser = argparse.ArgumentParser(
+        description="Validate tools, credentials, connections and environment variables concurrently",
+        epilog=(
+            "Example:\n"
+            "  python preflight.py aws snowcli env\n"
+            "  python preflight.py snowcli --no-cache\n"
+            "  python preflight.py conda --ttl 86400"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("groups", nargs='*', metavar="GROUP",
+                        help=f"Check groups to run: {', '.join(GROUPS)} (default: aws snowcli env)")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL_SECONDS,
+                        help=f"Seconds a successful result stays valid (default: {DEFAULT_TTL_SECONDS})")
+    parser.add_argument("--no-cache", action="store_true", help="Run every check, ignoring cached results")
+    parser.add_argument("--cache-file", type=Path, default=ROOT_DIR / DEFAULT_CACHE_FILE,
+                        help=f"Cached results (default: {DEFAULT_CACHE_FILE})")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT_SECONDS,
+                        help=f"Timeout of each check in seconds (default: {DEFAULT_TIMEOUT_SECONDS})")
+    parser.add_argument("--workers", "-w", type=int, default=8, help="Checks running at once (default: 8)")
+    args = parser.parse_args()
+
+    groups = args.groups or ['aws', 'snowcli', 'env']
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"unknown check group(s): {', '.join(unknown)} (choose from {', '.join(GROUPS)})")
+    started = time.perf_counter()
+    results = run_checks(
+        build_checks(groups, args.timeout),
+        None if args.no_cache else ResultCache(args.cache_file, args.ttl),
+        args.workers
+    )
+    _, failed = print_report(results, time.perf_counter() - started)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()